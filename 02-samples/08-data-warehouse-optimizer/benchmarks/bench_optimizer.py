@@ -0,0 +1,74 @@
+"""
+Benchmark: query latency before and after the optimizer's suggested indexes
+
+Generates (or reuses) a seeded dataset with scripts/generate_data.py, runs the
+benchmark queries in utils/benchmark.py through the workload optimizer and
+prints each query's measured latency.
+
+    before: the generated tables with only their primary keys
+    after:  the same tables with the indexes the optimizer recommends,
+            built and ANALYZEd in its scratch copy
+
+Record a run with --record and check a later run against it with --compare;
+the script exits with status 1 if any query regressed.
+
+Usage (from the data-warehouse-optimizer directory):
+    python benchmarks/bench_optimizer.py --rows 10000000 --db benchmark.db --record baseline.json
+    python benchmarks/bench_optimizer.py --db benchmark.db --reuse --compare baseline.json
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.generate_data import generate
+from utils.benchmark import compare, load, run_benchmark, save
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--db", default="benchmark.db")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="rows in sales_data and fact_sales")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reuse", action="store_true", help="use the existing database instead of generating it")
+    parser.add_argument("--max-indexes", type=int, default=8)
+    parser.add_argument("--record", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to check for regressions")
+    args = parser.parse_args()
+
+    if not args.reuse or not os.path.exists(args.db):
+        started = time.perf_counter()
+        inserted = generate(args.db, args.rows, args.seed)
+        print(f"generated {sum(inserted.values()):,} rows in {time.perf_counter() - started:.1f}s")
+
+    result = run_benchmark(args.db, max_indexes=args.max_indexes)
+    print(f"{'query':26} {'before ms':>10} {'after ms':>10} {'speedup':>9}  indexes used")
+    for name, timing in result["queries"].items():
+        if "error" in timing:
+            print(f"{name:26} error: {timing['error']}")
+            continue
+        print(f"{name:26} {timing['before_ms']:>10.2f} {timing['after_ms']:>10.2f} "
+              f"{timing['speedup'] or 0:>8.1f}x  {', '.join(timing['indexes_used']) or '-'}")
+    workload = result["workload"]
+    print(f"{'all queries':26} {workload['before_ms']:>10.2f} {workload['after_ms']:>10.2f} "
+          f"{workload['speedup'] or 0:>8.1f}x")
+    print("recommended:")
+    for index in result["recommended_indexes"]:
+        print(f"  {index}")
+
+    if args.record:
+        save(result, args.record)
+    if args.compare:
+        regressions = compare(result, load(args.compare))
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("no regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,9 @@ from strands import Agent
 from strands_tools import calculator
 from strands.models import BedrockModel
 from typing import Dict, Any
-from utils.prompts import analyzer_prompt, rewriter_prompt, validator_prompt
+from utils.optimizer import DB_PATH, WORKLOAD_MAX_INDEXES, get_optimizer, read_workload
+from utils.prompts import explainer_prompt
+from scripts.generate_data import DEFAULT_ROWS, generate
 from utils.tools import (
     get_query_execution_plan,
     suggest_optimizations,
@@ -23,7 +25,6 @@ import click
 import json
 import os
 import random
-import re
 import sqlite3
 import uuid
 
@@ -62,163 +63,79 @@ model = BedrockModel(
     max_tokens=2000,
 )
 
-# Define agents
-analyzer_agent = Agent(
+# The local optimizer engine does the analysis; the agent only explains its report
+explainer_agent = Agent(
     model=model,
-    system_prompt=analyzer_prompt,
-    tools=[get_query_execution_plan, calculator],
-)
-rewriter_agent = Agent(
-    model=model,
-    system_prompt=rewriter_prompt,
-    tools=[suggest_optimizations, calculator],
-)
-validator_agent = Agent(
-    model=model, system_prompt=validator_prompt, tools=[validate_query_cost, calculator]
+    system_prompt=explainer_prompt,
+    tools=[
+        get_query_execution_plan,
+        suggest_optimizations,
+        validate_query_cost,
+        calculator,
+    ],
 )
 
 
-def optimize_query(query: str) -> Dict[str, Any]:
+def _agent_text(result: Any) -> str:
+    """Final text of an agent result."""
+    if isinstance(result, str):
+        return result
+    if hasattr(result, "text"):
+        return result.text
+    if hasattr(result, "messages") and result.messages:
+        return str(result.messages[-1].get("content", ""))
+    return str(result)
+
+
+def optimize_query(query: str, explain: bool = True) -> Dict[str, Any]:
     """
-    Orchestrates the multi-agent query optimization workflow.
+    Optimizes a query with the local optimizer engine and, optionally, asks the
+    explainer agent to describe the findings in plain language.
 
     Args:
         query (str): The SQL query to optimize.
+        explain (bool): Whether to add a natural-language explanation.
 
     Returns:
-        Dict: Final optimization report with analysis, suggestions, and validation.
+        Dict: Final optimization report with analysis, measured index candidates,
+        recommendation and explanation.
     """
     with tracer.start_as_current_span("optimize_query"):
         try:
-            analysis_result = analyzer_agent(f"Analyze query: {query}")
-        except Exception as e:
-            print(f"Bedrock error in analyzer_agent: {str(e)}")
-            analysis = {
+            optimizer = get_optimizer()
+            with optimizer.lock:
+                result = optimizer.optimize(query)
+        except (sqlite3.Error, ValueError) as e:
+            return {
                 "query_id": str(uuid.uuid4()),
+                "original_query": query,
                 "status": "error",
                 "message": str(e),
             }
-        else:
-            try:
-                analysis_text = (
-                    analysis_result
-                    if isinstance(analysis_result, str)
-                    else (
-                        analysis_result.text
-                        if hasattr(analysis_result, "text")
-                        else (
-                            analysis_result.messages[-1].get("content", "{}")
-                            if hasattr(analysis_result, "messages")
-                            and analysis_result.messages
-                            else "{}"
-                        )
-                    )
-                )
-                try:
-                    analysis = json.loads(analysis_text)
-                except json.JSONDecodeError:
-                    query_id_match = re.search(r"Query ID: ([\w-]+)", analysis_text)
-                    query_id = (
-                        query_id_match.group(1) if query_id_match else str(uuid.uuid4())
-                    )
-                    bottlenecks = (
-                        ["Full table scan detected"]
-                        if "full table scan" in analysis_text.lower()
-                        else []
-                    )
-                    analysis = {
-                        "query_id": query_id,
-                        "status": "success",
-                        "summary": analysis_text,
-                        "bottlenecks": bottlenecks,
-                    }
-            except Exception as e:
-                print(f"Error parsing analysis result: {str(e)}")
-                analysis = {
-                    "query_id": str(uuid.uuid4()),
-                    "status": "error",
-                    "message": str(e),
-                }
-
-        rewriter_input = f"Query: {query}\nExecution Plan: {json.dumps(analysis)}"
-        try:
-            rewrite_result = rewriter_agent(rewriter_input)
-        except Exception as e:
-            print(f"Bedrock error in rewriter_agent: {str(e)}")
-            suggestions = {"status": "error", "message": str(e)}
-        else:
-            try:
-                suggestions_text = (
-                    rewrite_result
-                    if isinstance(rewrite_result, str)
-                    else (
-                        rewrite_result.text
-                        if hasattr(rewrite_result, "text")
-                        else (
-                            rewrite_result.messages[-1].get("content", "{}")
-                            if hasattr(rewrite_result, "messages")
-                            and rewrite_result.messages
-                            else "{}"
-                        )
-                    )
-                )
-                suggestions = json.loads(suggestions_text)
-            except json.JSONDecodeError:
-                suggestions = {
-                    "status": "error",
-                    "message": "Invalid JSON from rewriter",
-                }
-            except Exception as e:
-                print(f"Error parsing rewrite result: {str(e)}")
-                suggestions = {"status": "error", "message": str(e)}
-
-        rewritten_query = next(
-            (
-                s["suggestion"]
-                for s in suggestions.get("suggestions", [])
-                if s["type"] == "query_rewrite"
-            ),
-            query,
-        )
-        try:
-            validation_result = validator_agent(f"Validate query: {rewritten_query}")
-        except Exception as e:
-            print(f"Bedrock error in validator_agent: {str(e)}")
-            validation = {"status": "error", "message": str(e)}
-        else:
-            try:
-                validation_text = (
-                    validation_result
-                    if isinstance(validation_result, str)
-                    else (
-                        validation_result.text
-                        if hasattr(validation_result, "text")
-                        else (
-                            validation_result.messages[-1].get("content", "{}")
-                            if hasattr(validation_result, "messages")
-                            and validation_result.messages
-                            else "{}"
-                        )
-                    )
-                )
-                validation = json.loads(validation_text)
-            except json.JSONDecodeError:
-                validation = {
-                    "status": "error",
-                    "message": "Invalid JSON from validator",
-                }
-            except Exception as e:
-                print(f"Error parsing validation result: {str(e)}")
-                validation = {"status": "error", "message": str(e)}
 
         report = {
-            "query_id": analysis.get("query_id", str(uuid.uuid4())),
+            "query_id": result["query_id"],
             "original_query": query,
-            "analysis": analysis,
-            "suggestions": suggestions,
-            "validation": validation,
+            "analysis": {
+                "plan": result["plan"],
+                "bottlenecks": result["bottlenecks"],
+                "estimated_cost": result["estimated_cost"],
+                "baseline_ms": result["baseline_ms"],
+            },
+            "candidates": result["candidates"],
+            "recommendation": result["recommendation"],
         }
 
+        if explain:
+            try:
+                explanation = explainer_agent(
+                    f"Explain this optimization report:\n{json.dumps(report)}"
+                )
+                report["explanation"] = _agent_text(explanation)
+            except Exception as e:
+                print(f"Bedrock error in explainer_agent: {str(e)}")
+                report["explanation"] = None
+
         span = trace.get_current_span()
         span.set_attribute("query_optimization_report", json.dumps(report))
 
@@ -234,7 +151,7 @@ def cli():
 @cli.command()
 def list_tables():
     """List all tables in the database."""
-    conn = sqlite3.connect("query_optimizer.db")
+    conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
     tables = [row[0] for row in cursor.fetchall()]
@@ -244,16 +161,69 @@ def list_tables():
 
 @cli.command()
 @click.argument("query")
-def explain_query(query):
+@click.option(
+    "--explain/--no-explain",
+    default=True,
+    help="Add a natural-language explanation from the agent.",
+)
+def explain_query(query, explain):
     """Explain the given SQL query and suggest optimizations."""
-    result = optimize_query(query)
+    result = optimize_query(query, explain=explain)
     print(json.dumps(result, indent=2))
 
 
+@cli.command()
+@click.argument("workload", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--max-indexes",
+    default=WORKLOAD_MAX_INDEXES,
+    show_default=True,
+    help="Maximum number of indexes to recommend.",
+)
+@click.option(
+    "--replay/--no-replay",
+    default=False,
+    help="Also run every statement before and after for measured workload totals.",
+)
+@click.option("--output", type=click.Path(dir_okay=False), help="Write the report to a file.")
+def optimize_workload(workload, max_indexes, replay, output):
+    """Recommend indexes for a workload file (.sql script, .log/.txt one statement per line, or .jsonl)."""
+    with tracer.start_as_current_span("optimize_workload"):
+        try:
+            optimizer = get_optimizer()
+            with optimizer.lock:
+                result = optimizer.optimize_workload(
+                    read_workload(workload), max_indexes=max_indexes, replay=replay
+                )
+        except (sqlite3.Error, ValueError) as e:
+            result = {"status": "error", "message": str(e)}
+    report = json.dumps(result, indent=2)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(report)
+        print(json.dumps({"status": result["status"], "output": output}, indent=2))
+    else:
+        print(report)
+
+
+@cli.command()
+@click.option(
+    "--rows",
+    default=DEFAULT_ROWS,
+    show_default=True,
+    help="Rows in sales_data and fact_sales; the other tables scale with it.",
+)
+@click.option("--seed", default=42, show_default=True, help="Random seed.")
+def generate_data(rows, seed):
+    """Replace sales_data, bank and the star-schema tables with a large seeded dataset."""
+    inserted = generate(DB_PATH, rows=rows, seed=seed)
+    print(json.dumps({"status": "success", "rows": inserted}, indent=2))
+
+
 @cli.command()
 def create_bank_table():
     """Create a bank table with id and balance columns."""
-    conn = sqlite3.connect("query_optimizer.db")
+    conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     cursor.execute(
         """
@@ -271,7 +241,7 @@ def create_bank_table():
 @cli.command()
 def fill_bank_table():
     """Fill the bank table with 100 rows of random data, summing to 1000."""
-    conn = sqlite3.connect("query_optimizer.db")
+    conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='bank';")
     if not cursor.fetchone():
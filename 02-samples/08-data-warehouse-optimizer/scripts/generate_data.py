@@ -0,0 +1,297 @@
+"""
+Generate a large, seeded benchmark dataset in the SQLite database.
+
+Tables (existing copies are replaced):
+- sales_data: orders with the init_db schema; customers follow a Zipf
+  distribution, dates grow over three years with December and weekend peaks,
+  and amounts are log-normal
+- bank: account balances, log-normal with a long tail
+- dim_date, dim_customer, dim_product, dim_store and fact_sales: a star schema
+  with Zipf-distributed customers and products and a few large stores
+
+Rows are generated in batches and bulk inserted with executemany inside a
+single transaction, with journaling and syncing turned off for the load.
+The same seed always produces the same data.
+
+Usage:
+    uv run scripts/generate_data.py --rows 10000000
+"""
+
+import argparse
+import datetime
+import itertools
+import os
+import random
+import sqlite3
+import time
+from typing import Dict, Iterator, List, Tuple
+
+DEFAULT_ROWS = 10_000_000
+BATCH_SIZE = 50_000
+START_DATE = datetime.date(2023, 1, 1)
+DAYS = 3 * 365
+
+SEGMENTS = ["consumer", "small_business", "enterprise", "government"]
+SEGMENT_WEIGHTS = [70, 20, 8, 2]
+REGIONS = ["north", "south", "east", "west", "central"]
+REGION_WEIGHTS = [30, 25, 20, 15, 10]
+CATEGORIES = ["Electronics", "Grocery", "Clothing", "Home", "Toys", "Books", "Sports", "Beauty"]
+CATEGORY_WEIGHTS = [10, 30, 15, 12, 8, 8, 9, 8]
+STORE_FORMATS = ["online", "flagship", "mall", "outlet"]
+
+SCHEMA = """
+CREATE TABLE sales_data (
+    order_id INTEGER PRIMARY KEY,
+    customer_id INTEGER,
+    order_date TEXT,
+    amount REAL
+);
+CREATE TABLE bank (
+    id INTEGER PRIMARY KEY,
+    balance REAL NOT NULL
+);
+CREATE TABLE dim_date (
+    date_key INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    quarter INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    day_of_week INTEGER NOT NULL
+);
+CREATE TABLE dim_customer (
+    customer_key INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    segment TEXT NOT NULL,
+    region TEXT NOT NULL,
+    signup_date TEXT NOT NULL
+);
+CREATE TABLE dim_product (
+    product_key INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    brand TEXT NOT NULL,
+    unit_price REAL NOT NULL
+);
+CREATE TABLE dim_store (
+    store_key INTEGER PRIMARY KEY,
+    region TEXT NOT NULL,
+    city TEXT NOT NULL,
+    format TEXT NOT NULL
+);
+CREATE TABLE fact_sales (
+    sale_id INTEGER PRIMARY KEY,
+    date_key INTEGER NOT NULL,
+    customer_key INTEGER NOT NULL,
+    product_key INTEGER NOT NULL,
+    store_key INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    amount REAL NOT NULL
+);
+"""
+
+TABLES = ["sales_data", "bank", "dim_date", "dim_customer", "dim_product", "dim_store", "fact_sales"]
+
+
+def zipf_weights(n: int, s: float = 1.1) -> List[float]:
+    """Cumulative Zipf weights for keys 1..n (key 1 is the most frequent)."""
+    return list(itertools.accumulate(1.0 / rank ** s for rank in range(1, n + 1)))
+
+
+def date_weights() -> List[float]:
+    """Cumulative daily weights: 40% yearly growth, a December peak and busier weekends."""
+    weights = []
+    for offset in range(DAYS):
+        day = START_DATE + datetime.timedelta(days=offset)
+        weight = 1.4 ** (offset / 365)
+        if day.month == 12:
+            weight *= 1.8
+        if day.weekday() >= 5:
+            weight *= 1.3
+        weights.append(weight)
+    return list(itertools.accumulate(weights))
+
+
+def table_sizes(rows: int) -> Dict[str, int]:
+    """Row counts per table for a given number of order and fact rows."""
+    return {
+        "sales_data": rows,
+        "fact_sales": rows,
+        "bank": max(100, rows // 10),
+        "dim_customer": max(100, rows // 100),
+        "dim_product": max(50, min(50_000, rows // 1000)),
+        "dim_store": max(10, min(500, rows // 100_000)),
+        "dim_date": DAYS,
+    }
+
+
+def _batches(rows: Iterator[Tuple], size: int) -> Iterator[List[Tuple]]:
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _dates() -> List[str]:
+    return [(START_DATE + datetime.timedelta(days=offset)).isoformat() for offset in range(DAYS)]
+
+
+def sales_rows(rng: random.Random, count: int, customers: int, batch_size: int) -> Iterator[Tuple]:
+    dates, day_weights, customer_weights = _dates(), date_weights(), zipf_weights(customers)
+    order_id = 0
+    while order_id < count:
+        n = min(batch_size, count - order_id)
+        customer_ids = rng.choices(range(1, customers + 1), cum_weights=customer_weights, k=n)
+        order_dates = rng.choices(dates, cum_weights=day_weights, k=n)
+        for customer_id, order_date in zip(customer_ids, order_dates):
+            order_id += 1
+            yield order_id, customer_id, order_date, round(rng.lognormvariate(3.5, 0.9), 2)
+
+
+def bank_rows(rng: random.Random, count: int) -> Iterator[Tuple]:
+    for account in range(1, count + 1):
+        yield account, round(rng.lognormvariate(7.0, 1.5), 2)
+
+
+def date_rows() -> Iterator[Tuple]:
+    for offset in range(DAYS):
+        day = START_DATE + datetime.timedelta(days=offset)
+        yield offset + 1, day.isoformat(), day.year, (day.month - 1) // 3 + 1, day.month, day.weekday()
+
+
+def customer_rows(rng: random.Random, count: int) -> Iterator[Tuple]:
+    dates = _dates()
+    for key in range(1, count + 1):
+        yield (
+            key,
+            f"Customer {key}",
+            rng.choices(SEGMENTS, weights=SEGMENT_WEIGHTS)[0],
+            rng.choices(REGIONS, weights=REGION_WEIGHTS)[0],
+            rng.choice(dates),
+        )
+
+
+def product_rows(rng: random.Random, count: int) -> Iterator[Tuple]:
+    for key in range(1, count + 1):
+        category = rng.choices(CATEGORIES, weights=CATEGORY_WEIGHTS)[0]
+        yield (
+            key,
+            f"{category} item {key}",
+            category,
+            f"Brand {rng.randint(1, max(1, count // 20))}",
+            round(rng.lognormvariate(3.0, 1.0), 2),
+        )
+
+
+def store_rows(rng: random.Random, count: int) -> Iterator[Tuple]:
+    for key in range(1, count + 1):
+        region = rng.choices(REGIONS, weights=REGION_WEIGHTS)[0]
+        yield key, region, f"{region.title()} City {rng.randint(1, 20)}", rng.choice(STORE_FORMATS)
+
+
+def fact_rows(rng: random.Random, count: int, sizes: Dict[str, int], batch_size: int) -> Iterator[Tuple]:
+    day_weights = date_weights()
+    customer_weights = zipf_weights(sizes["dim_customer"])
+    product_weights = zipf_weights(sizes["dim_product"], s=0.9)
+    # The online store and a few flagships take most of the sales
+    store_weights = zipf_weights(sizes["dim_store"], s=1.3)
+    sale_id = 0
+    while sale_id < count:
+        n = min(batch_size, count - sale_id)
+        columns = zip(
+            rng.choices(range(1, DAYS + 1), cum_weights=day_weights, k=n),
+            rng.choices(range(1, sizes["dim_customer"] + 1), cum_weights=customer_weights, k=n),
+            rng.choices(range(1, sizes["dim_product"] + 1), cum_weights=product_weights, k=n),
+            rng.choices(range(1, sizes["dim_store"] + 1), cum_weights=store_weights, k=n),
+        )
+        for date_key, customer_key, product_key, store_key in columns:
+            sale_id += 1
+            quantity = min(50, int(rng.paretovariate(2.0)))
+            yield sale_id, date_key, customer_key, product_key, store_key, quantity, round(
+                quantity * rng.lognormvariate(3.0, 0.8), 2
+            )
+
+
+def _insert(conn: sqlite3.Connection, table: str, rows: Iterator[Tuple], width: int, batch_size: int) -> int:
+    sql = f"INSERT INTO {table} VALUES ({', '.join('?' * width)})"
+    inserted = 0
+    for batch in _batches(rows, batch_size):
+        conn.executemany(sql, batch)
+        inserted += len(batch)
+    return inserted
+
+
+def generate(db_path: str = "query_optimizer.db", rows: int = DEFAULT_ROWS, seed: int = 42,
+             batch_size: int = BATCH_SIZE, analyze: bool = True) -> Dict[str, int]:
+    """
+    Replace the benchmark tables with a seeded dataset.
+
+    Args:
+        db_path: SQLite database to write
+        rows: Rows in sales_data and in fact_sales (other tables scale with it)
+        seed: Random seed; the same seed gives the same data
+        batch_size: Rows per executemany call
+        analyze: Run ANALYZE afterwards so sqlite_stat1 reflects the new data
+
+    Returns:
+        Rows inserted per table
+    """
+    sizes = table_sizes(rows)
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA cache_size=-262144")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA locking_mode=EXCLUSIVE")
+        conn.execute("BEGIN")
+        for table in TABLES:
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+        for statement in SCHEMA.split(";"):
+            if statement.strip():
+                conn.execute(statement)
+
+        # One generator per table, each seeded separately so tables do not depend on each other's sizes
+        generators = {
+            "dim_date": (date_rows(), 6),
+            "dim_customer": (customer_rows(random.Random(f"{seed}-customer"), sizes["dim_customer"]), 5),
+            "dim_product": (product_rows(random.Random(f"{seed}-product"), sizes["dim_product"]), 5),
+            "dim_store": (store_rows(random.Random(f"{seed}-store"), sizes["dim_store"]), 4),
+            "bank": (bank_rows(random.Random(f"{seed}-bank"), sizes["bank"]), 2),
+            "sales_data": (
+                sales_rows(random.Random(f"{seed}-sales"), rows, sizes["dim_customer"], batch_size), 4
+            ),
+            "fact_sales": (fact_rows(random.Random(f"{seed}-fact"), rows, sizes, batch_size), 7),
+        }
+        inserted = {
+            table: _insert(conn, table, generator, width, batch_size)
+            for table, (generator, width) in generators.items()
+        }
+        conn.execute("COMMIT")
+        if analyze:
+            conn.execute("PRAGMA analysis_limit=1000")
+            conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    return inserted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--db", default=os.environ.get("QUERY_OPTIMIZER_DB", "query_optimizer.db"))
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="rows in sales_data and fact_sales")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    inserted = generate(args.db, args.rows, args.seed, args.batch_size)
+    seconds = time.perf_counter() - started
+    total = sum(inserted.values())
+    for table, count in inserted.items():
+        print(f"{table:14} {count:>12,} rows")
+    print(f"{total:,} rows in {seconds:.1f}s ({total / seconds:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Regression tests for the benchmark dataset and the optimizer's suggestions on it.
+"""
+
+import copy
+import os
+import sqlite3
+import statistics
+import tempfile
+import unittest
+from scripts.generate_data import generate
+from utils.benchmark import compare, run_benchmark
+from utils.optimizer import MIN_SPEEDUP
+
+
+class TestGenerateData(unittest.TestCase):
+    def test_seeded_and_skewed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            checksums = []
+            for name in ("a.db", "b.db"):
+                path = os.path.join(directory, name)
+                inserted = generate(path, rows=20000, seed=3)
+                with sqlite3.connect(path) as conn:
+                    checksums.append(conn.execute(
+                        "SELECT SUM(amount), SUM(customer_id), MAX(order_date) FROM sales_data"
+                    ).fetchone())
+                    counts = [row[0] for row in conn.execute(
+                        "SELECT COUNT(*) FROM fact_sales GROUP BY customer_key ORDER BY 1 DESC"
+                    )]
+        self.assertEqual(inserted["sales_data"], 20000)
+        self.assertEqual(inserted["fact_sales"], 20000)
+        self.assertEqual(checksums[0], checksums[1])
+        # Zipf customers: the top customer buys far more than the typical one
+        self.assertGreater(counts[0], 20 * statistics.median(counts))
+
+
+class TestBenchmarkRegressions(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.db_path = os.path.join(cls.directory.name, "benchmark.db")
+        generate(cls.db_path, rows=60000, seed=42)
+        cls.result = run_benchmark(cls.db_path, max_indexes=8, timing_runs=3)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_point_lookups_are_indexed(self):
+        for name in ("customer_orders", "customer_recent_orders", "customer_lifetime_value"):
+            timing = self.result["queries"][name]
+            self.assertTrue(timing["indexes_used"], name)
+            self.assertGreater(timing["speedup"], MIN_SPEEDUP, name)
+
+    def test_suggestions_do_not_slow_queries_down(self):
+        for name, timing in self.result["queries"].items():
+            self.assertNotIn("error", timing, name)
+            self.assertLessEqual(timing["after_ms"], timing["before_ms"] * 1.5 + 1, name)
+        self.assertGreater(self.result["workload"]["speedup"], MIN_SPEEDUP)
+
+    def test_compare_flags_regressions(self):
+        self.assertEqual(compare(self.result, self.result), [])
+        regressed = copy.deepcopy(self.result)
+        regressed["queries"]["customer_orders"]["after_ms"] += 100
+        regressed["queries"]["customer_lifetime_value"]["indexes_used"] = []
+        regressions = compare(regressed, self.result)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("customer_orders"))
+
+
+if __name__ == "__main__":
+    unittest.main()
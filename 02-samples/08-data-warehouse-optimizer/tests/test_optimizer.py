@@ -0,0 +1,180 @@
+"""
+Unit tests for the local query optimizer engine.
+"""
+
+import os
+import random
+import sqlite3
+import tempfile
+import unittest
+from utils.optimizer import (
+    QueryOptimizer,
+    TableStats,
+    estimate_plan_cost,
+    find_bottlenecks,
+    fingerprint,
+    is_read_only,
+    parse_plan,
+    parse_query,
+    read_workload,
+)
+
+
+class TestPlanParsing(unittest.TestCase):
+    def test_parse_plan_tree(self):
+        rows = [
+            (2, 0, 0, "SCAN s"),
+            (7, 0, 0, "CORRELATED SCALAR SUBQUERY 1"),
+            (13, 7, 0, "SEARCH s2 USING INDEX idx_customer (customer_id=? AND order_date>?)"),
+            (20, 0, 0, "USE TEMP B-TREE FOR ORDER BY"),
+        ]
+        plan = parse_plan(rows)
+        self.assertEqual([node.operation for node in plan], ["SCAN", "CORRELATED SUBQUERY", "TEMP B-TREE"])
+        search = plan[1].children[0]
+        self.assertEqual(search.table, "s2")
+        self.assertEqual(search.index, "idx_customer")
+        self.assertEqual(search.constraints, [("customer_id", "="), ("order_date", ">")])
+        self.assertEqual(
+            find_bottlenecks(plan),
+            [
+                "Full table scan detected",
+                "Correlated subquery executed once per outer row",
+                "Use of temporary table detected",
+            ],
+        )
+
+    def test_cost_prefers_index_search(self):
+        stats = TableStats(None, default_rows=100000)
+        scan = estimate_plan_cost(parse_plan([(2, 0, 0, "SCAN sales_data")]), stats)
+        search = estimate_plan_cost(
+            parse_plan([(2, 0, 0, "SEARCH sales_data USING INDEX idx (customer_id=?)")]), stats
+        )
+        self.assertLess(search, scan)
+
+
+class TestQueryParsing(unittest.TestCase):
+    def test_predicates_and_ordering(self):
+        shape = parse_query(
+            "SELECT c.region, SUM(s.amount) FROM sales_data s JOIN customers AS c "
+            "ON c.customer_id = s.customer_id WHERE s.order_date >= '2025-01-01' "
+            "AND c.segment = 'retail' AND date(s.order_date) > '2025' "
+            "GROUP BY c.region ORDER BY c.region"
+        )
+        self.assertEqual(shape.aliases["s"], "sales_data")
+        self.assertEqual(shape.aliases["c"], "customers")
+        self.assertIn((("c", "customer_id"), ("s", "customer_id")), shape.joins)
+        self.assertEqual(shape.ranges, [("s", "order_date")])
+        self.assertEqual(shape.equality, [("c", "segment")])
+        self.assertEqual(shape.group_by, [("c", "region")])
+        self.assertFalse(shape.select_star)
+
+
+class TestWorkload(unittest.TestCase):
+    def test_fingerprint_normalizes_literals(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM sales_data WHERE customer_id = 7 AND region IN ('a', 'b');"),
+            fingerprint("select *  from sales_data\nwhere customer_id=12 and region in ('c')"),
+        )
+        self.assertNotEqual(
+            fingerprint("SELECT * FROM sales_data WHERE customer_id = 7"),
+            fingerprint("SELECT * FROM sales_data WHERE order_id = 7"),
+        )
+
+    def test_is_read_only(self):
+        self.assertTrue(is_read_only("SELECT replace(name, 'a', 'b') FROM t WHERE note = 'delete me';"))
+        self.assertTrue(is_read_only("WITH recent AS (SELECT * FROM t) SELECT * FROM recent"))
+        self.assertFalse(is_read_only("DELETE FROM t"))
+        self.assertFalse(is_read_only("INSERT INTO t SELECT * FROM t"))
+        self.assertFalse(is_read_only("WITH old AS (SELECT id FROM t) DELETE FROM t WHERE id IN old"))
+        self.assertFalse(is_read_only("SELECT 1; DROP TABLE t"))
+
+    def test_read_workload_formats(self):
+        with tempfile.TemporaryDirectory() as directory:
+            script = os.path.join(directory, "workload.sql")
+            with open(script, "w") as f:
+                f.write("-- nightly report\nSELECT 1;\nSELECT ';'\n  FROM sales_data;\n")
+            log = os.path.join(directory, "workload.jsonl")
+            with open(log, "w") as f:
+                f.write('{"query": "SELECT 1"}\n\n{"sql": "SELECT 2"}\n')
+            self.assertEqual(list(read_workload(script)), ["SELECT 1", "SELECT ';'\n  FROM sales_data"])
+            self.assertEqual(list(read_workload(log)), ["SELECT 1", "SELECT 2"])
+
+
+class TestQueryOptimizer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.db_path = os.path.join(cls.directory.name, "optimizer.db")
+        rng = random.Random(7)
+        conn = sqlite3.connect(cls.db_path)
+        conn.execute(
+            "CREATE TABLE sales_data (order_id INTEGER PRIMARY KEY, customer_id INTEGER, "
+            "order_date TEXT, amount REAL)"
+        )
+        conn.executemany(
+            "INSERT INTO sales_data VALUES (?, ?, ?, ?)",
+            [
+                (i, rng.randint(1, 2000), f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}", rng.random() * 100)
+                for i in range(1, 50001)
+            ],
+        )
+        conn.commit()
+        conn.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_candidates_skip_rowid_and_lead_with_equality(self):
+        query = "SELECT * FROM sales_data WHERE customer_id = 7 AND order_date > '2025-06-01' AND order_id > 10"
+        with QueryOptimizer(self.db_path) as optimizer:
+            columns = [candidate.columns for candidate in optimizer.candidate_indexes(query)]
+        self.assertIn(("customer_id", "order_date"), columns)
+        self.assertTrue(all("order_id" not in c for c in columns))
+
+    def test_optimize_recommends_measured_index(self):
+        query = "SELECT * FROM sales_data WHERE customer_id = 7 AND order_date > '2025-06-01'"
+        with QueryOptimizer(self.db_path, timing_runs=1) as optimizer:
+            report = optimizer.optimize(query)
+            scratch = optimizer._scratch_dir
+        self.assertIn("Full table scan detected", report["bottlenecks"])
+        recommendation = report["recommendation"]
+        self.assertIsNotNone(recommendation)
+        self.assertEqual(recommendation["table"], "sales_data")
+        self.assertEqual(recommendation["columns"][0], "customer_id")
+        self.assertTrue(recommendation["used"])
+        self.assertGreater(recommendation["speedup"], 1.2)
+        self.assertLess(recommendation["estimated_cost"], recommendation["estimated_cost_before"])
+        # Candidates are tried in the scratch copy only
+        with sqlite3.connect(self.db_path) as conn:
+            self.assertEqual(conn.execute("PRAGMA index_list(sales_data)").fetchall(), [])
+        self.assertFalse(os.path.exists(scratch))
+
+    def test_optimize_rejects_writes(self):
+        with QueryOptimizer(self.db_path, timing_runs=1) as optimizer:
+            with self.assertRaises(ValueError):
+                optimizer.optimize("DELETE FROM sales_data WHERE customer_id = 7")
+            with self.assertRaises(ValueError):
+                optimizer.time_query("UPDATE sales_data SET amount = 0")
+        with sqlite3.connect(self.db_path) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM sales_data WHERE amount = 0").fetchone()[0], 0)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM sales_data").fetchone()[0], 50000)
+
+    def test_optimize_workload_picks_shared_index(self):
+        statements = [f"SELECT * FROM sales_data WHERE customer_id = {i}" for i in range(1, 40)]
+        statements += [f"SELECT amount FROM sales_data WHERE order_id = {i}" for i in range(1, 20)]
+        statements.append("UPDATE sales_data SET amount = 0")
+        with QueryOptimizer(self.db_path, timing_runs=1) as optimizer:
+            report = optimizer.optimize_workload(statements)
+        self.assertEqual(report["statements"], 59)
+        self.assertEqual(report["skipped"], 1)
+        self.assertEqual(report["unique_shapes"], 2)
+        recommended = report["recommended_indexes"]
+        self.assertEqual(len(recommended), 1)
+        self.assertIn('"idx_sales_data_customer_id"', recommended[0]["index"])
+        self.assertEqual(recommended[0]["statements_improved"], 39)
+        self.assertLess(report["workload"]["after_ms"], report["workload"]["before_ms"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+"""
+Benchmark harness: query latency before and after the optimizer's suggestions.
+
+Runs a fixed set of queries over the tables written by scripts/generate_data.py
+through the workload optimizer, records each query's measured latency without
+and with the recommended indexes, and compares a run against a recorded
+baseline so that regressions in the optimizer's suggestions show up.
+"""
+
+import json
+import platform
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from utils.optimizer import QueryOptimizer, fingerprint, parse_query
+
+BENCHMARK_QUERIES: Dict[str, str] = {
+    "customer_orders": "SELECT * FROM sales_data WHERE customer_id = 1234",
+    "recent_revenue": "SELECT SUM(amount) FROM sales_data WHERE order_date >= '2025-12-24'",
+    "customer_recent_orders": (
+        "SELECT order_id, amount FROM sales_data WHERE customer_id = 57 "
+        "AND order_date >= '2025-06-01' ORDER BY order_date"
+    ),
+    "top_balances": "SELECT id, balance FROM bank WHERE balance > 100000 ORDER BY balance DESC",
+    "category_sales_by_month": (
+        "SELECT d.year, d.month, SUM(f.amount) FROM fact_sales f "
+        "JOIN dim_product p ON p.product_key = f.product_key "
+        "JOIN dim_date d ON d.date_key = f.date_key "
+        "WHERE p.category = 'Toys' GROUP BY d.year, d.month"
+    ),
+    "store_segments": (
+        "SELECT c.segment, COUNT(*), SUM(f.amount) FROM fact_sales f "
+        "JOIN dim_customer c ON c.customer_key = f.customer_key "
+        "WHERE f.store_key = 7 GROUP BY c.segment"
+    ),
+    "customer_lifetime_value": (
+        "SELECT SUM(amount), COUNT(*) FROM fact_sales WHERE customer_key = 4321"
+    ),
+}
+
+# A query regresses when it is this many times slower than the baseline...
+REGRESSION_RATIO = 1.5
+# ...and at least this many milliseconds slower, so timer noise on fast queries is ignored
+REGRESSION_MIN_MS = 5.0
+
+
+def run_benchmark(db_path: str, queries: Optional[Dict[str, str]] = None, max_indexes: int = 5,
+                  timing_runs: int = 3) -> Dict[str, Any]:
+    """
+    Measure every benchmark query before and after the recommended indexes.
+
+    Args:
+        db_path: Database written by scripts/generate_data.py
+        queries: Query name to SQL (defaults to BENCHMARK_QUERIES)
+        max_indexes: Indexes the workload optimizer may recommend
+        timing_runs: Runs per timing (the median is recorded)
+
+    Returns:
+        Dict with the recommended indexes, per-query before_ms, after_ms,
+        speedup and indexes_used, and the row counts and SQLite version the
+        numbers were taken on
+    """
+    queries = queries or BENCHMARK_QUERIES
+    tables = sorted({table for sql in queries.values() for table in parse_query(sql).aliases.values()})
+    with QueryOptimizer(db_path, timing_runs=timing_runs) as optimizer:
+        report = optimizer.optimize_workload(list(queries.values()), max_indexes=max_indexes, samples_per_shape=1)
+        rows = {table: optimizer.stats.row_count(table) for table in tables}
+    shapes = {shape["fingerprint"]: shape for shape in report["shapes"]}
+    results = {}
+    for name, sql in queries.items():
+        shape = shapes[fingerprint(sql)]
+        if "error" in shape:
+            results[name] = {"error": shape["error"]}
+            continue
+        results[name] = {
+            "before_ms": shape["baseline_ms"],
+            "after_ms": shape["after_ms"],
+            "speedup": round(shape["baseline_ms"] / shape["after_ms"], 2) if shape["after_ms"] else None,
+            "indexes_used": shape["indexes_used"],
+        }
+    return {
+        "sqlite_version": sqlite3.sqlite_version,
+        "python": platform.python_version(),
+        "rows": rows,
+        "recommended_indexes": [index["index"] for index in report["recommended_indexes"]],
+        "queries": results,
+        "workload": report["workload"],
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], ratio: float = REGRESSION_RATIO,
+            min_ms: float = REGRESSION_MIN_MS) -> List[str]:
+    """
+    Regressions of a run against a recorded baseline.
+
+    A query regresses if it now fails, if its latency with the recommended
+    indexes grew by more than ratio (and min_ms), or if it used to be sped up
+    by an index and no longer is.
+
+    Returns:
+        One message per regression (empty if there are none)
+    """
+    regressions = []
+    for name, before in baseline["queries"].items():
+        now = current["queries"].get(name)
+        if now is None or "error" in before:
+            continue
+        if "error" in now:
+            regressions.append(f"{name}: {now['error']}")
+            continue
+        if now["after_ms"] > before["after_ms"] * ratio and now["after_ms"] - before["after_ms"] > min_ms:
+            regressions.append(
+                f"{name}: {now['after_ms']} ms with suggestions, baseline {before['after_ms']} ms"
+            )
+        if before["indexes_used"] and not now["indexes_used"]:
+            regressions.append(f"{name}: no longer uses a suggested index (was {', '.join(before['indexes_used'])})")
+    return regressions
+
+
+def save(result: Dict[str, Any], path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,988 @@
+"""
+Local SQLite query optimizer engine.
+
+Parses EXPLAIN QUERY PLAN output into a tree, reads table and index statistics
+from sqlite_stat1 (falling back to row counts), estimates plan cost from those
+statistics, enumerates candidate indexes from the query's predicates, joins,
+ORDER BY and GROUP BY columns, and validates each candidate by creating it in a
+scratch copy of the database and timing the query with and without it.
+"""
+
+import json
+import math
+import os
+import re
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+DB_PATH = os.environ.get("QUERY_OPTIMIZER_DB", "query_optimizer.db")
+TIMING_RUNS = int(os.environ.get("QUERY_OPTIMIZER_TIMING_RUNS", "3"))
+TIMING_BUDGET = float(os.environ.get("QUERY_OPTIMIZER_TIMING_BUDGET", "30"))
+MIN_SPEEDUP = float(os.environ.get("QUERY_OPTIMIZER_MIN_SPEEDUP", "1.2"))
+MAX_INDEX_COLUMNS = 6
+WORKLOAD_MAX_INDEXES = int(os.environ.get("QUERY_OPTIMIZER_MAX_INDEXES", "5"))
+WORKLOAD_SAMPLES_PER_SHAPE = int(os.environ.get("QUERY_OPTIMIZER_SAMPLES_PER_SHAPE", "3"))
+
+# SQLite's own guess for the fraction of rows a range constraint keeps
+RANGE_SELECTIVITY = 0.25
+
+KEYWORDS = {
+    "ALL", "AND", "AS", "ASC", "BETWEEN", "BY", "CASE", "CROSS", "DESC", "DISTINCT",
+    "ELSE", "END", "EXCEPT", "EXISTS", "FROM", "FULL", "GLOB", "GROUP", "HAVING", "IN",
+    "INNER", "INTERSECT", "IS", "JOIN", "LEFT", "LIKE", "LIMIT", "NATURAL", "NOT", "NULL",
+    "NULLS", "OFFSET", "ON", "OR", "ORDER", "OUTER", "RIGHT", "SELECT", "THEN", "UNION",
+    "USING", "VALUES", "WHEN", "WHERE", "WITH", "COLLATE", "FIRST", "LAST", "INDEXED",
+}
+
+_TOKEN = re.compile(
+    r"'(?:[^']|'')*'|\"[^\"]+\"|`[^`]+`|\[[^\]]+\]|\d+(?:\.\d+)?(?:[eE][+-]?\d+)?"
+    r"|[A-Za-z_][\w$]*|<=|>=|<>|!=|==|\|\||[?:@$]\w*|\S"
+)
+_PLAN_ACCESS = re.compile(
+    r"^(SCAN|SEARCH) (?:TABLE )?(\S+)(?: AS (\S+))?"
+    r"(?: USING (COVERING INDEX|INDEX|INTEGER PRIMARY KEY|PRIMARY KEY|AUTOMATIC (?:PARTIAL )?(?:COVERING )?INDEX)"
+    r"(?: (\w+))?(?: \((.*)\))?)?"
+)
+_CONSTRAINT = re.compile(r"(\w+)\s*(=|>|<|>=|<=)\s*\?")
+_IN_LIST = re.compile(r"\bin \( \?(?: , \?)* \)")
+
+EQUALITY_OPS = {"=", "==", "IS", "IN"}
+RANGE_OPS = {"<", ">", "<=", ">=", "BETWEEN"}
+
+
+# --- Plan parsing ---
+
+@dataclass
+class PlanNode:
+    """One EXPLAIN QUERY PLAN step with its parsed access details."""
+
+    id: int
+    parent: int
+    detail: str
+    children: List["PlanNode"] = field(default_factory=list)
+    operation: str = ""
+    table: Optional[str] = None
+    index: Optional[str] = None
+    access: Optional[str] = None
+    constraints: List[Tuple[str, str]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        node: Dict[str, Any] = {"detail": self.detail, "operation": self.operation}
+        if self.table:
+            node["table"] = self.table
+        if self.index:
+            node["index"] = self.index
+        if self.access:
+            node["access"] = self.access
+        if self.constraints:
+            node["constraints"] = [f"{column}{op}?" for column, op in self.constraints]
+        if self.children:
+            node["children"] = [child.to_dict() for child in self.children]
+        return node
+
+
+def _classify(node: PlanNode):
+    match = _PLAN_ACCESS.match(node.detail)
+    if match:
+        node.operation = match.group(1)
+        node.table = match.group(3) or match.group(2)
+        node.access = match.group(4)
+        node.index = match.group(5)
+        node.constraints = _CONSTRAINT.findall(match.group(6) or "")
+    elif node.detail.startswith("USE TEMP B-TREE"):
+        node.operation = "TEMP B-TREE"
+    elif "SUBQUERY" in node.detail:
+        node.operation = "CORRELATED SUBQUERY" if node.detail.startswith("CORRELATED") else "SUBQUERY"
+    else:
+        node.operation = node.detail.split(" ")[0]
+
+
+def parse_plan(rows: Sequence[Sequence[Any]]) -> List[PlanNode]:
+    """
+    Build the plan tree from EXPLAIN QUERY PLAN rows (id, parent, notused, detail).
+
+    Returns:
+        Top-level nodes in execution order, each with its children
+    """
+    nodes: Dict[int, PlanNode] = {}
+    roots: List[PlanNode] = []
+    for row in rows:
+        node = PlanNode(id=row[0], parent=row[1], detail=row[3])
+        _classify(node)
+        nodes[node.id] = node
+        parent = nodes.get(node.parent)
+        (parent.children if parent else roots).append(node)
+    return roots
+
+
+def walk(nodes: Sequence[PlanNode]):
+    """Depth-first iteration over plan nodes."""
+    for node in nodes:
+        yield node
+        yield from walk(node.children)
+
+
+def find_bottlenecks(nodes: Sequence[PlanNode]) -> List[str]:
+    """Bottlenecks in a parsed plan, using the labels the agents already know."""
+    bottlenecks = []
+    for node in walk(nodes):
+        if node.operation == "SCAN" and node.access is None:
+            bottlenecks.append("Full table scan detected")
+        elif node.access and node.access.startswith("AUTOMATIC"):
+            bottlenecks.append("Automatic index built at query time (missing index)")
+        elif node.operation == "TEMP B-TREE":
+            bottlenecks.append("Use of temporary table detected")
+        elif node.operation == "CORRELATED SUBQUERY":
+            bottlenecks.append("Correlated subquery executed once per outer row")
+    return bottlenecks
+
+
+# --- Statistics ---
+
+class TableStats:
+    """Row counts and per-index selectivity from sqlite_stat1, with COUNT(*) fallback."""
+
+    def __init__(self, conn: Optional[sqlite3.Connection], default_rows: int = 1000):
+        """
+        Args:
+            conn: Database to read statistics from; None assumes default_rows everywhere
+            default_rows: Row count for tables that cannot be counted
+        """
+        self.conn = conn
+        self.default_rows = default_rows
+        self.rows: Dict[str, int] = {}
+        self.indexes: Dict[str, List[float]] = {}
+        self.index_tables: Dict[str, str] = {}
+        self.reload()
+
+    def reload(self):
+        self.rows.clear()
+        self.indexes.clear()
+        self.index_tables.clear()
+        if self.conn is None:
+            return
+        has_stats = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        ).fetchone()
+        if not has_stats:
+            return
+        for table, index, stat in self.conn.execute("SELECT tbl, idx, stat FROM sqlite_stat1"):
+            numbers = [float(n) for n in stat.split() if re.fullmatch(r"\d+(\.\d+)?", n)]
+            if not numbers:
+                continue
+            self.rows[table] = int(numbers[0])
+            if index:
+                self.indexes[index] = numbers
+                self.index_tables[index] = table
+
+    def row_count(self, table: str) -> int:
+        if table not in self.rows:
+            try:
+                self.rows[table] = self.conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+            except (AttributeError, sqlite3.Error):
+                self.rows[table] = self.default_rows
+        return self.rows[table]
+
+    def rows_per_key(self, index: str, table: str, equality_columns: int) -> float:
+        """Average rows matching an equality lookup on the first N index columns."""
+        stat = self.indexes.get(index)
+        if stat and equality_columns and len(stat) > equality_columns:
+            return stat[equality_columns]
+        # No statistics: assume each equality column keeps 1/10 of the rows, like SQLite
+        return max(1.0, self.row_count(table) / (10 ** max(equality_columns, 1)))
+
+
+def estimate_plan_cost(nodes: Sequence[PlanNode], stats: TableStats, aliases: Optional[Dict[str, str]] = None) -> float:
+    """
+    Estimated rows touched by a plan.
+
+    Steps at one level run as nested loops, so each step's cost is multiplied
+    by the rows produced by the steps before it.
+    """
+    aliases = aliases or {}
+    total, outer_rows = 0.0, 1.0
+    for node in nodes:
+        table = aliases.get(node.table, node.table) if node.table else None
+        if node.operation in ("SCAN", "SEARCH") and table:
+            rows = float(stats.row_count(table))
+            seek = math.log2(rows + 2)
+            if node.operation == "SCAN":
+                step_cost = rows * (0.5 if node.access == "COVERING INDEX" else 1.0)
+                step_rows = rows
+            elif node.access and node.access.startswith("AUTOMATIC"):
+                step_cost = rows  # index built per statement
+                step_rows = max(1.0, rows / 10)
+            else:
+                equalities = sum(1 for _, op in node.constraints if op == "=")
+                ranges = sum(1 for _, op in node.constraints if op != "=")
+                if node.access in ("INTEGER PRIMARY KEY", "PRIMARY KEY") and equalities:
+                    step_rows = 1.0
+                else:
+                    step_rows = stats.rows_per_key(node.index or "", table, equalities) if equalities else rows
+                    if ranges:
+                        step_rows *= RANGE_SELECTIVITY
+                step_cost = seek + step_rows * (1.0 if node.access == "COVERING INDEX" else 2.0)
+            total += outer_rows * step_cost
+            outer_rows *= max(step_rows, 1.0)
+        elif node.operation == "TEMP B-TREE":
+            total += outer_rows * math.log2(outer_rows + 2)
+        elif node.operation == "CORRELATED SUBQUERY":
+            total += outer_rows * estimate_plan_cost(node.children, stats, aliases)
+        elif node.children:
+            total += estimate_plan_cost(node.children, stats, aliases)
+    return round(total, 1)
+
+
+# --- Query parsing ---
+
+def tokenize(sql: str) -> List[str]:
+    return _TOKEN.findall(sql)
+
+
+def is_read_only(sql: str) -> bool:
+    """
+    Whether a statement only reads: a single SELECT or WITH ... SELECT (a CTE
+    can front INSERT, UPDATE or DELETE in SQLite, so those keywords are
+    rejected anywhere outside string literals).
+    """
+    tokens = [token.upper() for token in tokenize(sql.strip().rstrip(";"))]
+    if not tokens or tokens[0] not in ("SELECT", "WITH") or ";" in tokens:
+        return False
+    for i, token in enumerate(tokens):
+        if token in ("INSERT", "UPDATE", "DELETE") or (token == "REPLACE" and tokens[i + 1:i + 2] == ["INTO"]):
+            return False
+    return True
+
+
+def _is_identifier(token: str) -> bool:
+    return bool(re.match(r"[A-Za-z_\"`\[]", token)) and token.upper() not in KEYWORDS
+
+
+def _unquote(token: str) -> str:
+    if token[:1] in "\"`[":
+        return token[1:-1]
+    return token
+
+
+def _is_literal(token: str) -> bool:
+    return token[:1] in "'?:@$" or token[:1].isdigit() or token.upper() == "NULL"
+
+
+@dataclass
+class QueryShape:
+    """Tables, sargable predicates and ordering columns referenced by a query."""
+
+    aliases: Dict[str, str] = field(default_factory=dict)
+    equality: List[Tuple[Optional[str], str]] = field(default_factory=list)
+    ranges: List[Tuple[Optional[str], str]] = field(default_factory=list)
+    joins: List[Tuple[Tuple[Optional[str], str], Tuple[Optional[str], str]]] = field(default_factory=list)
+    order_by: List[Tuple[Optional[str], str]] = field(default_factory=list)
+    group_by: List[Tuple[Optional[str], str]] = field(default_factory=list)
+    selected: List[Tuple[Optional[str], str]] = field(default_factory=list)
+    select_star: bool = False
+
+
+def parse_query(sql: str) -> QueryShape:
+    """
+    Extract the index-relevant parts of a SELECT (tables and aliases, equality,
+    range and join predicates, ORDER BY, GROUP BY and selected columns).
+
+    This is a token-level heuristic, not a full SQL parser; column references are
+    resolved against the schema afterwards, so anything it misreads is dropped.
+    """
+    tokens = tokenize(sql)
+    shape = QueryShape()
+    clause = None
+    i = 0
+
+    def column_ref(j: int) -> Tuple[Optional[Tuple[Optional[str], str]], int]:
+        if j >= len(tokens) or not _is_identifier(tokens[j]):
+            return None, j
+        if j + 1 < len(tokens) and tokens[j + 1] == "(":
+            return None, j  # function call
+        if j + 2 < len(tokens) and tokens[j + 1] == "." and _is_identifier(tokens[j + 2]):
+            return (_unquote(tokens[j]), _unquote(tokens[j + 2])), j + 3
+        return (None, _unquote(tokens[j])), j + 1
+
+    def table_ref(j: int) -> int:
+        if j >= len(tokens) or not _is_identifier(tokens[j]):
+            return j
+        name, j = _unquote(tokens[j]), j + 1
+        if j + 1 < len(tokens) and tokens[j] == ".":
+            name, j = _unquote(tokens[j + 1]), j + 2
+        shape.aliases[name] = name
+        if j < len(tokens) and tokens[j].upper() == "AS":
+            j += 1
+        if j < len(tokens) and _is_identifier(tokens[j]):
+            shape.aliases[_unquote(tokens[j])] = name
+            j += 1
+        return j
+
+    while i < len(tokens):
+        token = tokens[i]
+        upper = token.upper()
+        if upper == "SELECT":
+            clause = "select"
+        elif upper == "FROM" or upper == "JOIN":
+            clause = "from"
+            i = table_ref(i + 1)
+            continue
+        elif token == "," and clause == "from":
+            i = table_ref(i + 1)
+            continue
+        elif upper in ("WHERE", "ON"):
+            clause = "where"
+        elif upper == "GROUP":
+            clause = "group"
+        elif upper == "ORDER":
+            clause = "order"
+        elif upper in ("HAVING", "LIMIT", "UNION", "EXCEPT", "INTERSECT"):
+            clause = None
+        elif clause == "select" and token == "*":
+            shape.select_star = True
+        elif _is_identifier(token):
+            ref, end = column_ref(i)
+            if ref is None:
+                i += 1
+                continue
+            if clause == "select":
+                if end < len(tokens) and tokens[end] == "." and end + 1 < len(tokens) and tokens[end + 1] == "*":
+                    shape.select_star = True
+                shape.selected.append(ref)
+            elif clause in ("order", "group"):
+                (shape.order_by if clause == "order" else shape.group_by).append(ref)
+            elif clause == "where":
+                # Wrapped in a function (e.g. date(col)): not usable by an index
+                wrapped = i >= 2 and tokens[i - 1] == "(" and _is_identifier(tokens[i - 2])
+                op = tokens[end].upper() if end < len(tokens) else ""
+                if op == "NOT" or wrapped:
+                    pass
+                elif op in ("=", "=="):
+                    other, _ = column_ref(end + 1)
+                    if other is not None:
+                        shape.joins.append((ref, other))
+                    else:
+                        shape.equality.append(ref)
+                elif op == "IS" and end + 1 < len(tokens) and tokens[end + 1].upper() == "NOT":
+                    pass
+                elif op in EQUALITY_OPS:
+                    shape.equality.append(ref)
+                elif op in RANGE_OPS:
+                    shape.ranges.append(ref)
+                elif op in ("LIKE", "GLOB") and end + 1 < len(tokens) and tokens[end + 1][:2] not in ("'%", "'_", "'*"):
+                    shape.ranges.append(ref)
+                elif i >= 2 and _is_literal(tokens[i - 2]) and tokens[i - 1] in ("=", "==", "<", ">", "<=", ">="):
+                    (shape.equality if tokens[i - 1] in ("=", "==") else shape.ranges).append(ref)
+            i = end
+            continue
+        i += 1
+    return shape
+
+
+# --- Workloads ---
+
+def fingerprint(sql: str) -> str:
+    """
+    Normalized shape of a statement: literals and parameters become ?, IN lists
+    collapse to (?...), identifiers and keywords are lowercased and whitespace
+    is collapsed, so statements differing only in their values share a shape.
+    """
+    tokens = []
+    for token in tokenize(sql.strip().rstrip(";")):
+        if _is_literal(token) and token.upper() != "NULL":
+            tokens.append("?")
+        elif token[:1] in "\"`[":
+            tokens.append(token)
+        else:
+            tokens.append(token.lower())
+    return _IN_LIST.sub("in (?...)", " ".join(tokens))
+
+
+def read_workload(path: str) -> Iterator[str]:
+    """
+    Statements from a workload file.
+
+    - .jsonl / .ndjson: one JSON object per line with a "query" (or "sql") field
+    - .log / .txt: one statement per line
+    - anything else: SQL script with statements terminated by semicolons
+    """
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record.get("query") or record.get("sql") or ""
+        elif path.endswith((".log", ".txt")):
+            for line in f:
+                if line.strip() and not line.lstrip().startswith("--"):
+                    yield line.strip().rstrip(";")
+        else:
+            statement = ""
+            for line in f:
+                if not statement and (not line.strip() or line.lstrip().startswith("--")):
+                    continue
+                statement += line
+                if sqlite3.complete_statement(statement):
+                    yield statement.strip().rstrip(";").strip()
+                    statement = ""
+            if statement.strip():
+                yield statement.strip().rstrip(";").strip()
+
+
+# --- Candidate indexes ---
+
+@dataclass
+class IndexCandidate:
+    """A CREATE INDEX statement proposed for one table."""
+
+    table: str
+    columns: Tuple[str, ...]
+    reason: str
+
+    @property
+    def name(self) -> str:
+        return "idx_" + "_".join([self.table, *self.columns])[:60]
+
+    @property
+    def sql(self) -> str:
+        columns = ", ".join(f'"{c}"' for c in self.columns)
+        return f'CREATE INDEX "{self.name}" ON "{self.table}" ({columns})'
+
+
+class QueryOptimizer:
+    """
+    Plan analysis, cost estimation and measured index validation over one shared
+    connection (plus one scratch copy of the database for index experiments).
+    """
+
+    def __init__(self, db_path: str = DB_PATH, timing_runs: int = TIMING_RUNS,
+                 timing_budget: float = TIMING_BUDGET):
+        """
+        Args:
+            db_path: SQLite database to optimize (opened read-only)
+            timing_runs: Runs per timing; the median is reported
+            timing_budget: Seconds after which a timed run is aborted
+        """
+        self.db_path = db_path
+        self.timing_runs = timing_runs
+        self.timing_budget = timing_budget
+        if not os.path.exists(db_path):
+            raise sqlite3.OperationalError(f"Database not found: {db_path}")
+        # One shared read-only connection; callers on other threads hold self.lock
+        self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+        self.lock = threading.RLock()
+        self.stats = TableStats(self.conn)
+        self._columns: Dict[str, List[str]] = {}
+        self._integer_keys: Dict[str, Optional[str]] = {}
+        self._scratch_dir: Optional[str] = None
+        self._scratch: Optional[sqlite3.Connection] = None
+        self._scratch_stats: Optional[TableStats] = None
+        self._data_version = self._read_data_version()
+
+    def close(self):
+        """Close the connections and delete the scratch copy."""
+        self._discard_scratch()
+        self.conn.close()
+
+    def _discard_scratch(self):
+        if self._scratch is not None:
+            self._scratch.close()
+            self._scratch = None
+        if self._scratch_dir:
+            shutil.rmtree(self._scratch_dir, ignore_errors=True)
+            self._scratch_dir = None
+
+    def _read_data_version(self) -> int:
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def refresh(self):
+        """Drop cached schema, statistics and the scratch copy if the database changed since they were read."""
+        version = self._read_data_version()
+        if version != self._data_version:
+            self._data_version = version
+            self._columns.clear()
+            self._integer_keys.clear()
+            self.stats.reload()
+            self._discard_scratch()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Schema ---
+
+    def columns(self, table: str) -> List[str]:
+        if table not in self._columns:
+            info = self.conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+            self._columns[table] = [row[1] for row in info]
+            # An INTEGER PRIMARY KEY is the rowid and never needs an index
+            keys = [row for row in info if row[5]]
+            self._integer_keys[table] = (
+                keys[0][1] if len(keys) == 1 and keys[0][2].upper() == "INTEGER" else None
+            )
+        return self._columns[table]
+
+    def existing_indexes(self, table: str, conn: Optional[sqlite3.Connection] = None) -> List[Tuple[str, ...]]:
+        conn = conn or self.conn
+        indexes = []
+        for row in conn.execute(f'PRAGMA index_list("{table}")').fetchall():
+            columns = tuple(c[2] for c in conn.execute(f'PRAGMA index_info("{row[1]}")').fetchall())
+            indexes.append(columns)
+        return indexes
+
+    def _resolve(self, shape: QueryShape, ref: Tuple[Optional[str], str]) -> Optional[Tuple[str, str]]:
+        alias, column = ref
+        if alias is not None:
+            table = shape.aliases.get(alias)
+            return (table, column) if table and column in self.columns(table) else None
+        for table in dict.fromkeys(shape.aliases.values()):
+            if column in self.columns(table):
+                return table, column
+        return None
+
+    # --- Analysis ---
+
+    def explain(self, query: str, conn: Optional[sqlite3.Connection] = None) -> List[Tuple]:
+        return (conn or self.conn).execute(f"EXPLAIN QUERY PLAN {query}").fetchall()
+
+    def analyze(self, query: str) -> Dict[str, Any]:
+        """
+        Parse the plan of a query and estimate its cost from table statistics.
+
+        Returns:
+            Dict with query_id, execution_plan (raw rows), plan (tree),
+            bottlenecks and estimated_cost
+        """
+        self.refresh()
+        rows = self.explain(query)
+        plan = parse_plan(rows)
+        shape = parse_query(query)
+        return {
+            "status": "success",
+            "query_id": str(uuid.uuid4()),
+            "execution_plan": rows,
+            "plan": [node.to_dict() for node in plan],
+            "bottlenecks": find_bottlenecks(plan),
+            "estimated_cost": estimate_plan_cost(plan, self.stats, shape.aliases),
+        }
+
+    def candidate_indexes(self, query: str) -> List[IndexCandidate]:
+        """
+        Enumerate indexes that could serve a query's predicates, joins and ordering.
+
+        Equality columns lead (most selective first), followed by one range
+        column, or by the ORDER BY / GROUP BY columns; a covering variant adds
+        the remaining referenced columns. Candidates already served by a prefix
+        of an existing index are skipped.
+        """
+        shape = parse_query(query)
+        per_table: Dict[str, Dict[str, List[str]]] = {}
+
+        def add(kind: str, ref: Tuple[Optional[str], str]):
+            resolved = self._resolve(shape, ref)
+            if resolved is None:
+                return
+            table, column = resolved
+            self.columns(table)
+            if column == self._integer_keys.get(table):
+                return
+            columns = per_table.setdefault(table, {}).setdefault(kind, [])
+            if column not in columns:
+                columns.append(column)
+
+        for ref in shape.equality:
+            add("equality", ref)
+        for left, right in shape.joins:
+            add("equality", left)
+            add("equality", right)
+        for ref in shape.ranges:
+            add("range", ref)
+        for ref in shape.order_by:
+            add("order", ref)
+        for ref in shape.group_by:
+            add("group", ref)
+        for ref in shape.selected:
+            add("selected", ref)
+
+        candidates: List[IndexCandidate] = []
+        seen = set()
+        for table, parts in per_table.items():
+            existing = self.existing_indexes(table)
+            equality = sorted(parts.get("equality", []), key=lambda c: -self._distinct(table, c))
+            ranges = parts.get("range", [])
+            order = parts.get("order", []) or parts.get("group", [])
+            proposals = []
+            if equality:
+                proposals.append((tuple(equality), "equality filter"))
+                for column in equality:
+                    proposals.append(((column,), "single-column filter or join key"))
+            if ranges:
+                proposals.append((tuple(equality + ranges[:1]), "equality filter then range"))
+            if order:
+                proposals.append((tuple(equality + [c for c in order if c not in equality]), "filter then sort order"))
+            if not shape.select_star:
+                referenced = equality + ranges + order + parts.get("selected", [])
+                for key, reason in list(proposals):
+                    covering = tuple(dict.fromkeys([*key, *referenced]))
+                    if covering != key and len(covering) <= MAX_INDEX_COLUMNS:
+                        proposals.append((covering, f"covering index ({reason})"))
+            for columns, reason in proposals:
+                columns = columns[:MAX_INDEX_COLUMNS]
+                if not columns or (table, columns) in seen:
+                    continue
+                if any(index[:len(columns)] == columns for index in existing):
+                    continue
+                seen.add((table, columns))
+                candidates.append(IndexCandidate(table, columns, reason))
+        return candidates
+
+    def _distinct(self, table: str, column: str, sample: int = 100000) -> int:
+        return self.conn.execute(
+            f'SELECT COUNT(DISTINCT "{column}") FROM (SELECT "{column}" FROM "{table}" LIMIT {sample})'
+        ).fetchone()[0]
+
+    # --- Measurement ---
+
+    def scratch(self) -> sqlite3.Connection:
+        """Connection to a scratch copy of the database, created (and ANALYZEd) on first use."""
+        if self._scratch is None:
+            self._scratch_dir = tempfile.mkdtemp(prefix="query-optimizer-")
+            path = os.path.join(self._scratch_dir, "scratch.db")
+            self._scratch = sqlite3.connect(path, check_same_thread=False)
+            self.conn.backup(self._scratch)
+            self._scratch.execute("PRAGMA journal_mode=OFF")
+            self._scratch.execute("PRAGMA synchronous=OFF")
+            self._scratch.execute("ANALYZE")
+            self._scratch.commit()
+            self._scratch_stats = TableStats(self._scratch)
+        return self._scratch
+
+    def time_query(self, query: str, conn: Optional[sqlite3.Connection] = None,
+                   runs: Optional[int] = None) -> Optional[float]:
+        """
+        Median wall-clock milliseconds to run a query and fetch all rows.
+
+        Returns:
+            Milliseconds, or None if a run exceeded the timing budget
+
+        Raises:
+            ValueError: if the query is not a SELECT/WITH; running anything else
+                would change the database (or the shared scratch copy) it times on
+        """
+        if not is_read_only(query):
+            raise ValueError("Only SELECT/WITH queries can be timed")
+        conn = conn or self.conn
+        deadline = [0.0]
+        conn.set_progress_handler(lambda: 1 if time.perf_counter() > deadline[0] else 0, 10000)
+        timings = []
+        try:
+            for _ in range(runs or self.timing_runs):
+                started = time.perf_counter()
+                deadline[0] = started + self.timing_budget
+                try:
+                    conn.execute(query).fetchall()
+                except sqlite3.OperationalError as e:
+                    if "interrupted" in str(e):
+                        return None
+                    raise
+                timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            conn.set_progress_handler(None, 0)
+        return round(statistics.median(timings), 3)
+
+    def _page_count(self, conn: sqlite3.Connection) -> int:
+        # Pages in use: dropped candidates leave free pages that the next index reuses
+        return conn.execute("PRAGMA page_count").fetchone()[0] - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def evaluate_index(self, candidate: IndexCandidate, queries: Sequence[str],
+                       keep: bool = False) -> Dict[str, Any]:
+        """
+        Create an index in the scratch copy, ANALYZE it, and time each query with it.
+
+        Args:
+            candidate: Index to try
+            queries: Queries to explain and time with the index in place
+            keep: Leave the index in the scratch copy instead of dropping it
+
+        Returns:
+            Dict with build_ms, size_kb and, per query, used, estimated_cost and measured_ms
+        """
+        scratch = self.scratch()
+        build = self._create_index(candidate)
+        try:
+            results = []
+            for query in queries:
+                plan = parse_plan(self.explain(query, scratch))
+                used = any(node.index == candidate.name for node in walk(plan))
+                results.append({
+                    "used": used,
+                    "estimated_cost": estimate_plan_cost(plan, self._scratch_stats, parse_query(query).aliases),
+                    "measured_ms": self.time_query(query, scratch) if used else None,
+                })
+        finally:
+            if not keep:
+                self._drop_index(candidate)
+        return {**build, "queries": results}
+
+    def _create_index(self, candidate: IndexCandidate) -> Dict[str, Any]:
+        scratch = self.scratch()
+        page_size = scratch.execute("PRAGMA page_size").fetchone()[0]
+        pages = self._page_count(scratch)
+        started = time.perf_counter()
+        scratch.execute(candidate.sql)
+        scratch.execute(f'ANALYZE "{candidate.name}"')
+        scratch.commit()
+        build_ms = (time.perf_counter() - started) * 1000
+        self._scratch_stats.reload()
+        return {"build_ms": round(build_ms, 1), "size_kb": (self._page_count(scratch) - pages) * page_size // 1024}
+
+    def _drop_index(self, candidate: IndexCandidate):
+        scratch = self.scratch()
+        scratch.execute(f'DROP INDEX IF EXISTS "{candidate.name}"')
+        scratch.execute("DELETE FROM sqlite_stat1 WHERE idx = ?", (candidate.name,))
+        scratch.commit()
+        self._scratch_stats.reload()
+
+    def optimize(self, query: str) -> Dict[str, Any]:
+        """
+        Analyze a query, then validate every candidate index in the scratch copy.
+
+        Returns:
+            The analyze() report plus baseline_ms, the measured candidates (best
+            first) and the recommended index, if any improves the query by at
+            least MIN_SPEEDUP
+
+        Raises:
+            ValueError: if the query is not a SELECT/WITH
+        """
+        if not is_read_only(query):
+            raise ValueError("Only SELECT/WITH queries can be optimized")
+        report = self.analyze(query)
+        scratch = self.scratch()
+        baseline_plan = parse_plan(self.explain(query, scratch))
+        baseline_cost = estimate_plan_cost(baseline_plan, self._scratch_stats, parse_query(query).aliases)
+        baseline_ms = self.time_query(query, scratch)
+        report["baseline_ms"] = baseline_ms
+        # A baseline that hit the timing budget is at least that slow
+        baseline = baseline_ms or self.timing_budget * 1000
+
+        candidates = []
+        for candidate in self.candidate_indexes(query):
+            result = self.evaluate_index(candidate, [query])
+            measured = result["queries"][0]
+            speedup = round(baseline / measured["measured_ms"], 2) if measured["measured_ms"] else None
+            candidates.append({
+                "index": candidate.sql,
+                "table": candidate.table,
+                "columns": list(candidate.columns),
+                "reason": candidate.reason,
+                "used": measured["used"],
+                "estimated_cost": measured["estimated_cost"],
+                "estimated_cost_before": baseline_cost,
+                "measured_ms": measured["measured_ms"],
+                "speedup": speedup,
+                "build_ms": result["build_ms"],
+                "size_kb": result["size_kb"],
+            })
+        candidates.sort(key=lambda c: (not c["used"], -(c["speedup"] or 0), len(c["columns"])))
+        report["candidates"] = candidates
+        best = candidates[0] if candidates else None
+        report["recommendation"] = (
+            best if best and best["used"] and (best["speedup"] or 0) >= MIN_SPEEDUP else None
+        )
+        return report
+
+    def _time_samples(self, samples: Sequence[str], conn: sqlite3.Connection) -> float:
+        """Mean of the median timings of a shape's sample statements (timeouts count as the budget)."""
+        timings = [self.time_query(sample, conn) for sample in samples]
+        return round(statistics.mean(t if t is not None else self.timing_budget * 1000 for t in timings), 3)
+
+    def _replay(self, statements: Sequence[str], conn: sqlite3.Connection) -> float:
+        started = time.perf_counter()
+        for statement in statements:
+            conn.execute(statement).fetchall()
+        return round((time.perf_counter() - started) * 1000, 1)
+
+    def optimize_workload(
+        self,
+        statements: Iterable[str],
+        max_indexes: int = WORKLOAD_MAX_INDEXES,
+        samples_per_shape: int = WORKLOAD_SAMPLES_PER_SHAPE,
+        replay: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Recommend the set of indexes with the best total benefit for a workload.
+
+        Statements are fingerprinted and each unique shape is analyzed and timed
+        once (on up to samples_per_shape of its statements). Every candidate
+        index from every shape is built once in the scratch copy and timed on
+        the shapes over its table. Indexes are then picked greedily by total
+        benefit (execution count x time saved over the best index picked so
+        far), and the workload is timed again with the chosen set in place.
+
+        Args:
+            statements: SQL statements; anything other than SELECT/WITH is skipped
+            max_indexes: Maximum number of indexes to recommend
+            samples_per_shape: Statements timed per shape
+            replay: Also run every statement before and after for measured totals
+
+        Returns:
+            Dict with statement counts, per-shape results, the recommended
+            indexes, and workload before/after milliseconds (count-weighted
+            from samples, and replayed if requested)
+        """
+        started = time.perf_counter()
+        self.refresh()
+        shapes: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        logged: List[Tuple[str, str]] = []
+        skipped = 0
+        for statement in statements:
+            if not is_read_only(statement):
+                skipped += 1
+                continue
+            key = fingerprint(statement)
+            shape = shapes.setdefault(key, {"fingerprint": key, "count": 0, "samples": []})
+            shape["count"] += 1
+            if len(shape["samples"]) < samples_per_shape and statement not in shape["samples"]:
+                shape["samples"].append(statement)
+            if replay:
+                logged.append((key, statement))
+
+        scratch = self.scratch()
+        candidates: "OrderedDict[Tuple[str, Tuple[str, ...]], IndexCandidate]" = OrderedDict()
+        for shape in shapes.values():
+            example = shape["samples"][0]
+            try:
+                plan = parse_plan(self.explain(example, scratch))
+            except sqlite3.Error as e:
+                shape["error"] = str(e)
+                continue
+            shape["tables"] = set(parse_query(example).aliases.values())
+            shape["bottlenecks"] = find_bottlenecks(plan)
+            shape["baseline_ms"] = self._time_samples(shape["samples"], scratch)
+            for candidate in self.candidate_indexes(example):
+                candidates.setdefault((candidate.table, candidate.columns), candidate)
+        valid = [shape for shape in shapes.values() if "error" not in shape]
+        selects = [statement for key, statement in logged if "error" not in shapes[key]]
+        replay_before = self._replay(selects, scratch) if replay else None
+
+        # Build each candidate once and time it on the shapes over its table
+        measured: Dict[Tuple[str, Tuple[str, ...]], Dict[str, float]] = {}
+        builds: Dict[Tuple[str, Tuple[str, ...]], Dict[str, Any]] = {}
+        for key, candidate in candidates.items():
+            affected = [shape for shape in valid if candidate.table in shape["tables"]]
+            result = self.evaluate_index(candidate, [shape["samples"][0] for shape in affected])
+            builds[key] = result
+            measured[key] = {
+                shape["fingerprint"]: timing["measured_ms"]
+                for shape, timing in zip(affected, result["queries"])
+                if timing["used"] and timing["measured_ms"] is not None
+            }
+
+        # Greedy selection by total benefit over the best time reached so far
+        current = {shape["fingerprint"]: shape["baseline_ms"] for shape in valid}
+        counts = {shape["fingerprint"]: shape["count"] for shape in valid}
+        chosen: List[Dict[str, Any]] = []
+        while len(chosen) < max_indexes:
+            best_key, best_benefit, best_improved = None, 0.0, []
+            for key, timings in measured.items():
+                if any(c["key"] == key for c in chosen):
+                    continue
+                improved = [fp for fp, ms in timings.items() if ms * MIN_SPEEDUP <= current[fp]]
+                benefit = sum(counts[fp] * (current[fp] - timings[fp]) for fp in improved)
+                if benefit > best_benefit:
+                    best_key, best_benefit, best_improved = key, benefit, improved
+            if best_key is None:
+                break
+            for fp in best_improved:
+                current[fp] = measured[best_key][fp]
+            chosen.append({
+                "key": best_key,
+                "index": candidates[best_key].sql,
+                "estimated_benefit_ms": round(best_benefit, 1),
+                "shapes_improved": len(best_improved),
+                "statements_improved": sum(counts[fp] for fp in best_improved),
+                "build_ms": builds[best_key]["build_ms"],
+                "size_kb": builds[best_key]["size_kb"],
+            })
+
+        # Time the workload again with the chosen indexes in place
+        for choice in chosen:
+            self._create_index(candidates[choice["key"]])
+        try:
+            for shape in valid:
+                plan = parse_plan(self.explain(shape["samples"][0], scratch))
+                shape["after_ms"] = self._time_samples(shape["samples"], scratch)
+                shape["indexes_used"] = sorted({node.index for node in walk(plan) if node.index})
+            replay_after = self._replay(selects, scratch) if replay else None
+        finally:
+            for choice in chosen:
+                self._drop_index(candidates[choice["key"]])
+
+        before = sum(shape["count"] * shape["baseline_ms"] for shape in valid)
+        after = sum(shape["count"] * shape["after_ms"] for shape in valid)
+        workload = {
+            "before_ms": round(before, 1),
+            "after_ms": round(after, 1),
+            "speedup": round(before / after, 2) if after else None,
+            "method": "count-weighted sample timings",
+        }
+        if replay:
+            workload["replayed"] = {
+                "before_ms": replay_before,
+                "after_ms": replay_after,
+                "speedup": round(replay_before / replay_after, 2) if replay_after else None,
+            }
+
+        ranked = sorted(shapes.values(), key=lambda shape: -shape["count"] * shape.get("baseline_ms", 0))
+        return {
+            "status": "success",
+            "statements": sum(shape["count"] for shape in shapes.values()) + skipped,
+            "skipped": skipped,
+            "unique_shapes": len(shapes),
+            "candidates_evaluated": len(candidates),
+            "recommended_indexes": [{k: v for k, v in c.items() if k != "key"} for c in chosen],
+            "workload": workload,
+            "shapes": [
+                {
+                    "fingerprint": shape["fingerprint"],
+                    "count": shape["count"],
+                    "example": shape["samples"][0],
+                    **(
+                        {"error": shape["error"]} if "error" in shape else {
+                            "bottlenecks": shape["bottlenecks"],
+                            "baseline_ms": shape["baseline_ms"],
+                            "after_ms": shape["after_ms"],
+                            "indexes_used": shape["indexes_used"],
+                        }
+                    ),
+                }
+                for shape in ranked
+            ],
+            "seconds": round(time.perf_counter() - started, 2),
+        }
+
+
+_optimizer: Optional[QueryOptimizer] = None
+_optimizer_lock = threading.Lock()
+
+
+def get_optimizer(db_path: str = DB_PATH) -> QueryOptimizer:
+    """Shared optimizer (one connection and one scratch copy) for the tools and CLI."""
+    global _optimizer
+    with _optimizer_lock:
+        if _optimizer is None or _optimizer.db_path != db_path:
+            if _optimizer is not None:
+                _optimizer.close()
+            _optimizer = QueryOptimizer(db_path)
+        return _optimizer
@@ -4,11 +4,18 @@ SQLite database tools for query optimization.
 
 import sqlite3
 import json
-import uuid
-from typing import List
+from typing import List, Optional
 from strands import tool
 from opentelemetry import trace
 
+from utils.optimizer import (
+    TableStats,
+    estimate_plan_cost,
+    find_bottlenecks,
+    get_optimizer,
+    parse_plan,
+)
+
 
 @tool
 def get_query_execution_plan(query: str) -> str:
@@ -23,73 +30,58 @@ def get_query_execution_plan(query: str) -> str:
     """
     with trace.get_tracer(__name__).start_as_current_span("get_query_execution_plan"):
         try:
-            conn = sqlite3.connect("query_optimizer.db")
-            cursor = conn.cursor()
-            cursor.execute(f"EXPLAIN QUERY PLAN {query}")
-            plan = cursor.fetchall()
-            conn.close()
-            return json.dumps(
-                {
-                    "status": "success",
-                    "query_id": str(uuid.uuid4()),
-                    "execution_plan": plan,
-                    "bottlenecks": analyze_plan(plan),
-                }
-            )
+            optimizer = get_optimizer()
+            with optimizer.lock:
+                return json.dumps(optimizer.analyze(query))
         except sqlite3.Error as e:
             return json.dumps({"status": "error", "message": str(e)})
 
 
 def analyze_plan(plan: List) -> List[str]:
     """Identify bottlenecks in SQLite execution plan."""
-    bottlenecks = []
-    for step in plan:
-        detail = step[3].lower()
-        if "scan" in detail and "index" not in detail:
-            bottlenecks.append("Full table scan detected")
-        if "temporary table" in detail:
-            bottlenecks.append("Use of temporary table detected")
-    return bottlenecks
+    return find_bottlenecks(parse_plan(plan))
 
 
 @tool
 def suggest_optimizations(query: str, execution_plan: str) -> str:
     """
-    Suggests query rewrites or schema changes based on the query and execution plan.
+    Suggests schema changes for a query, each validated by creating the index in
+    a scratch copy of the database and timing the query with it.
 
     Args:
         query (str): The original SQL query.
-        execution_plan (str): JSON string of the execution plan.
+        execution_plan (str): JSON string of the execution plan (the plan is
+            recomputed locally; this is kept for the agents' call signature).
 
     Returns:
-        str: JSON string with suggested query rewrites or schema changes.
+        str: JSON string with measured index suggestions, best first.
     """
     with trace.get_tracer(__name__).start_as_current_span("suggest_optimizations"):
         try:
-            plan_data = json.loads(execution_plan)
-            suggestions = []
-            if "full table scan" in str(plan_data.get("bottlenecks", [])):
-                suggestions.append(
-                    {
-                        "type": "schema_change",
-                        "suggestion": "Create index on filtered columns (e.g., customer_id, order_date)",
-                    }
-                )
-                suggestions.append(
-                    {
-                        "type": "query_rewrite",
-                        "suggestion": f"Use selective filters: "
-                        f"{query.replace('SELECT *', 'SELECT order_id, customer_id')}",
-                    }
-                )
-            if "temporary table" in str(plan_data.get("bottlenecks", [])):
-                suggestions.append(
-                    {
-                        "type": "query_rewrite",
-                        "suggestion": "Simplify joins/subqueries to avoid temporary tables",
-                    }
-                )
-            return json.dumps({"status": "success", "suggestions": suggestions})
+            optimizer = get_optimizer()
+            with optimizer.lock:
+                report = optimizer.optimize(query)
+            suggestions = [
+                {
+                    "type": "schema_change",
+                    "suggestion": candidate["index"],
+                    "reason": candidate["reason"],
+                    "used_by_plan": candidate["used"],
+                    "measured_ms": candidate["measured_ms"],
+                    "baseline_ms": report["baseline_ms"],
+                    "speedup": candidate["speedup"],
+                    "size_kb": candidate["size_kb"],
+                }
+                for candidate in report["candidates"]
+                if candidate["used"]
+            ]
+            return json.dumps(
+                {
+                    "status": "success",
+                    "suggestions": suggestions,
+                    "recommendation": (report["recommendation"] or {}).get("index"),
+                }
+            )
         except Exception as e:
             return json.dumps({"status": "error", "message": str(e)})
 
@@ -97,40 +89,39 @@ def suggest_optimizations(query: str, execution_plan: str) -> str:
 @tool
 def validate_query_cost(query: str) -> str:
     """
-    Validates the cost of a rewritten query using SQLite's EXPLAIN QUERY PLAN.
+    Validates the cost of a rewritten query: the plan cost estimated from table
+    statistics, and the measured execution time.
 
     Args:
         query (str): The rewritten SQL query to validate.
 
     Returns:
-        str: JSON string with estimated query cost or error message.
+        str: JSON string with estimated query cost, measured time or error message.
     """
     with trace.get_tracer(__name__).start_as_current_span("validate_query_cost"):
         try:
-            conn = sqlite3.connect("query_optimizer.db")
-            cursor = conn.cursor()
-            cursor.execute(f"EXPLAIN QUERY PLAN {query}")
-            plan = cursor.fetchall()
-            conn.close()
-            cost = estimate_cost(plan)
+            optimizer = get_optimizer()
+            with optimizer.lock:
+                analysis = optimizer.analyze(query)
+                measured_ms = optimizer.time_query(query)
+            cost = analysis["estimated_cost"]
             return json.dumps(
                 {
                     "status": "success",
                     "cost": cost,
-                    "message": f"Estimated query cost: {cost}",
+                    "measured_ms": measured_ms,
+                    "bottlenecks": analysis["bottlenecks"],
+                    "message": f"Estimated query cost: {cost} rows touched; measured {measured_ms} ms",
                 }
             )
-        except sqlite3.Error as e:
+        except (sqlite3.Error, ValueError) as e:
             return json.dumps({"status": "error", "message": str(e)})
 
 
-def estimate_cost(plan: List) -> float:
-    """Estimate query cost from SQLite EXPLAIN QUERY PLAN."""
-    total_cost = 0.0
-    for step in plan:
-        detail = step[3].lower()
-        if "scan" in detail and "index" not in detail:
-            total_cost += 100.0
-        elif "index" in detail:
-            total_cost += 10.0
-    return total_cost
+def estimate_cost(plan: List, stats: Optional[TableStats] = None) -> float:
+    """
+    Estimate query cost (rows touched) from SQLite EXPLAIN QUERY PLAN rows.
+
+    Without statistics every table is assumed to hold 1,000 rows.
+    """
+    return estimate_plan_cost(parse_plan(plan), stats or TableStats(None))
@@ -8,7 +8,7 @@ A collection of tools for analyzing stocks using the Strands Agent SDK.
 from . import stock_price_agent
 from . import financial_metrics_agent
 from . import company_analysis_agent
-from . import finance_assistant_swarm_agent
+from . import finance_assistant_swarm
 
 # Import specific functions and classes for convenience
 from .stock_price_agent import get_stock_prices, create_stock_price_agent
@@ -21,9 +21,12 @@ from .company_analysis_agent import (
     get_stock_news,
     create_company_analysis_agent,
 )
-from .finance_assistant_swarm_agent import (
+from .finance_assistant_swarm import (
     StockAnalysisSwarm,
+    analyze_companies,
+    analyze_company,
     create_orchestration_agent,
+    get_swarm,
 )
 
 __all__ = [
@@ -31,12 +34,15 @@ __all__ = [
     "stock_price_agent",
     "financial_metrics_agent",
     "company_analysis_agent",
-    "finance_assistant_swarm_agent",
+    "finance_assistant_swarm",
     # Functions
     "get_stock_prices",
     "get_financial_metrics",
     "get_company_info",
     "get_stock_news",
+    "analyze_company",
+    "analyze_companies",
+    "get_swarm",
     # Agent creators
     "create_stock_price_agent",
     "create_financial_metrics_agent",
@@ -0,0 +1,131 @@
+"""
+Benchmark: sequential per-source scraping vs the concurrent news fetcher
+
+Starts a local mock HTTP server that serves each news source's page layout
+with a configurable per-source latency, then fetches news for a list of
+tickers twice (a swarm run followed by a repeat run).
+
+    before: get_stock_news's original loop - one requests.get per source with
+            no shared session, tried in order until 5 articles are found
+    after:  NewsFetcher - all sources concurrently over one pooled client,
+            returning at 5 unique articles or the deadline, with a per-source
+            TTL cache
+
+Usage (from the swarm agent directory):
+    python benchmarks/bench_news_fetcher.py --tickers 10 \
+        --latency MarketWatch=0.3,CNBC=2.0,"Seeking Alpha"=0.8,"Google News"=0.5
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from news_fetcher import DEFAULT_SOURCES, HEADERS, NewsFetcher
+
+ARTICLES_PER_SOURCE = 3
+
+PAGES = {
+    "MarketWatch": lambda t, i: f'<div class="article__content"><h3 class="article__headline">{t} MarketWatch story {i}</h3>'
+    f'<a class="link" href="/story/{t}-{i}">read</a></div>',
+    "CNBC": lambda t, i: f'<div class="SearchResult-searchResultContent"><span class="Card-title">{t} CNBC story {i}</span>'
+    f'<a class="resultlink" href="https://www.cnbc.com/{t}-{i}">read</a></div>',
+    "Seeking Alpha": lambda t, i: f'<article><a data-test-id="post-list-item-title" href="/news/{t}-{i}">{t} Seeking Alpha story {i}</a></article>',
+    "Google News": lambda t, i: f'<div class="SoaBEf"><a href="https://news.example.com/{t}-{i}">{t} Google News headline number {i}</a></div>',
+}
+
+
+def make_server(latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so pooled clients can reuse connections
+
+        def do_GET(self):
+            source, _, rest = self.path.lstrip("/").partition("/")
+            source = source.replace("_", " ")
+            ticker = rest.split("/")[0].split("?")[0].upper()
+            time.sleep(latency.get(source, 0.0))
+            body = "<html><body>" + "".join(PAGES[source](ticker, i) for i in range(ARTICLES_PER_SOURCE)) + "</body></html>"
+            data = body.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def mock_sources(base):
+    # Every HTTP source points at the mock server; the path carries the ticker
+    return [
+        replace(source, url_template=f"{base}/{source.name.replace(' ', '_')}/{{TICKER}}?q={{query}}")
+        for source in DEFAULT_SOURCES
+        if source.parse is not None
+    ]
+
+
+def before(sources, ticker):
+    all_news = []
+    for source in sources:
+        if len(all_news) >= 5:
+            break
+        response = requests.get(source.url(ticker, ticker), headers=HEADERS, timeout=10)
+        if response.status_code == 200:
+            for item in source.parse(response.text):
+                if item not in all_news:
+                    all_news.append(item)
+    return all_news[:5]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--tickers", type=int, default=10)
+    parser.add_argument("--latency", default="MarketWatch=0.3,CNBC=2.0,Seeking Alpha=0.8,Google News=0.5",
+                        help="Comma-separated source=seconds pairs")
+    parser.add_argument("--deadline", type=float, default=8.0)
+    args = parser.parse_args()
+
+    latency = {name.strip(): float(value) for name, value in (pair.split("=") for pair in args.latency.split(","))}
+    server = make_server(latency)
+    sources = mock_sources(f"http://127.0.0.1:{server.server_address[1]}")
+    tickers = [f"TK{i:02d}" for i in range(args.tickers)]
+    print(f"{args.tickers} tickers, source latency: {latency}")
+
+    start = time.perf_counter()
+    before_counts = [len(before(sources, ticker)) for ticker in tickers * 2]
+    before_s = time.perf_counter() - start
+
+    fetcher = NewsFetcher(sources=sources, deadline=args.deadline, company_name_lookup=lambda t: t)
+    start = time.perf_counter()
+    first = [fetcher.fetch(ticker) for ticker in tickers]
+    first_s = time.perf_counter() - start
+    start = time.perf_counter()
+    second = [fetcher.fetch(ticker) for ticker in tickers]
+    second_s = time.perf_counter() - start
+    after_s = first_s + second_s
+    fetcher.close()
+    server.shutdown()
+
+    after_counts = [len(r["articles"]) for r in first + second]
+    print(f"before  {before_s:6.2f} s  ({before_s / len(before_counts) * 1000:.0f} ms/ticker, "
+          f"{sum(before_counts) / len(before_counts):.1f} articles)")
+    print(f"after   {after_s:6.2f} s  (first run {first_s / len(tickers) * 1000:.0f} ms/ticker, "
+          f"repeat {second_s / len(tickers) * 1000:.1f} ms/ticker, {sum(after_counts) / len(after_counts):.1f} articles)")
+    print(f"speedup: {before_s / after_s:.1f}x; cache {fetcher.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: per-request swarm construction and sequential agents vs the reusable swarm
+
+Analyzes a list of companies with model responses simulated by a fixed
+latency (no Bedrock calls). Agent objects are still constructed for real, so
+setup costs are measured.
+
+    before: each analysis builds a new StockAnalysisSwarm, constructing the
+            three standalone agents (each with its own BedrockModel) just to
+            read their system prompts, then runs the search agent and the
+            price, metrics and news agents one after another
+    after:  one long-lived StockAnalysisSwarm sharing a model client, with
+            analyze_companies() running every search, then every phase-2
+            agent for every ticker, concurrently
+
+Usage (from the swarm agent directory):
+    python benchmarks/bench_swarm.py --companies 5 --latency 1.0
+"""
+
+import os
+import sys
+import time
+import argparse
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+warnings.filterwarnings("ignore")
+
+from finance_assistant_swarm import StockAnalysisSwarm, SEARCH_AGENT, ANALYSIS_AGENTS
+from stock_price_agent import create_stock_price_agent
+from financial_metrics_agent import create_financial_metrics_agent
+from company_analysis_agent import create_company_analysis_agent
+
+
+def simulated_model(spec, latency):
+    def respond(prompt):
+        time.sleep(latency)
+        if spec.agent_id == "search_agent":
+            return prompt.rsplit(":", 1)[1].strip().upper()[:4]
+        return f"{spec.agent_id} report for {prompt}"
+    return respond
+
+
+def before(companies, latency):
+    for company in companies:
+        # StockAnalysisSwarm() per orchestrator: throwaway agents for their prompts
+        create_stock_price_agent(), create_financial_metrics_agent(), create_company_analysis_agent()
+        ticker = simulated_model(SEARCH_AGENT, latency)(SEARCH_AGENT.task.format(query=company))
+        for spec in ANALYSIS_AGENTS:
+            simulated_model(spec, latency)(spec.task.format(ticker=ticker))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--companies", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=1.0, help="Simulated seconds per agent response")
+    args = parser.parse_args()
+    companies = [f"Company {chr(65 + i)}{chr(65 + i)}" for i in range(args.companies)]
+
+    start = time.perf_counter()
+    before(companies, args.latency)
+    before_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    swarm = StockAnalysisSwarm()
+    swarm.agent_factory = lambda spec: (swarm._create_agent(spec), simulated_model(spec, args.latency))[1]
+    results = swarm.analyze_companies(companies)
+    after_s = time.perf_counter() - start
+    swarm.close()
+
+    ok = sum(r["status"] == "success" for r in results.values())
+    timings = next(iter(results.values()))["timings"]
+    print(f"\n{args.companies} companies, {args.latency:.1f} s simulated per agent response")
+    print(f"before  {before_s:6.2f} s")
+    print(f"after   {after_s:6.2f} s  ({ok}/{len(companies)} succeeded; {timings})")
+    print(f"speedup: {before_s / after_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
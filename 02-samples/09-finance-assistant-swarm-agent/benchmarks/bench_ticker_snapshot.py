@@ -0,0 +1,126 @@
+"""
+Benchmark: per-tool yfinance calls vs the shared ticker snapshot cache
+
+Replays the data calls one StockAnalysisSwarm.analyze_company run makes for a
+ticker: the search agent's get_company_info, then the price, metrics and news
+agents in parallel (the news agent calls get_company_info and looks up the
+company name and Yahoo news). Upstream Yahoo Finance calls are simulated with
+a fixed latency and counted.
+
+    before: every tool creates its own yf.Ticker and calls .info/.history/.news
+    after:  every tool reads through TickerSnapshotCache (per-kind TTLs,
+            single-flight coalescing of concurrent loads)
+
+Usage (from the swarm agent directory):
+    python benchmarks/bench_ticker_snapshot.py --tickers 10 --latency 0.3
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ticker_snapshot
+from ticker_snapshot import TickerSnapshotCache
+from company_analysis_agent import get_company_info
+from financial_metrics_agent import get_financial_metrics
+from stock_price_agent import get_stock_prices
+from news_fetcher import fetch_yahoo_news, lookup_company_name
+
+
+class StubYahoo:
+    """Simulated upstream with fixed latency that counts calls per data kind."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def _call(self, kind):
+        with self._lock:
+            self.calls[kind] += 1
+        time.sleep(self.latency)
+
+    def info(self, ticker):
+        self._call("info")
+        return {"longName": f"{ticker} Corp", "shortName": ticker, "sector": "Technology",
+                "marketCap": 1e12, "trailingPE": 25.0, "beta": 1.1, "profitMargins": 0.2}
+
+    def history(self, ticker, period):
+        self._call("history")
+        dates = pd.bdate_range(end="2025-06-30", periods=63)
+        close = 100 + np.cumsum(np.random.default_rng(len(ticker)).normal(0, 1, len(dates)))
+        return pd.DataFrame({"Close": close, "High": close + 1, "Low": close - 1, "Volume": 1_000_000}, index=dates)
+
+    def news(self, ticker):
+        self._call("news")
+        return [{"title": f"{ticker} headline", "link": f"https://example.com/{ticker}", "publisher": "Yahoo Finance",
+                 "providerPublishTime": 1_750_000_000}]
+
+
+def analysis_before(stub, ticker, pool):
+    # Tools as they were: one upstream call per tool invocation
+    stub.info(ticker)  # phase 1: search agent get_company_info
+    phase2 = [
+        lambda: stub.history(ticker, "3mo"),  # price agent
+        lambda: stub.info(ticker),  # metrics agent
+        lambda: (stub.info(ticker), stub.info(ticker), stub.news(ticker)),  # news agent
+    ]
+    list(pool.map(lambda f: f(), phase2))
+
+
+def analysis_after(ticker, pool):
+    get_company_info(ticker)  # phase 1: search agent
+    phase2 = [
+        lambda: get_stock_prices(ticker),
+        lambda: get_financial_metrics(ticker),
+        lambda: (get_company_info(ticker), lookup_company_name(ticker), fetch_yahoo_news(ticker)),
+    ]
+    results = list(pool.map(lambda f: f(), phase2))
+    assert results[0]["status"] == "success" and results[1]["status"] == "success"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--tickers", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.3, help="Simulated seconds per upstream call")
+    args = parser.parse_args()
+    tickers = [f"TK{i:02d}" for i in range(args.tickers)]
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        stub = StubYahoo(args.latency)
+        start = time.perf_counter()
+        for ticker in tickers:
+            analysis_before(stub, ticker, pool)
+        before_s = time.perf_counter() - start
+        before_calls = dict(stub.calls)
+
+        stub = StubYahoo(args.latency)
+        cache = TickerSnapshotCache(loaders={"info": stub.info, "history": stub.history, "news": stub.news})
+        ticker_snapshot._snapshots = cache
+        start = time.perf_counter()
+        for ticker in tickers:
+            analysis_after(ticker, pool)
+        after_s = time.perf_counter() - start
+        after_calls = dict(stub.calls)
+
+    print(f"{args.tickers} analyses, {args.latency * 1000:.0f} ms per upstream call")
+    print(f"before  {before_s:6.2f} s  upstream calls per analysis: "
+          f"{ {k: v / args.tickers for k, v in before_calls.items()} }")
+    print(f"after   {after_s:6.2f} s  upstream calls per analysis: "
+          f"{ {k: v / args.tickers for k, v in after_calls.items()} }")
+    print(f"speedup: {before_s / after_s:.1f}x")
+    for kind, stats in cache.stats()["kinds"].items():
+        print(f"  {kind:8s} {stats}")
+
+
+if __name__ == "__main__":
+    main()
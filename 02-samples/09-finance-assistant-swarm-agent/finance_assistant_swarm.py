@@ -6,146 +6,333 @@ A collaborative swarm of specialized 02-agents for comprehensive stock analysis.
 """
 
 # Standard library imports
+import os
+import re
+import threading
 import time
-from typing import Dict, Any, List
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, Any, List, Optional
 
 # Third-party imports
-from strands import Agent
+from strands import Agent, tool
 from strands.models import BedrockModel
 from strands_tools import think, http_request
-from strands_tools.swarm import Swarm, SwarmAgent
 
-from stock_price_agent import get_stock_prices, create_stock_price_agent
+from stock_price_agent import get_stock_prices, STOCK_PRICE_AGENT_PROMPT
 from financial_metrics_agent import (
     get_financial_metrics,
-    create_financial_metrics_agent,
+    FINANCIAL_METRICS_AGENT_PROMPT,
 )
 from company_analysis_agent import (
     get_company_info,
     get_stock_news,
-    create_company_analysis_agent,
+    COMPANY_ANALYSIS_AGENT_PROMPT,
 )
+from ticker_snapshot import get_snapshot_cache
 
+SWARM_AGENT_TIMEOUT = float(os.environ.get("SWARM_AGENT_TIMEOUT", "120"))
+SWARM_MAX_WORKERS = int(os.environ.get("SWARM_MAX_WORKERS", "12"))
 
-class StockAnalysisSwarm:
-    """A collaborative swarm of specialized 02-agents for stock analysis."""
+# A query that already looks like a ticker skips the search phase
+_TICKER_PATTERN = re.compile(r"^[A-Z]{1,5}([.-][A-Z]{1,2})?$")
+# A ticker marked as one inside prose: "$AAPL", "(AAPL)", "ticker: AAPL", "NASDAQ: AAPL"
+_TICKER_IN_TEXT = re.compile(
+    r"(?:\$|\((?=[A-Z.-]+\))|\b(?i:ticker(?: symbol)?|symbol)(?: is)?:?\s+|\b(?:NASDAQ|NYSE|AMEX):\s*)"
+    r"\**([A-Z]{1,5}(?:[.-][A-Z]{1,2})?)\**(?![\w-]|\.\w)"
+)
 
-    def __init__(self):
-        """Initialize the swarm with specialized 02-agents."""
-        # Initialize Swarm with Nova Pro model
-        self.swarm = Swarm(
-            task="Analyze company stock with multiple specialized 02-agents",
-            coordination_pattern="collaborative",
-        )
 
-        # Create SwarmAgent instances with correct parameters
-        self.search_agent = SwarmAgent(
-            agent_id="search_agent",
-            system_prompt="""You are a company information specialist.
-            Your role is to:
-            1. Use get_company_info to find company details and ticker
-            2. Verify company identity
-            3. Share company information with other 02-agents
-            4. Ensure accuracy of company data""",
-            shared_memory=self.swarm.shared_memory,
-        )
-        self.search_agent.tools = [get_company_info, think]
+@dataclass(frozen=True)
+class SwarmAgentSpec:
+    """Definition of one specialised agent; agents are built from it per task."""
+
+    agent_id: str
+    system_prompt: str
+    tools: tuple
+    task: str
 
-        self.price_agent = SwarmAgent(
-            agent_id="price_agent",
-            system_prompt=create_stock_price_agent().system_prompt,  # Use the created agent's system prompt
-            shared_memory=self.swarm.shared_memory,
-        )
-        self.price_agent.tools = [
-            get_stock_prices,
-            http_request,
-            think,
-        ]  # Set tools directly
-
-        self.metrics_agent = SwarmAgent(
-            agent_id="metrics_agent",
-            system_prompt=create_financial_metrics_agent().system_prompt,
-            shared_memory=self.swarm.shared_memory,
-        )
-        self.metrics_agent.tools = [get_financial_metrics, http_request, think]
 
-        self.news_agent = SwarmAgent(
-            agent_id="news_agent",
-            system_prompt=create_company_analysis_agent().system_prompt,
-            shared_memory=self.swarm.shared_memory,
+SEARCH_AGENT = SwarmAgentSpec(
+    agent_id="search_agent",
+    system_prompt="""You are a company information specialist.
+    Your role is to:
+    1. Use get_company_info to find company details and ticker
+    2. Verify company identity
+    3. Reply with the verified ticker symbol alone on the first line
+    4. Ensure accuracy of company data""",
+    tools=(get_company_info, think),
+    task="Find the stock ticker symbol for: {query}",
+)
+
+ANALYSIS_AGENTS = (
+    SwarmAgentSpec(
+        agent_id="price_agent",
+        system_prompt=STOCK_PRICE_AGENT_PROMPT,
+        tools=(get_stock_prices, http_request, think),
+        task="Please analyze the stock price for: {ticker}",
+    ),
+    SwarmAgentSpec(
+        agent_id="metrics_agent",
+        system_prompt=FINANCIAL_METRICS_AGENT_PROMPT,
+        tools=(get_financial_metrics, http_request, think),
+        task="Please analyze the financial metrics for: {ticker}",
+    ),
+    SwarmAgentSpec(
+        agent_id="news_agent",
+        system_prompt=COMPANY_ANALYSIS_AGENT_PROMPT,
+        tools=(get_company_info, get_stock_news, http_request, think),
+        task="Please provide a comprehensive analysis for: {ticker}",
+    ),
+)
+
+
+class StockAnalysisSwarm:
+    """A long-lived, reusable swarm of specialized 02-agents for stock analysis.
+
+    The model client, agent definitions and worker pool are created once and
+    shared by every analysis. Each task gets a fresh agent with an empty
+    conversation, so concurrent analyses never share message history. The
+    price, metrics and news agents run concurrently, each with its own
+    timeout, and many tickers can be analysed in one batched call.
+    """
+
+    def __init__(
+        self,
+        model: Any = None,
+        agent_timeout: float = SWARM_AGENT_TIMEOUT,
+        max_workers: int = SWARM_MAX_WORKERS,
+        agent_factory: Optional[Callable[[SwarmAgentSpec], Callable[[str], Any]]] = None,
+    ):
+        """Initialize the swarm with specialized 02-agents."""
+        self.model = model or BedrockModel(
+            model_id="us.amazon.nova-pro-v1:0", region="us-east-1"
         )
-        self.news_agent.tools = [get_company_info, get_stock_news, http_request, think]
-
-        # Add 02-agents to swarm with their system prompts
-        self.swarm.add_agent(
-            self.search_agent,
-            system_prompt="""You are the company information coordinator in the swarm.
-            Use get_company_info to find and verify company information.
-            Share verified company data with other 02-agents.
-            Focus on accuracy and completeness of information.""",
+        self.agent_timeout = agent_timeout
+        self.search_agent = SEARCH_AGENT
+        self.analysis_agents = ANALYSIS_AGENTS
+        self.agent_factory = agent_factory or self._create_agent
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="swarm-agent"
         )
 
-        self.swarm.add_agent(
-            self.price_agent,
-            system_prompt="""You are a price analysis specialist in the swarm.
-            Analyze stock prices, trends, and patterns.
-            Share price analysis with other 02-agents.
-            Focus on recent price movements and volume analysis.""",
+    def _create_agent(self, spec: SwarmAgentSpec) -> Agent:
+        return Agent(
+            system_prompt=spec.system_prompt,
+            model=self.model,
+            tools=list(spec.tools),
+            callback_handler=None,  # concurrent agents would interleave streamed output
         )
 
-        self.swarm.add_agent(
-            self.metrics_agent,
-            system_prompt="""You are a financial metrics specialist in the swarm.
-            Analyze company financial health and metrics.
-            Share financial insights with other 02-agents.
-            Focus on key performance indicators and growth metrics.""",
+    def _run_agent(self, spec: SwarmAgentSpec, prompt: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            response = self.agent_factory(spec)(prompt)
+            return {
+                "agent_id": spec.agent_id,
+                "status": "success",
+                "result": str(response),
+                "seconds": round(time.perf_counter() - started, 3),
+            }
+        except Exception as e:
+            return {
+                "agent_id": spec.agent_id,
+                "status": "error",
+                "message": str(e),
+                "seconds": round(time.perf_counter() - started, 3),
+            }
+
+    def _run_phase(self, jobs: List[tuple]) -> List[Dict[str, Any]]:
+        """
+        Run (spec, prompt) jobs concurrently on the worker pool.
+
+        Each agent gets agent_timeout from the moment it starts; a job still
+        queued behind busy workers gets one extra agent_timeout to start.
+        """
+        submitted = time.perf_counter()
+        starts: Dict[int, float] = {}
+
+        def run(index, spec, prompt):
+            starts[index] = time.perf_counter()
+            return self._run_agent(spec, prompt)
+
+        futures = [
+            self.executor.submit(run, i, spec, prompt)
+            for i, (spec, prompt) in enumerate(jobs)
+        ]
+        results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+        pending = set(range(len(jobs)))
+
+        def deadline(index):
+            return starts.get(index, submitted + self.agent_timeout) + self.agent_timeout
+
+        while pending:
+            remaining = min(deadline(i) for i in pending) - time.perf_counter()
+            if remaining > 0:
+                wait(
+                    [futures[i] for i in pending],
+                    timeout=remaining,
+                    return_when=FIRST_COMPLETED,
+                )
+            now = time.perf_counter()
+            for i in list(pending):
+                if futures[i].done():
+                    results[i] = futures[i].result()
+                elif now >= deadline(i):
+                    # The worker cannot be interrupted; its late result is discarded
+                    futures[i].cancel()
+                    spec = jobs[i][0]
+                    results[i] = {
+                        "agent_id": spec.agent_id,
+                        "status": "timeout",
+                        "message": f"No response within {self.agent_timeout:g}s",
+                        "seconds": round(now - starts.get(i, now), 3),
+                    }
+                else:
+                    continue
+                pending.discard(i)
+        return results
+
+    @staticmethod
+    def _parse_ticker(text: str) -> Optional[str]:
+        # The search agent is asked for the ticker alone on the first line
+        lines = [line.strip().strip("*`").strip().rstrip(".") for line in text.strip().splitlines() if line.strip()]
+        if lines and _TICKER_PATTERN.match(lines[0]):
+            return lines[0]
+        # Otherwise only a symbol explicitly marked as a ticker counts, never any capitalized
+        # word; single letters are skipped there too, "(A)" is more often a list marker
+        for match in _TICKER_IN_TEXT.finditer(text):
+            ticker = match.group(1)
+            if len(ticker) > 1 and _TICKER_PATTERN.match(ticker):
+                return ticker
+        return None
+
+    def analyze_companies(self, queries: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Run the swarm analysis for many companies in one batch.
+
+        Ticker searches for every query run concurrently, then the price,
+        metrics and news agents for every resolved ticker run concurrently.
+
+        Args:
+            queries: Company names or ticker symbols
+
+        Returns:
+            Query to analysis result, each with status, ticker, search_results,
+            analysis_results and per-phase timings in seconds
+        """
+        started = time.perf_counter()
+        queries = list(dict.fromkeys(q.strip() for q in queries if q.strip()))
+        results: Dict[str, Dict[str, Any]] = {}
+
+        # Phase 1: Search for tickers (skipped for queries that already are tickers)
+        print(f"\nPhase 1: Searching for {len(queries)} company ticker(s)...")
+        tickers: Dict[str, str] = {}
+        search_results: Dict[str, List[Dict[str, Any]]] = {}
+        to_search = []
+        for query in queries:
+            if _TICKER_PATTERN.match(query):
+                tickers[query] = query
+            else:
+                to_search.append(query)
+        searched = self._run_phase(
+            [(self.search_agent, self.search_agent.task.format(query=q)) for q in to_search]
         )
+        for query, search_result in zip(to_search, searched):
+            search_results[query] = [search_result]
+            ticker = (
+                self._parse_ticker(search_result.get("result", ""))
+                if search_result["status"] == "success"
+                else None
+            )
+            if ticker:
+                tickers[query] = ticker
+            else:
+                results[query] = {
+                    "status": "error",
+                    "message": "Failed to find ticker symbol",
+                    "search_results": search_results[query],
+                }
+        search_seconds = time.perf_counter() - started
+        for query, ticker in tickers.items():
+            print(f"Found ticker: {ticker}")
+
+        # Phase 2: Parallel Analysis across all agents and tickers
+        print("\nPhase 2: Gathering data...")
+        phase2_started = time.perf_counter()
+        jobs = [
+            (spec, spec.task.format(ticker=ticker))
+            for ticker in tickers.values()
+            for spec in self.analysis_agents
+        ]
+        analysed = self._run_phase(jobs)
+        analysis_seconds = time.perf_counter() - phase2_started
+
+        per_ticker = len(self.analysis_agents)
+        for i, (query, ticker) in enumerate(tickers.items()):
+            analysis_results = analysed[i * per_ticker:(i + 1) * per_ticker]
+            results[query] = {
+                "status": "success"
+                if any(r["status"] == "success" for r in analysis_results)
+                else "error",
+                "ticker": ticker,
+                "search_results": search_results.get(query, []),
+                "analysis_results": analysis_results,
+            }
 
-        self.swarm.add_agent(
-            self.news_agent,
-            system_prompt="""You are a news analysis specialist in the swarm.
-            Analyze company news and market sentiment.
-            Share news insights with other 02-agents.
-            Focus on recent developments and market perception.""",
+        timings = {
+            "search_seconds": round(search_seconds, 3),
+            "analysis_seconds": round(analysis_seconds, 3),
+            "total_seconds": round(time.perf_counter() - started, 3),
+        }
+        print(
+            f"Swarm timings: search {timings['search_seconds']:.2f}s, "
+            f"analysis {timings['analysis_seconds']:.2f}s, total {timings['total_seconds']:.2f}s"
         )
+        for result in results.values():
+            result["timings"] = timings
+        return {query: results[query] for query in queries}
 
     def analyze_company(self, query: str) -> Dict[str, Any]:
         """Run the swarm analysis for a company."""
         try:
-            # Initialize shared memory with query
-            self.swarm.shared_memory.store("query", query)
-
-            # Phase 1: Search for ticker
-            print("\nPhase 1: Searching for company ticker...")
-            search_result = self.swarm.process_phase()
-
-            if search_result:
-                ticker = (
-                    search_result[0]
-                    .get("result", {})
-                    .get("content", [{}])[0]
-                    .get("text", "")
-                )
-                self.swarm.shared_memory.store("ticker", ticker)
-                print(f"Found ticker: {ticker}")
-
-                # Phase 2: Parallel Analysis
-                print("\nPhase 2: Gathering data...")
-                analysis_results = self.swarm.process_phase()
-
-                return {
-                    "status": "success",
-                    "ticker": ticker,
-                    "search_results": search_result,
-                    "analysis_results": analysis_results,
-                    "shared_memory": self.swarm.shared_memory.get_all_knowledge(),
-                }
-            else:
-                return {"status": "error", "message": "Failed to find ticker symbol"}
-
+            return self.analyze_companies([query])[query.strip()]
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot cache statistics for the data the agents have fetched."""
+        return get_snapshot_cache().stats()
+
+    def close(self):
+        """Shut down the worker pool."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_swarm: Optional[StockAnalysisSwarm] = None
+_swarm_lock = threading.Lock()
+
+
+def get_swarm() -> StockAnalysisSwarm:
+    """Shared swarm instance, created on first use and reused by every orchestrator."""
+    global _swarm
+    with _swarm_lock:
+        if _swarm is None:
+            _swarm = StockAnalysisSwarm()
+        return _swarm
+
+
+@tool
+def analyze_company(query: str) -> Dict[str, Any]:
+    """Run the stock analysis swarm for one company name or ticker symbol."""
+    return get_swarm().analyze_company(query)
+
+
+@tool
+def analyze_companies(queries: List[str]) -> Dict[str, Any]:
+    """Run the stock analysis swarm for several company names or ticker symbols in one batch."""
+    return get_swarm().analyze_companies(queries)
+
 
 def create_orchestration_agent() -> Agent:
     """Create the main orchestration agent that coordinates the swarm."""
@@ -156,6 +343,9 @@ def create_orchestration_agent() -> Agent:
         3. Integrate and synthesize all findings
         4. Present a comprehensive analysis
         
+        Use analyze_company for one company, or analyze_companies to analyze
+        several companies in one batch.
+        
         When analyzing results, structure the report as follows:
         1. Company Overview
            - Company name and ticker
@@ -183,7 +373,7 @@ def create_orchestration_agent() -> Agent:
            - Future outlook
            - Recommendation summary""",
         model=BedrockModel(model_id="us.amazon.nova-pro-v1:0", region="us-east-1"),
-        tools=[StockAnalysisSwarm().analyze_company, think, http_request],
+        tools=[analyze_company, analyze_companies, think, http_request],
     )
 
 
@@ -9,11 +9,44 @@ import datetime as dt
 from typing import Dict, Union
 
 # Third-party imports
-import yfinance as yf
 from strands import Agent, tool
 from strands.models.bedrock import BedrockModel
 from strands_tools import think, http_request
 
+from ticker_snapshot import get_snapshot_cache
+
+
+FINANCIAL_METRICS_AGENT_PROMPT = """You are a financial analysis specialist. Follow these steps:
+
+<input>
+When user provides a company ticker:
+1. Use get_financial_metrics to fetch data
+2. Analyze key financial metrics
+3. Provide comprehensive analysis in the format below
+</input>
+
+<output_format>
+1. Company Overview:
+   - Market Cap
+   - Beta
+   - Key Ratios
+
+2. Valuation Metrics:
+   - P/E Ratio
+   - PEG Ratio
+   - Price to Book
+
+3. Financial Health:
+   - Profit Margins
+   - Debt Metrics
+   - Growth Indicators
+
+4. Investment Metrics:
+   - Dividend Information
+   - Return on Equity
+   - Risk Assessment
+</output_format>"""
+
 
 @tool
 def get_financial_metrics(ticker: str) -> Union[Dict, str]:
@@ -22,8 +55,8 @@ def get_financial_metrics(ticker: str) -> Union[Dict, str]:
         if not ticker.strip():
             return {"status": "error", "message": "Ticker symbol is required"}
 
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        # Shared fundamentals snapshot (also used by get_company_info)
+        info = get_snapshot_cache().info(ticker)
 
         # Get financial data
         try:
@@ -98,36 +131,7 @@ def create_initial_messages():
 def create_financial_metrics_agent():
     """Create and configure the financial metrics analysis agent."""
     return Agent(
-        system_prompt="""You are a financial analysis specialist. Follow these steps:
-
-<input>
-When user provides a company ticker:
-1. Use get_financial_metrics to fetch data
-2. Analyze key financial metrics
-3. Provide comprehensive analysis in the format below
-</input>
-
-<output_format>
-1. Company Overview:
-   - Market Cap
-   - Beta
-   - Key Ratios
-
-2. Valuation Metrics:
-   - P/E Ratio
-   - PEG Ratio
-   - Price to Book
-
-3. Financial Health:
-   - Profit Margins
-   - Debt Metrics
-   - Growth Indicators
-
-4. Investment Metrics:
-   - Dividend Information
-   - Return on Equity
-   - Risk Assessment
-</output_format>""",
+        system_prompt=FINANCIAL_METRICS_AGENT_PROMPT,
         model=BedrockModel(model_id="us.amazon.nova-pro-v1:0", region="us-east-1"),
         tools=[get_financial_metrics, http_request, think],
     )
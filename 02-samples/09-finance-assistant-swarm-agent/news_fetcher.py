@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Concurrent News Fetcher
+
+Queries every news source for a ticker at the same time through one pooled
+HTTP client, returns as soon as enough unique articles are collected or the
+deadline passes, and caches each source's articles per ticker for a TTL.
+Sources that are still running when the fetch returns keep going in the
+background and fill the cache for the next request.
+"""
+
+import asyncio
+import datetime as dt
+import os
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Third-party imports
+import httpx
+from bs4 import BeautifulSoup
+
+from ticker_snapshot import get_snapshot_cache
+
+NEWS_MAX_ARTICLES = int(os.environ.get("NEWS_MAX_ARTICLES", "5"))
+NEWS_DEADLINE = float(os.environ.get("NEWS_DEADLINE", "8"))
+NEWS_SOURCE_TIMEOUT = float(os.environ.get("NEWS_SOURCE_TIMEOUT", "10"))
+NEWS_CACHE_TTL = float(os.environ.get("NEWS_CACHE_TTL", "900"))
+NEWS_MAX_CONNECTIONS = int(os.environ.get("NEWS_MAX_CONNECTIONS", "20"))
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,images/webp,*/*;q=0.8",
+}
+
+Article = Dict[str, str]
+
+
+def _today() -> str:
+    return dt.datetime.now().strftime("%Y-%m-%d")
+
+
+def _article(title: str, url: str, source: str, summary: str = "") -> Article:
+    return {
+        "title": title,
+        "summary": summary,
+        "url": url,
+        "source": source,
+        "date": _today(),
+    }
+
+
+def parse_marketwatch(html: str) -> List[Article]:
+    """Parse a MarketWatch quote page."""
+    soup = BeautifulSoup(html, "html.parser")
+    articles = []
+    for article in soup.select(".article__content")[:5]:
+        title_elem = article.select_one(".article__headline")
+        link_elem = article.select_one("a.link")
+        if title_elem and link_elem:
+            link = link_elem.get("href", "")
+            # Make sure link is absolute
+            if link and not link.startswith("http"):
+                link = f"https://www.marketwatch.com{link}"
+            articles.append(_article(title_elem.text.strip(), link, "MarketWatch"))
+    return articles
+
+
+def parse_cnbc(html: str) -> List[Article]:
+    """Parse a CNBC search results page."""
+    soup = BeautifulSoup(html, "html.parser")
+    articles = []
+    for article in soup.select(".SearchResult-searchResultContent")[:5]:
+        title_elem = article.select_one(".Card-title")
+        link_elem = article.select_one("a.resultlink")
+        if title_elem and link_elem:
+            articles.append(
+                _article(title_elem.text.strip(), link_elem.get("href", ""), "CNBC")
+            )
+    return articles
+
+
+def parse_seeking_alpha(html: str) -> List[Article]:
+    """Parse a Seeking Alpha symbol news page."""
+    soup = BeautifulSoup(html, "html.parser")
+    articles = []
+    for article in soup.select("article")[:5]:
+        title_elem = article.select_one('a[data-test-id="post-list-item-title"]')
+        if title_elem:
+            link = title_elem.get("href", "")
+            # Make sure link is absolute
+            if link and not link.startswith("http"):
+                link = f"https://seekingalpha.com{link}"
+            articles.append(_article(title_elem.text.strip(), link, "Seeking Alpha"))
+    return articles
+
+
+def parse_google_news(html: str) -> List[Article]:
+    """Parse a Google News search results page."""
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Try different selectors for Google News
+    news_elements = []
+    for selector in ["div.SoaBEf", "div.dbsr", "g-card", ".WlydOe", ".ftSUBd"]:
+        if not news_elements:
+            news_elements = soup.select(selector)
+
+    # If still no results, try to find any links with news-like content
+    if not news_elements:
+        for link in soup.find_all("a"):
+            href = link.get("href", "")
+            if "news" in href.lower() and link.text and len(link.text.strip()) > 20:
+                news_elements.append(link)
+
+    articles = []
+    for element in news_elements[:5]:
+        link_elem = element if element.name == "a" else element.find("a")
+        if not link_elem:
+            continue
+        title = link_elem.text.strip()
+        link = link_elem.get("href", "")
+        if link.startswith("/url?q="):
+            link = link.split("/url?q=")[1].split("&")[0]
+        if title and link and len(title) > 10:
+            articles.append(_article(title, link, "Google News"))
+    return articles
+
+
+def fetch_yahoo_news(ticker: str) -> List[Article]:
+    """Fetch news from the Yahoo Finance API (blocking; run in a worker thread)."""
+    articles = []
+    for item in get_snapshot_cache().news(ticker)[:5]:
+        article = {
+            "title": item.get("title", ""),
+            "summary": item.get("summary", "")[:300] if item.get("summary") else "",
+            "url": item.get("link", ""),
+            "source": item.get("publisher", "Yahoo Finance"),
+            "date": dt.datetime.fromtimestamp(
+                item.get("providerPublishTime", 0)
+            ).strftime("%Y-%m-%d"),
+        }
+        if article["title"] and article["url"]:
+            articles.append(article)
+    return articles
+
+
+def lookup_company_name(ticker: str) -> str:
+    """Company short name for search queries (blocking; run in a worker thread)."""
+    try:
+        # Same fundamentals snapshot the company info and metrics tools read
+        info = get_snapshot_cache().info(ticker)
+        return info.get("shortName") or info.get("longName") or ticker
+    except Exception:
+        return ticker
+
+
+@dataclass(frozen=True)
+class NewsSource:
+    """A news source: either an HTTP page plus parser, or a blocking fetch function."""
+
+    name: str
+    url_template: str = ""
+    parse: Optional[Callable[[str], List[Article]]] = None
+    fetch: Optional[Callable[[str], List[Article]]] = None
+
+    @property
+    def needs_company_name(self) -> bool:
+        return "{query}" in self.url_template
+
+    def url(self, ticker: str, company_name: str) -> str:
+        return self.url_template.format(
+            ticker=ticker.lower(),
+            TICKER=ticker.upper(),
+            query=urllib.parse.quote(f"{company_name} stock"),
+        )
+
+
+DEFAULT_SOURCES = [
+    NewsSource("Yahoo Finance API", fetch=fetch_yahoo_news),
+    NewsSource(
+        "MarketWatch",
+        "https://www.marketwatch.com/investing/stock/{ticker}",
+        parse_marketwatch,
+    ),
+    NewsSource(
+        "CNBC",
+        "https://www.cnbc.com/search/?query={query}&qsearchterm={query}",
+        parse_cnbc,
+    ),
+    NewsSource(
+        "Seeking Alpha",
+        "https://seekingalpha.com/symbol/{TICKER}/news",
+        parse_seeking_alpha,
+    ),
+    NewsSource(
+        "Google News",
+        "https://www.google.com/search?q={query}%20news&tbm=nws",
+        parse_google_news,
+    ),
+]
+
+
+class NewsFetcher:
+    """Concurrent multi-source news fetcher with a pooled client and a per-source TTL cache."""
+
+    def __init__(
+        self,
+        sources: Optional[List[NewsSource]] = None,
+        max_articles: int = NEWS_MAX_ARTICLES,
+        deadline: float = NEWS_DEADLINE,
+        source_timeout: float = NEWS_SOURCE_TIMEOUT,
+        cache_ttl: float = NEWS_CACHE_TTL,
+        max_connections: int = NEWS_MAX_CONNECTIONS,
+        company_name_lookup: Callable[[str], str] = lookup_company_name,
+    ):
+        self.sources = list(sources or DEFAULT_SOURCES)
+        self.max_articles = max_articles
+        self.deadline = deadline
+        self.source_timeout = source_timeout
+        self.cache_ttl = cache_ttl
+        self.max_connections = max_connections
+        self.company_name_lookup = company_name_lookup
+        self._cache: Dict[Tuple[str, str], Tuple[float, List[Article]]] = {}
+        self._names: Dict[str, Tuple[float, str]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: set = set()
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "cache_hits": 0, "cache_misses": 0, "errors": 0}
+
+    # --- Event loop ---
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Background event loop that owns the pooled client, so connections outlive each call."""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="news-fetcher", daemon=True
+                ).start()
+                self._loop = loop
+            return self._loop
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=HEADERS,
+                timeout=self.source_timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def _shutdown(self):
+        # Sources still filling the cache in the background are abandoned
+        for task in list(self._inflight):
+            task.cancel()
+        await asyncio.gather(*self._inflight, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def close(self):
+        """Cancel background source fetches, close the pooled client and stop the background loop."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+    # --- Cache ---
+
+    def _cached(self, ticker: str, source: str) -> Optional[List[Article]]:
+        entry = self._cache.get((ticker, source))
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def clear_cache(self):
+        """Drop all cached articles and company names."""
+        self._cache.clear()
+        self._names.clear()
+
+    # --- Fetching ---
+
+    async def _company_name(self, ticker: str) -> str:
+        entry = self._names.get(ticker)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        name = await asyncio.to_thread(self.company_name_lookup, ticker)
+        self._names[ticker] = (time.monotonic() + self.cache_ttl, name)
+        return name
+
+    async def _fetch_source(
+        self, source: NewsSource, ticker: str, company_name: "asyncio.Future[str]"
+    ) -> List[Article]:
+        try:
+            if source.fetch is not None:
+                articles = await asyncio.wait_for(
+                    asyncio.to_thread(source.fetch, ticker), self.source_timeout
+                )
+            else:
+                name = await company_name if source.needs_company_name else ticker
+                response = await self._get_client().get(source.url(ticker, name))
+                if response.status_code != 200:
+                    self.counters["errors"] += 1
+                    return []
+                articles = source.parse(response.text)
+        except Exception as e:
+            self.counters["errors"] += 1
+            print(f"Error with {source.name}: {str(e) or type(e).__name__}")
+            return []
+        # Only successful responses are cached, so failed sources are retried next time
+        self._cache[(ticker, source.name)] = (
+            time.monotonic() + self.cache_ttl,
+            articles,
+        )
+        return articles
+
+    async def _fetch(self, ticker: str, company_name: Optional[str]) -> Dict:
+        started = time.perf_counter()
+        ticker = ticker.strip().upper()
+        self.counters["requests"] += 1
+
+        if company_name:
+            name_task = asyncio.get_running_loop().create_future()
+            name_task.set_result(company_name)
+        else:
+            name_task = asyncio.ensure_future(self._company_name(ticker))
+
+        results: Dict[str, List[Article]] = {}
+        tasks = {}
+        for source in self.sources:
+            cached = self._cached(ticker, source.name)
+            if cached is not None:
+                self.counters["cache_hits"] += 1
+                results[source.name] = cached
+            else:
+                self.counters["cache_misses"] += 1
+                task = asyncio.ensure_future(
+                    self._fetch_source(source, ticker, name_task)
+                )
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+                tasks[task] = source.name
+
+        def collect() -> List[Article]:
+            # Merge in source priority order, dropping duplicate URLs and titles
+            articles, seen = [], set()
+            for source in self.sources:
+                for article in results.get(source.name, []):
+                    keys = (article["url"].rstrip("/"), article["title"].lower())
+                    if keys[0] in seen or keys[1] in seen:
+                        continue
+                    seen.update(keys)
+                    articles.append(article)
+            return articles
+
+        pending = set(tasks)
+        deadline = started + self.deadline
+        articles = collect()
+        while pending and len(articles) < self.max_articles:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                results[tasks[task]] = task.result()
+            articles = collect()
+
+        if company_name is None and name_task.done():
+            company_name = name_task.result()
+
+        return {
+            "symbol": ticker,
+            "company_name": company_name or ticker,
+            "articles": articles[: self.max_articles],
+            "sources_checked": [s.name for s in self.sources if s.name in results],
+            "sources_pending": [tasks[task] for task in pending],
+            "elapsed": round(time.perf_counter() - started, 3),
+        }
+
+    async def afetch(self, ticker: str, company_name: Optional[str] = None) -> Dict:
+        """
+        Fetch news for a ticker from an async caller.
+
+        Args:
+            ticker: Stock ticker symbol
+            company_name: Company name for search-based sources (looked up if omitted)
+
+        Returns:
+            Dict with symbol, company_name, articles, sources_checked, sources_pending and elapsed
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._fetch(ticker, company_name), self._ensure_loop()
+        )
+        return await asyncio.wrap_future(future)
+
+    def fetch(self, ticker: str, company_name: Optional[str] = None) -> Dict:
+        """
+        Fetch news for a ticker, blocking until enough articles arrive or the deadline passes.
+
+        Args:
+            ticker: Stock ticker symbol
+            company_name: Company name for search-based sources (looked up if omitted)
+
+        Returns:
+            Dict with symbol, company_name, articles, sources_checked, sources_pending and elapsed
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self._fetch(ticker, company_name), self._ensure_loop()
+        ).result()
+
+    def stats(self) -> Dict:
+        """Request, cache hit and error counters."""
+        lookups = self.counters["cache_hits"] + self.counters["cache_misses"]
+        return {
+            **self.counters,
+            "cache_hit_rate": round(self.counters["cache_hits"] / lookups, 3)
+            if lookups
+            else None,
+            "cached_entries": len(self._cache),
+        }
+
+
+_fetcher: Optional[NewsFetcher] = None
+
+
+def get_news_fetcher() -> NewsFetcher:
+    """Shared news fetcher, so the connection pool and cache persist across tool calls."""
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = NewsFetcher()
+    return _fetcher
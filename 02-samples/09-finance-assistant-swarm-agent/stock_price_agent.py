@@ -9,11 +9,35 @@ import datetime as dt
 from typing import Dict, Union
 
 # Third-party imports
-import yfinance as yf
 from strands import Agent, tool
 from strands.models.bedrock import BedrockModel
 from strands_tools import think, http_request
 
+from ticker_snapshot import get_snapshot_cache
+
+
+STOCK_PRICE_AGENT_PROMPT = """You are a stock price analysis specialist. Follow these steps:
+
+<input>
+When user provides a company name or ticker:
+1. Use get_stock_prices to fetch data
+2. Analyze price movements and trends
+3. Provide analysis in the format below
+</input>
+
+<output_format>
+1. Price Information:
+   - Current Price
+   - Price Change
+   - Volume
+
+2. Recent Performance:
+   - 90-day High/Low
+   - Trend Analysis
+
+3. Key Metrics Summary
+</output_format>"""
+
 
 @tool
 def get_stock_prices(ticker: str) -> Union[Dict, str]:
@@ -23,9 +47,8 @@ def get_stock_prices(ticker: str) -> Union[Dict, str]:
         if not ticker.strip():
             return {"status": "error", "message": "Ticker symbol is required"}
 
-        # Get stock data
-        stock = yf.Ticker(ticker)
-        data = stock.history(period="3mo")
+        # Get stock data from the shared quote snapshot
+        data = get_snapshot_cache().history(ticker, period="3mo")
 
         if data.empty:
             return {"status": "error", "message": f"No data found for ticker {ticker}"}
@@ -76,27 +99,7 @@ def create_initial_messages():
 def create_stock_price_agent():
     """Create and configure the stock price analysis agent."""
     return Agent(
-        system_prompt="""You are a stock price analysis specialist. Follow these steps:
-
-<input>
-When user provides a company name or ticker:
-1. Use get_stock_prices to fetch data
-2. Analyze price movements and trends
-3. Provide analysis in the format below
-</input>
-
-<output_format>
-1. Price Information:
-   - Current Price
-   - Price Change
-   - Volume
-
-2. Recent Performance:
-   - 90-day High/Low
-   - Trend Analysis
-
-3. Key Metrics Summary
-</output_format>""",
+        system_prompt=STOCK_PRICE_AGENT_PROMPT,
         model=BedrockModel(model_id="us.amazon.nova-pro-v1:0", region="us-east-1"),
         tools=[get_stock_prices, http_request, think],
     )
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Ticker Snapshot Cache
+
+A process-wide cache of Yahoo Finance data shared by every agent in the swarm.
+Company info and financial metrics read the same fundamentals snapshot, price
+analysis reads a quote history snapshot, and the news agent reads both. Each
+data kind has its own TTL. Concurrent requests for the same ticker and kind
+are coalesced into one upstream call (single-flight), so one swarm analysis
+makes at most one upstream call per data kind.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+SNAPSHOT_QUOTE_TTL = float(os.environ.get("SNAPSHOT_QUOTE_TTL", "60"))
+SNAPSHOT_FUNDAMENTALS_TTL = float(os.environ.get("SNAPSHOT_FUNDAMENTALS_TTL", "3600"))
+
+
+def _load_info(ticker: str) -> Dict[str, Any]:
+    import yfinance as yf
+
+    return yf.Ticker(ticker).info
+
+
+def _load_history(ticker: str, period: str):
+    import yfinance as yf
+
+    return yf.Ticker(ticker).history(period=period)
+
+
+def _load_news(ticker: str):
+    import yfinance as yf
+
+    return yf.Ticker(ticker).news or []
+
+
+DEFAULT_LOADERS: Dict[str, Callable[..., Any]] = {
+    "info": _load_info,
+    "history": _load_history,
+    "news": _load_news,
+}
+
+
+class TickerSnapshotCache:
+    """Per-kind TTL cache of ticker data with single-flight upstream loads."""
+
+    def __init__(
+        self,
+        quote_ttl: float = SNAPSHOT_QUOTE_TTL,
+        fundamentals_ttl: float = SNAPSHOT_FUNDAMENTALS_TTL,
+        loaders: Optional[Dict[str, Callable[..., Any]]] = None,
+    ):
+        self.loaders = {**DEFAULT_LOADERS, **(loaders or {})}
+        self.ttls = {"info": fundamentals_ttl, "history": quote_ttl, "news": quote_ttl}
+        self._entries: Dict[Tuple, Tuple[float, Any]] = {}
+        self._inflight: Dict[Tuple, Future] = {}
+        self._lock = threading.Lock()
+        self.counters = {
+            kind: {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+            for kind in self.loaders
+        }
+
+    def get(self, kind: str, ticker: str, *params) -> Any:
+        """
+        Cached data of one kind for a ticker, loading it upstream at most once at a time.
+
+        Args:
+            kind: Data kind ("info", "history" or "news")
+            ticker: Stock ticker symbol
+            *params: Extra loader arguments, part of the cache key (e.g. the history period)
+
+        Returns:
+            The loaded data; callers must treat it as read-only since it is shared
+        """
+        key = (kind, ticker.strip().upper(), *params)
+        counters = self.counters[kind]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                counters["hits"] += 1
+                return entry[1]
+            future = self._inflight.get(key)
+            if future is not None:
+                counters["coalesced"] += 1
+                owner = False
+            else:
+                counters["misses"] += 1
+                future = self._inflight[key] = Future()
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = self.loaders[kind](key[1], *params)
+        except Exception as e:
+            with self._lock:
+                counters["errors"] += 1
+                del self._inflight[key]
+            # Errors are shared with coalesced callers but never cached
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttls.get(kind, 0), value)
+            del self._inflight[key]
+        future.set_result(value)
+        return value
+
+    def info(self, ticker: str) -> Dict[str, Any]:
+        """Fundamentals snapshot (yfinance ``Ticker.info``)."""
+        return self.get("info", ticker)
+
+    def history(self, ticker: str, period: str = "3mo"):
+        """Quote history snapshot (yfinance ``Ticker.history``)."""
+        return self.get("history", ticker, period)
+
+    def news(self, ticker: str):
+        """Yahoo Finance news snapshot (yfinance ``Ticker.news``)."""
+        return self.get("news", ticker)
+
+    def invalidate(self, ticker: Optional[str] = None):
+        """Drop cached snapshots for one ticker, or for all tickers."""
+        with self._lock:
+            if ticker is None:
+                self._entries.clear()
+            else:
+                ticker = ticker.strip().upper()
+                for key in [k for k in self._entries if k[1] == ticker]:
+                    del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss, coalesced and upstream call counts per data kind."""
+        with self._lock:
+            kinds = {}
+            for kind, counters in self.counters.items():
+                lookups = counters["hits"] + counters["misses"] + counters["coalesced"]
+                kinds[kind] = {
+                    **counters,
+                    "upstream_calls": counters["misses"],
+                    "hit_rate": round(
+                        (counters["hits"] + counters["coalesced"]) / lookups, 3
+                    )
+                    if lookups
+                    else None,
+                }
+            return {"kinds": kinds, "entries": len(self._entries)}
+
+
+_snapshots: Optional[TickerSnapshotCache] = None
+_snapshots_lock = threading.Lock()
+
+
+def get_snapshot_cache() -> TickerSnapshotCache:
+    """Shared snapshot cache for all swarm tools."""
+    global _snapshots
+    with _snapshots_lock:
+        if _snapshots is None:
+            _snapshots = TickerSnapshotCache()
+        return _snapshots
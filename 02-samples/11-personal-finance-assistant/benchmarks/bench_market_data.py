@@ -0,0 +1,111 @@
+"""
+Benchmark: per-ticker history/info loop vs the batched market data layer
+
+Generates an offline price fixture (geometric Brownian motion, one year of
+trading days) for N tickers and computes the summary metrics the stock data
+tools return. Network round trips are simulated with a fixed latency so the
+fetch pattern can be compared without hitting Yahoo Finance.
+
+    before: for each ticker, one history() call and one .info call, then
+            pct_change/std/Sharpe on that ticker's Series
+    after:  one batched price fetch, company info on a bounded thread pool,
+            then compute_metrics() over the wide price matrix
+
+Usage (from the personal-finance-assistant directory):
+    python benchmarks/bench_market_data.py --tickers 500 --latency 0.02
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_data import compute_metrics, fetch_prices, load_price_fixture, MAX_WORKERS
+
+
+def make_fixture(path: str, tickers: int, days: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-01-02", periods=days)
+    drift = rng.normal(0.0004, 0.0006, tickers)
+    vol = rng.uniform(0.008, 0.035, tickers)
+    log_returns = rng.normal(drift, vol, (days, tickers))
+    prices = 100 * np.exp(np.cumsum(log_returns, axis=0))
+    columns = [f"T{i:04d}" for i in range(tickers)]
+    frame = pd.DataFrame(prices, index=dates, columns=columns)
+    # A few tickers listed late in the year, as real universes have
+    frame.iloc[:days // 3, ::50] = np.nan
+    frame.index.name = "Date"
+    frame.to_csv(path)
+    return columns
+
+
+def before(fixture: str, tickers, latency: float):
+    matrix = load_price_fixture(fixture)
+    stock_data = {}
+    for ticker in tickers:
+        time.sleep(latency)  # history()
+        hist = pd.DataFrame({"Close": matrix[ticker].dropna()})
+        time.sleep(latency)  # .info
+        if len(hist) > 0:
+            start_price = hist['Close'].iloc[0]
+            end_price = hist['Close'].iloc[-1]
+            total_return = ((end_price - start_price) / start_price) * 100
+            daily_returns = hist['Close'].pct_change().dropna()
+            volatility = daily_returns.std() * np.sqrt(252) * 100
+            years = len(hist) / 252
+            annual_return = total_return / years if years > 0 else total_return
+            sharpe_ratio = (annual_return - 2.0) / volatility if volatility > 0 else 0
+            stock_data[ticker] = (annual_return, volatility, sharpe_ratio)
+    return stock_data
+
+
+def after(fixture: str, tickers, latency: float, workers: int):
+    time.sleep(latency)  # one batched download
+    prices = fetch_prices(tickers, fixture=fixture)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda t: time.sleep(latency), tickers))  # .info lookups
+    metrics = compute_metrics(prices)
+    return {t: (r.annual_return, r.volatility, r.sharpe_ratio)
+            for t, r in zip(metrics.index, metrics.itertuples(index=False))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--days", type=int, default=252)
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated seconds per network call")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture = os.path.join(tmp, "prices.csv")
+        tickers = make_fixture(fixture, args.tickers, args.days)
+        print(f"{args.tickers} tickers x {args.days} days, {args.latency * 1000:.0f} ms simulated latency, "
+              f"{args.workers} info workers")
+
+        for latency in (0.0, args.latency):
+            start = time.perf_counter()
+            old = before(fixture, tickers, latency)
+            t_before = time.perf_counter() - start
+
+            start = time.perf_counter()
+            new = after(fixture, tickers, latency, args.workers)
+            t_after = time.perf_counter() - start
+
+            assert old.keys() == new.keys()
+            worst = max(abs(a - b) for t in old for a, b in zip(old[t], new[t]))
+            assert worst < 1e-9, f"metrics differ by {worst}"
+            label = "compute only" if latency == 0 else "with latency"
+            print(f"{label:13s} before {t_before * 1000:9.1f} ms  after {t_after * 1000:8.1f} ms  "
+                  f"speedup {t_before / t_after:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark: all-or-nothing CSV cache vs the columnar price store
+
+Replays a sequence of stock data requests against an offline price fixture.
+Each fetch is charged a simulated network cost (a fixed cost per call plus a
+cost per ticker) so the fetch patterns can be compared offline.
+
+    before: summary CSV cache; any missing ticker or new window re-fetches
+            every requested ticker, and hits are read with read_csv + iterrows
+    after:  PriceStore; only uncovered (ticker, date range) pairs are fetched,
+            and hits are memory-mapped Arrow reads plus compute_metrics()
+
+Usage (from the personal-finance-assistant directory):
+    python benchmarks/bench_price_store.py --tickers 500
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_market_data import make_fixture
+from market_data import compute_metrics, fetch_prices
+from price_store import PriceStore
+
+
+class SimulatedFetch:
+    """fetch_prices against the fixture, charged a simulated network cost"""
+
+    def __init__(self, fixture: str, per_call: float, per_ticker: float):
+        self.fixture = fixture
+        self.per_call = per_call
+        self.per_ticker = per_ticker
+        self.tickers_fetched = 0
+
+    def __call__(self, tickers, start=None, end=None, **kwargs):
+        time.sleep(self.per_call + self.per_ticker * len(tickers))
+        self.tickers_fetched += len(tickers)
+        return fetch_prices(tickers, start=start, end=end, fixture=self.fixture)
+
+
+def run_before(requests, fetch, csv_path):
+    cached = set()
+    for tickers, start, end in requests:
+        if set(tickers).issubset(cached) and (start, end) == cached_window:
+            df = pd.read_csv(csv_path, index_col='ticker')
+            stocks = {ticker: {'annual_return': float(row.get('annual_return', 0))} for ticker, row in df.iterrows()}
+            continue
+        metrics = compute_metrics(fetch(tickers, start=start, end=end))
+        metrics.to_csv(csv_path, index_label='ticker')
+        cached, cached_window = set(tickers), (start, end)
+
+
+def run_after(requests, store):
+    for tickers, start, end in requests:
+        compute_metrics(store.get_prices(tickers, start, end))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--per-call", type=float, default=0.2, help="Simulated seconds per fetch call")
+    parser.add_argument("--per-ticker", type=float, default=0.01, help="Simulated seconds per fetched ticker")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture = os.path.join(tmp, "prices.csv")
+        tickers = make_fixture(fixture, args.tickers + 1, 500)
+        base, extra = tickers[:-1], tickers[-1]
+        requests = [
+            (base, "2024-01-01", "2024-12-31"),           # cold
+            (base, "2024-01-01", "2024-12-31"),           # repeat
+            (base, "2024-01-01", "2024-12-31"),           # repeat
+            (base + [extra], "2024-01-01", "2024-12-31"),  # one new ticker
+            (base + [extra], "2024-01-01", "2025-03-31"),  # window extended
+            (base + [extra], "2024-01-01", "2025-03-31"),  # repeat
+        ]
+        print(f"{len(requests)} requests over {args.tickers} tickers, simulated fetch "
+              f"{args.per_call * 1000:.0f} ms/call + {args.per_ticker * 1000:.1f} ms/ticker")
+
+        fetch = SimulatedFetch(fixture, args.per_call, args.per_ticker)
+        start = time.perf_counter()
+        run_before(requests, fetch, os.path.join(tmp, "summary.csv"))
+        before = time.perf_counter() - start
+        before_fetched = fetch.tickers_fetched
+
+        fetch = SimulatedFetch(fixture, args.per_call, args.per_ticker)
+        store = PriceStore(root=os.path.join(tmp, "store"), fetch=fetch)
+        start = time.perf_counter()
+        run_after(requests, store)
+        after = time.perf_counter() - start
+        stats = store.stats()
+
+        print(f"before  {before:7.2f} s  tickers fetched {before_fetched:5d}")
+        print(f"after   {after:7.2f} s  tickers fetched {fetch.tickers_fetched:5d}  "
+              f"hit rate {stats['hit_rate']}  avg load {stats['avg_load_ms']} ms")
+        print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Batched market data layer for the Multi-Agent Portfolio Orchestrator
+
+Prices for all requested tickers are fetched in one multi-ticker download
+(falling back to a bounded thread pool for tickers the batch call misses) and
+kept as a wide price matrix: one row per trading day, one column per ticker.
+Returns, annualised volatility and Sharpe ratios are then computed for every
+ticker in a single NumPy pass over that matrix.
+
+Setting MARKET_DATA_FIXTURE to a local wide price file (CSV or Parquet, a Date
+index and one column per ticker) serves prices from that file instead of the
+network, so the tools and benchmarks can run offline.
+"""
+
+import os
+import re
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+RISK_FREE_RATE = 2.0
+MAX_WORKERS = int(os.environ.get("MARKET_DATA_MAX_WORKERS", "8"))
+
+_PERIOD_PATTERN = re.compile(r"^(\d+)(d|wk|mo|y)$")
+
+
+def load_price_fixture(path: str) -> pd.DataFrame:
+    """
+    Load a wide price matrix from a local CSV or Parquet file.
+
+    Args:
+        path: File with a Date index and one close-price column per ticker
+
+    Returns:
+        Price matrix indexed by date
+    """
+    if path.endswith(".parquet"):
+        prices = pd.read_parquet(path)
+    else:
+        prices = pd.read_csv(path, index_col=0, parse_dates=True)
+    prices.index = pd.DatetimeIndex(prices.index).tz_localize(None)
+    return prices.sort_index().astype("float64")
+
+
+def period_range(period: str, fixture: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Resolve a yfinance-style period into an explicit [start, end) date range.
+
+    Periods end today, or on the last date of the price fixture when one is configured.
+
+    Args:
+        period: Period string such as "1y", "6mo", "3mo", "5d", "ytd" or "max"
+        fixture: Local price file (defaults to MARKET_DATA_FIXTURE)
+
+    Returns:
+        (start, end) as ISO dates, end exclusive
+    """
+    fixture = fixture or os.environ.get("MARKET_DATA_FIXTURE")
+    if fixture:
+        index = load_price_fixture(fixture).index
+        last = index[-1] if len(index) else pd.Timestamp.today().normalize()
+    else:
+        last = pd.Timestamp.today().normalize()
+    end = last + pd.DateOffset(days=1)
+
+    if period == "max":
+        start = pd.Timestamp("1970-01-01")
+    elif period == "ytd":
+        start = pd.Timestamp(year=last.year, month=1, day=1)
+    else:
+        match = _PERIOD_PATTERN.match(period)
+        if not match:
+            raise ValueError(f"Unsupported period: {period}")
+        count, unit = int(match.group(1)), match.group(2)
+        offset = {
+            "d": pd.DateOffset(days=count),
+            "wk": pd.DateOffset(weeks=count),
+            "mo": pd.DateOffset(months=count),
+            "y": pd.DateOffset(years=count),
+        }[unit]
+        start = last - offset + pd.DateOffset(days=1)
+    return start.date().isoformat(), end.date().isoformat()
+
+
+def _slice_period(prices: pd.DataFrame, start: Optional[str], end: Optional[str], period: Optional[str],
+                  fixture: str) -> pd.DataFrame:
+    """Apply yfinance-style start/end or period arguments to a local price matrix."""
+    if not (start or end):
+        if not period or prices.empty:
+            return prices
+        start, end = period_range(period, fixture)
+    if start:
+        prices = prices[prices.index >= pd.Timestamp(start)]
+    if end:
+        # yfinance treats end as exclusive
+        prices = prices[prices.index < pd.Timestamp(end)]
+    return prices
+
+
+def _history_one(ticker: str, start: Optional[str], end: Optional[str], period: Optional[str]) -> Optional[pd.Series]:
+    """Per-ticker fallback used when the batch download misses a ticker."""
+    import yfinance as yf
+    try:
+        if start or end:
+            hist = yf.Ticker(ticker).history(start=start, end=end)
+        else:
+            hist = yf.Ticker(ticker).history(period=period or "1y")
+    except Exception as e:
+        print(f"⚠️ Could not fetch {ticker}: {e}")
+        return None
+    if hist.empty:
+        return None
+    close = hist["Close"]
+    close.index = pd.DatetimeIndex(close.index).tz_localize(None)
+    return close.rename(ticker)
+
+
+def fetch_prices(tickers: List[str], start: Optional[str] = None, end: Optional[str] = None,
+                 period: Optional[str] = None, fixture: Optional[str] = None,
+                 max_workers: int = MAX_WORKERS) -> pd.DataFrame:
+    """
+    Fetch daily close prices for many tickers as one wide matrix.
+
+    Args:
+        tickers: Stock symbols
+        start: Start date (inclusive), used with end instead of period
+        end: End date (exclusive)
+        period: yfinance period string such as "1y", "6mo" or "3mo"
+        fixture: Local price file to read instead of the network (defaults to MARKET_DATA_FIXTURE)
+        max_workers: Thread pool size for tickers the batch download misses
+
+    Returns:
+        Price matrix indexed by date with one column per ticker that has data
+    """
+    tickers = list(dict.fromkeys(tickers))
+    fixture = fixture or os.environ.get("MARKET_DATA_FIXTURE")
+    if fixture:
+        prices = _slice_period(load_price_fixture(fixture), start, end, period, fixture)
+        return prices[[t for t in tickers if t in prices.columns]].dropna(axis=1, how="all")
+
+    import yfinance as yf
+    prices = pd.DataFrame()
+    try:
+        if start or end:
+            data = yf.download(tickers, start=start, end=end, auto_adjust=True,
+                               group_by="column", threads=True, progress=False)
+        else:
+            data = yf.download(tickers, period=period or "1y", auto_adjust=True,
+                               group_by="column", threads=True, progress=False)
+        if not data.empty:
+            close = data["Close"]
+            prices = close.to_frame(tickers[0]) if isinstance(close, pd.Series) else close
+    except Exception as e:
+        print(f"⚠️ Batch download failed, fetching tickers individually: {e}")
+
+    prices = prices.dropna(axis=1, how="all")
+    missing = [t for t in tickers if t not in prices.columns]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(missing))) as pool:
+            series = [s for s in pool.map(lambda t: _history_one(t, start, end, period), missing) if s is not None]
+        if series:
+            prices = pd.concat([prices, *series], axis=1)
+
+    if prices.empty:
+        return prices
+    prices.index = pd.DatetimeIndex(prices.index).tz_localize(None)
+    return prices[[t for t in tickers if t in prices.columns]].sort_index().astype("float64")
+
+
+def fetch_company_info(tickers: List[str], fixture: Optional[str] = None,
+                       max_workers: int = MAX_WORKERS) -> Dict[str, Dict[str, str]]:
+    """
+    Look up company name and sector for each ticker.
+
+    yfinance has no batch endpoint for this, so lookups run on a bounded
+    thread pool. With a fixture, names come from an optional
+    ``<fixture>_info.json`` file next to it.
+
+    Args:
+        tickers: Stock symbols
+        fixture: Local price file whose companion info file is used instead of the network
+            (defaults to MARKET_DATA_FIXTURE)
+        max_workers: Thread pool size
+
+    Returns:
+        Mapping of ticker to {'company', 'sector'}
+    """
+    fixture = fixture or os.environ.get("MARKET_DATA_FIXTURE")
+    if fixture:
+        info_path = f"{os.path.splitext(fixture)[0]}_info.json"
+        known = {}
+        if os.path.exists(info_path):
+            with open(info_path) as f:
+                known = json.load(f)
+        return {
+            t: {'company': known.get(t, {}).get('company', t), 'sector': known.get(t, {}).get('sector', 'Unknown')}
+            for t in tickers
+        }
+
+    import yfinance as yf
+
+    def lookup(ticker):
+        try:
+            info = yf.Ticker(ticker).info
+        except Exception:
+            info = {}
+        return ticker, {'company': info.get('longName', ticker), 'sector': info.get('sector', 'Unknown')}
+
+    if not tickers:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tickers))) as pool:
+        return dict(pool.map(lookup, tickers))
+
+
+def compute_metrics(prices: pd.DataFrame, risk_free_rate: float = RISK_FREE_RATE) -> pd.DataFrame:
+    """
+    Compute return, volatility and Sharpe metrics for every column of a price matrix at once.
+
+    Each ticker only uses its own valid prices, so tickers with shorter
+    histories or gaps get the same numbers as a per-ticker calculation.
+
+    Args:
+        prices: Price matrix indexed by date with one column per ticker
+        risk_free_rate: Annual risk-free rate in percent
+
+    Returns:
+        DataFrame indexed by ticker with total_return, annual_return, volatility
+        (all percentages), sharpe_ratio (from annual_return), total_sharpe_ratio
+        (from total_return), current_price and observations
+    """
+    if prices.empty:
+        return pd.DataFrame(columns=['total_return', 'annual_return', 'volatility', 'sharpe_ratio',
+                                     'total_sharpe_ratio', 'current_price', 'observations'])
+
+    values = prices.to_numpy(dtype="float64")
+    valid = ~np.isnan(values)
+    observations = valid.sum(axis=0)
+    columns = np.arange(values.shape[1])
+
+    # First and last valid price per column
+    first_idx = valid.argmax(axis=0)
+    last_idx = values.shape[0] - 1 - valid[::-1].argmax(axis=0)
+    start_price = values[first_idx, columns]
+    end_price = values[last_idx, columns]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        total_return = (end_price - start_price) / start_price * 100
+
+        # Daily returns against the previous valid price, only on days with a price
+        previous = prices.ffill().to_numpy(dtype="float64")[:-1]
+        daily_returns = values[1:] / previous - 1
+        counts = (~np.isnan(daily_returns)).sum(axis=0)
+        volatility = np.full(values.shape[1], np.nan)
+        enough = counts > 1
+        if enough.any():
+            volatility[enough] = np.nanstd(daily_returns[:, enough], axis=0, ddof=1) * np.sqrt(TRADING_DAYS) * 100
+
+        years = observations / TRADING_DAYS
+        annual_return = np.where(years > 0, total_return / years, total_return)
+        positive = volatility > 0
+        sharpe_ratio = np.where(positive, (annual_return - risk_free_rate) / volatility, 0.0)
+        total_sharpe_ratio = np.where(positive, (total_return - risk_free_rate) / volatility, 0.0)
+
+    metrics = pd.DataFrame({
+        'total_return': total_return,
+        'annual_return': annual_return,
+        'volatility': volatility,
+        'sharpe_ratio': sharpe_ratio,
+        'total_sharpe_ratio': total_sharpe_ratio,
+        'current_price': end_price,
+        'observations': observations,
+    }, index=prices.columns)
+    return metrics[metrics['observations'] > 0]
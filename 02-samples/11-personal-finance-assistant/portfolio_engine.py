@@ -0,0 +1,178 @@
+"""
+Vectorized portfolio risk and backtest engine for the Multi-Agent Portfolio Orchestrator
+
+The engine is built once from a wide daily price matrix (normally the cached
+prices from the price store). It precomputes each ticker's period return and
+the annualised covariance matrix of daily returns, so any number of candidate
+allocations can be scored together: weights are stacked into a
+(portfolios x tickers) matrix and expected return, correlation-aware
+volatility and Sharpe ratio come out of a few matrix products. A
+daily-rebalanced backtest over the same returns runs the same way.
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from market_data import TRADING_DAYS, RISK_FREE_RATE, compute_metrics
+from price_store import PriceStore, get_price_store
+
+
+class PortfolioEngine:
+    """Covariance-aware scoring and backtesting of many allocations over one price matrix"""
+
+    def __init__(self, prices: pd.DataFrame, risk_free_rate: float = RISK_FREE_RATE):
+        metrics = compute_metrics(prices)
+        prices = prices[metrics.index]
+        self.tickers: List[str] = list(prices.columns)
+        self.positions = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.risk_free_rate = risk_free_rate
+        self.dates = prices.index
+
+        # Buy-and-hold return of each ticker over the period, in percent
+        self.total_returns = metrics['total_return'].to_numpy(dtype="float64")
+
+        # Daily returns against the previous valid price; days before a ticker
+        # lists (or with no price) count as a flat day
+        values = prices.to_numpy(dtype="float64")
+        previous = prices.ffill().to_numpy(dtype="float64")[:-1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = values[1:] / previous - 1
+        self.returns = np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+        # Annualised covariance of daily returns (decimal units), computed once
+        if len(self.returns) > 1:
+            self.covariance = np.atleast_2d(np.cov(self.returns, rowvar=False)) * TRADING_DAYS
+        else:
+            self.covariance = np.zeros((len(self.tickers), len(self.tickers)))
+        self.asset_volatility = np.sqrt(np.clip(np.diag(self.covariance), 0.0, None))
+
+    @classmethod
+    def from_store(cls, tickers: List[str], start: str, end: str, store: Optional[PriceStore] = None,
+                   risk_free_rate: float = RISK_FREE_RATE) -> "PortfolioEngine":
+        """
+        Build an engine from the cached price matrix, fetching only uncovered ranges.
+
+        Args:
+            tickers: Stock symbols
+            start: Start date (inclusive, ISO format)
+            end: End date (exclusive, ISO format)
+            store: Price store to read from (defaults to the shared store)
+            risk_free_rate: Annual risk-free rate in percent
+
+        Returns:
+            PortfolioEngine over the tickers that have prices in the window
+        """
+        store = store or get_price_store()
+        return cls(store.get_prices(tickers, start, end), risk_free_rate=risk_free_rate)
+
+    def weights(self, allocations: Sequence[Mapping[str, float]]) -> np.ndarray:
+        """
+        Stack allocations into a (portfolios x tickers) weight matrix.
+
+        Tickers the engine has no prices for are dropped and each row is
+        normalised to sum to 1 over the remaining tickers.
+
+        Args:
+            allocations: One {ticker: allocation} mapping per portfolio, in any units
+
+        Returns:
+            Weight matrix whose rows sum to 1 (or are all zero if nothing was priced)
+        """
+        matrix = np.zeros((len(allocations), len(self.tickers)))
+        for row, allocation in enumerate(allocations):
+            for ticker, amount in allocation.items():
+                column = self.positions.get(ticker)
+                if column is not None:
+                    matrix[row, column] += amount
+        totals = matrix.sum(axis=1, keepdims=True)
+        np.divide(matrix, totals, out=matrix, where=totals != 0)
+        return matrix
+
+    def evaluate(self, weights: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Score every portfolio row at once.
+
+        Args:
+            weights: (portfolios x tickers) weight matrix, or a single weight vector
+
+        Returns:
+            Arrays of expected_return (buy-and-hold, %), volatility (annualised, %),
+            sharpe_ratio and diversification_ratio (weighted asset volatility over
+            portfolio volatility; 1.0 means no diversification benefit)
+        """
+        weights = np.atleast_2d(weights)
+        expected_return = weights @ self.total_returns
+        variance = ((weights @ self.covariance) * weights).sum(axis=1)
+        volatility = np.sqrt(np.clip(variance, 0.0, None)) * 100
+        weighted_volatility = weights @ self.asset_volatility * 100
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sharpe_ratio = np.where(volatility > 0, (expected_return - self.risk_free_rate) / volatility, 0.0)
+            diversification_ratio = np.where(volatility > 0, weighted_volatility / volatility, 1.0)
+        return {
+            'expected_return': expected_return,
+            'volatility': volatility,
+            'sharpe_ratio': sharpe_ratio,
+            'diversification_ratio': diversification_ratio,
+        }
+
+    def backtest(self, weights: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Daily-rebalanced backtest of every portfolio row at once.
+
+        Args:
+            weights: (portfolios x tickers) weight matrix, or a single weight vector
+
+        Returns:
+            Arrays of total_return (%), realized_volatility (annualised, %) and
+            max_drawdown (%, negative), plus the growth-of-1 value matrix
+            (days x portfolios) under values
+        """
+        weights = np.atleast_2d(weights)
+        if len(self.returns) == 0:
+            zeros = np.zeros(len(weights))
+            return {'total_return': zeros, 'realized_volatility': zeros, 'max_drawdown': zeros,
+                    'values': np.ones((1, len(weights)))}
+
+        daily = self.returns @ weights.T
+        values = np.vstack([np.ones(len(weights)), np.cumprod(1 + daily, axis=0)])
+        drawdown = values / np.maximum.accumulate(values, axis=0) - 1
+        realized = daily.std(axis=0, ddof=1) * np.sqrt(TRADING_DAYS) * 100 if len(daily) > 1 else np.zeros(len(weights))
+        return {
+            'total_return': (values[-1] - 1) * 100,
+            'realized_volatility': realized,
+            'max_drawdown': drawdown.min(axis=0) * 100,
+            'values': values,
+        }
+
+    def analyze(self, portfolios: Mapping[str, Mapping[str, float]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Risk and backtest summary for named portfolios, scored in one batch.
+
+        Args:
+            portfolios: Strategy name to {ticker: allocation} mapping
+
+        Returns:
+            Strategy name to rounded expected_return, volatility, sharpe_ratio,
+            diversification_ratio, backtest_return, realized_volatility,
+            max_drawdown and stocks_priced
+        """
+        names = list(portfolios)
+        weights = self.weights([portfolios[name] for name in names])
+        scores = self.evaluate(weights)
+        backtest = self.backtest(weights)
+        priced = (weights > 0).sum(axis=1)
+        return {
+            name: {
+                'expected_return': round(float(scores['expected_return'][i]), 1),
+                'volatility': round(float(scores['volatility'][i]), 1),
+                'sharpe_ratio': round(float(scores['sharpe_ratio'][i]), 2),
+                'diversification_ratio': round(float(scores['diversification_ratio'][i]), 2),
+                'backtest_return': round(float(backtest['total_return'][i]), 1),
+                'realized_volatility': round(float(backtest['realized_volatility'][i]), 1),
+                'max_drawdown': round(float(backtest['max_drawdown'][i]), 1),
+                'stocks_priced': int(priced[i]),
+            }
+            for i, name in enumerate(names)
+        }
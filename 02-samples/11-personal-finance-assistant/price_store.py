@@ -0,0 +1,319 @@
+"""
+Columnar on-disk price cache for the Multi-Agent Portfolio Orchestrator
+
+Daily close prices are stored per ticker as Arrow IPC files (a date column and
+a close column) that are memory-mapped on read. A coverage file records which
+[start, end) date ranges have already been fetched for each ticker, so a
+request only downloads the ranges it is missing, batched across tickers, and
+appends them to the existing files. Today's bar can still change, so it is
+never recorded as covered; a fetch that included it is reused for
+PRICE_STORE_TODAY_TTL seconds, and on days without a session (weekends) the
+range up to tomorrow is covered outright. Company names and sectors are
+cached next to the prices so repeat requests skip the per-ticker info
+lookups too.
+"""
+
+import os
+import json
+import time
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from market_data import fetch_prices, fetch_company_info
+
+PRICE_STORE_DIR = os.environ.get("PRICE_STORE_DIR", "price_store")
+# How long a fetch of today's (still changing) bar is reused before it is fetched again
+PRICE_STORE_TODAY_TTL = float(os.environ.get("PRICE_STORE_TODAY_TTL", "900"))
+
+Range = Tuple[str, str]
+
+
+def _merge_ranges(ranges: List[Range]) -> List[Range]:
+    """Merge overlapping or touching [start, end) ranges."""
+    merged: List[List[str]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def _subtract_ranges(start: str, end: str, covered: List[Range]) -> List[Range]:
+    """Parts of [start, end) not inside any covered range."""
+    missing = []
+    cursor = start
+    for covered_start, covered_end in covered:
+        if covered_end <= cursor:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > cursor:
+            missing.append((cursor, covered_start))
+        cursor = max(cursor, covered_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        missing.append((cursor, end))
+    return missing
+
+
+class PriceStore:
+    """Per-ticker Arrow price files with date-range coverage tracking"""
+
+    def __init__(self, root: str = PRICE_STORE_DIR, fetch: Callable[..., pd.DataFrame] = fetch_prices,
+                 fetch_info: Callable[[List[str]], Dict[str, Dict[str, str]]] = fetch_company_info,
+                 today_ttl: float = PRICE_STORE_TODAY_TTL):
+        self.root = root
+        self.prices_dir = os.path.join(root, "prices")
+        self.coverage_path = os.path.join(root, "coverage.json")
+        self.info_path = os.path.join(root, "info.json")
+        self.fetch = fetch
+        self.fetch_info = fetch_info
+        self.today_ttl = today_ttl
+        # ticker -> (today's date, monotonic time) of the last fetch that included today
+        self._today_fetched: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.RLock()
+        os.makedirs(self.prices_dir, exist_ok=True)
+        self._coverage: Dict[str, List[Range]] = {
+            ticker: [tuple(r) for r in ranges] for ticker, ranges in self._read_json(self.coverage_path).items()
+        }
+        self._info: Dict[str, Dict[str, str]] = self._read_json(self.info_path)
+        self.counters = {
+            "requests": 0,
+            "hits": 0,
+            "partial_hits": 0,
+            "misses": 0,
+            "fetch_calls": 0,
+            "fetched_ranges": 0,
+            "info_hits": 0,
+            "info_misses": 0,
+            "loads": 0,
+            "load_seconds": 0.0,
+            "last_load_seconds": 0.0,
+        }
+
+    # --- Coverage ---
+
+    def missing_ranges(self, ticker: str, start: str, end: str) -> List[Range]:
+        """Date ranges within [start, end) that have not been fetched for a ticker"""
+        with self._lock:
+            covered = self._coverage.get(ticker, [])
+            today = self._today()
+            fetched = self._today_fetched.get(ticker)
+            if fetched and fetched[0] == today and time.monotonic() - fetched[1] < self.today_ttl:
+                # Today's bar was fetched recently enough; treat it as covered until it goes stale
+                tomorrow = (pd.Timestamp(today) + pd.Timedelta(days=1)).date().isoformat()
+                covered = _merge_ranges(covered + [(today, tomorrow)])
+            return _subtract_ranges(start, end, covered)
+
+    @staticmethod
+    def _today() -> str:
+        return pd.Timestamp.today().normalize().date().isoformat()
+
+    def get_prices(self, tickers: List[str], start: str, end: str) -> pd.DataFrame:
+        """
+        Wide close-price matrix for [start, end), fetching only uncovered ranges.
+
+        Tickers missing the same range are fetched together in one batched call.
+
+        Args:
+            tickers: Stock symbols
+            start: Start date (inclusive, ISO format)
+            end: End date (exclusive, ISO format)
+
+        Returns:
+            Price matrix indexed by date with one column per ticker that has data
+        """
+        tickers = list(dict.fromkeys(tickers))
+        by_range: Dict[Range, List[str]] = defaultdict(list)
+        for ticker in tickers:
+            missing = self.missing_ranges(ticker, start, end)
+            self.counters["requests"] += 1
+            if not missing:
+                self.counters["hits"] += 1
+            elif missing == [(start, end)]:
+                self.counters["misses"] += 1
+            else:
+                self.counters["partial_hits"] += 1
+            for missing_range in missing:
+                by_range[missing_range].append(ticker)
+
+        for (range_start, range_end), range_tickers in by_range.items():
+            self._fetch_range(range_tickers, range_start, range_end)
+
+        return self.load(tickers, start, end)
+
+    def _fetch_range(self, tickers: List[str], start: str, end: str):
+        self.counters["fetch_calls"] += 1
+        self.counters["fetched_ranges"] += len(tickers)
+        prices = self.fetch(tickers, start=start, end=end)
+
+        today = self._today()
+        no_trading_days = len(pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1))) == 0
+        if end > today and len(pd.bdate_range(max(start, today), pd.Timestamp(end) - pd.Timedelta(days=1))) == 0:
+            # No trading session from today on (weekend): nothing later can change, so all of it is covered
+            covered_end = end
+            includes_today = False
+        else:
+            # Today's bar may still change, so it is only reused for today_ttl seconds, never recorded as covered
+            covered_end = min(end, today)
+            includes_today = end > today
+        fetched_at = time.monotonic()
+
+        with self._lock:
+            for ticker in tickers:
+                if ticker in prices.columns:
+                    self.append(ticker, prices[ticker].dropna())
+                elif not no_trading_days:
+                    continue  # fetch failed for this ticker; try again next time
+                if start < covered_end:
+                    self._coverage[ticker] = _merge_ranges(self._coverage.get(ticker, []) + [(start, covered_end)])
+                if includes_today:
+                    self._today_fetched[ticker] = (today, fetched_at)
+            self._write_json(self.coverage_path, self._coverage)
+
+    # --- Storage ---
+
+    def _path(self, ticker: str) -> str:
+        return os.path.join(self.prices_dir, f"{ticker.replace('/', '_')}.arrow")
+
+    def _read_table(self, ticker: str) -> Optional[pa.Table]:
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return None
+        # Memory-mapped, zero-copy read of the Arrow file
+        with pa.memory_map(path, "r") as source:
+            return pa.ipc.open_file(source).read_all()
+
+    def append(self, ticker: str, closes: pd.Series):
+        """Merge new closes into a ticker's file; new values win on overlapping dates"""
+        if closes.empty:
+            return
+        new = pd.Series(closes.to_numpy(dtype="float64"),
+                        index=pd.DatetimeIndex(closes.index).tz_localize(None).astype("datetime64[ns]"))
+        with self._lock:
+            existing = self.read(ticker)
+            if existing is not None and not existing.empty:
+                new = pd.concat([existing[~existing.index.isin(new.index)], new]).sort_index()
+            else:
+                new = new.sort_index()
+            table = pa.table({
+                "date": pa.array(new.index.to_numpy(), type=pa.timestamp("ns")),
+                "close": pa.array(new.to_numpy(), type=pa.float64()),
+            })
+            path = self._path(ticker)
+            tmp_path = f"{path}.tmp"
+            with pa.OSFile(tmp_path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, path)
+
+    def read(self, ticker: str) -> Optional[pd.Series]:
+        """All stored closes for a ticker"""
+        table = self._read_table(ticker)
+        if table is None:
+            return None
+        dates = table.column("date").to_numpy()
+        return pd.Series(table.column("close").to_numpy(), index=pd.DatetimeIndex(dates), name=ticker)
+
+    def load(self, tickers: List[str], start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """Stored closes for [start, end) as a wide matrix, without fetching"""
+        started = time.perf_counter()
+        start_ts = np.datetime64(start, "ns") if start else None
+        end_ts = np.datetime64(end, "ns") if end else None
+        windows = {}
+        for ticker in tickers:
+            table = self._read_table(ticker)
+            if table is None:
+                continue
+            dates = table.column("date").to_numpy()
+            # Dates are sorted, so the window is a slice
+            lo = np.searchsorted(dates, start_ts, "left") if start_ts is not None else 0
+            hi = np.searchsorted(dates, end_ts, "left") if end_ts is not None else len(dates)
+            if hi > lo:
+                windows[ticker] = (dates[lo:hi], table.column("close").to_numpy()[lo:hi])
+
+        if windows:
+            # Place every ticker's window on the shared date axis in one matrix
+            index = np.unique(np.concatenate([dates for dates, _ in windows.values()]))
+            values = np.full((len(index), len(windows)), np.nan)
+            for i, (dates, closes) in enumerate(windows.values()):
+                values[np.searchsorted(index, dates), i] = closes
+            prices = pd.DataFrame(values, index=pd.DatetimeIndex(index), columns=list(windows))
+        else:
+            prices = pd.DataFrame()
+        elapsed = time.perf_counter() - started
+        self.counters["loads"] += 1
+        self.counters["load_seconds"] += elapsed
+        self.counters["last_load_seconds"] = elapsed
+        return prices
+
+    # --- Company info ---
+
+    def get_info(self, tickers: List[str]) -> Dict[str, Dict[str, str]]:
+        """Company name and sector per ticker, looking up only uncached tickers"""
+        missing = [t for t in tickers if t not in self._info]
+        self.counters["info_hits"] += len(tickers) - len(missing)
+        self.counters["info_misses"] += len(missing)
+        if missing:
+            fetched = self.fetch_info(missing)
+            with self._lock:
+                self._info.update(fetched)
+                self._write_json(self.info_path, self._info)
+        return {t: self._info.get(t, {'company': t, 'sector': 'Unknown'}) for t in tickers}
+
+    # --- Stats ---
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache hit rate, fetch counts and load times"""
+        requests = self.counters["requests"]
+        info_lookups = self.counters["info_hits"] + self.counters["info_misses"]
+        loads = self.counters["loads"]
+        return {
+            "requests": requests,
+            "hits": self.counters["hits"],
+            "partial_hits": self.counters["partial_hits"],
+            "misses": self.counters["misses"],
+            "hit_rate": round(self.counters["hits"] / requests, 3) if requests else None,
+            "fetch_calls": self.counters["fetch_calls"],
+            "fetched_ranges": self.counters["fetched_ranges"],
+            "info_hit_rate": round(self.counters["info_hits"] / info_lookups, 3) if info_lookups else None,
+            "last_load_ms": round(self.counters["last_load_seconds"] * 1000, 2),
+            "avg_load_ms": round(self.counters["load_seconds"] / loads * 1000, 2) if loads else None,
+            "tickers_stored": len(self._coverage),
+            "store_dir": self.root,
+        }
+
+    @staticmethod
+    def _read_json(path: str) -> Dict[str, Any]:
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _write_json(path: str, data: Dict[str, Any]):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+
+_store: Optional[PriceStore] = None
+
+
+def get_price_store() -> PriceStore:
+    """Shared price store rooted at PRICE_STORE_DIR"""
+    global _store
+    if _store is None:
+        _store = PriceStore()
+    return _store
@@ -0,0 +1,68 @@
+"""
+Tests for the price store's date-range coverage, in particular ranges that end today.
+"""
+
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from price_store import PriceStore
+
+
+class StubFetcher:
+    """fetch_prices stand-in: one close per business day in [start, end), counting calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, tickers, start, end):
+        self.calls.append((tuple(tickers), start, end))
+        days = pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1))
+        return pd.DataFrame({ticker: range(1, len(days) + 1) for ticker in tickers}, index=days, dtype="float64")
+
+
+class TestCoverageUpToToday(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.fetch = StubFetcher()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def store(self, today, today_ttl=900):
+        store = PriceStore(self.directory.name, fetch=self.fetch, fetch_info=lambda tickers: {}, today_ttl=today_ttl)
+        patcher = mock.patch.object(PriceStore, "_today", staticmethod(lambda: today))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return store
+
+    def test_repeated_period_call_on_weekend_does_not_refetch(self):
+        # Sunday: period_range ends tomorrow, and no session can still change
+        store = self.store("2026-10-18")
+        for _ in range(3):
+            prices = store.get_prices(["AAPL", "MSFT"], "2025-10-18", "2026-10-19")
+        self.assertEqual(len(self.fetch.calls), 1)
+        self.assertEqual(store.stats()["hits"], 4)
+        self.assertFalse(prices.empty)
+        # Coverage survives a restart
+        self.assertEqual(PriceStore(self.directory.name, fetch=self.fetch).missing_ranges("AAPL", "2025-10-18", "2026-10-19"), [])
+
+    def test_repeated_period_call_on_trading_day_reuses_today_within_ttl(self):
+        store = self.store("2026-10-16")
+        store.get_prices(["AAPL"], "2025-10-16", "2026-10-17")
+        store.get_prices(["AAPL"], "2025-10-16", "2026-10-17")
+        self.assertEqual(len(self.fetch.calls), 1)
+        self.assertEqual(store.stats()["hit_rate"], 0.5)
+
+    def test_today_is_refetched_once_stale(self):
+        store = self.store("2026-10-16", today_ttl=0)
+        store.get_prices(["AAPL"], "2025-10-16", "2026-10-17")
+        store.get_prices(["AAPL"], "2025-10-16", "2026-10-17")
+        # Only today's bar is fetched again
+        self.assertEqual(self.fetch.calls[1], (("AAPL",), "2026-10-16", "2026-10-17"))
+
+
+if __name__ == "__main__":
+    unittest.main()
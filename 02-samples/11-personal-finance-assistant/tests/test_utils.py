@@ -0,0 +1,33 @@
+"""
+Tests for the analysis-period handling shared by the portfolio tools.
+"""
+
+import unittest
+
+from utils import _price_window, create_growth_portfolio
+
+
+class TestPriceWindow(unittest.TestCase):
+    def test_explicit_range(self):
+        self.assertEqual(_price_window("2024-01-01 to 2024-06-01"), ("2024-01-01", "2024-06-01"))
+
+    def test_unknown_period_is_an_error(self):
+        with self.assertRaisesRegex(ValueError, "Unknown analysis period 'Unknown'"):
+            _price_window("Unknown")
+
+    def test_portfolio_tool_reports_unknown_period(self):
+        analysis = {
+            "success": True,
+            "period": "Unknown",
+            "stocks": {
+                "AAPL": {"return_pct": 20.0, "volatility_pct": 25.0, "sharpe_ratio": 0.8, "sector": "Technology"},
+                "MSFT": {"return_pct": 15.0, "volatility_pct": 20.0, "sharpe_ratio": 0.7, "sector": "Technology"},
+            },
+        }
+        result = create_growth_portfolio(stock_analysis=analysis, allocation_count=2)
+        self.assertFalse(result["success"])
+        self.assertIn("Unknown analysis period", result["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,25 +3,26 @@ Utility functions for the Multi-Agent Portfolio Orchestrator
 """
 
 from strands import tool
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 import pandas as pd
 import os
-import yfinance as yf
-import numpy as np
-from datetime import datetime
-import time
 import matplotlib.pyplot as plt
 
+from market_data import fetch_prices, fetch_company_info, compute_metrics, period_range
+from price_store import get_price_store
+from portfolio_engine import PortfolioEngine
 
-def _load_comprehensive_stock_data_from_csv(csv_filename: str = "comprehensive_stock_data.csv") -> Dict[str, Any]:
+
+def _load_summary_csv(csv_filename: str, numeric_fields: List[str]) -> Dict[str, Any]:
     """
-    Load comprehensive stock data from CSV (annual_return, volatility fields).
+    Load a per-ticker summary CSV into a {ticker: fields} dict in one vectorized pass.
     
     Args:
         csv_filename: CSV filename to load
+        numeric_fields: Metric columns converted to float (missing columns become 0)
     
     Returns:
-        Stock data with annual_return, volatility, sharpe_ratio
+        Stock data keyed by ticker
     """
     try:
         if not os.path.exists(csv_filename):
@@ -35,19 +36,15 @@ def _load_comprehensive_stock_data_from_csv(csv_filename: str = "comprehensive_s
         if df.empty:
             return {'success': False, 'error': 'CSV file is empty', 'action': 'empty_file'}
         
-        stocks = {}
         period = df['period'].iloc[0] if 'period' in df.columns else 'Unknown'
         
-        for ticker, row in df.iterrows():
-            # ticker is now correctly the actual ticker symbol from the CSV index
-            stocks[ticker] = {
-                'company': row.get('company', 'Unknown'),
-                'sector': row.get('sector', 'Unknown'),
-                'annual_return': float(row.get('annual_return', 0)),
-                'volatility': float(row.get('volatility', 0)),
-                'sharpe_ratio': float(row.get('sharpe_ratio', 0)),
-                'current_price': float(row.get('current_price', 0))
-            }
+        # Missing columns get the same defaults the per-row loader used
+        summary = pd.DataFrame(index=df.index)
+        for column in ('company', 'sector'):
+            summary[column] = df[column] if column in df.columns else 'Unknown'
+        for column in numeric_fields:
+            summary[column] = df[column].astype('float64') if column in df.columns else 0.0
+        stocks = summary.to_dict('index')
         
         return {
             'success': True,
@@ -62,6 +59,19 @@ def _load_comprehensive_stock_data_from_csv(csv_filename: str = "comprehensive_s
         return {'success': False, 'error': f'CSV load failed: {str(e)}', 'action': 'load_error'}
 
 
+def _load_comprehensive_stock_data_from_csv(csv_filename: str = "comprehensive_stock_data.csv") -> Dict[str, Any]:
+    """
+    Load comprehensive stock data from CSV (annual_return, volatility fields).
+    
+    Args:
+        csv_filename: CSV filename to load
+    
+    Returns:
+        Stock data with annual_return, volatility, sharpe_ratio
+    """
+    return _load_summary_csv(csv_filename, ['annual_return', 'volatility', 'sharpe_ratio', 'current_price'])
+
+
 def _load_simple_stock_data_from_csv(csv_filename: str = "simple_stock_data.csv") -> Dict[str, Any]:
     """
     Load simple stock data from CSV (return_pct, volatility_pct fields).
@@ -72,43 +82,7 @@ def _load_simple_stock_data_from_csv(csv_filename: str = "simple_stock_data.csv"
     Returns:
         Stock data with return_pct, volatility_pct, sharpe_ratio
     """
-    try:
-        if not os.path.exists(csv_filename):
-            return {
-                'success': False,
-                'error': f'CSV file {csv_filename} not found',
-                'action': 'file_missing'
-            }
-        
-        df = pd.read_csv(csv_filename, index_col='ticker')
-        if df.empty:
-            return {'success': False, 'error': 'CSV file is empty', 'action': 'empty_file'}
-        
-        stocks = {}
-        period = df['period'].iloc[0] if 'period' in df.columns else 'Unknown'
-        
-        for ticker, row in df.iterrows():
-            # ticker is now correctly the actual ticker symbol from the CSV index
-            stocks[ticker] = {
-                'company': row.get('company', 'Unknown'),
-                'sector': row.get('sector', 'Unknown'),
-                'return_pct': float(row.get('return_pct', 0)),
-                'volatility_pct': float(row.get('volatility_pct', 0)),
-                'sharpe_ratio': float(row.get('sharpe_ratio', 0)),
-                'current_price': float(row.get('current_price', 0))
-            }
-        
-        return {
-            'success': True,
-            'stocks': stocks,
-            'period': period,
-            'count': len(stocks),
-            'source': 'csv_cache',
-            'csv_filename': csv_filename
-        }
-        
-    except Exception as e:
-        return {'success': False, 'error': f'CSV load failed: {str(e)}', 'action': 'load_error'}
+    return _load_summary_csv(csv_filename, ['return_pct', 'volatility_pct', 'sharpe_ratio', 'current_price'])
 
 
 # Create tool versions for Strands
@@ -130,24 +104,24 @@ load_simple_stock_data_from_csv_func = _load_simple_stock_data_from_csv
 
 
 # Complex stock data fetching functions moved from lab3
-# Global cache for stock data to prevent redundant API calls
-_stock_data_cache = None
-_cache_timestamp = None
+def _price_source(store_stats_before: Dict[str, Any], store_stats_after: Dict[str, Any]) -> str:
+    """'cache' if the request was served without fetching any price range, else 'fresh'."""
+    return 'cache' if store_stats_after['fetch_calls'] == store_stats_before['fetch_calls'] else 'fresh'
 
 
 @tool
 def get_stock_data(tickers: List[str] = None, year: int = 2024, save_csv: bool = False, use_cache: bool = True) -> Dict[str, Any]:
     """
-    Fetch real stock data INCLUDING DAILY PRICES with automatic CSV export when caching enabled.
+    Fetch real stock data INCLUDING DAILY PRICES, reusing the columnar price cache.
     
     Args:
         tickers: List of stock symbols (defaults to major stocks across sectors)
         year: Year for data fetch (fetches from Jan 1 to Dec 31 of specified year)
-        save_csv: Whether to force save CSV files (saves regardless of use_cache setting)
-        use_cache: Whether to check/use CSV cache first (also enables auto-save to CSV)
+        save_csv: Whether to also export the summary and daily prices to CSV files
+        use_cache: Whether to use the price cache (only missing date ranges are fetched)
     
     Returns:
-        Stock performance data WITH daily prices and summary metrics
+        Stock performance data WITH daily prices, summary metrics and cache statistics
     """
     # Construct date range from year parameter
     start_date = f"{year}-01-01"
@@ -162,85 +136,65 @@ def get_stock_data(tickers: List[str] = None, year: int = 2024, save_csv: bool =
             'META', 'NVDA'                            # Growth/AI
         ]
     
-    # Try to load from cache first if enabled
-    if use_cache:
-        cache_result = load_comprehensive_stock_data_from_csv()
-        if cache_result['success']:
-            cached_tickers = set(cache_result['stocks'].keys())
-            needed_tickers = set(tickers)
-            
-            if needed_tickers.issubset(cached_tickers):
-                print(f"📁 Using cached comprehensive data with daily prices")
-                filtered_stocks = {t: cache_result['stocks'][t] for t in tickers if t in cache_result['stocks']}
-                return {
-                    'success': True,
-                    'stocks': filtered_stocks,
-                    'period': cache_result['period'],
-                    'source': 'cache'
-                }
-    
-    # Fetch fresh data
-    print("🌐 Fetching fresh comprehensive stock data with daily prices...")
     try:
+        if use_cache:
+            store = get_price_store()
+            before = store.stats()
+            prices = store.get_prices(tickers, start_date, end_date)
+            metrics = compute_metrics(prices)
+            info = store.get_info(list(metrics.index))
+            after = store.stats()
+            source = _price_source(before, after)
+            print("📁 Using cached daily prices" if source == 'cache' else "🌐 Fetched missing daily price ranges")
+        else:
+            # One batched download for every ticker, then one vectorized metrics pass
+            print("🌐 Fetching fresh comprehensive stock data with daily prices...")
+            prices = fetch_prices(tickers, start=start_date, end=end_date)
+            metrics = compute_metrics(prices)
+            info = fetch_company_info(list(metrics.index))
+            source = 'fresh'
+        
         stock_data = {}
         daily_prices = {}
         
-        for ticker in tickers:
-            try:
-                stock = yf.Ticker(ticker)
-                hist = stock.history(start=start_date, end=end_date)
-                info = stock.info
-                
-                if len(hist) > 0:
-                    start_price = hist['Close'].iloc[0]
-                    end_price = hist['Close'].iloc[-1]
-                    total_return = ((end_price - start_price) / start_price) * 100
-                    
-                    daily_returns = hist['Close'].pct_change().dropna()
-                    volatility = daily_returns.std() * np.sqrt(252) * 100
-                    
-                    # Calculate annual return
-                    years = len(hist) / 252
-                    annual_return = total_return / years if years > 0 else total_return
-                    sharpe_ratio = (annual_return - 2.0) / volatility if volatility > 0 else 0
-                    
-                    # Summary metrics
-                    stock_data[ticker] = {
-                        'company': info.get('longName', ticker),
-                        'sector': info.get('sector', 'Unknown'),
-                        'annual_return': round(annual_return, 2),
-                        'volatility': round(volatility, 2),
-                        'sharpe_ratio': round(sharpe_ratio, 2),
-                        'current_price': round(end_price, 2)
-                    }
-                    
-                    # Store DAILY PRICES (key difference from get_stock_analysis)
-                    daily_prices[ticker] = hist['Close'].round(2).to_dict()
-                    
-            except Exception as e:
-                print(f"Warning: Could not fetch data for {ticker}: {e}")
-                continue
+        for ticker, row in zip(metrics.index, metrics.itertuples(index=False)):
+            # Summary metrics
+            stock_data[ticker] = {
+                'company': info[ticker]['company'],
+                'sector': info[ticker]['sector'],
+                'annual_return': round(row.annual_return, 2),
+                'volatility': round(row.volatility, 2),
+                'sharpe_ratio': round(row.sharpe_ratio, 2),
+                'current_price': round(row.current_price, 2)
+            }
+            
+            # Store DAILY PRICES (key difference from get_stock_analysis)
+            daily_prices[ticker] = prices[ticker].dropna().round(2).to_dict()
+        
+        missing = [t for t in tickers if t not in stock_data]
+        if missing:
+            print(f"Warning: Could not fetch data for {', '.join(missing)}")
         
         result = {
             'success': True, 
             'stocks': stock_data, 
             'daily_prices': daily_prices,  # This is what makes it comprehensive
             'period': f"{start_date} to {end_date}", 
-            'source': 'fresh'
+            'source': source
         }
+        if use_cache:
+            result['cache_stats'] = store.stats()
         
-        # Save to CSV if caching is enabled OR explicitly requested
+        # Summary CSV is what load_comprehensive_stock_data_from_csv hands to other agents
         if (use_cache or save_csv) and stock_data:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
-            # Save summary data
             df = pd.DataFrame.from_dict(stock_data, orient='index')
+            # Period lets the portfolio tools price the same window from the cache
+            df['period'] = result['period']
             df.to_csv("comprehensive_stock_data.csv", index_label='ticker')
             
-            # Save DAILY PRICES (comprehensive feature)
-            if daily_prices:
-                prices_df = pd.DataFrame(daily_prices)
-                prices_df.to_csv(f"stock_daily_prices_{start_date}_to_{end_date}_{timestamp}.csv")
+            # Daily prices live in the price cache; export them only on request
+            if save_csv and daily_prices:
+                prices.round(2).to_csv(f"stock_daily_prices_{start_date}_to_{end_date}.csv")
                 print(f"💾 Comprehensive data + daily prices saved to CSV")
         
         return result
@@ -257,84 +211,114 @@ def get_stock_analysis(tickers: List[str] = None, period: str = "1y", use_cache:
     Args:
         tickers: List of stock symbols (defaults to major stocks)
         period: Time period for data ("1y", "6mo", "3mo")
-        use_cache: Whether to check/use CSV cache first
+        use_cache: Whether to use the price cache (only missing date ranges are fetched)
     
     Returns:
-        Stock analysis with SUMMARY METRICS ONLY (return_pct, volatility_pct)
+        Stock analysis with SUMMARY METRICS ONLY (return_pct, volatility_pct) and cache statistics
     """
     # Default to major stocks if none provided
     if tickers is None:
         tickers = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'TSLA', 'JPM', 'JNJ', 'V']
     
-    # Try to load from cache first if enabled
-    if use_cache:
-        cache_result = load_simple_stock_data_from_csv()
-        if cache_result['success']:
-            cached_tickers = set(cache_result['stocks'].keys())
-            needed_tickers = set(tickers)
-            
-            if needed_tickers.issubset(cached_tickers):
-                print(f"📁 Using cached simple analysis (summary metrics only)")
-                filtered_stocks = {t: cache_result['stocks'][t] for t in tickers if t in cache_result['stocks']}
-                return {
-                    'success': True,
-                    'period': cache_result['period'],
-                    'stocks': filtered_stocks,
-                    'count': len(filtered_stocks),
-                    'source': 'cache'
-                }
-    
-    # Fetch fresh data
-    print("🌐 Fetching fresh market data for summary analysis...")
     stock_data = {}
+    source = 'fresh'
+    store = get_price_store() if use_cache else None
     
-    for ticker in tickers:
-        try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period=period)
-            info = stock.info
-            
-            if len(hist) > 0:
-                start_price = hist['Close'].iloc[0]
-                end_price = hist['Close'].iloc[-1]
-                total_return = ((end_price - start_price) / start_price) * 100
-                
-                daily_returns = hist['Close'].pct_change().dropna()
-                volatility = daily_returns.std() * np.sqrt(252) * 100
-                sharpe_ratio = (total_return - 2.0) / volatility if volatility > 0 else 0
-                
-                # SUMMARY METRICS ONLY (no daily prices)
-                stock_data[ticker] = {
-                    'company': info.get('longName', ticker),
-                    'sector': info.get('sector', 'Unknown'),
-                    'return_pct': round(total_return, 1),
-                    'volatility_pct': round(volatility, 1),
-                    'sharpe_ratio': round(sharpe_ratio, 2),
-                    'current_price': round(end_price, 2)
-                }
-                
-        except Exception as e:
-            print(f"⚠️ Could not analyze {ticker}: {e}")
-            continue
+    try:
+        if store is not None:
+            before = store.stats()
+            start_date, end_date = period_range(period)
+            prices = store.get_prices(tickers, start_date, end_date)
+            metrics = compute_metrics(prices)
+            info = store.get_info(list(metrics.index))
+            source = _price_source(before, store.stats())
+            print("📁 Using cached prices for summary analysis" if source == 'cache'
+                  else "🌐 Fetched missing price ranges for summary analysis")
+        else:
+            # One batched download for every ticker, then one vectorized metrics pass
+            print("🌐 Fetching fresh market data for summary analysis...")
+            prices = fetch_prices(tickers, period=period)
+            metrics = compute_metrics(prices)
+            info = fetch_company_info(list(metrics.index))
+        
+        for ticker, row in zip(metrics.index, metrics.itertuples(index=False)):
+            # SUMMARY METRICS ONLY (no daily prices)
+            stock_data[ticker] = {
+                'company': info[ticker]['company'],
+                'sector': info[ticker]['sector'],
+                'return_pct': round(row.total_return, 1),
+                'volatility_pct': round(row.volatility, 1),
+                'sharpe_ratio': round(row.total_sharpe_ratio, 2),
+                'current_price': round(row.current_price, 2)
+            }
+    except Exception as e:
+        print(f"⚠️ Could not analyze {', '.join(tickers)}: {e}")
+    
+    missing = [t for t in tickers if t not in stock_data]
+    if stock_data and missing:
+        print(f"⚠️ Could not analyze {', '.join(missing)}")
     
     result = {
         'success': len(stock_data) > 0,
         'period': period,
         'stocks': stock_data,
         'count': len(stock_data),
-        'source': 'fresh'
+        'source': source
         # Note: NO daily_prices key - this is summary only
     }
+    if store is not None:
+        result['cache_stats'] = store.stats()
     
-    # Save to CSV if enabled
+    # Summary CSV is what load_simple_stock_data_from_csv hands to other agents
     if result['success'] and use_cache:
         df = pd.DataFrame.from_dict(stock_data, orient='index')
+        # Period lets the portfolio tools price the same window from the cache
+        df['period'] = period
         df.to_csv("simple_stock_data.csv", index_label='ticker')
         print(f"💾 Simple analysis (summary only) saved to CSV")
     
     return result
 
 
+@tool
+def get_price_cache_stats() -> Dict[str, Any]:
+    """
+    Report price cache statistics: hit rate, fetched ranges and load times.
+    
+    Returns:
+        Cache statistics for the columnar price store
+    """
+    return {'success': True, 'cache_stats': get_price_store().stats()}
+
+
+def _price_window(period: str) -> Tuple[str, str]:
+    """
+    [start, end) dates for an analysis period ("1y", "6mo", ... or "YYYY-MM-DD to YYYY-MM-DD").
+
+    Raises:
+        ValueError: if the period is not one of those forms (eg: 'Unknown' from a CSV without a period column)
+    """
+    if ' to ' in str(period):
+        start, end = str(period).split(' to ', 1)
+        return start.strip(), end.strip()
+    try:
+        return period_range(str(period))
+    except ValueError:
+        raise ValueError(
+            f"Unknown analysis period {period!r}; re-run the stock analysis so its period is recorded"
+        ) from None
+
+
+def _analyze_portfolios(portfolios: Dict[str, Dict[str, float]], period: str) -> Dict[str, Dict[str, Any]]:
+    """Covariance-aware risk and daily-rebalanced backtest for named portfolios over cached prices."""
+    tickers = sorted({ticker for allocation in portfolios.values() for ticker in allocation})
+    start, end = _price_window(period)
+    engine = PortfolioEngine.from_store(tickers, start, end)
+    if not engine.tickers:
+        raise ValueError(f"No price history available for {', '.join(tickers)}")
+    return engine.analyze(portfolios)
+
+
 # Portfolio creation functions moved from lab3
 @tool
 def create_growth_portfolio(stock_analysis: Dict[str, Any] = None, allocation_count: int = 4, allocation_method: str = "performance_weighted") -> Dict[str, Any]:
@@ -413,20 +397,23 @@ def create_growth_portfolio(stock_analysis: Dict[str, Any] = None, allocation_co
         for ticker in portfolio:
             portfolio[ticker] = round((portfolio[ticker] / total_weight) * 100, 1)
     
-    # Calculate portfolio metrics - simple analysis uses return_pct, volatility_pct
-    total_return = sum(stocks[ticker]['return_pct'] * (portfolio[ticker]/100) 
-                      for ticker in portfolio.keys())
-    
-    avg_volatility = sum(stocks[ticker]['volatility_pct'] * (portfolio[ticker]/100) 
-                        for ticker in portfolio.keys())
+    # Portfolio metrics from the cached price matrix (correlation-aware volatility)
+    try:
+        metrics = _analyze_portfolios({'Growth': portfolio}, stock_analysis.get('period', '1y'))['Growth']
+    except Exception as e:
+        return {'success': False, 'error': f'Portfolio analysis failed: {str(e)}'}
     
     return {
         'success': True,
         'strategy': 'Growth',
         'allocation_method': allocation_method,
         'portfolio': portfolio,
-        'expected_return': round(total_return, 1),
-        'risk_level': 'High' if avg_volatility > 25 else 'Moderate',
+        'expected_return': metrics['expected_return'],
+        'volatility': metrics['volatility'],
+        'sharpe_ratio': metrics['sharpe_ratio'],
+        'backtest_return': metrics['backtest_return'],
+        'max_drawdown': metrics['max_drawdown'],
+        'risk_level': 'High' if metrics['volatility'] > 25 else 'Moderate',
         'stock_count': len(portfolio),
         'data_source': stock_analysis.get('source', 'unknown')
     }
@@ -490,19 +477,23 @@ def create_diversified_portfolio(stock_analysis: Dict[str, Any] = None, allocati
     total = sum(portfolio.values())
     portfolio = {k: round(v * 100 / total, 1) for k, v in portfolio.items()}
     
-    # Calculate portfolio metrics - simple analysis uses return_pct, volatility_pct
-    total_return = sum(stocks[ticker]['return_pct'] * (allocation/100) 
-                      for ticker, allocation in portfolio.items())
-    
-    avg_volatility = sum(stocks[ticker]['volatility_pct'] * (allocation/100) 
-                        for ticker, allocation in portfolio.items())
+    # Portfolio metrics from the cached price matrix (correlation-aware volatility)
+    try:
+        metrics = _analyze_portfolios({'Diversified': portfolio}, stock_analysis.get('period', '1y'))['Diversified']
+    except Exception as e:
+        return {'success': False, 'error': f'Portfolio analysis failed: {str(e)}'}
     
     return {
         'success': True,
         'strategy': 'Diversified',
         'portfolio': portfolio,
-        'expected_return': round(total_return, 1),
-        'risk_level': 'Low' if avg_volatility < 20 else 'Moderate',
+        'expected_return': metrics['expected_return'],
+        'volatility': metrics['volatility'],
+        'sharpe_ratio': metrics['sharpe_ratio'],
+        'diversification_ratio': metrics['diversification_ratio'],
+        'backtest_return': metrics['backtest_return'],
+        'max_drawdown': metrics['max_drawdown'],
+        'risk_level': 'Low' if metrics['volatility'] < 20 else 'Moderate',
         'sectors': len(sectors),
         'stock_count': len(portfolio),
         'data_source': stock_analysis.get('source', 'unknown')
@@ -529,47 +520,48 @@ def calculate_portfolio_performance(portfolios: Dict[str, Dict[str, float]], inv
     if not stock_analysis.get('success'):
         return {'success': False, 'error': 'No cached stock analysis available. Run stock_data_agent first.'}
     
-    stocks = stock_analysis['stocks']
+    # Every strategy is scored in one batch over the cached price matrix
+    try:
+        analysis = _analyze_portfolios(portfolios, stock_analysis.get('period', '1y'))
+    except Exception as e:
+        return {'success': False, 'error': f'Portfolio analysis failed: {str(e)}'}
+    
     results = {}
     
-    for strategy, allocation in portfolios.items():
-        try:
-            # Calculate weighted portfolio return
-            total_return = 0.0
-            total_volatility = 0.0
-            
-            for ticker, percentage in allocation.items():
-                if ticker in stocks:
-                    weight = percentage / 100.0
-                    # Use simple analysis field names: return_pct, volatility_pct
-                    total_return += stocks[ticker]['return_pct'] * weight
-                    total_volatility += stocks[ticker]['volatility_pct'] * weight
-            
-            # Calculate investment outcome
-            final_value = investment_amount * (1 + total_return / 100.0)
-            profit = final_value - investment_amount
-            
-            # Risk assessment
-            if total_volatility < 20:
-                risk_level = "Low"
-            elif total_volatility < 30:
-                risk_level = "Moderate"
-            else:
-                risk_level = "High"
-            
-            results[strategy] = {
-                'expected_return_pct': round(total_return, 1),
-                'portfolio_volatility': round(total_volatility, 1),
-                'risk_level': risk_level,
-                'initial_investment': investment_amount,
-                'final_value': round(final_value, 2),
-                'profit': round(profit, 2),
-                'profit_percentage': round((profit / investment_amount) * 100, 1),
-                'data_source': stock_analysis.get('source', 'unknown')
-            }
-            
-        except Exception as e:
-            results[strategy] = {'error': f'Calculation failed: {str(e)}'}
+    for strategy, metrics in analysis.items():
+        if metrics['stocks_priced'] == 0:
+            results[strategy] = {'error': 'Calculation failed: no priced stocks in allocation'}
+            continue
+        
+        total_return = metrics['expected_return']
+        total_volatility = metrics['volatility']
+        
+        # Calculate investment outcome
+        final_value = investment_amount * (1 + total_return / 100.0)
+        profit = final_value - investment_amount
+        
+        # Risk assessment
+        if total_volatility < 20:
+            risk_level = "Low"
+        elif total_volatility < 30:
+            risk_level = "Moderate"
+        else:
+            risk_level = "High"
+        
+        results[strategy] = {
+            'expected_return_pct': total_return,
+            'portfolio_volatility': total_volatility,
+            'sharpe_ratio': metrics['sharpe_ratio'],
+            'diversification_ratio': metrics['diversification_ratio'],
+            'backtest_return_pct': metrics['backtest_return'],
+            'max_drawdown_pct': metrics['max_drawdown'],
+            'risk_level': risk_level,
+            'initial_investment': investment_amount,
+            'final_value': round(final_value, 2),
+            'profit': round(profit, 2),
+            'profit_percentage': round((profit / investment_amount) * 100, 1),
+            'data_source': stock_analysis.get('source', 'unknown')
+        }
     
     return {
         'success': True,
@@ -784,26 +776,24 @@ def validate_portfolio_performance(portfolio_allocations: Dict[str, float],
     if total_allocation == 0:
         return {'success': False, 'error': 'No valid allocations'}
     
-    # Normalize allocations to percentages
-    normalized_alloc = {k: v/total_allocation for k, v in portfolio_allocations.items()}
-    
-    # Calculate weighted return using validation data
-    actual_return = 0.0
-    actual_volatility = 0.0
-    valid_stocks = 0
+    # Only stocks present in the validation data are scored
+    validated = {k: v for k, v in portfolio_allocations.items() if k in validation_stocks}
+    if not validated:
+        return {'success': False, 'error': 'No valid stocks found in validation data'}
     
-    for ticker, weight in normalized_alloc.items():
-        if ticker in validation_stocks:
-            # Use return_pct from validation data
-            actual_return += validation_stocks[ticker]['return_pct'] * weight
-            actual_volatility += validation_stocks[ticker]['volatility_pct'] * weight
-            valid_stocks += 1
+    # Covariance-aware risk and backtest over the validation window's cached prices
+    try:
+        metrics = _analyze_portfolios({'validation': validated}, validation_data.get('period', '1y'))['validation']
+    except Exception as e:
+        return {'success': False, 'error': f'Portfolio validation failed: {str(e)}'}
     
+    valid_stocks = metrics['stocks_priced']
     if valid_stocks == 0:
         return {'success': False, 'error': 'No valid stocks found in validation data'}
     
-    # Calculate Sharpe ratio using validation data
-    actual_sharpe = actual_return / actual_volatility if actual_volatility > 0 else 0
+    actual_return = metrics['expected_return']
+    actual_volatility = metrics['volatility']
+    actual_sharpe = metrics['sharpe_ratio']
     
     # Determine risk level
     if actual_volatility < 20:
@@ -817,7 +807,9 @@ def validate_portfolio_performance(portfolio_allocations: Dict[str, float],
         'success': True,
         'actual_return': round(actual_return, 1),
         'actual_volatility': round(actual_volatility, 1),
-        'actual_sharpe': round(actual_sharpe, 2),
+        'actual_sharpe': actual_sharpe,
+        'backtest_return': metrics['backtest_return'],
+        'max_drawdown': metrics['max_drawdown'],
         'risk_level': risk_level,
         'validation_period': validation_data.get('period', 'Current'),
         'stocks_validated': valid_stocks,
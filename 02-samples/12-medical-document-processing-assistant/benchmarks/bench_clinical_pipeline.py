@@ -0,0 +1,158 @@
+"""
+Benchmark: three link_* model calls vs the single-pass extraction pipeline
+
+Codes a set of synthetic discharge summaries against a simulated Bedrock
+client. The client's latency grows with the prompt and answer size, like a
+real model, and it counts tokens at 4 characters per token. The summaries
+reuse sections (for example a standard medication list), so some chunks repeat
+across documents.
+
+    before: link_icd, link_rx and link_snomed each send the full text in one
+            call (serially, as the agent calls them), one new client per call
+    after:  ClinicalEntityPipeline; one call per chunk for all entity kinds,
+            chunks run concurrently and are cached by content hash, and
+            entities are coded against the local terminology index
+
+Usage (from the medical-document-processing-assistant directory):
+    python benchmarks/bench_clinical_pipeline.py --documents 5 --sections 40
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clinical_pipeline import ClinicalEntityPipeline
+from terminology_service import TerminologyService
+
+DIAGNOSES = ["Seizure", "Headache", "Nausea", "Blurred vision", "Atrial fibrillation",
+             "Hypertension", "Type 2 diabetes mellitus", "Chronic kidney disease", "Pneumonia"]
+MEDICATIONS = ["Topamax", "Metformin", "Lisinopril", "Apixaban", "Atorvastatin", "Ondansetron"]
+PROCEDURES = ["Referral to neurologist", "Electrocardiogram", "Chest X-ray", "Hemodialysis"]
+
+
+class SimulatedBedrock:
+    """invoke_model with latency proportional to tokens, answering from the known entity names."""
+
+    def __init__(self, per_call, per_input_token, per_output_token):
+        self.per_call = per_call
+        self.per_input_token = per_input_token
+        self.per_output_token = per_output_token
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def invoke_model(self, modelId, body):
+        prompt = json.loads(body)["messages"][0]["content"]
+        answer = json.dumps({
+            "diagnoses": [d for d in DIAGNOSES if d in prompt],
+            "medications": [{"name": m, "dosage": "50 mg", "frequency": "daily"} for m in MEDICATIONS if m in prompt],
+            "procedures": [p for p in PROCEDURES if p in prompt],
+        })
+        input_tokens, output_tokens = len(prompt) // 4, len(answer) // 4
+        time.sleep(self.per_call + input_tokens * self.per_input_token + output_tokens * self.per_output_token)
+        self.calls += 1
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        return {"body": io.BytesIO(json.dumps({
+            "content": [{"text": answer}],
+            "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+        }).encode("utf-8"))}
+
+
+def make_documents(count, sections, rng):
+    filler = ("Patient was seen and examined. Vital signs stable. Plan discussed with the patient "
+              "and family, who agree with the plan of care. ") * 8
+    shared = [f"Medication list:\n" + "\n".join(f"{m} 50 mg daily" for m in MEDICATIONS) + "\n" + filler]
+    documents = []
+    for d in range(count):
+        parts = [shared[0]]
+        for s in range(sections):
+            parts.append(f"Day {s + 1} (document {d}): {rng.choice(DIAGNOSES)} noted. "
+                         f"{rng.choice(PROCEDURES)} ordered.\n{filler}")
+        documents.append("\n\n".join(parts))
+    return documents
+
+
+def write_release_files(directory):
+    icd = os.path.join(directory, "icd10cm-codes-2025.txt")
+    with open(icd, "w") as f:
+        for i, term in enumerate(DIAGNOSES):
+            f.write(f"R{i:02d}0    {term}\n")
+    rx = os.path.join(directory, "RXNCONSO.RRF")
+    with open(rx, "w") as f:
+        for i, term in enumerate(MEDICATIONS):
+            f.write(f"{1000 + i}|ENG||||||||||RXNORM|BN||{term}||N||\n")
+    snomed = os.path.join(directory, "sct2_Description_Snapshot-en_INT_20250301.txt")
+    with open(snomed, "w") as f:
+        f.write("id\teffectiveTime\tactive\tmoduleId\tconceptId\tlanguageCode\ttypeId\tterm\tcaseSignificanceId\n")
+        for i, term in enumerate(PROCEDURES):
+            f.write(f"{i}\t20250301\t1\t0\t{300000000 + i}\ten\t900000000000013009\t{term}\t0\n")
+    return {"icd10": icd, "rxnorm": rx, "snomed": snomed}
+
+
+def run_before(documents, client, client_setup):
+    for text in documents:
+        for data_type in ("diagnoses", "medications", "treatments"):
+            time.sleep(client_setup)
+            prompt = f"Extract all {data_type} from the following clinical text and link them to codes.\n{text}"
+            response = client.invoke_model(modelId="model", body=json.dumps({
+                "messages": [{"role": "user", "content": prompt}]}))
+            json.loads(response["body"].read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--documents", type=int, default=5)
+    parser.add_argument("--sections", type=int, default=40, help="sections per document")
+    parser.add_argument("--chunk-chars", type=int, default=12000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--scale", type=float, default=0.1, help="fraction of realistic model latency to simulate")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    documents = make_documents(args.documents, args.sections, rng)
+    # Roughly 0.5s per call, 0.2 ms per prompt token and 20 ms per answer token, scaled
+    latency = (0.5 * args.scale, 0.0002 * args.scale, 0.02 * args.scale)
+
+    before_client = SimulatedBedrock(*latency)
+    started = time.perf_counter()
+    run_before(documents, before_client, client_setup=0.05 * args.scale)
+    before = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as directory:
+        terminology = TerminologyService(os.path.join(directory, "terminology.db"))
+        for system, path in write_release_files(directory).items():
+            terminology.load(system, path)
+        after_client = SimulatedBedrock(*latency)
+        pipeline = ClinicalEntityPipeline(terminology, client=after_client,
+                                          chunk_chars=args.chunk_chars, max_workers=args.workers)
+        started = time.perf_counter()
+        results = [pipeline.process(text) for text in documents]
+        after = time.perf_counter() - started
+        pipeline.close()
+
+    chars = sum(len(d) for d in documents)
+    print(f"{args.documents} documents, {chars // 4} tokens of text")
+    print(f"before: {before:.2f}s  ({before_client.calls} model calls, "
+          f"{before_client.input_tokens} input / {before_client.output_tokens} output tokens)")
+    print(f"after:  {after:.2f}s  ({after_client.calls} model calls, "
+          f"{after_client.input_tokens} input / {after_client.output_tokens} output tokens)")
+    print(f"speedup: {before / after:.1f}x")
+    metrics = results[-1]["metrics"]
+    print(f"last document: {metrics['chunks']} chunks, {metrics['model_calls']} calls, "
+          f"{metrics['cache_hits']} cache hits, {metrics['input_tokens']} input tokens, "
+          f"extraction {metrics['extraction_seconds']}s, coding {metrics['coding_seconds']}s")
+    coded = results[-1]["medications"][0]
+    print(f"example: {coded}")
+
+
+if __name__ == "__main__":
+    main()
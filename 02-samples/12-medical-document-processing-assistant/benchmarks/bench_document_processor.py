@@ -0,0 +1,180 @@
+"""
+Benchmark: single whole-file model request vs the page-parallel PDF processor
+
+Writes a synthetic 300-page PDF in which most pages have a text layer and
+every tenth page is a scanned image with no text. Model requests go to a
+simulated Bedrock client whose latency grows with input and output tokens
+(about 1,500 input tokens per PDF page) and whose answer is capped at
+max_tokens, like the real API.
+
+    before: process_document sends the whole file, base64-encoded, in one
+            request capped at max_tokens 4096; the pypdf fallback reads every
+            page serially and joins the text with +=, losing scanned pages
+    after:  DocumentProcessor; page ranges read concurrently, text-layer pages
+            extracted locally, only scanned pages sent to the model (one page
+            per request, bounded pool), merged in order and cached per page
+
+Usage (from the medical-document-processing-assistant directory):
+    python benchmarks/bench_document_processor.py --pages 300
+"""
+
+import io
+import os
+import base64
+import sys
+import json
+import time
+import zlib
+import random
+import argparse
+import tempfile
+
+from pypdf import PdfReader
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from document_processor import DocumentProcessor
+
+PAGE_INPUT_TOKENS = 1500
+SCANNED_PAGE_TEXT = "Scanned note: patient reports improved sleep, continue Topiramate 50 mg daily. " * 30
+
+
+class SimulatedBedrock:
+    """invoke_model charging latency per call, input token and output token, with output capped at max_tokens."""
+
+    def __init__(self, per_call, per_input_token, per_output_token):
+        self.per_call = per_call
+        self.per_input_token = per_input_token
+        self.per_output_token = per_output_token
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def invoke_model(self, modelId, body):
+        request = json.loads(body)
+        source = request["messages"][0]["content"][0]["source"]
+        if source["media_type"] == "application/pdf":
+            pages = max(1, len(PdfReader(io.BytesIO(base64.b64decode(source["data"]))).pages))
+        else:
+            pages = 1
+        input_tokens = pages * PAGE_INPUT_TOKENS
+        # A full answer would be every page's text; the response is cut at max_tokens
+        output_tokens = min(pages * len(SCANNED_PAGE_TEXT) // 4, request["max_tokens"])
+        time.sleep(self.per_call + input_tokens * self.per_input_token + output_tokens * self.per_output_token)
+        self.calls += 1
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        return {"body": io.BytesIO(json.dumps({
+            "content": [{"text": (SCANNED_PAGE_TEXT * pages)[:output_tokens * 4]}],
+            "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+        }).encode("utf-8"))}
+
+
+def make_pdf(path, pages, scanned_every=10, lines=40, seed=7):
+    """Minimal PDF: Helvetica text pages, with every scanned_every-th page a grayscale image only."""
+    rng = random.Random(seed)
+    objects = [None, None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+
+    def add(data):
+        objects.append(data)
+        return len(objects)
+
+    kids = []
+    for number in range(1, pages + 1):
+        if scanned_every and number % scanned_every == 0:
+            width = height = 200
+            pixels = zlib.compress(bytes(rng.randrange(256) for _ in range(width * height)))
+            image = add(b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray "
+                        b"/BitsPerComponent 8 /Filter /FlateDecode /Length %d >>\nstream\n%s\nendstream"
+                        % (width, height, len(pixels), pixels))
+            content = b"q 500 0 0 700 50 50 cm /Im0 Do Q"
+            resources = b"<< /XObject << /Im0 %d 0 R >> >>" % image
+        else:
+            operations = [b"BT /F1 10 Tf 50 750 Td 12 TL"]
+            for line in range(1, lines + 1):
+                operations.append(b"(Page %d line %d: patient stable, continue Metformin 500 mg twice daily.) '"
+                                  % (number, line))
+            operations.append(b"ET")
+            content = b"\n".join(operations)
+            resources = b"<< /Font << /F1 3 0 R >> >>"
+        stream = zlib.compress(content)
+        contents = add(b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(stream), stream))
+        kids.append(add(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources %s /Contents %d 0 R >>"
+                        % (resources, contents)))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, data in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, data)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def run_before(path, client):
+    processor = DocumentProcessor(client=client)
+    with open(path, "rb") as f:
+        text = processor._invoke(f.read(), "application/pdf")
+    processor.close()
+    return text
+
+
+def run_before_fallback(path):
+    reader = PdfReader(path)
+    text = ""
+    for page in reader.pages:
+        text += page.extract_text() + "\n"
+    return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--scanned-every", type=int, default=10)
+    parser.add_argument("--model-workers", type=int, default=8)
+    parser.add_argument("--scale", type=float, default=0.1, help="fraction of realistic model latency to simulate")
+    args = parser.parse_args()
+
+    # Roughly 0.5s per call, 0.1 ms per input token and 20 ms per output token, scaled
+    latency = (0.5 * args.scale, 0.0001 * args.scale, 0.02 * args.scale)
+    scanned = args.pages // args.scanned_every if args.scanned_every else 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "record.pdf")
+        make_pdf(path, args.pages, args.scanned_every)
+        print(f"{args.pages}-page PDF ({os.path.getsize(path) // 1024} KB), {scanned} scanned pages")
+
+        client = SimulatedBedrock(*latency)
+        started = time.perf_counter()
+        text = run_before(path, client)
+        before = time.perf_counter() - started
+        print(f"before (one request):  {before:.2f}s  {client.calls} call, {client.input_tokens} input tokens, "
+              f"{len(text)} chars returned (truncated at max_tokens)")
+
+        started = time.perf_counter()
+        text = run_before_fallback(path)
+        fallback = time.perf_counter() - started
+        print(f"before (pypdf += loop): {fallback:.2f}s  {len(text)} chars, scanned pages lost")
+
+        client = SimulatedBedrock(*latency)
+        processor = DocumentProcessor(client=client, model_workers=args.model_workers)
+        result = processor.process_pdf(path)
+        print(f"after:                 {result['seconds']:.2f}s  {client.calls} calls, {client.input_tokens} input "
+              f"tokens, {len(result['text'])} chars, {result['text_pages']} text-layer pages, "
+              f"{result['model_pages']} model pages")
+        print(f"speedup vs one request: {before / result['seconds']:.1f}x")
+
+        again = processor.process_pdf(path)
+        print(f"after, cached:         {again['seconds']:.2f}s  {again['cache_hits']} page cache hits, "
+              f"{client.calls - result['model_pages']} new calls")
+        processor.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Benchmark: per-term remote API lookups vs the local terminology index
+
+Generates synthetic ICD-10-CM, RxNorm and SNOMED CT release files, builds the
+index from them, then codes a set of discharge summaries. Each summary has a
+mix of exact, prefix and misspelled terms, and terms repeat across summaries.
+Remote calls are simulated with a fixed latency per HTTP request.
+
+    before: one remote lookup per term (ICD-10 and SNOMED: 1 request; RxNorm:
+            1 request plus 3 serial allrelated requests), nothing cached
+    after:  TerminologyService.lookup_many per code system against the local
+            index
+
+Usage (from the medical-document-processing-assistant directory):
+    python benchmarks/bench_terminology.py --concepts 100000 --latency 0.08
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from terminology_service import TerminologyService
+
+SYLLABLES = ["car", "dio", "neph", "ro", "gas", "tro", "hep", "a", "ti", "tis", "my", "al", "gia",
+             "os", "teo", "pul", "mo", "nar", "cer", "e", "bral", "ven", "tric", "u", "lar", "pan",
+             "cre", "at", "ic", "thy", "roid", "der", "ma", "lym", "pho", "ma", "leu", "ke", "mi"]
+QUALIFIERS = ["acute", "chronic", "left", "right", "bilateral", "unspecified", "recurrent",
+              "with complication", "without complication", "initial encounter", "oral tablet",
+              "50 MG", "100 MG", "injection", "procedure", "referral to", "excision of"]
+RRF_BLANK = "|".join([""] * 18)
+
+
+def make_words(count, rng):
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_terms(count, words, rng):
+    terms = []
+    for _ in range(count):
+        term = " ".join(rng.sample(words, rng.randint(1, 3)))
+        if rng.random() < 0.6:
+            term += " " + rng.choice(QUALIFIERS)
+        terms.append(term.capitalize())
+    return terms
+
+
+def write_release_files(directory, concepts, rng):
+    words = make_words(max(2000, concepts // 20), rng)
+    paths = {}
+
+    icd_terms = make_terms(concepts, words, rng)
+    paths["icd10"] = os.path.join(directory, "icd10cm-codes-2025.txt")
+    with open(paths["icd10"], "w") as f:
+        for i, term in enumerate(icd_terms):
+            code = f"{chr(65 + i % 26)}{i // 26 % 100:02d}{i // 2600 % 10}{i // 26000 % 10}"
+            f.write(f"{code:<8}{term}\n")
+
+    rx_terms = make_terms(concepts, words, rng)
+    paths["rxnorm"] = os.path.join(directory, "RXNCONSO.RRF")
+    with open(paths["rxnorm"], "w") as f:
+        for i, term in enumerate(rx_terms):
+            fields = RRF_BLANK.split("|")
+            fields[0], fields[11], fields[12], fields[14], fields[16] = (
+                str(100000 + i), "RXNORM", rng.choice(["IN", "BN", "SCD", "SBD"]), term, "N")
+            f.write("|".join(fields) + "\n")
+
+    snomed_terms = make_terms(concepts, words, rng)
+    paths["snomed"] = os.path.join(directory, "sct2_Description_Snapshot-en_INT_20250301.txt")
+    with open(paths["snomed"], "w") as f:
+        f.write("id\teffectiveTime\tactive\tmoduleId\tconceptId\tlanguageCode\ttypeId\tterm\tcaseSignificanceId\n")
+        for i, term in enumerate(snomed_terms):
+            f.write(f"{i}\t20250301\t1\t900000000000207008\t{300000000 + i}\ten\t"
+                    f"900000000000013009\t{term}\t900000000000448009\n")
+
+    return paths, {"icd10": icd_terms, "rxnorm": rx_terms, "snomed": snomed_terms}
+
+
+def misspell(term, rng):
+    words = term.split()
+    i = max(range(len(words)), key=lambda j: len(words[j]))
+    word = words[i]
+    if len(word) >= 6:
+        k = rng.randint(1, len(word) - 2)
+        words[i] = word[:k] + word[k + 1:]
+    return " ".join(words)
+
+
+def make_documents(count, terms, rng, per_system=12):
+    """Per document: per_system terms for each code system, drawn from a shared pool so they repeat."""
+    pools = {system: rng.sample(values, per_system * 4) for system, values in terms.items()}
+    documents = []
+    for _ in range(count):
+        document = {}
+        for system, pool in pools.items():
+            queries = []
+            for term in rng.sample(pool, per_system):
+                kind = rng.random()
+                if kind < 0.5:
+                    queries.append(term.lower())
+                elif kind < 0.8:
+                    queries.append(" ".join(w[:4] for w in term.split()[:2]))
+                else:
+                    queries.append(misspell(term, rng))
+            document[system] = queries
+        documents.append(document)
+    return documents
+
+
+def run_before(documents, latency):
+    requests = 0
+    for document in documents:
+        for system, queries in document.items():
+            for _ in queries:
+                calls = 4 if system == "rxnorm" else 1
+                time.sleep(latency * calls)
+                requests += calls
+    return requests
+
+
+def run_after(documents, service):
+    found = total = 0
+    for document in documents:
+        for system, queries in document.items():
+            results = service.lookup_many(system, queries)
+            total += len(queries)
+            found += sum(1 for q in queries if results.get(q))
+    return found, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--concepts", type=int, default=100000, help="concepts per code system")
+    parser.add_argument("--documents", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.08, help="simulated seconds per remote request")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        paths, terms = write_release_files(directory, args.concepts, rng)
+        documents = make_documents(args.documents, terms, rng)
+        lookups = sum(len(q) for d in documents for q in d.values())
+
+        # Remote fallback should not be needed; count it if it is
+        remote_calls = []
+
+        def remote(term):
+            remote_calls.append(term)
+            time.sleep(args.latency)
+            return json.dumps([])
+
+        service = TerminologyService(os.path.join(directory, "terminology.db"),
+                                     remote_lookups={s: remote for s in paths})
+        started = time.perf_counter()
+        for system, path in paths.items():
+            service.load(system, path)
+        build = time.perf_counter() - started
+        print(f"index build: {3 * args.concepts} concepts in {build:.1f}s")
+
+        started = time.perf_counter()
+        requests = run_before(documents, args.latency)
+        before = time.perf_counter() - started
+
+        started = time.perf_counter()
+        found, total = run_after(documents, service)
+        after = time.perf_counter() - started
+
+        print(f"{args.documents} documents, {lookups} term lookups")
+        print(f"before: {before:.2f}s  ({requests} remote requests)")
+        print(f"after:  {after:.2f}s  ({after / total * 1000:.2f} ms/term, {found}/{total} resolved locally, "
+              f"{len(remote_calls)} remote fallbacks)")
+        print(f"speedup: {before / after:.0f}x")
+
+        for label, query in [("exact", terms["icd10"][0].lower()),
+                             ("prefix", " ".join(w[:4] for w in terms["icd10"][1].split()[:2])),
+                             ("fuzzy", misspell(terms["icd10"][2], rng))]:
+            started = time.perf_counter()
+            results = service.lookup_local("icd10", query)
+            elapsed = (time.perf_counter() - started) * 1000
+            top = results[0]["description"] if results else "-"
+            print(f"  {label:6s} {query!r:45s} -> {top!r} ({elapsed:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
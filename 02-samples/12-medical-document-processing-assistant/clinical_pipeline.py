@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Single-pass clinical entity extraction and coding.
+
+A clinical document is split into chunks and each chunk is sent to Bedrock
+once, asking for diagnoses, medications and procedures together. Chunks run
+concurrently, and their extractions are cached by a hash of the chunk text, so
+the same text is never sent to the model twice. The merged entities are then
+coded against the terminology index, with one batched lookup per code system,
+and the three lookups run concurrently. Token and latency counters are
+reported for each document.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import boto3
+
+from terminology_service import SYSTEMS, TerminologyService, normalize
+
+PIPELINE_CHUNK_CHARS = int(os.environ.get("PIPELINE_CHUNK_CHARS", "12000"))
+PIPELINE_MAX_WORKERS = int(os.environ.get("PIPELINE_MAX_WORKERS", "4"))
+PIPELINE_CACHE_SIZE = int(os.environ.get("PIPELINE_CACHE_SIZE", "1024"))
+PIPELINE_MAX_TOKENS = int(os.environ.get("PIPELINE_MAX_TOKENS", "2048"))
+
+EXTRACTION_PROMPT = """
+Extract all diagnoses, medications, and treatments/procedures from the following clinical text.
+Use the terms as they are mentioned in the text. Use null for a dosage or frequency that is not specified.
+
+Clinical text:
+{text}
+
+Return only a JSON object with this exact format:
+{{
+    "diagnoses": ["Seizure", "Headache"],
+    "medications": [{{"name": "Topamax", "dosage": "50 mg", "frequency": "daily"}}],
+    "procedures": ["Referral to neurologist"]
+}}
+"""
+
+# Code system for each entity list in the extraction
+ENTITY_KINDS = {
+    "diagnoses": "icd10",
+    "medications": "rxnorm",
+    "procedures": "snomed",
+}
+
+_bedrock_client = None
+_bedrock_client_lock = threading.Lock()
+
+
+def get_bedrock_client():
+    """Bedrock runtime client shared by all model calls (boto3 clients are thread-safe)."""
+    global _bedrock_client
+    with _bedrock_client_lock:
+        if _bedrock_client is None:
+            _bedrock_client = boto3.client(
+                service_name='bedrock-runtime',
+                region_name=os.environ.get('AWS_REGION', 'us-east-1')
+            )
+        return _bedrock_client
+
+
+def split_text(text: str, chunk_chars: int = PIPELINE_CHUNK_CHARS) -> List[str]:
+    """
+    Split text into chunks of at most chunk_chars, on paragraph, then line, then word boundaries.
+
+    Args:
+        text: Clinical text
+        chunk_chars: Maximum characters per chunk
+
+    Returns:
+        Non-empty chunks in document order
+    """
+    pieces: List[str] = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        if len(paragraph) <= chunk_chars:
+            pieces.append(paragraph)
+            continue
+        for line in paragraph.splitlines():
+            while len(line) > chunk_chars:
+                cut = line.rfind(" ", 0, chunk_chars)
+                cut = cut if cut > 0 else chunk_chars
+                pieces.append(line[:cut])
+                line = line[cut:].lstrip()
+            pieces.append(line)
+
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for piece in pieces:
+        piece = piece.strip()
+        if not piece:
+            continue
+        if current and size + len(piece) + 2 > chunk_chars:
+            chunks.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(piece)
+        size += len(piece) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def _parse_extraction(text: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Parse the model's JSON answer into lists of entity dicts."""
+    match = re.search(r"```(?:json)?\n(.*?)\n```", text, re.DOTALL)
+    if match:
+        text = match.group(1)
+    else:
+        start, end = text.find("{"), text.rfind("}")
+        if start != -1 and end > start:
+            text = text[start:end + 1]
+    data = json.loads(text)
+
+    entities: Dict[str, List[Dict[str, Any]]] = {kind: [] for kind in ENTITY_KINDS}
+    for kind in ENTITY_KINDS:
+        for item in data.get(kind) or []:
+            if isinstance(item, str):
+                item = {"name": item}
+            elif isinstance(item, dict):
+                item = dict(item)
+                item.setdefault("name", item.pop("text", None) or item.pop("term", None))
+            else:
+                continue
+            if item.get("name"):
+                entities[kind].append(item)
+    return entities
+
+
+class ClinicalEntityPipeline:
+    """Chunked single-call entity extraction with content-hash caching and batched coding."""
+
+    def __init__(
+        self,
+        terminology: TerminologyService,
+        client=None,
+        model_id: Optional[str] = None,
+        chunk_chars: int = PIPELINE_CHUNK_CHARS,
+        max_workers: int = PIPELINE_MAX_WORKERS,
+        cache_size: int = PIPELINE_CACHE_SIZE,
+    ):
+        """
+        Args:
+            terminology: Terminology index used to code the extracted entities
+            client: Bedrock runtime client (defaults to the shared client)
+            model_id: Bedrock model (defaults to BEDROCK_MODEL_ID)
+            chunk_chars: Maximum characters of text per model call
+            max_workers: Concurrent model calls and lookups
+            cache_size: Chunk extractions kept in the cache
+        """
+        self.terminology = terminology
+        self.client = client
+        self.model_id = model_id or os.environ.get('BEDROCK_MODEL_ID', 'anthropic.claude-3-sonnet-20240229-v1:0')
+        self.chunk_chars = chunk_chars
+        self.cache_size = cache_size
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="clinical-pipeline")
+        self._cache: "OrderedDict[str, Dict[str, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"documents": 0, "chunks": 0, "model_calls": 0, "cache_hits": 0,
+                         "input_tokens": 0, "output_tokens": 0}
+
+    def _invoke(self, chunk: str) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, int]]:
+        client = self.client or get_bedrock_client()
+        request_body = {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": PIPELINE_MAX_TOKENS,
+            "messages": [{"role": "user", "content": EXTRACTION_PROMPT.format(text=chunk)}],
+        }
+        response = client.invoke_model(modelId=self.model_id, body=json.dumps(request_body))
+        response_body = json.loads(response['body'].read().decode('utf-8'))
+        usage = response_body.get("usage", {})
+        return _parse_extraction(response_body['content'][0]['text']), {
+            "input_tokens": usage.get("input_tokens", 0),
+            "output_tokens": usage.get("output_tokens", 0),
+        }
+
+    def _extract_chunk(self, chunk: str) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, int], bool]:
+        """Entities of one chunk, from the cache or one model call."""
+        key = hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+        with self._lock:
+            entities = self._cache.get(key)
+            if entities is not None:
+                self._cache.move_to_end(key)
+                return entities, {"input_tokens": 0, "output_tokens": 0}, True
+
+        entities, usage = self._invoke(chunk)
+        with self._lock:
+            self._cache[key] = entities
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return entities, usage, False
+
+    @staticmethod
+    def _merge(extractions: List[Dict[str, List[Dict[str, Any]]]]) -> Dict[str, List[Dict[str, Any]]]:
+        """Merge chunk extractions in document order, keeping the first mention of each entity."""
+        merged: Dict[str, List[Dict[str, Any]]] = {kind: [] for kind in ENTITY_KINDS}
+        seen = {kind: set() for kind in ENTITY_KINDS}
+        for extraction in extractions:
+            for kind, items in extraction.items():
+                for item in items:
+                    key = normalize(item["name"])
+                    if key not in seen[kind]:
+                        seen[kind].add(key)
+                        merged[kind].append(item)
+        return merged
+
+    def _code(self, kind: str, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Code one kind of entity with a single batched terminology lookup."""
+        system = ENTITY_KINDS[kind]
+        fields = SYSTEMS[system]
+        if not items:
+            return []
+        matches = self.terminology.lookup_many(system, [item["name"] for item in items])
+        coded = []
+        for item in items:
+            found = matches.get(item["name"], [])
+            candidates = [m for m in found if "error" not in m]
+            if found and not candidates:
+                # Every lookup failed (e.g. the remote API is down): report it rather than "Not found"
+                raise RuntimeError(f"{item['name']}: {found[0]['error']}")
+            best = candidates[0] if candidates else {}
+            entry = {
+                fields["term_field"]: item["name"],
+                fields["code_field"]: best.get(fields["code_field"], "Not found"),
+                "description": best.get("description", ""),
+                "confidence_score": best.get("confidence_score", "0%"),
+            }
+            if kind == "medications":
+                entry["dosage"] = item.get("dosage")
+                entry["frequency"] = item.get("frequency")
+            coded.append(entry)
+        return coded
+
+    def process(self, text: str) -> Dict[str, Any]:
+        """
+        Extract and code all diagnoses, medications and procedures in a clinical text.
+
+        Args:
+            text: Clinical text
+
+        Returns:
+            Dict with coded diagnoses (ICD-10), medications (RxNorm) and
+            procedures (SNOMED CT), plus per-document metrics: chunks,
+            model_calls, cache_hits, input_tokens, output_tokens, errors and
+            extraction, coding and total seconds
+        """
+        started = time.perf_counter()
+        chunks = split_text(text, self.chunk_chars)
+        metrics: Dict[str, Any] = {"chunks": len(chunks), "model_calls": 0, "cache_hits": 0,
+                                   "input_tokens": 0, "output_tokens": 0, "errors": []}
+
+        extractions = []
+        futures = [self._pool.submit(self._extract_chunk, chunk) for chunk in chunks]
+        for i, future in enumerate(futures):
+            try:
+                entities, usage, cached = future.result()
+            except Exception as e:
+                metrics["errors"].append(f"Chunk {i + 1}: error extracting entities: {str(e)}")
+                continue
+            extractions.append(entities)
+            metrics["cache_hits" if cached else "model_calls"] += 1
+            metrics["input_tokens"] += usage["input_tokens"]
+            metrics["output_tokens"] += usage["output_tokens"]
+        extracted = time.perf_counter()
+
+        merged = self._merge(extractions)
+        coding = {kind: self._pool.submit(self._code, kind, items) for kind, items in merged.items()}
+        result: Dict[str, Any] = {}
+        for kind, future in coding.items():
+            try:
+                result[kind] = future.result()
+            except Exception as e:
+                result[kind] = []
+                metrics["errors"].append(f"Error coding {kind}: {str(e)}")
+        finished = time.perf_counter()
+
+        metrics["extraction_seconds"] = round(extracted - started, 3)
+        metrics["coding_seconds"] = round(finished - extracted, 3)
+        metrics["total_seconds"] = round(finished - started, 3)
+        with self._lock:
+            self.counters["documents"] += 1
+            for name in ("chunks", "model_calls", "cache_hits", "input_tokens", "output_tokens"):
+                self.counters[name] += metrics[name]
+        result["metrics"] = metrics
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Cumulative counters over all processed documents."""
+        with self._lock:
+            return {**self.counters, "cached_chunks": len(self._cache)}
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -1,135 +1,340 @@
 #!/usr/bin/env python3
+"""
+Page-parallel medical document processing.
 
+PDFs are split into page ranges that are read concurrently on a bounded pool,
+each range with its own reader so the file is never loaded into memory whole.
+Pages with a text layer are extracted locally; only image-only (scanned) pages
+are sent to Bedrock, one page per request, so long records are not truncated
+by a single response's token limit. Model results are cached by a hash of the
+page content, and pages are merged back in document order.
+"""
+
+import io
 import os
 import json
-import boto3
+import time
 import base64
-from pypdf import PdfReader
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from PIL import Image
+from pypdf import PdfReader, PdfWriter
 from strands import tool
 
-@tool
-def process_document(file_path: str) -> str:
+from clinical_pipeline import get_bedrock_client
+
+DOCUMENT_PAGES_PER_TASK = int(os.environ.get("DOCUMENT_PAGES_PER_TASK", "25"))
+DOCUMENT_MAX_WORKERS = int(os.environ.get("DOCUMENT_MAX_WORKERS", "4"))
+DOCUMENT_MODEL_WORKERS = int(os.environ.get("DOCUMENT_MODEL_WORKERS", "8"))
+DOCUMENT_MIN_TEXT_CHARS = int(os.environ.get("DOCUMENT_MIN_TEXT_CHARS", "20"))
+DOCUMENT_MAX_TOKENS = int(os.environ.get("DOCUMENT_MAX_TOKENS", "4096"))
+DOCUMENT_CACHE_SIZE = int(os.environ.get("DOCUMENT_CACHE_SIZE", "2048"))
+
+EXTRACTION_INSTRUCTION = (
+    "Extract all text content from this medical document. Preserve the formatting as much as possible. "
+    "Include all medical terms, diagnoses, medications, and treatments. Be thorough and capture all details "
+    "from the document."
+)
+
+IMAGE_MEDIA_TYPES = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+}
+# Image formats the model does not accept; they are converted to PNG before sending
+CONVERTED_IMAGE_TYPES = {'.tiff', '.tif', '.bmp'}
+
+PageText = Union[str, Future]
+
+
+def _page_hash(page) -> str:
+    """Hash of a page's content stream and the raw data of the images it draws."""
+    digest = hashlib.sha256()
+    contents = page.get_contents()
+    if contents is not None:
+        digest.update(contents.get_data())
+    resources = page.get("/Resources")
+    xobjects = resources.get_object().get("/XObject") if resources is not None else None
+    if xobjects is not None:
+        xobjects = xobjects.get_object()
+        for name in sorted(xobjects):
+            xobject = xobjects[name].get_object()
+            digest.update(name.encode("utf-8"))
+            digest.update(getattr(xobject, "_data", b"") or b"")
+    return digest.hexdigest()
+
+
+def _to_png(data: bytes) -> bytes:
+    """Re-encode an image (e.g. TIFF or BMP) as PNG; multi-page TIFFs keep their first frame."""
+    with Image.open(io.BytesIO(data)) as image:
+        if image.mode not in ("1", "L", "LA", "RGB", "RGBA", "P"):
+            image = image.convert("RGB")
+        output = io.BytesIO()
+        image.save(output, format="PNG")
+        return output.getvalue()
+
+
+def _scanned_page(page) -> Tuple[bytes, str]:
     """
-    Process a medical document (PDF or image) and extract its content using Amazon Bedrock.
-    
-    Args:
-        file_path: Path to the document file (PDF or image)
-        
-    Returns:
-        Extracted text content from the document
+    What to send the model for a page with no text layer.
+
+    A scan is normally one image covering the page; it is sent as that image
+    (JPEG data as is, anything else as PNG). Pages drawing several images or
+    none are sent as a single-page PDF document.
     """
-    if not os.path.exists(file_path):
-        return json.dumps({"error": f"File not found: {file_path}"})
-    
-    file_extension = os.path.splitext(file_path)[1].lower()
-    
     try:
-        # Use Bedrock for all document types
-        if file_extension == '.pdf':
-            # For PDFs, try Bedrock first, then fall back to traditional PDF extraction
-            try:
-                return _use_bedrock_for_document(file_path)
-            except Exception as e:
-                print(f"Bedrock processing failed, falling back to PDF extraction: {str(e)}")
-                return _process_pdf_traditional(file_path)
-        
-        # Process image files with Bedrock
-        elif file_extension in ['.jpg', '.jpeg', '.png', '.tiff', '.bmp']:
-            return _use_bedrock_for_document(file_path)
-        
-        else:
-            return json.dumps({"error": f"Unsupported file format: {file_extension}"})
-            
-    except Exception as e:
-        return json.dumps({"error": f"Error processing document: {str(e)}"})
+        images = page.images
+        if len(images) == 1:
+            image = images[0]
+            if os.path.splitext(image.name)[1].lower() in ('.jpg', '.jpeg'):
+                return image.data, 'image/jpeg'
+            output = io.BytesIO()
+            image.image.save(output, format="PNG")
+            return output.getvalue(), 'image/png'
+    except Exception:
+        # An image pypdf cannot decode is left to the model as part of the page
+        pass
+    return _single_page_pdf(page), 'application/pdf'
 
-def _process_pdf_traditional(file_path: str) -> str:
-    """Extract text from a PDF file using PyPDF."""
-    try:
-        # Extract text directly from PDF
-        reader = PdfReader(file_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        
-        # If text extraction yields meaningful content, return it
-        if len(text.strip()) > 50:
-            return text
-        
-        # If minimal text was extracted, the PDF might be scanned/image-based
-        # In this case, we can't extract text using traditional methods
-        return json.dumps({"error": "PDF appears to be image-based and requires Bedrock for processing"})
-        
-    except Exception as e:
-        return json.dumps({"error": f"Error processing PDF: {str(e)}"})
 
-def _use_bedrock_for_document(file_path: str) -> str:
-    """Use Amazon Bedrock for document processing."""
-    try:
-        # Initialize Bedrock client
-        bedrock_runtime = boto3.client(
-            service_name='bedrock-runtime',
-            region_name=os.environ.get('AWS_REGION', 'us-east-1')
-        )
-        
-        # Read file as base64
-        with open(file_path, 'rb') as file:
-            file_bytes = file.read()
-            base64_data = base64.b64encode(file_bytes).decode('utf-8')
-        
-        # Determine media type based on file extension
-        file_extension = os.path.splitext(file_path)[1].lower()
-        if file_extension == '.pdf':
-            media_type = 'application/pdf'
-        elif file_extension == '.png':
-            media_type = 'image/png'
-        elif file_extension in ['.jpg', '.jpeg']:
-            media_type = 'image/jpeg'
-        elif file_extension == '.tiff':
-            media_type = 'image/tiff'
-        elif file_extension == '.bmp':
-            media_type = 'image/bmp'
-        else:
-            media_type = 'application/octet-stream'
-        
-        # Prepare request for Claude model
-        model_id = os.environ.get('BEDROCK_MODEL_ID', 'anthropic.claude-3-sonnet-20240229-v1:0')
-        
+def _single_page_pdf(page) -> bytes:
+    writer = PdfWriter()
+    writer.add_page(page)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+class DocumentProcessor:
+    """Streams PDFs page range by page range, sending only image-only pages to the model."""
+
+    def __init__(
+        self,
+        client=None,
+        model_id: Optional[str] = None,
+        pages_per_task: int = DOCUMENT_PAGES_PER_TASK,
+        max_workers: int = DOCUMENT_MAX_WORKERS,
+        model_workers: int = DOCUMENT_MODEL_WORKERS,
+        min_text_chars: int = DOCUMENT_MIN_TEXT_CHARS,
+        cache_size: int = DOCUMENT_CACHE_SIZE,
+    ):
+        """
+        Args:
+            client: Bedrock runtime client (defaults to the shared client)
+            model_id: Bedrock model (defaults to BEDROCK_MODEL_ID)
+            pages_per_task: Pages read by each range task
+            max_workers: Page range tasks read concurrently
+            model_workers: Concurrent model requests for image-only pages
+            min_text_chars: Text layer characters below which a page is treated as image-only
+            cache_size: Model results kept in the page cache
+        """
+        self.client = client
+        self.model_id = model_id or os.environ.get('BEDROCK_MODEL_ID', 'anthropic.claude-3-sonnet-20240229-v1:0')
+        self.pages_per_task = pages_per_task
+        self.min_text_chars = min_text_chars
+        self.cache_size = cache_size
+        # Separate pools: range tasks hand image pages to the model pool without waiting on it
+        self._ranges = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf-ranges")
+        self._model = ThreadPoolExecutor(max_workers=model_workers, thread_name_prefix="pdf-model")
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _invoke(self, data: bytes, media_type: str) -> str:
+        client = self.client or get_bedrock_client()
         request_body = {
             "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 4096,
+            "max_tokens": DOCUMENT_MAX_TOKENS,
             "messages": [
                 {
                     "role": "user",
                     "content": [
                         {
-                            "type": "image",
+                            # PDF pages go in a document block; image blocks only take images
+                            "type": "document" if media_type == 'application/pdf' else "image",
                             "source": {
                                 "type": "base64",
                                 "media_type": media_type,
-                                "data": base64_data
+                                "data": base64.b64encode(data).decode('utf-8')
                             }
                         },
                         {
                             "type": "text",
-                            "text": "Extract all text content from this medical document. Preserve the formatting as much as possible. Include all medical terms, diagnoses, medications, and treatments. Be thorough and capture all details from the document."
+                            "text": EXTRACTION_INSTRUCTION
                         }
                     ]
                 }
             ]
         }
-        
-        # Invoke Bedrock model
-        response = bedrock_runtime.invoke_model(
-            modelId=model_id,
-            body=json.dumps(request_body)
-        )
-        
-        # Parse response
+        response = client.invoke_model(modelId=self.model_id, body=json.dumps(request_body))
         response_body = json.loads(response['body'].read().decode('utf-8'))
-        extracted_text = response_body['content'][0]['text']
-        
-        return extracted_text
-        
+        return response_body['content'][0]['text']
+
+    def _extract_with_model(self, key: str, load: Callable[[], Tuple[bytes, str]]) -> Tuple[Future, bool]:
+        """
+        Model text for a page or image, from the cache, an identical in-flight request, or a new request.
+
+        Args:
+            key: Content hash of the page or image
+            load: Returns the bytes to send and their media type; only called on a cache
+                miss, in the caller's thread
+
+        Returns:
+            Future of the text, and whether it was served without a new request
+        """
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                future: Future = Future()
+                future.set_result(self._cache[key])
+                return future, True
+            if key in self._inflight:
+                return self._inflight[key], True
+            future = self._inflight[key] = Future()
+
+        def finish(request: Future):
+            error = request.exception()
+            with self._lock:
+                self._inflight.pop(key, None)
+                if error is None:
+                    self._cache[key] = request.result()
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+            if error is None:
+                future.set_result(request.result())
+            else:
+                future.set_exception(error)
+
+        try:
+            data, media_type = load()
+        except Exception as e:
+            failed: Future = Future()
+            failed.set_exception(e)
+            finish(failed)
+        else:
+            self._model.submit(self._invoke, data, media_type).add_done_callback(finish)
+        return future, False
+
+    def _read_range(self, file_path: str, start: int, stop: int) -> List[Tuple[PageText, bool]]:
+        """Text of pages [start, stop): local text, or a future for image-only pages."""
+        # A file handle rather than a path, so pypdf reads objects on demand instead of copying the file
+        with open(file_path, 'rb') as file:
+            reader = PdfReader(file)
+            pages = []
+            for number in range(start, stop):
+                page = reader.pages[number]
+                text = page.extract_text() or ""
+                if len(text.strip()) >= self.min_text_chars:
+                    pages.append((text, False))
+                    continue
+                future, cached = self._extract_with_model(_page_hash(page), lambda: _scanned_page(page))
+                pages.append((future, cached))
+        return pages
+
+    def process_pdf(self, file_path: str) -> Dict[str, Any]:
+        """
+        Extract the text of a PDF, page range by page range.
+
+        Args:
+            file_path: Path to the PDF
+
+        Returns:
+            Dict with the merged text and the counts of pages, text_pages
+            (local text layer), model_pages (sent to the model), cache_hits,
+            errors and seconds
+        """
+        started = time.perf_counter()
+        with open(file_path, 'rb') as file:
+            page_count = len(PdfReader(file).pages)
+        ranges = [
+            self._ranges.submit(self._read_range, file_path, start, min(start + self.pages_per_task, page_count))
+            for start in range(0, page_count, self.pages_per_task)
+        ]
+
+        texts: List[str] = []
+        stats = {"pages": page_count, "text_pages": 0, "model_pages": 0, "cache_hits": 0, "errors": []}
+        for task in ranges:
+            for page_text, cached in task.result():
+                number = len(texts) + 1
+                if isinstance(page_text, str):
+                    stats["text_pages"] += 1
+                    texts.append(page_text)
+                    continue
+                stats["cache_hits" if cached else "model_pages"] += 1
+                try:
+                    texts.append(page_text.result())
+                except Exception as e:
+                    stats["errors"].append(f"Page {number}: {str(e)}")
+                    texts.append(f"[Page {number}: text could not be extracted]")
+
+        return {"text": "\n".join(texts), **stats, "seconds": round(time.perf_counter() - started, 3)}
+
+    def process_image(self, file_path: str) -> str:
+        """Extract the text of an image with one (cached) model request."""
+        with open(file_path, 'rb') as file:
+            data = file.read()
+        extension = os.path.splitext(file_path)[1].lower()
+        if extension in CONVERTED_IMAGE_TYPES:
+            load = lambda: (_to_png(data), 'image/png')
+        else:
+            load = lambda: (data, IMAGE_MEDIA_TYPES[extension])
+        future, _ = self._extract_with_model(hashlib.sha256(data).hexdigest(), load)
+        return future.result()
+
+    def close(self):
+        self._ranges.shutdown(wait=False, cancel_futures=True)
+        self._model.shutdown(wait=False, cancel_futures=True)
+
+
+_processor: Optional[DocumentProcessor] = None
+_processor_lock = threading.Lock()
+
+
+def get_document_processor() -> DocumentProcessor:
+    """Shared document processor, so the page cache is reused across documents."""
+    global _processor
+    with _processor_lock:
+        if _processor is None:
+            _processor = DocumentProcessor()
+        return _processor
+
+
+@tool
+def process_document(file_path: str) -> str:
+    """
+    Process a medical document (PDF or image) and extract its content.
+
+    PDF pages with a text layer are read locally; scanned pages and images
+    are extracted with Amazon Bedrock.
+
+    Args:
+        file_path: Path to the document file (PDF or image)
+
+    Returns:
+        Extracted text content from the document
+    """
+    if not os.path.exists(file_path):
+        return json.dumps({"error": f"File not found: {file_path}"})
+
+    file_extension = os.path.splitext(file_path)[1].lower()
+
+    try:
+        if file_extension == '.pdf':
+            result = get_document_processor().process_pdf(file_path)
+            if len(result["text"].strip()) <= 50 and result["errors"]:
+                return json.dumps({"error": f"Error processing PDF: {'; '.join(result['errors'])}"})
+            return result["text"]
+
+        # Process image files with Bedrock
+        elif file_extension in IMAGE_MEDIA_TYPES or file_extension in CONVERTED_IMAGE_TYPES:
+            return get_document_processor().process_image(file_path)
+
+        else:
+            return json.dumps({"error": f"Unsupported file format: {file_extension}"})
+
     except Exception as e:
-        raise Exception(f"Error using Bedrock for document processing: {str(e)}")
+        return json.dumps({"error": f"Error processing document: {str(e)}"})
@@ -6,12 +6,14 @@ import os
 from document_processor import process_document
 from dotenv import load_dotenv
 from medical_coding_tools import (
+    extract_and_code,
     get_icd,
     get_rx,
     get_snomed,
     link_icd,
     link_rx,
     link_snomed,
+    lookup_codes,
 )
 from strands import Agent
 from strands_tools import file_read
@@ -36,6 +38,9 @@ Your tasks include:
    - ICD-10 codes for diagnoses
    - RxNorm codes for medications
    - SNOMED CT codes for treatments
+   Use extract_and_code to extract and code all three from a text in a single call; it replaces
+   calling link_icd, link_rx and link_snomed separately.
+   Use lookup_codes to code several terms at once instead of one get_icd/get_rx/get_snomed call per term.
 
 Provide clear, accurate, and structured information that can be used by healthcare professionals.
 """
@@ -46,12 +51,14 @@ medical_agent = Agent(
     tools=[
         file_read,
         process_document,
+        extract_and_code,
         get_icd,
         get_rx,
         get_snomed,
         link_icd,
         link_rx,
         link_snomed,
+        lookup_codes,
     ],
 )
 
@@ -2,11 +2,15 @@
 
 import os
 import json
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
-import boto3
 from strands import tool
 
+from clinical_pipeline import ClinicalEntityPipeline, get_bedrock_client
+from terminology_service import TerminologyService
+
 # Base URLs for medical terminology APIs
 ICD10_API_BASE_URL = "https://clinicaltables.nlm.nih.gov/api/icd10cm/v3/search"
 RXNORM_API_BASE_URL = "https://rxnav.nlm.nih.gov/REST/rxcui"
@@ -14,10 +18,44 @@ RXNORM_INFO_API_BASE_URL = "https://rxnav.nlm.nih.gov/REST/rxcui/{rxcui}/allrela
 SNOMED_API_BASE_URL = "https://browser.ihtsdotools.org/snowstorm/snomed-ct/MAIN/concepts"
 SNOMED_BROWSER_URL = "https://browser.ihtsdotools.org/?perspective=full&edition=MAIN/SNOMEDCT-US/2025-03-01&languages=en"
 
+# Timeout in seconds for remote terminology API calls
+TERMINOLOGY_API_TIMEOUT = float(os.environ.get("TERMINOLOGY_API_TIMEOUT", "10"))
+
+# Pooled HTTP session shared by all remote terminology lookups
+_session = requests.Session()
+
+_terminology: Optional[TerminologyService] = None
+_terminology_lock = threading.Lock()
+_pipeline: Optional[ClinicalEntityPipeline] = None
+
+
+def get_terminology_service() -> TerminologyService:
+    """Shared terminology index, falling back to the remote APIs for terms it cannot resolve."""
+    global _terminology
+    with _terminology_lock:
+        if _terminology is None:
+            _terminology = TerminologyService(remote_lookups={
+                "icd10": _get_icd_from_api,
+                "rxnorm": _get_rx_from_api,
+                "snomed": _get_snomed_from_api,
+            })
+        return _terminology
+
+
+def get_clinical_pipeline() -> ClinicalEntityPipeline:
+    """Shared extraction pipeline; its chunk cache lets the link_* tools share one model call per text."""
+    global _pipeline
+    terminology = get_terminology_service()
+    with _terminology_lock:
+        if _pipeline is None:
+            _pipeline = ClinicalEntityPipeline(terminology)
+        return _pipeline
+
 @tool
 def get_icd(diagnosis: str) -> str:
     """
-    Get ICD-10 codes for a given diagnosis using the NLM Clinical Tables API.
+    Get ICD-10 codes for a given diagnosis from the local terminology index,
+    falling back to the NLM Clinical Tables API.
     
     Args:
         diagnosis: The medical diagnosis to look up
@@ -26,8 +64,8 @@ def get_icd(diagnosis: str) -> str:
         JSON string containing matching ICD-10 codes and descriptions
     """
     try:
-        # Use the NLM Clinical Tables API (no authentication required)
-        return _get_icd_from_api(diagnosis)
+        # Local index first, then the (cached) NLM Clinical Tables API
+        return json.dumps(get_terminology_service().lookup("icd10", diagnosis))
     except Exception as e:
         # Fallback to Bedrock for code lookup if API fails
         try:
@@ -45,7 +83,8 @@ def get_icd(diagnosis: str) -> str:
 @tool
 def get_rx(medication: str) -> str:
     """
-    Get RxNorm codes for a given medication using the NLM RxNav API.
+    Get RxNorm codes for a given medication from the local terminology index,
+    falling back to the NLM RxNav API.
     
     Args:
         medication: The medication name to look up
@@ -54,8 +93,8 @@ def get_rx(medication: str) -> str:
         JSON string containing matching RxNorm codes and information
     """
     try:
-        # Use the NLM RxNav API (no authentication required)
-        return _get_rx_from_api(medication)
+        # Local index first, then the (cached) NLM RxNav API
+        return json.dumps(get_terminology_service().lookup("rxnorm", medication))
     except Exception as e:
         # Fallback to Bedrock for code lookup if API fails
         try:
@@ -73,7 +112,8 @@ def get_rx(medication: str) -> str:
 @tool
 def get_snomed(treatment: str) -> str:
     """
-    Get SNOMED CT codes for a given treatment or procedure using the SNOMED CT browser API.
+    Get SNOMED CT codes for a given treatment or procedure from the local
+    terminology index, falling back to the SNOMED CT browser API.
     
     Args:
         treatment: The medical treatment or procedure to look up
@@ -82,8 +122,8 @@ def get_snomed(treatment: str) -> str:
         JSON string containing matching SNOMED CT codes and descriptions
     """
     try:
-        # Use the SNOMED CT browser API
-        return _get_snomed_from_api(treatment)
+        # Local index first, then the (cached) SNOMED CT browser API
+        return json.dumps(get_terminology_service().lookup("snomed", treatment))
     except Exception as e:
         # Fallback to Bedrock for code lookup if API fails
         try:
@@ -98,6 +138,65 @@ def get_snomed(treatment: str) -> str:
                 "treatment": treatment
             })
 
+@tool
+def lookup_codes(diagnoses: Optional[List[str]] = None, medications: Optional[List[str]] = None,
+                 treatments: Optional[List[str]] = None) -> str:
+    """
+    Look up ICD-10, RxNorm and SNOMED CT codes for many terms in one call.
+    
+    Args:
+        diagnoses: Diagnoses to code with ICD-10
+        medications: Medication names to code with RxNorm
+        treatments: Treatments or procedures to code with SNOMED CT
+        
+    Returns:
+        JSON object mapping each term to its matching codes, grouped by code system
+    """
+    service = get_terminology_service()
+    batches = {"icd10": diagnoses or [], "rxnorm": medications or [], "snomed": treatments or []}
+    results = {}
+    for system, terms in batches.items():
+        if not terms:
+            continue
+        try:
+            results[system] = service.lookup_many(system, terms)
+        except Exception as e:
+            results[system] = {"error": f"Error retrieving {system} codes: {str(e)}"}
+    return json.dumps(results)
+
+@tool
+def extract_and_code(clinical_text: str) -> str:
+    """
+    Extract diagnoses, medications and treatments from clinical text and link them
+    to ICD-10, RxNorm and SNOMED CT codes in one pass.
+    
+    Args:
+        clinical_text: The clinical text to analyze
+        
+    Returns:
+        JSON string with coded diagnoses, medications and procedures, and the
+        token and latency metrics for the document
+    """
+    try:
+        return json.dumps(get_clinical_pipeline().process(clinical_text))
+    except Exception as e:
+        return json.dumps({"error": f"Error extracting and coding clinical text: {str(e)}"})
+
+def _link(clinical_text: str, kind: str) -> List[Dict[str, Any]]:
+    """
+    Coded entities of one kind from the shared pipeline.
+
+    Raises:
+        RuntimeError: if extracting any chunk or coding this kind failed, so an
+            empty list always means nothing was found rather than an error
+    """
+    result = get_clinical_pipeline().process(clinical_text)
+    errors = [error for error in result["metrics"]["errors"]
+              if not error.startswith("Error coding ") or error.startswith(f"Error coding {kind}:")]
+    if errors:
+        raise RuntimeError("; ".join(errors))
+    return result[kind]
+
 @tool
 def link_icd(clinical_text: str) -> str:
     """
@@ -110,31 +209,7 @@ def link_icd(clinical_text: str) -> str:
         JSON string containing extracted diagnoses with their ICD-10 codes
     """
     try:
-        # Use Bedrock to extract diagnoses and link to ICD-10 codes
-        prompt = f"""
-        Extract all diagnoses from the following clinical text and link them to the most appropriate ICD-10 codes.
-        For each diagnosis, provide:
-        1. The diagnosis as mentioned in the text
-        2. The ICD-10 code
-        3. The official ICD-10 description
-        4. A confidence score (95% for high confidence, lower for less certain matches)
-        
-        Clinical text:
-        {clinical_text}
-        
-        Format the output as a JSON array of diagnosis objects with the exact format:
-        [
-            {{
-                "diagnosis": "Atrial fibrillation",
-                "ICD10_code": "I48.0",
-                "description": "Paroxysmal atrial fibrillation",
-                "confidence_score": "95%"
-            }},
-            ...
-        ]
-        """
-        
-        return _get_structured_data_from_bedrock(prompt, "diagnoses")
+        return json.dumps(_link(clinical_text, "diagnoses"))
     except Exception as e:
         return json.dumps([{
             "diagnosis": "Error",
@@ -155,35 +230,7 @@ def link_rx(clinical_text: str) -> str:
         JSON string containing extracted medications with their RxNorm codes
     """
     try:
-        # Use Bedrock to extract medications and link to RxNorm codes
-        prompt = f"""
-        Extract all medications from the following clinical text and link them to the most appropriate RxNorm codes.
-        For each medication, provide:
-        1. The medication name as mentioned in the text
-        2. The RxNorm code
-        3. The standard RxNorm name/description
-        4. The dosage if specified
-        5. The frequency if specified
-        6. A confidence score (95% for high confidence, lower for less certain matches)
-        
-        Clinical text:
-        {clinical_text}
-        
-        Format the output as a JSON array of medication objects with the exact format:
-        [
-            {{
-                "medication": "Topamax",
-                "RxNorm_code": "36926",
-                "description": "Topiramate 50 MG Oral Tablet",
-                "dosage": "50 mg",
-                "frequency": "daily",
-                "confidence_score": "95%"
-            }},
-            ...
-        ]
-        """
-        
-        return _get_structured_data_from_bedrock(prompt, "medications")
+        return json.dumps(_link(clinical_text, "medications"))
     except Exception as e:
         return json.dumps([{
             "medication": "Error",
@@ -204,31 +251,7 @@ def link_snomed(clinical_text: str) -> str:
         JSON string containing extracted treatments with their SNOMED CT codes
     """
     try:
-        # Use Bedrock to extract treatments and link to SNOMED CT codes
-        prompt = f"""
-        Extract all treatments, procedures, and clinical actions from the following clinical text and link them to the most appropriate SNOMED CT codes.
-        For each treatment or procedure, provide:
-        1. The treatment/procedure as mentioned in the text
-        2. The SNOMED CT code
-        3. The official SNOMED CT description
-        4. A confidence score (95% for high confidence, lower for less certain matches)
-        
-        Clinical text:
-        {clinical_text}
-        
-        Format the output as a JSON array of procedure objects with the exact format:
-        [
-            {{
-                "procedure": "Referral to neurologist",
-                "SNOMED_code": "306206005",
-                "description": "Referral to neurology service",
-                "confidence_score": "95%"
-            }},
-            ...
-        ]
-        """
-        
-        return _get_structured_data_from_bedrock(prompt, "treatments")
+        return json.dumps(_link(clinical_text, "procedures"))
     except Exception as e:
         return json.dumps([{
             "procedure": "Error",
@@ -251,7 +274,7 @@ def _get_icd_from_api(diagnosis: str, api_key: str = None) -> str:
     }
     
     # Note: This API doesn't require authentication for basic usage
-    response = requests.get(ICD10_API_BASE_URL, params=params)
+    response = _session.get(ICD10_API_BASE_URL, params=params, timeout=TERMINOLOGY_API_TIMEOUT)
     
     if response.status_code == 200:
         data = response.json()
@@ -295,7 +318,7 @@ def _get_rx_from_api(medication: str, api_key: str = None) -> str:
     }
     
     # RxNav API doesn't require authentication
-    response = requests.get(f"{RXNORM_API_BASE_URL}", params=params)
+    response = _session.get(f"{RXNORM_API_BASE_URL}", params=params, timeout=TERMINOLOGY_API_TIMEOUT)
     
     if response.status_code != 200:
         return json.dumps([{
@@ -317,16 +340,17 @@ def _get_rx_from_api(medication: str, api_key: str = None) -> str:
             "confidence_score": "0%"
         }])
     
-    results = []
+    # Step 2: Get related information for the first 3 RxCUIs concurrently
+    rxcuis = [element.text for element in rxcui_elements[:3]]
     
-    # For each RxCUI, get additional information
-    for i, rxcui_element in enumerate(rxcui_elements[:3]):  # Limit to first 3 results
-        rxcui = rxcui_element.text
-        
-        # Step 2: Get related information for this RxCUI
-        info_url = RXNORM_INFO_API_BASE_URL.format(rxcui=rxcui)
-        info_response = requests.get(info_url)
-        
+    def fetch_related(rxcui):
+        return _session.get(RXNORM_INFO_API_BASE_URL.format(rxcui=rxcui), timeout=TERMINOLOGY_API_TIMEOUT)
+    
+    with ThreadPoolExecutor(max_workers=len(rxcuis)) as pool:
+        info_responses = list(pool.map(fetch_related, rxcuis))
+    
+    results = []
+    for i, (rxcui, info_response) in enumerate(zip(rxcuis, info_responses)):
         if info_response.status_code == 200:
             info_root = ET.fromstring(info_response.content)
             
@@ -388,7 +412,7 @@ def _get_snomed_from_api(treatment: str, api_key: str = None) -> str:
         headers["Authorization"] = f"Bearer {api_key}"
     
     try:
-        response = requests.get(search_url, params=params, headers=headers)
+        response = _session.get(search_url, params=params, headers=headers, timeout=TERMINOLOGY_API_TIMEOUT)
         
         if response.status_code == 200:
             data = response.json()
@@ -437,11 +461,8 @@ def _get_snomed_from_api(treatment: str, api_key: str = None) -> str:
 def _get_medical_code_from_bedrock(term: str, code_system: str, instruction: str) -> str:
     """Use Amazon Bedrock to look up medical codes."""
     try:
-        # Initialize Bedrock client
-        bedrock_runtime = boto3.client(
-            service_name='bedrock-runtime',
-            region_name=os.environ.get('AWS_REGION', 'us-east-1')
-        )
+        # Shared Bedrock client
+        bedrock_runtime = get_bedrock_client()
         
         # Prepare request for Claude model
         model_id = os.environ.get('BEDROCK_MODEL_ID', 'anthropic.claude-3-sonnet-20240229-v1:0')
@@ -531,128 +552,3 @@ def _get_medical_code_from_bedrock(term: str, code_system: str, instruction: str
             "error": f"Error using Bedrock for code lookup: {str(e)}",
             "confidence_score": "0%"
         }])
-
-def _get_structured_data_from_bedrock(prompt: str, data_type: str) -> str:
-    """Use Amazon Bedrock to extract structured data from clinical text."""
-    try:
-        # Initialize Bedrock client
-        bedrock_runtime = boto3.client(
-            service_name='bedrock-runtime',
-            region_name=os.environ.get('AWS_REGION', 'us-east-1')
-        )
-        
-        # Prepare request for Claude model
-        model_id = os.environ.get('BEDROCK_MODEL_ID', 'anthropic.claude-3-sonnet-20240229-v1:0')
-        
-        # Modify prompt based on data type to ensure consistent output format
-        if "diagnoses" in data_type:
-            prompt += """
-            Each diagnosis object should have this exact format:
-            {
-                "diagnosis": "The diagnosis as mentioned in the text",
-                "ICD10_code": "The ICD-10 code",
-                "description": "The official ICD-10 description",
-                "confidence_score": "95%"
-            }
-            """
-        elif "medications" in data_type:
-            prompt += """
-            Each medication object should have this exact format:
-            {
-                "medication": "The medication name as mentioned in the text",
-                "RxNorm_code": "The RxNorm code",
-                "description": "The standard RxNorm name",
-                "dosage": "The dosage if specified (or null)",
-                "frequency": "The frequency if specified (or null)",
-                "confidence_score": "95%"
-            }
-            """
-        elif "treatments" in data_type or "procedures" in data_type:
-            prompt += """
-            Each treatment/procedure object should have this exact format:
-            {
-                "procedure": "The treatment/procedure as mentioned in the text",
-                "SNOMED_code": "The SNOMED CT code",
-                "description": "The official SNOMED CT description",
-                "confidence_score": "95%"
-            }
-            """
-        
-        request_body = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 2048,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-        }
-        
-        # Invoke Bedrock model
-        response = bedrock_runtime.invoke_model(
-            modelId=model_id,
-            body=json.dumps(request_body)
-        )
-        
-        # Parse response
-        response_body = json.loads(response['body'].read().decode('utf-8'))
-        result = response_body['content'][0]['text']
-        
-        # Extract JSON from response if needed
-        import re
-        json_match = re.search(r'```json\n(.*?)\n```', result, re.DOTALL)
-        if json_match:
-            result = json_match.group(1)
-        
-        # Ensure result is valid JSON
-        try:
-            parsed_result = json.loads(result)
-            return result
-        except:
-            # If not valid JSON, create a fallback response
-            if "diagnoses" in data_type:
-                return json.dumps([{
-                    "diagnosis": "Could not extract diagnoses",
-                    "ICD10_code": "Unknown",
-                    "description": "Error parsing response",
-                    "confidence_score": "0%"
-                }])
-            elif "medications" in data_type:
-                return json.dumps([{
-                    "medication": "Could not extract medications",
-                    "RxNorm_code": "Unknown",
-                    "description": "Error parsing response",
-                    "confidence_score": "0%"
-                }])
-            else:  # treatments/procedures
-                return json.dumps([{
-                    "procedure": "Could not extract procedures",
-                    "SNOMED_code": "Unknown",
-                    "description": "Error parsing response",
-                    "confidence_score": "0%"
-                }])
-            
-    except Exception as e:
-        # Create appropriate error response based on data type
-        if "diagnoses" in data_type:
-            return json.dumps([{
-                "diagnosis": "Error",
-                "ICD10_code": "Error",
-                "error": f"Error extracting structured data: {str(e)}",
-                "confidence_score": "0%"
-            }])
-        elif "medications" in data_type:
-            return json.dumps([{
-                "medication": "Error",
-                "RxNorm_code": "Error",
-                "error": f"Error extracting structured data: {str(e)}",
-                "confidence_score": "0%"
-            }])
-        else:  # treatments/procedures
-            return json.dumps([{
-                "procedure": "Error",
-                "SNOMED_code": "Error",
-                "error": f"Error extracting structured data: {str(e)}",
-                "confidence_score": "0%"
-            }])
@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Local terminology index for ICD-10-CM, RxNorm and SNOMED CT.
+
+Code tables are loaded from the official release files into a SQLite
+database with FTS5 indexes, so term lookups are answered locally in
+milliseconds:
+
+- exact (case-insensitive) term and code matches
+- prefix matches on every word of the term ("topir 50" -> "Topiramate 50 MG")
+- fuzzy matches, by correcting misspelled words against the index
+  vocabulary with a trigram index before the prefix search
+
+When a term is not found locally (or a code system has not been loaded),
+the remote NLM / SNOMED APIs are used as a fallback and their answers are
+cached in the same database.
+
+Release files:
+    ICD-10-CM  icd10cm-codes-<year>.txt or icd10cm_order_<year>.txt (CMS)
+    RxNorm     rrf/RXNCONSO.RRF (NLM RxNorm full or prescribable release)
+    SNOMED CT  sct2_Description_Snapshot-en_*.txt (RF2 snapshot)
+
+Usage:
+    python terminology_service.py load --icd10 icd10cm-codes-2025.txt \\
+        --rxnorm RXNCONSO.RRF --snomed sct2_Description_Snapshot-en_US1000124_20250301.txt
+    python terminology_service.py lookup icd10 "atrial fibrilation"
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from difflib import SequenceMatcher
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+TERMINOLOGY_DB_PATH = os.environ.get("TERMINOLOGY_DB_PATH", "terminology.db")
+TERMINOLOGY_REMOTE_TTL = float(os.environ.get("TERMINOLOGY_REMOTE_TTL", str(7 * 24 * 3600)))
+TERMINOLOGY_REMOTE_WORKERS = int(os.environ.get("TERMINOLOGY_REMOTE_WORKERS", "4"))
+
+# Output fields per code system, matching the medical coding tools
+SYSTEMS = {
+    "icd10": {"term_field": "diagnosis", "code_field": "ICD10_code"},
+    "rxnorm": {"term_field": "medication", "code_field": "RxNorm_code"},
+    "snomed": {"term_field": "procedure", "code_field": "SNOMED_code"},
+}
+
+# Lower preference sorts first among equally good matches
+RXNORM_PREFERENCE = {"IN": 0, "BN": 1, "PIN": 2, "MIN": 2, "SCD": 3, "SBD": 3, "GPCK": 4, "BPCK": 4}
+SNOMED_FSN_TYPE = "900000000000003001"
+
+FUZZY_WORD_CUTOFF = 0.75
+_WORD = re.compile(r"[a-z0-9]+")
+_ICD10_CODE = re.compile(r"^[A-Z][0-9][0-9A-Z](\.?[0-9A-Z]{0,4})?$", re.IGNORECASE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS concepts (
+    id INTEGER PRIMARY KEY,
+    system TEXT NOT NULL,
+    code TEXT NOT NULL,
+    term TEXT NOT NULL,
+    term_lower TEXT NOT NULL,
+    term_type TEXT,
+    preference INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS concepts_term ON concepts(system, term_lower);
+CREATE INDEX IF NOT EXISTS concepts_code ON concepts(system, code);
+CREATE VIRTUAL TABLE IF NOT EXISTS concepts_fts USING fts5(
+    term, content='concepts', content_rowid='id', prefix='2 3'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS concepts_vocab USING fts5vocab(concepts_fts, row);
+CREATE TABLE IF NOT EXISTS words (id INTEGER PRIMARY KEY, word TEXT NOT NULL UNIQUE);
+CREATE VIRTUAL TABLE IF NOT EXISTS words_trigram USING fts5(
+    word, content='words', content_rowid='id', tokenize='trigram'
+);
+CREATE TABLE IF NOT EXISTS releases (
+    system TEXT PRIMARY KEY,
+    source TEXT,
+    concepts INTEGER,
+    loaded_at REAL
+);
+CREATE TABLE IF NOT EXISTS remote_cache (
+    system TEXT NOT NULL,
+    query TEXT NOT NULL,
+    results TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (system, query)
+);
+"""
+
+Concept = Tuple[str, str, str, int]  # code, term, term_type, preference
+
+
+def normalize(term: str) -> str:
+    """Lowercase and collapse whitespace."""
+    return " ".join(term.lower().split())
+
+
+# --- Release file readers ---
+
+def read_icd10cm(path: str) -> Iterator[Concept]:
+    """
+    Read a CMS ICD-10-CM codes file or order file.
+
+    Codes files have "<code> <description>" per line; order files have
+    "<order> <code> <header flag> <short description> <long description>"
+    in fixed-width columns. Codes are returned in dotted form (I48.0).
+    """
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip():
+                continue
+            if line[:5].isdigit() and len(line) > 77:
+                code, term = line[6:13].strip(), line[77:].strip()
+            else:
+                parts = line.split(None, 1)
+                if len(parts) != 2:
+                    continue
+                code, term = parts
+            if len(code) > 3 and "." not in code:
+                code = f"{code[:3]}.{code[3:]}"
+            yield code, term.strip(), "", 0
+
+
+def read_rxnconso(path: str) -> Iterator[Concept]:
+    """Read RxNorm-sourced, unsuppressed atoms from RXNCONSO.RRF."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            fields = line.split("|")
+            if len(fields) < 17 or fields[11] != "RXNORM" or fields[16] not in ("N", ""):
+                continue
+            tty = fields[12]
+            yield fields[0], fields[14], tty, RXNORM_PREFERENCE.get(tty, 5)
+
+
+def read_snomed_descriptions(path: str) -> Iterator[Concept]:
+    """Read active descriptions from an RF2 description snapshot (synonyms preferred over FSNs)."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        header = f.readline().rstrip("\n").split("\t")
+        col = {name: i for i, name in enumerate(header)}
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < len(header) or fields[col["active"]] != "1":
+                continue
+            is_fsn = fields[col["typeId"]] == SNOMED_FSN_TYPE
+            yield fields[col["conceptId"]], fields[col["term"]], "FSN" if is_fsn else "SYN", int(is_fsn)
+
+
+READERS: Dict[str, Callable[[str], Iterator[Concept]]] = {
+    "icd10": read_icd10cm,
+    "rxnorm": read_rxnconso,
+    "snomed": read_snomed_descriptions,
+}
+
+
+class TerminologyService:
+    """SQLite/FTS5 terminology index with a cached remote fallback."""
+
+    def __init__(
+        self,
+        db_path: str = TERMINOLOGY_DB_PATH,
+        remote_lookups: Optional[Dict[str, Callable[[str], str]]] = None,
+        remote_ttl: float = TERMINOLOGY_REMOTE_TTL,
+        remote_workers: int = TERMINOLOGY_REMOTE_WORKERS,
+    ):
+        """
+        Args:
+            db_path: SQLite database holding the index and the remote cache
+            remote_lookups: Code system to a function returning the remote API's JSON result for a term
+            remote_ttl: Seconds a cached remote answer stays valid
+            remote_workers: Concurrent remote lookups in lookup_many
+        """
+        self.db_path = db_path
+        self.remote_lookups = remote_lookups or {}
+        self.remote_ttl = remote_ttl
+        self.remote_workers = remote_workers
+        self._local = threading.local()
+        self._loaded: Optional[Dict[str, int]] = None
+        self.counters = {"local_hits": 0, "remote_cache_hits": 0, "remote_calls": 0, "misses": 0}
+        self._counter_lock = threading.Lock()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets readers and the remote-cache writer overlap
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name: str, amount: int = 1):
+        with self._counter_lock:
+            self.counters[name] += amount
+
+    # --- Loading ---
+
+    def load(self, system: str, path: str, batch_size: int = 50000) -> int:
+        """
+        Replace a code system's concepts with the contents of a release file and rebuild the indexes.
+
+        Args:
+            system: "icd10", "rxnorm" or "snomed"
+            path: Release file for that system
+            batch_size: Rows inserted per executemany call
+
+        Returns:
+            Number of concepts loaded
+        """
+        if system not in READERS:
+            raise ValueError(f"Unknown code system: {system}")
+        conn = self._connection()
+        count = 0
+        with conn:
+            conn.execute("DELETE FROM concepts WHERE system = ?", (system,))
+            batch = []
+            for code, term, term_type, preference in READERS[system](path):
+                batch.append((system, code, term, normalize(term), term_type, preference))
+                if len(batch) >= batch_size:
+                    conn.executemany(
+                        "INSERT INTO concepts (system, code, term, term_lower, term_type, preference) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        batch,
+                    )
+                    count += len(batch)
+                    batch = []
+            if batch:
+                conn.executemany(
+                    "INSERT INTO concepts (system, code, term, term_lower, term_type, preference) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    batch,
+                )
+                count += len(batch)
+            conn.execute(
+                "INSERT OR REPLACE INTO releases (system, source, concepts, loaded_at) VALUES (?, ?, ?, ?)",
+                (system, os.path.basename(path), count, time.time()),
+            )
+            self._rebuild_indexes(conn)
+        self._loaded = None
+        return count
+
+    @staticmethod
+    def _rebuild_indexes(conn: sqlite3.Connection):
+        conn.execute("INSERT INTO concepts_fts(concepts_fts) VALUES ('rebuild')")
+        # The correction vocabulary is every word in the term index
+        conn.execute("DELETE FROM words")
+        conn.execute("INSERT INTO words (word) SELECT term FROM concepts_vocab WHERE length(term) >= 3")
+        conn.execute("INSERT INTO words_trigram(words_trigram) VALUES ('rebuild')")
+        conn.execute("INSERT INTO concepts_fts(concepts_fts) VALUES ('optimize')")
+
+    def loaded_systems(self) -> Dict[str, int]:
+        """Concept counts per loaded code system."""
+        if self._loaded is None:
+            rows = self._connection().execute("SELECT system, concepts FROM releases").fetchall()
+            self._loaded = {system: count for system, count in rows}
+        return self._loaded
+
+    # --- Local lookup ---
+
+    def _exact(self, system: str, norm: str, limit: int) -> List[Tuple[str, str]]:
+        return self._connection().execute(
+            "SELECT code, term FROM concepts WHERE system = ? AND term_lower = ? "
+            "ORDER BY preference LIMIT ?",
+            (system, norm, limit),
+        ).fetchall()
+
+    def _by_code(self, system: str, term: str, limit: int) -> List[Tuple[str, str]]:
+        code = term.strip().upper()
+        if system == "icd10" and _ICD10_CODE.match(code):
+            if len(code) > 3 and "." not in code:
+                code = f"{code[:3]}.{code[3:]}"
+            return self._connection().execute(
+                "SELECT code, term FROM concepts WHERE system = ? AND code >= ? AND code < ? "
+                "ORDER BY code, preference LIMIT ?",
+                (system, code, code + "￿", limit),
+            ).fetchall()
+        if system in ("rxnorm", "snomed") and code.isdigit():
+            return self._connection().execute(
+                "SELECT code, term FROM concepts WHERE system = ? AND code = ? ORDER BY preference LIMIT ?",
+                (system, code, limit),
+            ).fetchall()
+        return []
+
+    def _prefix(self, system: str, words: List[str], limit: int) -> List[Tuple[str, str]]:
+        if not words:
+            return []
+        query = " ".join(f'"{word}"*' for word in words)
+        return self._connection().execute(
+            "SELECT c.code, c.term FROM concepts_fts f JOIN concepts c ON c.id = f.rowid "
+            "WHERE concepts_fts MATCH ? AND c.system = ? "
+            "ORDER BY f.rank + c.preference * 0.5, length(c.term) LIMIT ?",
+            (query, system, limit * 4),
+        ).fetchall()
+
+    def _correct(self, word: str) -> Optional[str]:
+        """Closest vocabulary word for a misspelled word, using the trigram index for candidates."""
+        conn = self._connection()
+        if conn.execute("SELECT 1 FROM words WHERE word = ?", (word,)).fetchone():
+            return word
+        trigrams = {word[i:i + 3] for i in range(len(word) - 2)}
+        if not trigrams:
+            return None
+        query = " OR ".join(f'"{t}"' for t in trigrams)
+        candidates = conn.execute(
+            "SELECT word FROM words_trigram WHERE words_trigram MATCH ? ORDER BY rank LIMIT 50",
+            (query,),
+        ).fetchall()
+        best, best_ratio = None, FUZZY_WORD_CUTOFF
+        for (candidate,) in candidates:
+            ratio = SequenceMatcher(None, word, candidate).ratio()
+            if ratio > best_ratio:
+                best, best_ratio = candidate, ratio
+        return best
+
+    def lookup_local(self, system: str, term: str, limit: int = 5) -> List[Dict[str, str]]:
+        """
+        Look up a term in the local index only.
+
+        Tries code, exact, prefix and then fuzzy matching, stopping at the
+        first strategy that finds anything.
+
+        Args:
+            system: "icd10", "rxnorm" or "snomed"
+            term: Term (or code) to look up
+            limit: Maximum number of codes to return
+
+        Returns:
+            Result dicts in the coding tools' format, best match first
+        """
+        norm = normalize(term)
+        rows, base, match = self._by_code(system, term, limit), 95, "code"
+        if not rows:
+            rows, match = self._exact(system, norm, limit), "exact"
+        if not rows:
+            rows, match = self._prefix(system, _WORD.findall(norm), limit), "prefix"
+        if not rows:
+            words = [self._correct(w) if len(w) >= 4 else w for w in _WORD.findall(norm)]
+            if all(words):
+                rows, base, match = self._prefix(system, words, limit), 85, "fuzzy"
+        return self._format(system, term, rows, limit, base, match)
+
+    @staticmethod
+    def _format(system: str, term: str, rows: Iterable[Tuple[str, str]], limit: int,
+                base: int, match: str) -> List[Dict[str, str]]:
+        fields = SYSTEMS[system]
+        results, seen = [], set()
+        for code, description in rows:
+            if code in seen:
+                continue
+            seen.add(code)
+            # Higher confidence for earlier results, as the remote lookups score them
+            confidence = max(base - len(results) * 5, 70 if base == 95 else 60)
+            results.append({
+                fields["term_field"]: term,
+                fields["code_field"]: code,
+                "description": description,
+                "confidence_score": f"{confidence}%",
+                "match": match,
+                "source": "local",
+            })
+            if len(results) >= limit:
+                break
+        return results
+
+    # --- Remote fallback ---
+
+    def _remote(self, system: str, term: str) -> List[Dict[str, str]]:
+        norm = normalize(term)
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT results, fetched_at FROM remote_cache WHERE system = ? AND query = ?",
+            (system, norm),
+        ).fetchone()
+        if row and time.time() - row[1] < self.remote_ttl:
+            self._count("remote_cache_hits")
+            term_field = SYSTEMS[system]["term_field"]
+            return [{**r, term_field: term} if term_field in r else r for r in json.loads(row[0])]
+
+        remote = self.remote_lookups.get(system)
+        if remote is None:
+            return []
+        self._count("remote_calls")
+        results = json.loads(remote(term))
+        if not isinstance(results, list):
+            results = [results]
+        # Error responses are returned but not cached, so they are retried next time
+        if not any("error" in r for r in results):
+            for r in results:
+                r.setdefault("source", "remote")
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO remote_cache (system, query, results, fetched_at) VALUES (?, ?, ?, ?)",
+                    (system, norm, json.dumps(results), time.time()),
+                )
+        return results
+
+    def lookup(self, system: str, term: str, limit: int = 5) -> List[Dict[str, str]]:
+        """
+        Look up a term locally, falling back to the cached remote API.
+
+        Args:
+            system: "icd10", "rxnorm" or "snomed"
+            term: Term (or code) to look up
+            limit: Maximum number of codes to return
+
+        Returns:
+            Result dicts in the coding tools' format, best match first
+        """
+        if system not in SYSTEMS:
+            raise ValueError(f"Unknown code system: {system}")
+        if system in self.loaded_systems():
+            results = self.lookup_local(system, term, limit)
+            if results:
+                self._count("local_hits")
+                return results
+        results = self._remote(system, term)
+        if not results:
+            self._count("misses")
+        return results
+
+    def lookup_many(self, system: str, terms: List[str], limit: int = 5) -> Dict[str, List[Dict[str, str]]]:
+        """
+        Look up many terms of one code system in a single batch.
+
+        Duplicate terms are looked up once; local lookups run first and the
+        terms they miss go to the remote fallback concurrently.
+
+        Args:
+            system: "icd10", "rxnorm" or "snomed"
+            terms: Terms (or codes) to look up
+            limit: Maximum number of codes per term
+
+        Returns:
+            Each input term mapped to its results
+        """
+        if system not in SYSTEMS:
+            raise ValueError(f"Unknown code system: {system}")
+        unique = list(dict.fromkeys(t for t in terms if t and t.strip()))
+        results: Dict[str, List[Dict[str, str]]] = {}
+        if system in self.loaded_systems():
+            for term in unique:
+                found = self.lookup_local(system, term, limit)
+                if found:
+                    results[term] = found
+            self._count("local_hits", len(results))
+
+        missing = [t for t in unique if t not in results]
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.remote_workers, len(missing))) as pool:
+                for term, found in zip(missing, pool.map(lambda t: self._remote(system, t), missing)):
+                    results[term] = found
+                    if not found:
+                        self._count("misses")
+        return {term: results.get(term, []) for term in terms if term and term.strip()}
+
+    def stats(self) -> Dict[str, object]:
+        """Loaded code systems and lookup counters."""
+        return {"loaded": dict(self.loaded_systems()), **self.counters}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the local terminology index")
+    parser.add_argument("--db", default=TERMINOLOGY_DB_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("load", help="Load release files into the index")
+    load.add_argument("--icd10", help="CMS ICD-10-CM codes or order file")
+    load.add_argument("--rxnorm", help="RxNorm RXNCONSO.RRF")
+    load.add_argument("--snomed", help="SNOMED CT RF2 description snapshot")
+    lookup = commands.add_parser("lookup", help="Look up a term")
+    lookup.add_argument("system", choices=sorted(SYSTEMS))
+    lookup.add_argument("term")
+    args = parser.parse_args()
+
+    service = TerminologyService(args.db)
+    if args.command == "load":
+        for system in ("icd10", "rxnorm", "snomed"):
+            path = getattr(args, system)
+            if path:
+                started = time.perf_counter()
+                count = service.load(system, path)
+                print(f"Loaded {count} {system} concepts from {path} in {time.perf_counter() - started:.1f}s")
+    else:
+        started = time.perf_counter()
+        results = service.lookup_local(args.system, args.term)
+        print(json.dumps(results, indent=2))
+        print(f"{(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark: whole-hierarchy download and walk vs the indexed entity queries
+
+Builds a synthetic campus of 100k devices (buildings, floors, zones, and
+sensors, VAVs and dampers in each zone) and serves it with the entities Lambda
+handler called in process. Each request is charged a simulated round trip
+plus transfer time per byte of response.
+
+    before: get_site_info downloads the whole nested tree, json.loads it and
+            walks children/entity by hand to find one floor's sensors (repeats
+            skip the download on 304 but still parse and walk the tree)
+    after:  find_entities(type="TemperatureSensor", under=<floor>) against
+            the warm index; repeated queries are revalidated with
+            If-None-Match and answered from the tool's cache on 304
+
+Usage (from the hvac-data-analytics-agent directory):
+    python benchmarks/bench_entities.py --devices 100000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import importlib.util
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "code", "lambda", "STAgentMain"))
+sys.path.insert(0, os.path.join(ROOT, "code", "lambda", "SmartBuildingToolEntitiesApi"))
+
+from tools import site_info
+
+DEVICE_TYPES = ["TemperatureSensor", "VAV", "Damper", "HumiditySensor"]
+
+
+def make_campus(devices, buildings=10, floors=10, zones=25):
+    per_zone = max(1, devices // (buildings * floors * zones))
+
+    def entity(entity_type, entity_id, name, kind, children=()):
+        return {"id": {"entityType": entity_type, "id": entity_id}, "name": name, "type": kind,
+                "children": [{"entity": child} for child in children]}
+
+    return entity("ASSET", "campus", "Campus", "Campus", [
+        entity("ASSET", f"b{b}", f"Building {b}", "Building", [
+            entity("ASSET", f"b{b}-f{f}", f"B{b} Floor {f}", "Floor", [
+                entity("ASSET", f"b{b}-f{f}-z{z}", f"B{b}-F{f}-Zone-{z}", "Zone", [
+                    entity("DEVICE", f"b{b}-f{f}-z{z}-d{d}", f"B{b}-F{f}-Z{z}-D{d}", DEVICE_TYPES[d % len(DEVICE_TYPES)])
+                    for d in range(per_zone)
+                ])
+                for z in range(zones)
+            ])
+            for f in range(floors)
+        ])
+        for b in range(buildings)
+    ])
+
+
+class Response:
+    def __init__(self, result):
+        self.status_code = result["statusCode"]
+        self.headers = result.get("headers", {})
+        self.text = result.get("body", "")
+
+
+class SimulatedSession:
+    """requests.Session.get that calls the entities handler, charged per request and per byte."""
+
+    def __init__(self, handler, round_trip, bytes_per_second):
+        self.handler = handler
+        self.round_trip = round_trip
+        self.bytes_per_second = bytes_per_second
+        self.requests = 0
+        self.bytes = 0
+
+    def get(self, url, headers=None, params=None):
+        operation = url.split("/entities", 1)[1].strip("/")
+        result = self.handler({
+            "headers": headers or {},
+            "pathParameters": {"operation": operation} if operation else None,
+            "queryStringParameters": params,
+        }, None)
+        body = result.get("body", "")
+        time.sleep(self.round_trip + len(body) / self.bytes_per_second)
+        self.requests += 1
+        self.bytes += len(body)
+        return Response(result)
+
+
+def run_before(floor_name):
+    tree = json.loads(site_info.get_site_info("campus"))
+    sensors = []
+
+    def walk(entity, inside):
+        inside = inside or entity["name"] == floor_name
+        if inside and entity["type"] == "TemperatureSensor":
+            sensors.append(entity["id"]["id"])
+        for child in entity.get("children", []):
+            walk(child["entity"], inside)
+
+    walk(tree, False)
+    return sensors
+
+
+def run_after(floor_name):
+    return [e["id"] for e in site_info.find_entities(type="TemperatureSensor", under=floor_name)["entities"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--devices", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=5, help="repeated questions about the same floor")
+    parser.add_argument("--round-trip", type=float, default=0.03, help="seconds per request")
+    parser.add_argument("--bandwidth", type=float, default=20e6, help="bytes per second")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "campus.json")
+        with open(path, "w") as f:
+            json.dump(make_campus(args.devices), f, separators=(",", ":"))
+        os.environ["ENTITY_HIERARCHY_FILE"] = path
+        started = time.perf_counter()
+        spec = importlib.util.spec_from_file_location(
+            "entities_api", os.path.join(ROOT, "code", "lambda", "SmartBuildingToolEntitiesApi", "index.py")
+        )
+        entities_api = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(entities_api)
+        print(f"{len(entities_api.INDEX):,} entities, {os.path.getsize(path) / 1e6:.1f} MB tree, "
+              f"index built in {time.perf_counter() - started:.2f}s (once per Lambda container)")
+
+    os.environ["ID_TOKEN"] = "benchmark"
+    floor = "B3 Floor 7"
+    for name, run in (("before", run_before), ("after", run_after)):
+        site_info._entity_cache.clear()
+        site_info._session = SimulatedSession(entities_api.lambda_handler, args.round_trip, args.bandwidth)
+        timings = []
+        for _ in range(args.queries):
+            started = time.perf_counter()
+            sensors = run(floor)
+            timings.append(time.perf_counter() - started)
+        print(f"{name:7} first {timings[0] * 1000:7.1f} ms, repeat {min(timings[1:] or timings) * 1000:7.1f} ms  "
+              f"{site_info._session.requests} requests, {site_info._session.bytes / 1024:9,.1f} KB, "
+              f"{len(sensors)} sensors")
+        if name == "before":
+            before = timings
+    print(f"speedup: {before[0] / timings[0]:.1f}x first query, "
+          f"{min(before[1:] or before) / min(timings[1:] or timings):.1f}x repeated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark: in-process exec vs a fresh process per run vs the sandbox pool
+
+Runs the same agent-style code several times (a question and its follow-ups):
+it loads a week of 10-minute readings for 20 sensors with
+get_timeseries_data and averages them with pandas. Tool calls are charged a
+simulated round trip plus transfer time per byte, as if they went to the
+tool API.
+
+    before:  execute_code as it was; exec inside the agent process with
+             sys.stdout swapped, no limits, and every run fetching its data
+             over HTTP again
+    process: the obvious isolation; a fresh interpreter per run that has to
+             import NumPy and pandas again (imports only, no tool calls)
+    after:   SandboxPool; pre-forked workers with NumPy and pandas imported,
+             CPU/memory/time limits, and tool results fetched once by the
+             agent and shared with the workers through a memory-mapped file
+
+Usage (from the hvac-data-analytics-agent directory):
+    python benchmarks/bench_sandbox.py --runs 10
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import subprocess
+from io import StringIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "code", "lambda", "STAgentMain"))
+
+from sandbox import SandboxPool
+
+ROUND_TRIP = 0.03
+BYTES_PER_SECOND = 20e6
+POINTS = 7 * 144
+
+CODE = """
+import pandas as pd
+frames = []
+for sensor in [f"ts-{i}" for i in range(20)]:
+    data = get_timeseries_data(sensor, "temperature", "2024-01-01 00:00:00", "2024-01-07 23:59:59")["data"]
+    frame = pd.DataFrame(data)
+    frame["sensor"] = sensor
+    frames.append(frame)
+readings = pd.concat(frames)
+print(readings.groupby("sensor")["value"].mean().round(2).max())
+"""
+
+
+def get_timeseries_data(entity_id, property, start_time, end_time):
+    """Simulated tool API call: a week of 10-minute readings."""
+    rng = random.Random(entity_id)
+    data = [{"time": 1704067200 + i * 600, "value": round(rng.uniform(18, 24), 2)} for i in range(POINTS)]
+    time.sleep(ROUND_TRIP + len(data) * 40 / BYTES_PER_SECOND)
+    return {"data": data}
+
+
+def run_before(code):
+    stdout_buffer, stderr_buffer = StringIO(), StringIO()
+    original_stdout, original_stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = stdout_buffer, stderr_buffer
+    exec(code, {"get_timeseries_data": get_timeseries_data})
+    sys.stdout, sys.stderr = original_stdout, original_stderr
+    return stdout_buffer.getvalue()
+
+
+def run_process():
+    subprocess.run([sys.executable, "-c", "import numpy, pandas"], check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    rows = []
+    started = time.perf_counter()
+    for _ in range(args.runs):
+        output = run_before(CODE)
+    rows.append(("before", time.perf_counter() - started, output.strip()))
+
+    started = time.perf_counter()
+    for _ in range(args.runs):
+        run_process()
+    rows.append(("process", time.perf_counter() - started, "-"))
+
+    started = time.perf_counter()
+    pool = SandboxPool({"get_timeseries_data": get_timeseries_data}, workers=args.workers)
+    startup = time.perf_counter() - started
+    started = time.perf_counter()
+    results = [pool.run(CODE) for _ in range(args.runs)]
+    rows.append(("after", time.perf_counter() - started, results[-1]["stdout"].strip()))
+    pool.close()
+
+    for name, seconds, output in rows:
+        print(f"{name:8} {seconds:6.2f}s for {args.runs} runs, {seconds / args.runs * 1000:7.1f} ms per run  "
+              f"output {output}")
+    print(f"pool startup (once per Lambda container, during init): {startup:.2f}s")
+    first, last = results[0]["timings"], results[-1]["timings"]
+    print(f"after, first run: {first['total_ms']} ms ({first['tool_ms']} ms in {first['tool_calls']} tool calls); "
+          f"later runs: {last['total_ms']} ms ({last['tool_ms']} ms in tool calls)")
+    print(f"speedup vs before: {rows[0][1] / rows[2][1]:.1f}x, vs a process per run: {rows[1][1] / rows[2][1]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
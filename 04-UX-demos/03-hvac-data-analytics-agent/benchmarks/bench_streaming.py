@@ -0,0 +1,149 @@
+"""
+Benchmark: time to first byte of the agent's reply, whole answer vs streamed
+
+Runs a Strands agent on a scripted model that streams tokens at a fixed rate
+(with a delay before each model call's first token) and answers in two model
+calls around one slow tool call, like a typical question that needs data. The
+WebSocket client is a fake API Gateway management API that charges each
+post_to_connection a round trip and records when it was delivered.
+
+    before: agent(question) runs to completion, then the whole answer is
+            posted once (what STAgentMain did until now)
+    after:  ws_stream.WebSocketStream as the agent's callback handler posts
+            text deltas (coalesced into STREAM_WINDOW_MS windows), tool
+            progress and an end-of-message frame as they happen
+    naive:  the same stream with no coalescing, one post per token
+
+Usage (from the hvac-data-analytics-agent directory):
+    python benchmarks/bench_streaming.py --tokens 300 --tokens-per-second 80
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "code", "lambda", "STAgentMain"))
+
+from strands import Agent, tool
+from strands.models import Model
+
+from ws_stream import WebSocketStream
+
+
+class FakeManagementApi:
+    """apigatewaymanagementapi client that records the frames posted to each connection."""
+
+    class exceptions:
+        class GoneException(Exception):
+            pass
+
+    def __init__(self, round_trip):
+        self.round_trip = round_trip
+        self.frames = []
+
+    def post_to_connection(self, Data, ConnectionId):
+        time.sleep(self.round_trip)
+        self.frames.append((time.monotonic(), Data))
+
+
+class ScriptedModel(Model):
+    """Streams a preamble and a tool call, then (after the tool result) the answer, token by token."""
+
+    def __init__(self, tokens, tokens_per_second, first_token):
+        self.tokens = tokens
+        self.delay = 1 / tokens_per_second
+        self.first_token = first_token
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError
+        yield
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        answered = any("toolResult" in content for content in messages[-1]["content"])
+        await asyncio.sleep(self.first_token)
+        yield {"messageStart": {"role": "assistant"}}
+        yield {"contentBlockStart": {"start": {}}}
+        words = (["The", " zones", " on", " floor", " 3", " averaged", " 21.8", " C", " today", ".\n"] * self.tokens)[:self.tokens] \
+            if answered else ["Let", " me", " get", " the", " zone", " temperatures", ".\n"]
+        for word in words:
+            await asyncio.sleep(self.delay)
+            yield {"contentBlockDelta": {"delta": {"text": word}}}
+        yield {"contentBlockStop": {}}
+        if answered:
+            yield {"messageStop": {"stopReason": "end_turn"}}
+            return
+        yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": "tool-1", "name": "get_timeseries_data"}}}}
+        yield {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps({"entity_id": "floor-3"})}}}}
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "tool_use"}}
+
+
+def make_agent(args, callback_handler):
+    @tool
+    def get_timeseries_data(entity_id: str) -> str:
+        """Readings of an entity."""
+        time.sleep(args.tool_seconds)
+        return json.dumps({"entity_id": entity_id, "temperature": [21.5, 21.9, 22.0]})
+
+    return Agent(
+        model=ScriptedModel(args.tokens, args.tokens_per_second, args.first_token),
+        tools=[get_timeseries_data],
+        callback_handler=callback_handler,
+    )
+
+
+def run(name, args):
+    api = FakeManagementApi(args.round_trip)
+    started = time.monotonic()
+    if name == "before":
+        response = make_agent(args, None)("How warm was floor 3 today?")
+        api.post_to_connection(Data=str(response).replace("\n", "<br>"), ConnectionId="bench")
+    else:
+        stream = WebSocketStream(api, "bench", window_ms=args.window_ms if name == "after" else 0,
+                                 max_bytes=args.max_bytes if name == "after" else 0)
+        response = make_agent(args, stream)("How warm was floor 3 today?")
+        stream.close(str(response))
+
+        frames = [json.loads(data) for _, data in api.frames]
+        assert [frame["seq"] for frame in frames] == list(range(len(frames))), "frames out of order"
+        assert frames[-1]["type"] == "end" and frames[-1]["text"] == str(response)
+        streamed = "".join(frame["text"] for frame in frames if frame["type"] == "text")
+        assert streamed.strip().endswith(str(response).strip()), "streamed text differs from the answer"
+        tools = [(frame["name"], frame["status"]) for frame in frames if frame["type"] == "tool"]
+        assert tools == [("get_timeseries_data", "running"), ("get_timeseries_data", "success")], tools
+
+    first, last = api.frames[0][0] - started, api.frames[-1][0] - started
+    print(f"{name:7} first byte {first * 1000:7.0f} ms, complete {last * 1000:7.0f} ms, "
+          f"{len(api.frames):4} posts")
+    return first
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--tokens", type=int, default=300, help="tokens in the final answer")
+    parser.add_argument("--tokens-per-second", type=float, default=80)
+    parser.add_argument("--first-token", type=float, default=0.6, help="seconds before each model call's first token")
+    parser.add_argument("--tool-seconds", type=float, default=1.5)
+    parser.add_argument("--round-trip", type=float, default=0.02, help="seconds per post_to_connection")
+    parser.add_argument("--window-ms", type=int, default=50)
+    parser.add_argument("--max-bytes", type=int, default=4096)
+    args = parser.parse_args()
+
+    before = run("before", args)
+    after = run("after", args)
+    run("naive", args)
+    print(f"time to first byte: {before / after:.1f}x sooner")
+
+
+if __name__ == "__main__":
+    main()
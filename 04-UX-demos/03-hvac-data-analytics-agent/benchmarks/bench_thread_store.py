@@ -0,0 +1,167 @@
+"""
+Benchmark: whole-thread rewrite vs snapshot plus appended segments per turn
+
+Replays a long conversation whose turns each carry a tool call and a tool
+result (the timeseries and site info payloads the agent keeps in its
+history), and saves it after every turn. Objects live in a local directory
+through thread_store.LocalBackend; each request is charged a simulated S3
+round trip plus transfer time per byte.
+
+    before: get_object of threads/{thread_id}.json, then put_object of the
+            whole thread again (what STAgentMain did until now), so every
+            turn moves the entire history twice
+    after:  ThreadStore.load (snapshot + the segments since) and append of
+            only the turn's own messages; every THREAD_COMPACT_EVERY turns
+            the tail is folded into a new snapshot
+
+Also checks that two overlapping turns on the same thread are both kept.
+
+Usage (from the hvac-data-analytics-agent directory):
+    python benchmarks/bench_thread_store.py --turns 200 --result-kb 8
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "code", "lambda", "STAgentMain"))
+
+from thread_store import LocalBackend, ThreadStore
+
+
+class SimulatedS3(LocalBackend):
+    """LocalBackend charged a round trip per request and transfer time per byte."""
+
+    def __init__(self, root, round_trip, bytes_per_second):
+        super().__init__(root)
+        self.round_trip = round_trip
+        self.bytes_per_second = bytes_per_second
+        self.requests = 0
+        self.bytes = 0
+
+    def _charge(self, size=0):
+        time.sleep(self.round_trip + size / self.bytes_per_second)
+        self.requests += 1
+        self.bytes += size
+
+    def get(self, key):
+        found = super().get(key)
+        self._charge(len(found[0]) if found else 0)
+        return found
+
+    def put(self, key, data, if_match=None, create_only=False):
+        self._charge(len(data))
+        return super().put(key, data, if_match=if_match, create_only=create_only)
+
+    def list(self, prefix, start_after=""):
+        self._charge()
+        return super().list(prefix, start_after)
+
+    def delete(self, keys):
+        self._charge()
+        super().delete(keys)
+
+
+def make_turn(number, result_kb):
+    """Messages one agent turn adds: question, tool use, tool result, answer."""
+    payload = json.dumps([[1_700_000_000 + i * 300, 21.5 + (i % 7) * 0.1] for i in range(result_kb * 40)])
+    return [
+        {"role": "user", "content": [{"text": f"What was the average zone temperature on floor {number}?"}]},
+        {"role": "assistant", "content": [{"toolUse": {
+            "toolUseId": f"tool-{number}", "name": "get_timeseries_data",
+            "input": {"entity_id": f"zone-{number}", "keys": "temperature"}}}]},
+        {"role": "user", "content": [{"toolResult": {
+            "toolUseId": f"tool-{number}", "status": "success", "content": [{"text": payload}]}}]},
+        {"role": "assistant", "content": [{"text": f"The average temperature on floor {number} was 21.8 C."}]},
+    ]
+
+
+def trim(messages, window):
+    """The agent's sliding window: drop the oldest turns once the thread is over window messages."""
+    return messages[-window:] if len(messages) > window else messages
+
+
+def run_before(backend, thread_id, turns, result_kb, window):
+    key = f"threads/{thread_id}.json"
+    timings = []
+    for number in range(turns):
+        started = time.perf_counter()
+        found = backend.get(key)
+        messages = json.loads(found[0])["messages"] if found else []
+        messages = trim(messages + make_turn(number, result_kb), window)
+        backend.put(key, json.dumps({"messages": messages, "system_prompt": "..."}).encode("utf-8"))
+        timings.append(time.perf_counter() - started)
+    return timings, len(messages)
+
+
+def run_after(make_store, thread_id, turns, result_kb, window):
+    timings = []
+    store = make_store()
+    for number in range(turns):
+        started = time.perf_counter()
+        state = store.load(thread_id)
+        loaded = list(state.messages)
+        messages = trim(loaded + make_turn(number, result_kb), window)
+        trimmed = len(loaded) - (len(messages) - 4) if len(loaded) + 4 > window else 0
+        store.append(state, messages[-4:], keep_from=state.first_message + trimmed, system_prompt="...")
+        timings.append(time.perf_counter() - started)
+        store = make_store(store)
+    final = make_store().load(thread_id).messages
+    assert final == json.loads(json.dumps(messages)), "stored thread differs from the agent's"
+    return timings, len(final)
+
+
+def check_overlapping_turns(directory):
+    store = ThreadStore(LocalBackend(directory), compact_every=3)
+    first = store.load("overlap")
+    second = store.load("overlap")
+    store.append(first, make_turn(1, 1))
+    store.append(second, make_turn(2, 1))
+    messages = store.load("overlap").messages
+    texts = [m["content"][0]["text"] for m in messages if m["role"] == "user" and "text" in m["content"][0]]
+    assert len(messages) == 8 and "floor 1" in texts[0] and "floor 2" in texts[1], texts
+    print("overlapping turns: both saved, in the order they were appended")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--result-kb", type=int, default=8, help="approximate size of each turn's tool result")
+    parser.add_argument("--compact-every", type=int, default=10)
+    parser.add_argument("--window", type=int, default=40, help="messages kept by the agent's conversation manager")
+    parser.add_argument("--round-trip", type=float, default=0.02, help="seconds per S3 request")
+    parser.add_argument("--bandwidth", type=float, default=50e6, help="bytes per second")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        check_overlapping_turns(directory)
+
+        results = {}
+        for name in ("before", "after warm", "after cold"):
+            backend = SimulatedS3(os.path.join(directory, name.replace(" ", "-")), args.round_trip, args.bandwidth)
+            if name == "before":
+                timings, messages = run_before(backend, "bench", args.turns, args.result_kb, args.window)
+            else:
+                # warm: every turn lands on the same container; cold: a new container (empty cache) each turn
+                warm = name == "after warm"
+                timings, messages = run_after(
+                    lambda store=None: store if warm and store else ThreadStore(
+                        backend, compact_every=args.compact_every, cache_size=32 if warm else 0),
+                    "bench", args.turns, args.result_kb, args.window
+                )
+            results[name] = timings
+            print(f"{name:10} avg {sum(timings) / len(timings) * 1000:6.1f} ms/turn, "
+                  f"p95 {sorted(timings)[int(len(timings) * 0.95)] * 1000:6.1f} ms  "
+                  f"{backend.requests / args.turns:4.1f} requests/turn, "
+                  f"{backend.bytes / args.turns / 1024:7.1f} KB/turn moved, {messages} messages kept")
+
+    before = sum(results["before"])
+    print(f"speedup: {before / sum(results['after warm']):.1f}x warm, {before / sum(results['after cold']):.1f}x cold")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: raw per-sensor timeseries rows vs aggregated, batched binary columns
+
+Answers "daily max temperature of every sensor for a month" the way the
+agent-generated code does, against the timeseries Lambda handler called in
+process. Each request is charged a simulated round trip plus transfer time
+per byte of response.
+
+    before: get_timeseries_data per sensor; every 10-minute point comes back
+            as a {"time", "value"} dict, json.loads'ed in the agent Lambda,
+            and the daily max is computed in Python
+    after:  one get_timeseries_batch request with resolution="1d", agg="max";
+            the API buckets the points and returns base64 float32 columns
+
+Usage (from the hvac-data-analytics-agent directory):
+    python benchmarks/bench_timeseries.py --sensors 40 --days 30
+"""
+
+import os
+import sys
+import time
+import argparse
+import importlib.util
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "code", "lambda", "STAgentMain"))
+
+from tools import site_info
+
+spec = importlib.util.spec_from_file_location(
+    "timeseries_api", os.path.join(ROOT, "code", "lambda", "SmartBuildingToolTimeseriesApi", "index.py")
+)
+timeseries_api = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(timeseries_api)
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class SimulatedSession:
+    """requests.Session.get that calls the timeseries handler, charged per request and per byte."""
+
+    def __init__(self, round_trip, bytes_per_second):
+        self.round_trip = round_trip
+        self.bytes_per_second = bytes_per_second
+        self.requests = 0
+        self.bytes = 0
+
+    def get(self, url, headers=None, params=None):
+        text = timeseries_api.lambda_handler({"queryStringParameters": params}, None)
+        time.sleep(self.round_trip + len(text) / self.bytes_per_second)
+        self.requests += 1
+        self.bytes += len(text)
+        return Response(text)
+
+
+def run_before(sensors, start, end):
+    maxima = {}
+    for sensor in sensors:
+        daily = {}
+        for point in site_info.get_timeseries_data(sensor, "temperature", start, end)["data"]:
+            day = point["time"] - point["time"] % 86400
+            daily[day] = max(daily.get(day, point["value"]), point["value"])
+        maxima[sensor] = daily
+    return maxima
+
+
+def run_after(sensors, start, end):
+    result = site_info.get_timeseries_batch(sensors, "temperature", start, end, resolution="1d", agg="max")
+    return {sensor: dict(zip(series["time"], series["value"])) for sensor, series in result["series"].items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sensors", type=int, default=40)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--round-trip", type=float, default=0.03, help="seconds per request")
+    parser.add_argument("--bandwidth", type=float, default=20e6, help="bytes per second")
+    args = parser.parse_args()
+
+    os.environ["ID_TOKEN"] = "benchmark"
+    sensors = [f"ts-{i}" for i in range(1, args.sensors + 1)]
+    end = datetime(2024, 2, 1)
+    start, end = (end - timedelta(days=args.days)).strftime("%Y-%m-%d %H:%M:%S"), end.strftime("%Y-%m-%d %H:%M:%S")
+    points = args.sensors * (args.days * 144 + 1)
+    print(f"{args.sensors} sensors x {args.days} days = {points:,} raw points")
+
+    for name, run in (("before", run_before), ("after", run_after)):
+        site_info._session = SimulatedSession(args.round_trip, args.bandwidth)
+        started = time.perf_counter()
+        maxima = run(sensors, start, end)
+        seconds = time.perf_counter() - started
+        days = sum(len(daily) for daily in maxima.values())
+        print(f"{name:7} {seconds:6.2f}s  {site_info._session.requests:3} requests, "
+              f"{site_info._session.bytes / 1024:9,.1f} KB transferred, {days} daily maxima")
+        if name == "before":
+            before = seconds
+    print(f"speedup: {before / seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
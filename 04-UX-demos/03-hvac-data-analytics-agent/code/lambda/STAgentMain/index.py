@@ -18,20 +18,19 @@ SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 '''
 import os
-import json
 from typing import Dict, Any
 import boto3
-import sys
-from botocore.exceptions import ClientError
-from io import StringIO
 import base64
 
 from strands import Agent, tool
 from strands.models import BedrockModel
 
 
+from sandbox import SandboxPool
+from thread_store import ThreadStore, ThreadState, S3Backend
+from ws_stream import WebSocketStream
 from tools.util import get_current_time
-from tools.site_info import  get_site_info, get_timeseries_data
+from tools.site_info import  get_site_info, find_entities, get_ancestors, get_timeseries_data, get_timeseries_batch
 
 
 
@@ -43,11 +42,28 @@ WS_REPLY_API_ENDPOINT = WS_API_ENDPOINT.replace("wss:", "https:") + "/$default"
 
 #create S3 client
 s3_client = boto3.client('s3')
+#conversation threads: a snapshot plus one appended segment per turn
+thread_store = ThreadStore(S3Backend(s3_client, BUCKET_NAME))
 # Create API Gateway management client
 api_client = boto3.client('apigatewaymanagementapi',
                         endpoint_url= WS_REPLY_API_ENDPOINT, 
                         region_name = REGION)
 
+# Worker processes for execute_code, started during the Lambda init phase with NumPy and pandas imported.
+# Results of the data tools are shared with the workers; the current time is always fetched.
+sandbox = SandboxPool(
+    {
+        'get_site_info': get_site_info,
+        'find_entities': find_entities,
+        'get_ancestors': get_ancestors,
+        'get_timeseries_data': get_timeseries_data,
+        'get_timeseries_batch': get_timeseries_batch,
+        'get_current_time': get_current_time
+    },
+    cached=['get_site_info', 'find_entities', 'get_ancestors', 'get_timeseries_data', 'get_timeseries_batch']
+)
+_sandbox_user = None
+
 #Model id for the FM in Bedrock. Select a model that supports tools
 MODEL_ID = "us.anthropic.claude-3-5-haiku-20241022-v1:0"
 #System prompt for the agent. Explain here what you want the agent to be.
@@ -59,113 +75,83 @@ SYSTEM_PROMPT = """
                         write code and execute to list the number of children for that floor id of type zone. These types are fixed and allowed values are listed in get_site_info documentation
                 2. If the response requires ANY mathematical calculations (eg:count, average, min, max), ALWAYS generate the python code to generate the answer and call the execute_code tool. 
                     DO NOT do ANY mathematical calculations without generating code. 
-                    The code executed inside the execute_code tool call call the get_site_info, get_timeseries_data and get_current_time tools. 
+                    The code executed inside the execute_code tool call call the get_site_info, find_entities, get_ancestors, get_timeseries_data, get_timeseries_batch and get_current_time tools. 
                     CALL these functions to retrieve the data for processing. eg: get_site_info('s123'). Otherwise the code execution DOES NOT have access to your tool_result.
+                    To look up floors, zones or devices use find_entities(type=..., under=...) instead of walking the get_site_info hierarchy.
+                    For long time ranges or many sensors, pass resolution and agg (eg: resolution="1d", agg="max") so the data is aggregated by the API,
+                    and use get_timeseries_batch instead of calling get_timeseries_data in a loop.
                     ALWAYS use the print statement at the end to return the end result. eg: instead of sum, use print(sum) at the end of the generated code.
                 3. Use the resulting answer to give the response to user
             """
 
 @tool
-def execute_code(code: str) -> Dict[str, str]:
+def execute_code(code: str) -> Dict[str, Any]:
     """
-    Executes the provided Python code in a controlled environment and captures its output.
+    Executes the provided Python code in a sandboxed worker process and captures its output.
 
     This function executes the given code with access to specific predefined functions
-    while capturing both standard output and standard error streams. The code is also
-    saved to a file for reference.
+    while capturing both standard output and standard error streams. NumPy and pandas are
+    already imported in the worker, so importing them is fast. Each run has a time, CPU and
+    memory limit.
 
     Args:
         code (str): The Python code to be executed as a string.
 
     Returns:
-        dict: A dictionary containing two keys:
+        dict: A dictionary containing three keys:
             - 'stdout' (str): The captured standard output from the code execution
-            - 'stderr' (str): The captured standard error output from the code execution
+            - 'stderr' (str): The captured standard error output from the code execution,
+              including the traceback if the code raised, or why the run was stopped
+            - 'timings' (dict): Milliseconds spent waiting for a worker (queue_ms), running the code
+              (exec_ms, cpu_ms), in tool calls (tool_ms, tool_calls) and in total (total_ms)
 
     Available Functions:
         The below functions are available in the code which are the SAME as your tool definitions
 
         - get_site_info: Retrieves site information
+        - find_entities: Finds entities by type, ancestor and name
+        - get_ancestors: Retrieves the ancestors of an entity
         - get_timeseries_data: Retrieves time series data
+        - get_timeseries_batch: Retrieves time series data for several entities at once
         - get_current_time: Gets the current time
  
 
     Example:
         >>> result = execute_code('print("Hello World")')
         >>> print(result)
-        {'stdout': 'Hello World\n', 'stderr': ''}
+        {'stdout': 'Hello World\n', 'stderr': '', 'timings': {'queue_ms': 0.0, 'exec_ms': 0.1, ...}}
 
     Note:
-        - The code is executed in a restricted environment with only specific functions available
+        - The code is executed in a separate process with only specific functions available
         - All stdout is captured and returned rather than being printed directly
+        - Data returned by the functions is reused across runs, so fetching it again is cheap
     """
-    
-    stdout_buffer = StringIO()
-    stderr_buffer = StringIO()
-    
-    # Save the originals
-    original_stdout = sys.stdout
-    original_stderr = sys.stderr
-    # Redirect stdout to our buffer
-    sys.stdout = stdout_buffer
-    sys.stderr = stderr_buffer
-
-    available_functions = {
-        'get_site_info': get_site_info,
-        'get_timeseries_data': get_timeseries_data,
-        'get_current_time': get_current_time
-    }
-
-    #execute the code snippet
-    exec(code, available_functions)
+    return sandbox.run(code)
 
-    # Restore the original stdout
-    sys.stdout = original_stdout
-    sys.stderr = original_stderr
 
-    # Get the captured output
-    output = stdout_buffer.getvalue()
-    err = stderr_buffer.getvalue()
-    return {
-            "stdout" : output , 
-            "stderr" : err
-            }
+def get_agent_object(thread_id: str, callback_handler=None):
 
+    #snapshot plus the turns appended since, instead of the whole thread in one object
+    state = thread_store.load(thread_id)
+    # the agent gets its own list so the messages added by this turn can be told apart
+    return create_agent(list(state.messages), callback_handler), state
 
-def get_agent_object(key: str):
+def put_agent_object(state: ThreadState, agent: Agent):
 
-    try:
-        response = s3_client.get_object(Bucket=BUCKET_NAME, Key=key)
-        content = response['Body'].read().decode('utf-8')
-        state = json.loads(content)
-        
-        return create_agent(state['messages'])
-    
-    except ClientError as e:
-        if e.response['Error']['Code'] == 'NoSuchKey':
-            return create_agent([])
-        else:
-            raise  # Re-raise if it's a different error
-
-def put_agent_object(key: str, agent: Agent):
-    
-    state = {
-        "messages": agent.messages,
-        "system_prompt": agent.system_prompt
-    }
-    
-    content = json.dumps(state)
-    
-    response = s3_client.put_object(
-        Bucket=BUCKET_NAME,
-        Key=key,
-        Body=content.encode('utf-8'),
-        ContentType='application/json'
+    #the conversation manager may have trimmed the oldest messages; what is left of the loaded ones comes first
+    loaded = {id(message) for message in state.messages}
+    kept = 0
+    while kept < len(agent.messages) and id(agent.messages[kept]) in loaded:
+        kept += 1
+    #append only the messages this turn added, and where in the thread the kept ones start
+    return thread_store.append(
+        state,
+        agent.messages[kept:],
+        keep_from=state.first_message + len(state.messages) - kept,
+        system_prompt=agent.system_prompt
     )
-    
-    return response
 
-def create_agent(messages):
+def create_agent(messages, callback_handler=None):
 
     model = BedrockModel(
         model_id= MODEL_ID,
@@ -173,6 +159,9 @@ def create_agent(messages):
         
     )
 
+    #the default handler prints the stream to the logs
+    kwargs = {'callback_handler': callback_handler} if callback_handler else {}
+
     return Agent(
         model = model,
         system_prompt = SYSTEM_PROMPT,
@@ -181,25 +170,14 @@ def create_agent(messages):
                     get_current_time,
                     execute_code,
                     get_site_info,
-                    get_timeseries_data
-                ]
+                    find_entities,
+                    get_ancestors,
+                    get_timeseries_data,
+                    get_timeseries_batch
+                ],
+        **kwargs
     )
 
-#send a reply back to the client specified by the connection_id
-def send_to_websocket_client(last_message, connection_id):
- 
-    try:
-        #replace new lines with <br>
-        last_message = last_message.replace("\n", "<br>")
-
-        # Send message to connected client
-        api_client.post_to_connection(
-            Data=last_message,
-            ConnectionId=connection_id
-        )
-    except Exception as e:
-        print(f"Error sending message to websocket client: {str(e)}")   
-
 def lambda_handler(event: Dict[str, Any], _context) -> str:
 
     print(event)
@@ -209,6 +187,11 @@ def lambda_handler(event: Dict[str, Any], _context) -> str:
     connection_id = event['connection_id']
     # set the id token in env var
     os.environ['ID_TOKEN'] = event['id_token']
+    # tool results shared with the sandbox are only reused for the same user
+    global _sandbox_user
+    if _sandbox_user != event['id_token']:
+        sandbox.clear_cache()
+        _sandbox_user = event['id_token']
 
     #Langfuse tracing setup
     langfuse_pk = os.environ.get("LANGFUSE_PK")
@@ -228,13 +211,17 @@ def lambda_handler(event: Dict[str, Any], _context) -> str:
         human_message = payload['human_message']
         thread_id = payload['thread_id']
 
+        #stream the reply to the websocket client as it is generated
+        stream = WebSocketStream(api_client, connection_id)
         try:
 
-            agent = get_agent_object(key=f"threads/{thread_id}.json")            
+            agent, state = get_agent_object(thread_id, callback_handler=stream)
             response = agent(human_message)
             content = str(response)
-            put_agent_object(key=f"threads/{thread_id}.json", agent=agent)        
-            send_to_websocket_client(content, connection_id)
+            #end of message first: the client does not wait for the thread to be saved
+            stream.close(content)
+            put_agent_object(state, agent)
 
         except Exception as e:
             print(e)
+            stream.close(error=True)
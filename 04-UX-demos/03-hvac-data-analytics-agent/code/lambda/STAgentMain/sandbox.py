@@ -0,0 +1,431 @@
+'''
+MIT No Attribution
+
+Copyright 2024 Amazon Web Services
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this
+software and associated documentation files (the "Software"), to deal in the Software
+without restriction, including without limitation the rights to use, copy, modify,
+merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+'''
+import os
+import json
+import mmap
+import ctypes
+import time
+import queue
+import pickle
+import signal
+import builtins
+import tempfile
+import threading
+import importlib
+import traceback
+import contextlib
+import multiprocessing
+import multiprocessing.forkserver
+from io import StringIO
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # not available on Windows; limits are skipped there
+    resource = None
+
+SANDBOX_WORKERS = int(os.environ.get("SANDBOX_WORKERS", "2"))
+SANDBOX_TIMEOUT = float(os.environ.get("SANDBOX_TIMEOUT", "60"))
+SANDBOX_CPU_SECONDS = int(os.environ.get("SANDBOX_CPU_SECONDS", "30"))
+SANDBOX_MEMORY_MB = int(os.environ.get("SANDBOX_MEMORY_MB", "256"))
+SANDBOX_MAX_OUTPUT = int(os.environ.get("SANDBOX_MAX_OUTPUT", "65536"))
+SANDBOX_MAX_RUNS = int(os.environ.get("SANDBOX_MAX_RUNS", "100"))
+SANDBOX_CACHE_TTL = float(os.environ.get("SANDBOX_CACHE_TTL", "300"))
+SANDBOX_CACHE_MB = int(os.environ.get("SANDBOX_CACHE_MB", "64"))
+SANDBOX_PRELOAD = [m for m in os.environ.get("SANDBOX_PRELOAD", "numpy,pandas").split(",") if m]
+
+# The only environment variables workers are started with; everything else (AWS credentials, the user's
+# token, exporter headers) stays in the agent process, which serves the tool calls
+SANDBOX_ENV_ALLOW = ("PATH", "PYTHONHOME", "PYTHONPATH", "LD_LIBRARY_PATH", "LANG", "TZ", "HOME", "TMPDIR",
+                     "LAMBDA_TASK_ROOT")
+SANDBOX_ENV_ALLOW_PREFIXES = ("LC_", "SANDBOX_", "OMP_", "OPENBLAS_", "MKL_")
+
+PR_SET_DUMPABLE = 4
+
+
+def _shared_dir() -> str:
+    """tmpfs when available (Lambda has no /dev/shm, so /tmp is used there)."""
+    return "/dev/shm" if os.access("/dev/shm", os.W_OK) else tempfile.gettempdir()
+
+
+def _sandbox_environ() -> Dict[str, str]:
+    return {key: value for key, value in os.environ.items()
+            if key in SANDBOX_ENV_ALLOW or key.startswith(SANDBOX_ENV_ALLOW_PREFIXES)}
+
+
+@contextlib.contextmanager
+def _scrubbed_environ():
+    """Reduce os.environ to what workers may see while a process that inherits it is started."""
+    saved, allowed = dict(os.environ), _sandbox_environ()
+    os.environ.clear()
+    os.environ.update(allowed)
+    try:
+        yield
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+
+
+def _make_undumpable() -> bool:
+    """
+    Mark this process non-dumpable, so processes of the same user (the workers)
+    cannot read its /proc/<pid>/environ, mem or fd, where the credentials are.
+    """
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.prctl(PR_SET_DUMPABLE, 0, 0, 0, 0) == 0:
+            return True
+        print(f"Sandbox: prctl(PR_SET_DUMPABLE) failed: {os.strerror(ctypes.get_errno())}")
+    except (OSError, AttributeError):
+        # Not Linux
+        pass
+    return False
+
+
+def _vm_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+    except (OSError, ValueError):
+        return 0.0
+
+
+class ToolCallError(RuntimeError):
+    """A tool called from sandboxed code failed in the agent process."""
+
+
+# --- Worker process ---
+
+def _worker_main(conn, names: List[str], preload: List[str], cpu_seconds: int, memory_mb: int, max_output: int):
+    """Run code sent over conn until told to stop; tool calls are forwarded back over conn."""
+    os.chdir(tempfile.mkdtemp(prefix="sandbox-"))
+    for module in preload:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+
+    tool_time = [0.0, 0]
+
+    def stub(name: str) -> Callable:
+        def call(*args, **kwargs):
+            started = time.perf_counter()
+            conn.send(("call", name, args, kwargs))
+            status, payload, size = conn.recv()
+            try:
+                if status == "error":
+                    raise ToolCallError(payload)
+                with open(payload, "rb") as f, mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as shared:
+                    value = pickle.loads(shared)
+                if status == "owned":
+                    # Not cached by the agent: this worker is its only reader
+                    os.remove(payload)
+                return value
+            finally:
+                tool_time[0] += time.perf_counter() - started
+                tool_time[1] += 1
+        call.__name__ = name
+        return call
+
+    stubs = {name: stub(name) for name in names}
+    while True:
+        code = conn.recv()
+        if code is None:
+            return
+        if resource is not None:
+            # RLIMIT_CPU counts the process's total CPU, so the budget is added to what was used so far
+            used = resource.getrusage(resource.RUSAGE_SELF)
+            cpu_limit = int(used.ru_utime + used.ru_stime) + cpu_seconds + 1
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, cpu_limit + 1))
+            if memory_mb and _vm_bytes():
+                memory_limit = _vm_bytes() + memory_mb * 2 ** 20
+                resource.setrlimit(resource.RLIMIT_AS, (memory_limit, resource.RLIM_INFINITY))
+        tool_time[:] = [0.0, 0]
+        stdout, stderr = StringIO(), StringIO()
+        scope = {"__name__": "__main__", "__builtins__": builtins, **stubs}
+        cpu_started = time.process_time()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                exec(compile(code, "<agent-code>", "exec"), scope)
+            except SystemExit:
+                pass
+            except BaseException as e:
+                # Skip this function's frame so the traceback starts in the agent's code
+                traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        exec_seconds = time.perf_counter() - started
+        cpu_seconds_used = time.process_time() - cpu_started
+        del scope
+        if resource is not None and memory_mb:
+            resource.setrlimit(resource.RLIMIT_AS, (resource.RLIM_INFINITY, resource.RLIM_INFINITY))
+        conn.send(("done", stdout.getvalue()[:max_output], stderr.getvalue()[:max_output], {
+            "exec_ms": round(exec_seconds * 1000, 1),
+            "cpu_ms": round(cpu_seconds_used * 1000, 1),
+            "tool_ms": round(tool_time[0] * 1000, 1),
+            "tool_calls": tool_time[1],
+            "rss_mb": _rss_mb(),
+        }))
+
+
+# --- Agent process ---
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.runs = 0
+
+
+class _SharedResult:
+    """A tool result pickled into a file on tmpfs that workers map read-only."""
+
+    def __init__(self, value: Any, directory: str):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        fd, self.path = tempfile.mkstemp(prefix="sandbox-data-", dir=directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        self.size = len(data)
+        self.created = time.monotonic()
+
+    def release(self):
+        with contextlib.suppress(OSError):
+            os.remove(self.path)
+
+
+class SandboxPool:
+    """
+    Pool of worker processes that run agent-generated code.
+
+    Workers are forked from a server process that has already imported NumPy
+    and pandas, so a run does not pay for those imports. Each run gets a fresh
+    namespace, captured stdout/stderr, a CPU time limit, an address-space cap
+    and a wall-clock timeout; a worker that exceeds a limit is killed and
+    replaced. The tool functions available to the code are stubs that ask the
+    agent process, which runs the real tool once and shares the pickled result
+    through a memory-mapped tmpfs file, so repeated runs reuse it instead of
+    fetching it again.
+
+    On Linux the server process is started with only the SANDBOX_ENV_ALLOW
+    environment, and the agent process is made non-dumpable so workers cannot
+    read its /proc entries; that keeps the AWS credentials and the user's token
+    out of the workers' reach. The code is otherwise unrestricted: it has all
+    builtins, can import any installed module and can open network connections.
+    """
+
+    def __init__(
+        self,
+        functions: Dict[str, Callable],
+        cached: Optional[Iterable[str]] = None,
+        workers: int = SANDBOX_WORKERS,
+        timeout: float = SANDBOX_TIMEOUT,
+        cpu_seconds: int = SANDBOX_CPU_SECONDS,
+        memory_mb: int = SANDBOX_MEMORY_MB,
+        max_output: int = SANDBOX_MAX_OUTPUT,
+        max_runs: int = SANDBOX_MAX_RUNS,
+        cache_ttl: float = SANDBOX_CACHE_TTL,
+        cache_mb: int = SANDBOX_CACHE_MB,
+        preload: Optional[List[str]] = None,
+    ):
+        """
+        Args:
+            functions: Name to callable of the tools the code may call
+            cached: Names of the tools whose results are shared across calls (default all)
+            workers: Worker processes kept ready
+            timeout: Wall-clock seconds per run, including tool calls
+            cpu_seconds: CPU seconds per run
+            memory_mb: Address space a run may add to the worker, in MB (0 for no cap)
+            max_output: Characters of stdout and of stderr returned
+            max_runs: Runs after which a worker is replaced
+            cache_ttl: Seconds a shared tool result is reused
+            cache_mb: Size of the shared tool results kept, in MB
+            preload: Modules imported before workers are forked (default SANDBOX_PRELOAD)
+        """
+        self.functions = functions
+        self.cached = set(functions if cached is None else cached)
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.max_output = max_output
+        self.max_runs = max_runs
+        self.cache_ttl = cache_ttl
+        self.cache_bytes = cache_mb * 2 ** 20
+        self.preload = SANDBOX_PRELOAD if preload is None else preload
+        self._shared_dir = _shared_dir()
+        self._results: "OrderedDict[Tuple[str, str], _SharedResult]" = OrderedDict()
+        self._results_lock = threading.Lock()
+        self._inflight: Dict[Tuple[str, str], threading.Event] = {}
+
+        _make_undumpable()
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            self._context = multiprocessing.get_context("forkserver")
+            self._context.set_forkserver_preload(self.preload + [__name__])
+            # The server inherits os.environ when it starts, and every worker is forked from it
+            with _scrubbed_environ():
+                multiprocessing.forkserver.ensure_running()
+        else:
+            # Not fork: a forked worker would get a copy of the agent's memory, credentials included
+            self._context = multiprocessing.get_context("spawn")
+        self._spawn_lock = threading.Lock()
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._closed = False
+        for _ in range(workers):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        parent, child = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child, list(self.functions), self.preload, self.cpu_seconds, self.memory_mb, self.max_output),
+            daemon=True,
+        )
+        if self._context.get_start_method() == "forkserver":
+            process.start()
+        else:
+            with self._spawn_lock, _scrubbed_environ():
+                process.start()
+        child.close()
+        return _Worker(process, parent)
+
+    def _kill(self, worker: _Worker):
+        with contextlib.suppress(Exception):
+            worker.process.kill()
+            worker.process.join(1)
+        worker.conn.close()
+
+    def _shared(self, name: str, args: tuple, kwargs: dict) -> _SharedResult:
+        """Run a tool, or reuse its shared result from an earlier identical call."""
+        if name not in self.cached:
+            return _SharedResult(self.functions[name](*args, **kwargs), self._shared_dir)
+        key = (name, json.dumps([args, kwargs], sort_keys=True, default=str))
+        while True:
+            with self._results_lock:
+                result = self._results.get(key)
+                if result is not None and time.monotonic() - result.created < self.cache_ttl:
+                    self._results.move_to_end(key)
+                    return result
+                event = self._inflight.get(key)
+                if event is None:
+                    event = self._inflight[key] = threading.Event()
+                    break
+            # Another run is fetching the same data; wait for it rather than fetching twice
+            event.wait()
+        try:
+            result = _SharedResult(self.functions[name](*args, **kwargs), self._shared_dir)
+            with self._results_lock:
+                stale = self._results.pop(key, None)
+                if stale is not None:
+                    stale.release()
+                self._results[key] = result
+                while sum(r.size for r in self._results.values()) > self.cache_bytes and len(self._results) > 1:
+                    self._results.popitem(last=False)[1].release()
+            return result
+        finally:
+            with self._results_lock:
+                self._inflight.pop(key).set()
+
+    def run(self, code: str) -> Dict[str, Any]:
+        """
+        Run code in a worker.
+
+        Returns:
+            Dict with stdout, stderr and timings: queue_ms (waiting for a
+            worker), exec_ms, cpu_ms, tool_ms and tool_calls (tool calls made
+            by the code, including the transfer), total_ms and the worker's
+            rss_mb. If the run was stopped, stderr says why.
+        """
+        started = time.perf_counter()
+        if self._closed:
+            raise RuntimeError("Sandbox pool is closed")
+        worker = self._idle.get()
+        queued = time.perf_counter()
+        deadline = queued + self.timeout
+        healthy = False
+        result: Dict[str, Any] = {"stdout": "", "stderr": ""}
+        timings: Dict[str, Any] = {}
+        try:
+            worker.conn.send(code)
+            while True:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or not worker.conn.poll(remaining):
+                    result["stderr"] = f"Execution timed out after {self.timeout:g} seconds"
+                    break
+                try:
+                    message = worker.conn.recv()
+                except (EOFError, OSError):
+                    worker.process.join(1)
+                    if worker.process.exitcode == -getattr(signal, "SIGXCPU", -1):
+                        result["stderr"] = f"CPU time limit of {self.cpu_seconds} seconds exceeded"
+                    else:
+                        result["stderr"] = f"Execution process exited unexpectedly (code {worker.process.exitcode})"
+                    break
+                if message[0] == "call":
+                    _, name, args, kwargs = message
+                    try:
+                        shared = self._shared(name, args, kwargs)
+                        worker.conn.send(("ok" if name in self.cached else "owned", shared.path, shared.size))
+                    except Exception as e:
+                        worker.conn.send(("error", f"{name} failed: {type(e).__name__}: {e}", 0))
+                    continue
+                _, stdout, stderr, timings = message
+                result.update(stdout=stdout, stderr=stderr)
+                healthy = True
+                break
+        finally:
+            worker.runs += 1
+            if healthy and worker.runs < self.max_runs and not self._closed:
+                self._idle.put(worker)
+            else:
+                self._kill(worker)
+                if not self._closed:
+                    self._idle.put(self._spawn())
+        result["timings"] = {
+            "queue_ms": round((queued - started) * 1000, 1),
+            **timings,
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        return result
+
+    def clear_cache(self):
+        """Forget shared tool results, eg: when the next runs are for a different user."""
+        with self._results_lock:
+            for result in self._results.values():
+                result.release()
+            self._results.clear()
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            with contextlib.suppress(Exception):
+                worker.conn.send(None)
+            self._kill(worker)
+        self.clear_cache()
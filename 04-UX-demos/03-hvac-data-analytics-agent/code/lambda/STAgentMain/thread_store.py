@@ -0,0 +1,390 @@
+'''
+MIT No Attribution
+
+Copyright 2024 Amazon Web Services
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this
+software and associated documentation files (the "Software"), to deal in the Software
+without restriction, including without limitation the rights to use, copy, modify,
+merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+'''
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Dict, Any, List, Optional, Tuple
+
+THREAD_COMPACT_EVERY = int(os.environ.get("THREAD_COMPACT_EVERY", "10"))
+THREAD_APPEND_RETRIES = int(os.environ.get("THREAD_APPEND_RETRIES", "3"))
+THREAD_CACHE_SIZE = int(os.environ.get("THREAD_CACHE_SIZE", "32"))
+THREAD_READ_WORKERS = int(os.environ.get("THREAD_READ_WORKERS", "8"))
+
+
+class PreconditionFailed(Exception):
+    """A conditional write lost: the object exists (create-only) or its ETag changed."""
+
+
+class ConcurrentTurnError(Exception):
+    """Another turn kept appending to the thread; this turn's messages were not saved."""
+
+
+# --- Backends ---
+
+class S3Backend:
+    """Objects in an S3 bucket, with S3 conditional writes (If-None-Match / If-Match)."""
+
+    def __init__(self, client, bucket: str):
+        self.client = client
+        self.bucket = bucket
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=key)
+        except self.client.exceptions.NoSuchKey:
+            return None
+        return response['Body'].read(), response['ETag']
+
+    def put(self, key: str, data: bytes, if_match: Optional[str] = None, create_only: bool = False) -> str:
+        kwargs = {}
+        if create_only:
+            kwargs['IfNoneMatch'] = '*'
+        elif if_match:
+            kwargs['IfMatch'] = if_match
+        try:
+            response = self.client.put_object(
+                Bucket=self.bucket, Key=key, Body=data, ContentType='application/json', **kwargs
+            )
+        except self.client.exceptions.ClientError as e:
+            if e.response['Error']['Code'] in ('PreconditionFailed', 'ConditionalRequestConflict'):
+                raise PreconditionFailed(key) from e
+            raise
+        return response['ETag']
+
+    def list(self, prefix: str, start_after: str = '') -> List[str]:
+        keys = []
+        kwargs = {'Bucket': self.bucket, 'Prefix': prefix, 'StartAfter': start_after}
+        while True:
+            response = self.client.list_objects_v2(**kwargs)
+            keys.extend(item['Key'] for item in response.get('Contents', []))
+            if not response.get('IsTruncated'):
+                return keys
+            kwargs['ContinuationToken'] = response['NextContinuationToken']
+
+    def delete(self, keys: List[str]):
+        for start in range(0, len(keys), 1000):
+            self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': key} for key in keys[start:start + 1000]], 'Quiet': True}
+            )
+
+
+class LocalBackend:
+    """Files under a directory, with the same conditional write semantics; for tests and benchmarks."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split('/'))
+
+    @staticmethod
+    def _etag(data: bytes) -> str:
+        return '"' + hashlib.md5(data).hexdigest() + '"'
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        try:
+            with open(self._path(key), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        return data, self._etag(data)
+
+    def put(self, key: str, data: bytes, if_match: Optional[str] = None, create_only: bool = False) -> str:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock:
+            if if_match:
+                current = self.get(key)
+                if current is None or current[1] != if_match:
+                    raise PreconditionFailed(key)
+            temporary = path + '.tmp'
+            with open(temporary, 'wb') as f:
+                f.write(data)
+            if create_only:
+                # link() fails if the name exists, so readers see the whole object or none, like If-None-Match
+                try:
+                    os.link(temporary, path)
+                except FileExistsError:
+                    raise PreconditionFailed(key)
+                finally:
+                    os.remove(temporary)
+            else:
+                os.replace(temporary, path)
+        return self._etag(data)
+
+    def list(self, prefix: str, start_after: str = '') -> List[str]:
+        directory, _, name_prefix = prefix.rpartition('/')
+        try:
+            names = os.listdir(self._path(directory))
+        except FileNotFoundError:
+            return []
+        keys = sorted(f"{directory}/{name}" for name in names if name.startswith(name_prefix) and not name.endswith('.tmp'))
+        return [key for key in keys if key > start_after]
+
+    def delete(self, keys: List[str]):
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+
+# --- Store ---
+
+@dataclass
+class ThreadState:
+    """Messages of a thread as loaded, and where the next segment goes."""
+
+    thread_id: str
+    messages: List[Dict[str, Any]] = field(default_factory=list)
+    system_prompt: Optional[str] = None
+    next_segment: int = 0
+    # Segments written since the snapshot; compaction folds them in
+    tail_segments: int = 0
+    snapshot_etag: Optional[str] = None
+    # next_segment of the snapshot as loaded; segments before it are already folded in
+    snapshot_segment: int = 0
+    # Position of messages[0] in the whole thread; the ones before it were trimmed
+    first_message: int = 0
+
+    def copy(self) -> 'ThreadState':
+        return replace(self, messages=list(self.messages))
+
+
+class ThreadStore:
+    """
+    Conversation state as a snapshot plus append-only per-turn segments.
+
+    Layout, per thread:
+        threads/{thread_id}/snapshot.json          messages up to next_segment
+        threads/{thread_id}/segments/{n:08d}.json  messages added by one turn, and the
+                                                   first message the agent kept
+
+    A turn loads the snapshot and the segments after it, then writes only its
+    own messages as the next segment, create-only, so two overlapping turns
+    cannot both take the same segment: the loser re-reads the tail and appends
+    after it. Every compact_every segments the messages are folded into a new
+    snapshot, written with If-Match on the snapshot's ETag. Segments are
+    deleted one compaction late (those folded into the previous snapshot), so a
+    turn still holding the old snapshot finds its segment number taken and
+    catches up instead of re-creating a deleted one. Threads saved by the old
+    whole-blob format (threads/{thread_id}.json) are read as the initial
+    snapshot.
+
+    Messages are numbered by their position in the whole thread, trimmed ones
+    included, and a turn records the number of the first message it kept
+    rather than how many it trimmed: a turn that lost the race and is appended
+    after another one then still removes exactly the messages it trimmed.
+
+    The last state of recently used threads is kept in memory: a warm Lambda
+    container only lists the segments written since, usually none.
+    """
+
+    def __init__(self, backend, prefix: str = 'threads', compact_every: int = THREAD_COMPACT_EVERY,
+                 append_retries: int = THREAD_APPEND_RETRIES, cache_size: int = THREAD_CACHE_SIZE):
+        self.backend = backend
+        self.prefix = prefix
+        self.compact_every = compact_every
+        self.append_retries = append_retries
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, ThreadState]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=THREAD_READ_WORKERS)
+
+    def _snapshot_key(self, thread_id: str) -> str:
+        return f"{self.prefix}/{thread_id}/snapshot.json"
+
+    def _segment_key(self, thread_id: str, number: int) -> str:
+        return f"{self.prefix}/{thread_id}/segments/{number:08d}.json"
+
+    def _segment_number(self, key: str) -> int:
+        return int(key.rsplit('/', 1)[1].split('.')[0])
+
+    def _remember(self, state: ThreadState):
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[state.thread_id] = state.copy()
+            self._cache.move_to_end(state.thread_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _forget(self, thread_id: str):
+        with self._cache_lock:
+            self._cache.pop(thread_id, None)
+
+    @staticmethod
+    def _apply(state: ThreadState, messages: List[Dict[str, Any]], keep_from: int):
+        if keep_from > state.first_message:
+            del state.messages[:keep_from - state.first_message]
+            state.first_message = keep_from
+        state.messages.extend(messages)
+        state.next_segment += 1
+        state.tail_segments += 1
+
+    def _list_segments(self, thread_id: str, after: int = 0) -> List[str]:
+        return self.backend.list(
+            f"{self.prefix}/{thread_id}/segments/",
+            start_after=self._segment_key(thread_id, after - 1) if after else ''
+        )
+
+    def _read_tail(self, state: ThreadState, keys: Optional[List[str]] = None) -> bool:
+        """Apply the segments from state.next_segment on; False if one was compacted away meanwhile."""
+        if keys is None:
+            keys = self._list_segments(state.thread_id, state.next_segment)
+        keys = [key for key in keys if self._segment_number(key) >= state.next_segment]
+        if [self._segment_number(key) for key in keys] != list(range(state.next_segment, state.next_segment + len(keys))):
+            return False
+        # Fetched in parallel: one round trip however many turns were saved since
+        for found in self._executor.map(self.backend.get, keys):
+            if found is None:
+                return False
+            segment = json.loads(found[0])
+            self._apply(state, segment['messages'], segment.get('keep_from', 0))
+        return True
+
+    def _read_snapshot(self, thread_id: str) -> ThreadState:
+        state = ThreadState(thread_id)
+        found = self.backend.get(self._snapshot_key(thread_id))
+        if found is not None:
+            snapshot = json.loads(found[0])
+            state.messages = snapshot['messages']
+            state.system_prompt = snapshot.get('system_prompt')
+            state.next_segment = state.snapshot_segment = snapshot['next_segment']
+            state.first_message = snapshot.get('first_message', 0)
+            state.snapshot_etag = found[1]
+            return state
+        legacy = self.backend.get(f"{self.prefix}/{thread_id}.json")
+        if legacy is not None:
+            blob = json.loads(legacy[0])
+            state.messages = blob['messages']
+            state.system_prompt = blob.get('system_prompt')
+            # Not yet in the new layout: the next compaction writes it
+            state.tail_segments = self.compact_every
+        return state
+
+    def load(self, thread_id: str) -> ThreadState:
+        """Snapshot plus tail of a thread (an empty state for a new thread)."""
+        with self._cache_lock:
+            cached = self._cache.get(thread_id)
+        if cached is not None:
+            state = cached.copy()
+            if self._read_tail(state):
+                self._remember(state)
+                return state
+        while True:
+            # The snapshot and the segment list are independent: one round trip for both
+            snapshot = self._executor.submit(self._read_snapshot, thread_id)
+            keys = self._list_segments(thread_id)
+            state = snapshot.result()
+            if self._read_tail(state, keys):
+                self._remember(state)
+                return state
+            # A compaction deleted segments between reading the snapshot and the tail; start over
+
+    def append(self, state: ThreadState, messages: List[Dict[str, Any]], keep_from: int = 0,
+               system_prompt: Optional[str] = None) -> int:
+        """
+        Save one turn as the next segment.
+
+        If another turn appended first, the tail is re-read and the turn goes
+        after it (both turns are kept, in the order they were saved).
+
+        Args:
+            state: The state the turn started from, as returned by load
+            messages: Messages the turn added
+            keep_from: Position in the thread of the first message the agent kept
+                (state.first_message plus the number it trimmed); earlier ones are removed
+            system_prompt: Stored with the next snapshot
+
+        Returns:
+            The segment number written
+
+        Raises:
+            ConcurrentTurnError: if the segment could not be written after append_retries attempts
+        """
+        if system_prompt is not None:
+            state.system_prompt = system_prompt
+        segment = {'messages': messages}
+        if keep_from:
+            segment['keep_from'] = keep_from
+        data = json.dumps(segment).encode('utf-8')
+        for _ in range(self.append_retries + 1):
+            number = state.next_segment
+            try:
+                self.backend.put(self._segment_key(state.thread_id, number), data, create_only=True)
+            except PreconditionFailed:
+                # Another turn took this segment: read what it (and any others) wrote, then retry after it
+                if not self._read_tail(state):
+                    self._forget(state.thread_id)
+                    fresh = self.load(state.thread_id)
+                    state.__dict__.update(fresh.__dict__)
+                continue
+            self._apply(state, messages, keep_from)
+            if state.tail_segments >= self.compact_every and not self.compact(state):
+                # Compacted elsewhere since this state was read; the next load picks up that snapshot
+                self._forget(state.thread_id)
+            else:
+                self._remember(state)
+            return number
+        self._forget(state.thread_id)
+        raise ConcurrentTurnError(state.thread_id)
+
+    def compact(self, state: ThreadState) -> bool:
+        """
+        Fold the tail into a new snapshot and delete the segments the previous snapshot folded in.
+
+        Returns:
+            False if another compaction changed the snapshot first (nothing is deleted then)
+        """
+        snapshot = json.dumps({
+            'messages': state.messages,
+            'system_prompt': state.system_prompt,
+            'next_segment': state.next_segment,
+            'first_message': state.first_message,
+        }).encode('utf-8')
+        try:
+            if state.snapshot_etag is None:
+                state.snapshot_etag = self.backend.put(self._snapshot_key(state.thread_id), snapshot, create_only=True)
+            else:
+                state.snapshot_etag = self.backend.put(
+                    self._snapshot_key(state.thread_id), snapshot, if_match=state.snapshot_etag
+                )
+        except PreconditionFailed:
+            return False
+        # Not needed for this turn's reply; a cleanup that does not finish is redone by the next compaction
+        self._executor.submit(self._delete_folded, state.thread_id, state.snapshot_segment)
+        state.snapshot_segment = state.next_segment
+        state.tail_segments = 0
+        return True
+
+    def _delete_folded(self, thread_id: str, before: int):
+        """Delete the segments numbered below before (and the old whole-blob object on the first snapshot)."""
+        folded = [key for key in self._list_segments(thread_id) if self._segment_number(key) < before]
+        if before == 0:
+            folded.append(f"{self.prefix}/{thread_id}.json")
+        if folded:
+            self.backend.delete(folded)
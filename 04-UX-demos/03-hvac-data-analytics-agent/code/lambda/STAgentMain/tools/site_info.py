@@ -18,15 +18,79 @@ SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 '''
 
-import time
-from datetime import datetime
-from typing import Dict, Any
-import random
+import base64
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 import os
 import requests
 import json
 from strands import tool
 
+# Reused across tool calls in a warm Lambda so connections to the tool API stay open
+_session = requests.Session()
+
+# Entity API responses by request: (ETag, body), revalidated with If-None-Match
+ENTITY_CACHE_SIZE = int(os.environ.get('ENTITY_CACHE_SIZE', '256'))
+_entity_cache: "OrderedDict[Tuple, Tuple[str, str]]" = OrderedDict()
+_entity_cache_lock = threading.Lock()
+
+
+def _get_entities(path: str, params: Optional[Dict[str, str]] = None) -> str:
+    """GET an entities endpoint, answering from the cache when the API replies 304 Not Modified."""
+    ID_TOKEN = os.environ.get('ID_TOKEN', '')
+    TOOL_API_ENDPOINT = os.environ.get('TOOL_API_ENDPOINT', '')
+    key = (TOOL_API_ENDPOINT + path, tuple(sorted((params or {}).items())))
+    headers = {
+        'id_token': ID_TOKEN
+    }
+    with _entity_cache_lock:
+        cached = _entity_cache.get(key)
+    if cached:
+        headers['If-None-Match'] = cached[0]
+    response = _session.get(TOOL_API_ENDPOINT + path, headers=headers, params=params)
+    if response.status_code == 304 and cached:
+        return cached[1]
+    etag = response.headers.get('ETag')
+    if response.status_code == 200 and etag:
+        with _entity_cache_lock:
+            _entity_cache[key] = (etag, response.text)
+            _entity_cache.move_to_end(key)
+            while len(_entity_cache) > ENTITY_CACHE_SIZE:
+                _entity_cache.popitem(last=False)
+    return response.text
+
+
+def _decode(values: str, typecode: str) -> array:
+    """Base64 little-endian array from the timeseries API's binary format."""
+    decoded = array(typecode, base64.b64decode(values))
+    if sys.byteorder == "big":
+        decoded.byteswap()
+    return decoded
+
+
+def _columns(series: Dict[str, Any]) -> Dict[str, List]:
+    """Parallel time and value lists of a binary series (float32 values rounded to 4 decimals)."""
+    return {
+        "time": _decode(series["time"], "I").tolist(),
+        "value": [round(value, 4) for value in _decode(series["value"], "f")],
+    }
+
+
+def _request_timeseries(params: Dict[str, str]) -> Dict[str, Any]:
+    ID_TOKEN = os.environ.get('ID_TOKEN', '')
+    TOOL_API_ENDPOINT = os.environ.get('TOOL_API_ENDPOINT', '')
+    headers = {
+        'id_token': ID_TOKEN
+    }
+    response = _session.get(TOOL_API_ENDPOINT + '/timeseries', headers=headers, params=params)
+    result = json.loads(response.text)
+    if 'error' in result:
+        raise ValueError(result['error'])
+    return result
+
 
 @tool
 def get_site_info(site_id: str) -> str:
@@ -199,32 +263,88 @@ def get_site_info(site_id: str) -> str:
     """
     
     ID_TOKEN = os.environ.get('ID_TOKEN', '')
-    TOOL_API_ENDPOINT = os.environ.get('TOOL_API_ENDPOINT', '')
     if ID_TOKEN != "":
         #invoke the HTTP GET API to get the site info
-        headers = {
-            'id_token': ID_TOKEN
-        }
-        response = requests.get(TOOL_API_ENDPOINT + '/entities', headers=headers)
-        return response.text
+        return _get_entities('/entities')
     else:
         return '{}'
 
 
+@tool
+def find_entities(type: str = "", under: str = "", name: str = "") -> Dict[str, Any]:
+    """
+    Find entities of the site by type, ancestor and/or name, without walking the whole hierarchy.
+
+    Prefer this over get_site_info when looking for particular floors, zones or devices.
+
+    Args:
+        type (str): Entity type, case-insensitive. One of <Building/Floor/Zone/Plant/TemperatureSensor/VAV/ChilledWaterPump/Chiller/AirHandlingUnit>
+        under (str): Id or name of an ancestor entity; only entities below it are returned. Example: "First Floor"
+        name (str): Entity name, case-insensitive. Example: "F1-Zone-3"
+
+    Returns:
+        dict: The total number of matches and the matching entities (at most 1000), in the format:
+            {
+                "total": 2,
+                "entities": [
+                    {"id": "f1-ts-1", "entityType": "DEVICE", "name": "F1-TS-1", "type": "TemperatureSensor",
+                     "label": null, "parent": "f1-zone-1", "path": "Office Building HVAC/First Floor/F1-Zone-1/F1-TS-1",
+                     "children": 0},
+                    ...
+                ]
+            }
+
+    Example:
+        >>> find_entities(type="Zone", under="First Floor")["total"]
+        10
+    """
+    if os.environ.get('ID_TOKEN', '') == "":
+        return {"total": 0, "entities": []}
+    params = {key: value for key, value in (("type", type), ("under", under), ("name", name)) if value}
+    return json.loads(_get_entities('/entities/find', params))
+
 
 @tool
-def get_timeseries_data(entity_id: str, property: str, start_time: str, end_time: str) -> Dict[str, Any]:
+def get_ancestors(entity_id: str) -> Dict[str, Any]:
+    """
+    Get the chain of entities above an entity, from the building down to its parent.
+
+    Args:
+        entity_id (str): Id or name of the entity. Example: "f1-ts-1"
+
+    Returns:
+        dict: The ancestors in the same entity format as find_entities, root first:
+            {"entities": [{"id": "...", "name": "Office Building HVAC", "type": "Building", ...}, ...]}
+
+    Example:
+        >>> [e["name"] for e in get_ancestors("f1-ts-1")["entities"]]
+        ['Office Building HVAC', 'First Floor', 'F1-Zone-1']
+    """
+    if os.environ.get('ID_TOKEN', '') == "":
+        return {"entities": []}
+    return json.loads(_get_entities('/entities/ancestors', {'id': entity_id}))
+
+
+
+@tool
+def get_timeseries_data(entity_id: str, property: str, start_time: str, end_time: str,
+                        resolution: str = "", agg: str = "mean", columnar: bool = False) -> Dict[str, Any]:
     """
     Get timeseries data for a specific entity and property within a given time range.
 
     This function retrieves time-series values for a specified property of an entity
-    within the provided time window.
+    within the provided time window. Raw points are 10 minutes apart; pass resolution
+    and agg to have the API aggregate them into buckets, which is much smaller and faster
+    for long time ranges (eg: daily max temperature for a month).
 
     Args:
         entity_id (str): Unique identifier for the entity. Example: "0e4b4070-50ff-11ef-b4ce-d5aee9e495ad" this is NOT the name like "Inverter5"
         property (str): Name of the property to retrieve values for. Example: "power"
         start_time (str): Start date time string for the data range
         end_time (str): End date time string for the data range
+        resolution (str): Optional bucket size, eg: "15m", "1h", "1d". Empty for raw 10-minute points
+        agg (str): Aggregation per bucket when resolution is set: "min", "max", "mean" or "p95"
+        columnar (bool): Return parallel "time" and "value" lists instead of a list of dicts
 
     Returns:
         dict: Dictionary containing timeseries data in the format:
@@ -234,6 +354,13 @@ def get_timeseries_data(entity_id: str, property: str, start_time: str, end_time
                     ...
                 ]
             }
+            or, with columnar=True:
+            {
+                "time": [timestamp, ...],
+                "value": [numeric_value, ...]
+            }
+            With a resolution, each time is the start of a bucket (aligned to UTC multiples of
+            the resolution) and each value is that bucket's aggregate.
 
     Example:
         >>> get_timeseries_data("12345", "power", "2024-01-01 00:00:00", "2024-01-02 23:59:59")
@@ -245,32 +372,89 @@ def get_timeseries_data(entity_id: str, property: str, start_time: str, end_time
                 {"time": 1739325219, "value": 8.0}
             ]
         }
+        >>> get_timeseries_data("12345", "power", "2024-01-01 00:00:00", "2024-01-02 23:59:59", resolution="1d", agg="max", columnar=True)
+        {
+            "time": [1704067200, 1704153600],
+            "value": [23.98, 23.95]
+        }
     """
 
     ID_TOKEN = os.environ.get('ID_TOKEN', '')
-    TOOL_API_ENDPOINT = os.environ.get('TOOL_API_ENDPOINT', '')
     if ID_TOKEN != "":
-        #invoke the HTTP GET API to get the site info
-        headers = {
-            'id_token': ID_TOKEN
-        }
         params = {
             'entity_id': entity_id,
             'property': property,
             'start_time': start_time,
             'end_time': end_time
         }
+        if not resolution and not columnar:
+            return _request_timeseries(params)
 
-        response = requests.get(
-            TOOL_API_ENDPOINT + '/timeseries',
-            headers=headers,
-            params=params
-        )
-        return json.loads(response.text)
+        # Binary transfer, decoded here into columns
+        params['format'] = 'binary'
+        if resolution:
+            params.update({'resolution': resolution, 'agg': agg})
+        columns = _columns(_request_timeseries(params))
+        if columnar:
+            return columns
+        return {
+            "data": [{"time": ts, "value": value} for ts, value in zip(columns["time"], columns["value"])]
+        }
     else:
+        if columnar:
+            return {"time": [], "value": []}
         return {
             "data": []
         }
-    
-    
-       
+
+
+@tool
+def get_timeseries_batch(entity_ids: List[str], property: str, start_time: str, end_time: str,
+                         resolution: str = "", agg: str = "mean") -> Dict[str, Any]:
+    """
+    Get timeseries data of the same property for several entities in one request.
+
+    Use this instead of calling get_timeseries_data in a loop, eg: the daily mean temperature
+    of every temperature sensor on a floor.
+
+    Args:
+        entity_ids (list): Unique identifiers of the entities (not their names)
+        property (str): Name of the property to retrieve values for. Example: "temperature"
+        start_time (str): Start date time string for the data range
+        end_time (str): End date time string for the data range
+        resolution (str): Optional bucket size, eg: "15m", "1h", "1d". Empty for raw 10-minute points
+        agg (str): Aggregation per bucket when resolution is set: "min", "max", "mean" or "p95"
+
+    Returns:
+        dict: Parallel time and value lists per entity id, in the format:
+            {
+                "series": {
+                    "<entity_id>": {"time": [timestamp, ...], "value": [numeric_value, ...]},
+                    ...
+                }
+            }
+
+    Example:
+        >>> get_timeseries_batch(["gf-ts-1", "gf-ts-2"], "temperature", "2024-01-01 00:00:00", "2024-01-02 23:59:59", resolution="1d", agg="mean")
+        {
+            "series": {
+                "gf-ts-1": {"time": [1704067200, 1704153600], "value": [21.02, 20.97]},
+                "gf-ts-2": {"time": [1704067200, 1704153600], "value": [20.88, 21.1]}
+            }
+        }
+    """
+
+    ID_TOKEN = os.environ.get('ID_TOKEN', '')
+    if ID_TOKEN == "" or not entity_ids:
+        return {"series": {entity_id: {"time": [], "value": []} for entity_id in entity_ids}}
+    params = {
+        'entity_ids': ','.join(entity_ids),
+        'property': property,
+        'start_time': start_time,
+        'end_time': end_time,
+        'format': 'binary'
+    }
+    if resolution:
+        params.update({'resolution': resolution, 'agg': agg})
+    result = _request_timeseries(params)
+    return {"series": {series["entity_id"]: _columns(series) for series in result["series"]}}
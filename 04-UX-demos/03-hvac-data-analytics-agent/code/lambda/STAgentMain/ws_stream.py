@@ -0,0 +1,140 @@
+'''
+MIT No Attribution
+
+Copyright 2024 Amazon Web Services
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this
+software and associated documentation files (the "Software"), to deal in the Software
+without restriction, including without limitation the rights to use, copy, modify,
+merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+'''
+import os
+import json
+import time
+import queue
+import threading
+from typing import Any, Dict, Optional
+
+STREAM_WINDOW_MS = int(os.environ.get("STREAM_WINDOW_MS", "50"))
+STREAM_MAX_BYTES = int(os.environ.get("STREAM_MAX_BYTES", "4096"))
+
+_END = object()
+
+
+class WebSocketStream:
+    """
+    Strands callback handler that streams an agent's reply to a WebSocket client.
+
+    Every frame is a JSON object with a "seq" number (0, 1, 2, ...) and a "type":
+        {"seq": 0, "type": "text", "text": "..."}                    text generated so far, in pieces
+        {"seq": 1, "type": "tool", "name": "...", "status": "running"}  a tool call started
+        {"seq": 2, "type": "tool", "name": "...", "status": "success"}  it finished ("error" if it failed)
+        {"seq": 9, "type": "end", "text": "...", "error": false}     the final answer; always the last frame
+
+    The callback only queues events; one sender thread posts them in order with
+    post_to_connection, so a slow post never holds up the model. Text deltas
+    are coalesced: the first delta after a quiet period is sent at once, later
+    ones are batched until window_ms has passed since the last post or
+    max_bytes of text is waiting.
+    """
+
+    def __init__(self, client, connection_id: str, window_ms: int = STREAM_WINDOW_MS,
+                 max_bytes: int = STREAM_MAX_BYTES):
+        self.client = client
+        self.connection_id = connection_id
+        self.window = window_ms / 1000
+        self.max_bytes = max_bytes
+        self.started = time.monotonic()
+        self.first_post: Optional[float] = None
+        self.posts = 0
+        self.gone = False
+        self._seq = 0
+        self._tools: Dict[str, str] = {}
+        self._closed = False
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._sender = threading.Thread(target=self._send_loop, daemon=True)
+        self._sender.start()
+
+    def __call__(self, **kwargs):
+        text = kwargs.get('data')
+        if text:
+            self._queue.put(text)
+
+        tool_use = kwargs.get('current_tool_use')
+        if tool_use and tool_use.get('toolUseId') and tool_use['toolUseId'] not in self._tools:
+            self._tools[tool_use['toolUseId']] = tool_use.get('name')
+            self._queue.put({'type': 'tool', 'name': tool_use.get('name'), 'status': 'running'})
+
+        message = kwargs.get('message')
+        if message:
+            for content in message.get('content', []):
+                result = content.get('toolResult')
+                if result and result.get('toolUseId') in self._tools:
+                    self._queue.put({
+                        'type': 'tool',
+                        'name': self._tools[result['toolUseId']],
+                        'status': result.get('status', 'success')
+                    })
+
+    def close(self, text: str = '', error: bool = False):
+        """Send the end-of-message frame after everything queued before it, and wait until it is posted."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put({'type': 'end', 'text': text, 'error': error})
+        self._queue.put(_END)
+        self._sender.join()
+
+    def _post(self, frame: Dict[str, Any]):
+        frame = {'seq': self._seq, **frame}
+        self._seq += 1
+        if self.gone:
+            return
+        try:
+            self.client.post_to_connection(Data=json.dumps(frame), ConnectionId=self.connection_id)
+        except self.client.exceptions.GoneException:
+            #the client disconnected; the agent still finishes so the thread is saved
+            self.gone = True
+            return
+        except Exception as e:
+            print(f"Error sending message to websocket client: {str(e)}")
+            return
+        self.posts += 1
+        if self.first_post is None:
+            self.first_post = time.monotonic()
+
+    def _send_loop(self):
+        pending = []
+        size = 0
+        last_post = 0.0
+        while True:
+            timeout = max(0.0, last_post + self.window - time.monotonic()) if pending else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, str):
+                pending.append(item)
+                size += len(item.encode('utf-8'))
+                if size < self.max_bytes and time.monotonic() < last_post + self.window:
+                    continue
+            if pending:
+                last_post = time.monotonic()
+                self._post({'type': 'text', 'text': ''.join(pending)})
+                pending = []
+                size = 0
+            if item is _END:
+                return
+            if isinstance(item, dict):
+                last_post = time.monotonic()
+                self._post(item)
@@ -0,0 +1,131 @@
+'''
+MIT No Attribution
+
+Copyright 2024 Amazon Web Services
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this
+software and associated documentation files (the "Software"), to deal in the Software
+without restriction, including without limitation the rights to use, copy, modify,
+merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+'''
+from bisect import bisect_left
+from typing import Dict, Any, List, Optional
+
+
+class EntityIndex:
+    """
+    Flattened, indexed view of a nested entity hierarchy.
+
+    Nodes are numbered in depth-first order, so the subtree of a node is the
+    contiguous range [order, end) and "is X under Y" is two comparisons. Ids of
+    each type are kept sorted by that order, so the nodes of a type under a
+    node are found with a binary search instead of a walk of the tree.
+    """
+
+    def __init__(self, root: Dict[str, Any]):
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.children: Dict[str, List[str]] = {}
+        self.by_type: Dict[str, List[str]] = {}
+        self.by_name: Dict[str, List[str]] = {}
+        self.order: Dict[str, int] = {}
+        self.end: Dict[str, int] = {}
+        self.root_id = self._add_tree(root)
+
+    def _add_tree(self, root: Dict[str, Any]) -> str:
+        # Iterative depth-first walk; (entity, parent id, exiting) so large trees do not hit the recursion limit
+        stack = [(root, None, False)]
+        counter = 0
+        root_id = root["id"]["id"]
+        while stack:
+            entity, parent, exiting = stack.pop()
+            entity_id = entity["id"]["id"]
+            if exiting:
+                self.end[entity_id] = counter
+                continue
+            self.nodes[entity_id] = {
+                "id": entity_id,
+                "entityType": entity["id"].get("entityType"),
+                "name": entity.get("name"),
+                "type": entity.get("type"),
+                "label": entity.get("label"),
+                "parent": parent,
+            }
+            self.order[entity_id] = counter
+            counter += 1
+            self.children[entity_id] = []
+            if parent is not None:
+                self.children[parent].append(entity_id)
+            self.by_type.setdefault((entity.get("type") or "").lower(), []).append(entity_id)
+            self.by_name.setdefault((entity.get("name") or "").lower(), []).append(entity_id)
+            stack.append((entity, parent, True))
+            for child in reversed(entity.get("children") or []):
+                stack.append((child["entity"], entity_id, False))
+        return root_id
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def resolve(self, entity: str) -> Optional[str]:
+        """Id of an entity given its id or its (case-insensitive) name."""
+        if entity in self.nodes:
+            return entity
+        ids = self.by_name.get(entity.lower())
+        return ids[0] if ids else None
+
+    def ancestors(self, entity_id: str) -> List[str]:
+        """Ids from the root down to the parent of an entity."""
+        chain = []
+        parent = self.nodes[entity_id]["parent"]
+        while parent is not None:
+            chain.append(parent)
+            parent = self.nodes[parent]["parent"]
+        return chain[::-1]
+
+    def path(self, entity_id: str) -> str:
+        return "/".join(self.nodes[i]["name"] for i in self.ancestors(entity_id) + [entity_id])
+
+    def is_under(self, entity_id: str, ancestor_id: str) -> bool:
+        return self.order[ancestor_id] < self.order[entity_id] < self.end[ancestor_id]
+
+    def find(self, type: Optional[str] = None, under: Optional[str] = None,
+             name: Optional[str] = None) -> List[str]:
+        """
+        Ids of the entities matching every given filter, in depth-first order.
+
+        Args:
+            type: Entity type, case-insensitive (eg: Zone, TemperatureSensor)
+            under: Id of an ancestor; only its descendants match
+            name: Entity name, case-insensitive
+        """
+        if type is not None:
+            candidates = self.by_type.get(type.lower(), [])
+        elif name is not None:
+            candidates = self.by_name.get(name.lower(), [])
+        else:
+            candidates = sorted(self.nodes, key=self.order.__getitem__)
+
+        if under is not None:
+            if type is not None:
+                # by_type lists are in depth-first order: the subtree is one contiguous slice
+                low = bisect_left(candidates, self.order[under] + 1, key=self.order.__getitem__)
+                high = bisect_left(candidates, self.end[under], key=self.order.__getitem__)
+                candidates = candidates[low:high]
+            else:
+                candidates = [i for i in candidates if self.is_under(i, under)]
+        if name is not None and type is not None:
+            name = name.lower()
+            candidates = [i for i in candidates if (self.nodes[i]["name"] or "").lower() == name]
+        return list(candidates)
+
+    def describe(self, entity_id: str) -> Dict[str, Any]:
+        """A node with its path and number of children."""
+        return {**self.nodes[entity_id], "path": self.path(entity_id), "children": len(self.children[entity_id])}
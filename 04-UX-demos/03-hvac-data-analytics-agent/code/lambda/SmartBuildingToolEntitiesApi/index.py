@@ -18,8 +18,92 @@ SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 '''
 
+import os
+import json
+import hashlib
+from typing import Dict, Any
+
+from entity_index import EntityIndex
+
+HIERARCHY_FILE = os.environ.get('ENTITY_HIERARCHY_FILE', 'entity_hierarchy_hvac.min.json')
+# Results returned by a find query at most
+FIND_LIMIT = int(os.environ.get('ENTITY_FIND_LIMIT', '1000'))
+
+# Loaded once per Lambda container and kept warm across invocations
+with open(HIERARCHY_FILE, 'rb') as f:
+    _raw = f.read()
+ETAG = '"' + hashlib.sha256(_raw).hexdigest()[:32] + '"'
+TREE = _raw.decode('utf-8')
+INDEX = EntityIndex(json.loads(TREE))
+del _raw
+
+
+def _response(status: int, body: str = '') -> Dict[str, Any]:
+    return {
+        'statusCode': status,
+        'headers': {'ETag': ETAG, 'Content-Type': 'application/json', 'Cache-Control': 'private, max-age=60'},
+        'body': body
+    }
+
+
+def _error(status: int, message: str) -> Dict[str, Any]:
+    return {'statusCode': status, 'headers': {'Content-Type': 'application/json'}, 'body': json.dumps({'error': message})}
+
+
+def query(operation: str, params: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Run a query against the entity index.
+
+    Operations:
+        find: entities matching type, under (id or name of an ancestor) and/or name
+        ancestors: the chain from the root down to the parent of id
+        children: the direct children of id
+        entity: a single entity by id or name
+
+    Raises:
+        KeyError: if an entity given by id or name does not exist
+        ValueError: for an unknown operation
+    """
+    def resolve(key: str) -> str:
+        entity_id = INDEX.resolve(params[key])
+        if entity_id is None:
+            raise KeyError(f"Entity not found: {params[key]}")
+        return entity_id
+
+    if operation == 'find':
+        under = resolve('under') if params.get('under') else None
+        ids = INDEX.find(type=params.get('type') or None, under=under, name=params.get('name') or None)
+        limit = int(params.get('limit', FIND_LIMIT))
+        return {'total': len(ids), 'entities': [INDEX.describe(i) for i in ids[:limit]]}
+    if operation == 'ancestors':
+        return {'entities': [INDEX.describe(i) for i in INDEX.ancestors(resolve('id'))]}
+    if operation == 'children':
+        return {'entities': [INDEX.describe(i) for i in INDEX.children[resolve('id')]]}
+    if operation == 'entity':
+        return {'entity': INDEX.describe(resolve('id'))}
+    raise ValueError(f"Unknown operation: {operation}")
+
+
 #This is a dummy API which will return a predefined entity_hierarchy
 def lambda_handler(event, context):
+    """
+    GET /entities returns the whole hierarchy; GET /entities/{operation} queries the index.
+
+    Every response carries the ETag of the hierarchy file; a request whose
+    If-None-Match matches it gets an empty 304 response.
+    """
+    headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+    if headers.get('if-none-match') == ETAG:
+        return _response(304)
+
+    operation = (event.get('pathParameters') or {}).get('operation')
+    if not operation:
+        return _response(200, TREE)
 
-    with open('entity_hierarchy_hvac.min.json', 'r') as f:
-        return f.read()
+    try:
+        result = query(operation, event.get('queryStringParameters') or {})
+    except KeyError as e:
+        return _error(404, str(e).strip('"\''))
+    except ValueError as e:
+        return _error(400, str(e))
+    return _response(200, json.dumps(result, separators=(',', ':')))
@@ -17,38 +17,136 @@ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
 SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 '''
-import time
-from datetime import datetime
-from typing import Dict, Any
+import base64
+import math
 import random
-import os
+import re
+import sys
 import json
+from array import array
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+# Dummy sensors report every 10 minutes
+INTERVAL = 600
+AGGREGATIONS = ("min", "max", "mean", "p95")
+FORMATS = ("rows", "columnar", "binary")
+RESOLUTION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_resolution(resolution: Optional[str]) -> Optional[int]:
+    """Bucket size in seconds from '3600', '15m', '1h' or '1d' (None for raw points)."""
+    if not resolution:
+        return None
+    match = re.fullmatch(r"(\d+)\s*([smhd]?)", resolution.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid resolution: {resolution}")
+    return int(match.group(1)) * RESOLUTION_UNITS[match.group(2) or "s"]
+
+
+def generate_series(entity_id: str, property_name: str, start_ts: int, end_ts: int) -> Tuple[List[int], List[float]]:
+    """Random readings every 10 minutes between start_ts and end_ts, as parallel time and value lists."""
+    times = list(range(start_ts, end_ts + 1, INTERVAL))
+    return times, [round(random.uniform(18, 24), 2) for _ in times]
+
+
+def _p95(values: List[float]) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)]
+
+
+def downsample(times: List[int], values: List[float], resolution: int, agg: str) -> Tuple[List[int], List[float]]:
+    """
+    Aggregate points into buckets aligned to multiples of resolution seconds.
+
+    Returns:
+        Bucket start times and the aggregated value of each non-empty bucket
+    """
+    buckets: Dict[int, List[float]] = {}
+    for ts, value in zip(times, values):
+        buckets.setdefault(ts - ts % resolution, []).append(value)
+    reduce = {
+        "min": min,
+        "max": max,
+        "mean": lambda bucket: round(sum(bucket) / len(bucket), 4),
+        "p95": _p95,
+    }[agg]
+    starts = sorted(buckets)
+    return starts, [reduce(buckets[start]) for start in starts]
+
+
+def _b64(values: array) -> str:
+    if sys.byteorder == "big":
+        values.byteswap()
+    return base64.b64encode(values.tobytes()).decode("ascii")
+
+
+def encode(times: List[int], values: List[float], response_format: str) -> Dict[str, Any]:
+    """One series in the requested format: rows of {time, value}, parallel arrays, or base64 arrays."""
+    if response_format == "rows":
+        return {"data": [{"time": ts, "value": value} for ts, value in zip(times, values)]}
+    if response_format == "columnar":
+        return {"time": times, "value": values}
+    return {
+        "time": _b64(array("I", times)),
+        "value": _b64(array("f", values)),
+        "count": len(times),
+    }
+
 
 #This is a dummy API which will return a set of random timeseries data
 def lambda_handler(event, context):
+    """
+    Timeseries for one entity, or a batch of entities, of a property.
 
-    
-    end_time =  event['queryStringParameters']['end_time']
-    entity_id =  event['queryStringParameters']['entity_id']
-    property_name =  event['queryStringParameters']['property']
-    start_time =  event['queryStringParameters']['start_time'] 
+    Query parameters:
+        entity_id or entity_ids: one id, or comma separated ids for a batch
+        property, start_time, end_time ("%Y-%m-%d %H:%M:%S")
+        resolution (optional): bucket size, e.g. 3600, 15m, 1h, 1d
+        agg (optional, with resolution): min, max, mean (default) or p95
+        format (optional): rows (default) - [{"time", "value"}, ...];
+            columnar - parallel "time" and "value" arrays;
+            binary - base64 little-endian uint32 times and float32 values
+    """
+    params = event['queryStringParameters']
+    end_time = params['end_time']
+    property_name = params['property']
+    start_time = params['start_time']
+    response_format = params.get('format', 'rows')
+    agg = params.get('agg', 'mean')
+
+    if response_format not in FORMATS:
+        return json.dumps({"error": f"format must be one of {', '.join(FORMATS)}"})
+    if agg not in AGGREGATIONS:
+        return json.dumps({"error": f"agg must be one of {', '.join(AGGREGATIONS)}"})
+    try:
+        resolution = parse_resolution(params.get('resolution'))
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
 
     # Convert string times to timestamps
     start_ts = int(datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S").timestamp())
     end_ts = int(datetime.strptime(end_time, "%Y-%m-%d %H:%M:%S").timestamp())
-    
-    # Generate data points every 10 minutes
-    interval = 600  # 10 minutes in seconds
-    data = []
-    
-    current_ts = start_ts
-    while current_ts <= end_ts:
-        data.append({
-            "time": current_ts,
-            "value": round(random.uniform(18, 24), 2)
-        })
-        current_ts += interval
-        
-    return json.dumps({
-        "data" : data
-    })
\ No newline at end of file
+
+    def series(entity_id: str) -> Dict[str, Any]:
+        times, values = generate_series(entity_id, property_name, start_ts, end_ts)
+        if resolution:
+            times, values = downsample(times, values, resolution, agg)
+        return encode(times, values, response_format)
+
+    meta = {"format": response_format}
+    if resolution:
+        meta.update({"resolution": resolution, "agg": agg})
+
+    if 'entity_ids' in params:
+        entity_ids = [entity_id.strip() for entity_id in params['entity_ids'].split(',') if entity_id.strip()]
+        return json.dumps({
+            **meta,
+            "series": [{"entity_id": entity_id, **series(entity_id)} for entity_id in entity_ids]
+        }, separators=(',', ':'))
+
+    result = series(params['entity_id'])
+    if response_format == "rows" and not resolution:
+        # Unchanged response for the original query parameters
+        return json.dumps(result)
+    return json.dumps({**meta, **result}, separators=(',', ':'))
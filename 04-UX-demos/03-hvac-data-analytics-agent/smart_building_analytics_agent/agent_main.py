@@ -95,7 +95,8 @@ class AgentStack(Stack):
             function_name=agent_main_function_name,
             handler="index.lambda_handler",
             code=lambda_.Code.from_asset("code/lambda/STAgentMain"),
-            memory_size=512,
+            # Room for the execute_code sandbox workers (SANDBOX_WORKERS x SANDBOX_MEMORY_MB) next to the agent
+            memory_size=1024,
             timeout=Duration.seconds(180),
             environment={
                 "WS_API_ENDPOINT": websocket_api.attr_api_endpoint,
@@ -103,8 +104,13 @@ class AgentStack(Stack):
                 "TOOL_API_ENDPOINT": tool_api_endpoint,
                 "LANGFUSE_HOST": "",
                 "LANGFUSE_PK": "",
-                "LANGFUSE_SK": ""
-                
+                "LANGFUSE_SK": "",
+                "SANDBOX_WORKERS": "2",
+                "SANDBOX_TIMEOUT": "60",
+                "SANDBOX_CPU_SECONDS": "30",
+                "SANDBOX_MEMORY_MB": "256",
+                "THREAD_COMPACT_EVERY": "10",
+                "STREAM_WINDOW_MS": "50"
             },
             role=lambda_role,
             layers=[lambda_layer]
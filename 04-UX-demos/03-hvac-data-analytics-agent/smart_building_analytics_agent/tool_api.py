@@ -161,6 +161,15 @@ class ToolApiStack(Stack):
             authorizer_id=http_api_authorizer.ref
         )
 
+        entities_query_route = apigatewayv2.CfnRoute(
+            self, "EntitiesQueryRoute",
+            api_id=http_api.ref,
+            route_key="GET /entities/{operation}",
+            target=f"integrations/{entities_integration.ref}",
+            authorization_type="CUSTOM",
+            authorizer_id=http_api_authorizer.ref
+        )
+
         timeseries_route = apigatewayv2.CfnRoute(
             self, "TimeseriesRoute",
             api_id=http_api.ref,
@@ -189,6 +198,13 @@ class ToolApiStack(Stack):
             source_arn=f"arn:aws:execute-api:{Aws.REGION}:{Aws.ACCOUNT_ID}:{http_api.ref}/*/*/entities"
         )
 
+        entities_function.add_permission(
+            "ToolEntitiesQueryAPIPermission",
+            principal=iam.ServicePrincipal("apigateway.amazonaws.com"),
+            action="lambda:InvokeFunction",
+            source_arn=f"arn:aws:execute-api:{Aws.REGION}:{Aws.ACCOUNT_ID}:{http_api.ref}/*/*/entities/*"
+        )
+
         timeseries_function.add_permission(
             "ToolTimeseriesAPIPermission",
             principal=iam.ServicePrincipal("apigateway.amazonaws.com"),
@@ -0,0 +1,100 @@
+'''
+MIT No Attribution
+
+Copyright 2024 Amazon Web Services
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this
+software and associated documentation files (the "Software"), to deal in the Software
+without restriction, including without limitation the rights to use, copy, modify,
+merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+'''
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'code', 'lambda', 'STAgentMain'))
+
+from thread_store import ThreadStore, LocalBackend
+
+
+def make_turn(name):
+    #a question answered with one tool call: the toolUse and its toolResult must stay together
+    return [
+        {'role': 'user', 'content': [{'text': f'question {name}'}]},
+        {'role': 'assistant', 'content': [{'toolUse': {'toolUseId': f'tool-{name}', 'name': 'get_site_info', 'input': {}}}]},
+        {'role': 'user', 'content': [{'toolResult': {'toolUseId': f'tool-{name}', 'status': 'success', 'content': []}}]},
+        {'role': 'assistant', 'content': [{'text': f'answer {name}'}]},
+    ]
+
+
+class ThreadStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def store(self, compact_every=3):
+        return ThreadStore(LocalBackend(self.directory.name), compact_every=compact_every, cache_size=0)
+
+    def test_losing_turn_trims_only_what_it_trimmed(self):
+        store = self.store()
+        store.append(store.load('t'), make_turn(0) + make_turn(1))
+
+        first, second = store.load('t'), store.load('t')
+        #both agents trim the oldest turn, then add one
+        store.append(first, make_turn('a'), keep_from=first.first_message + 4)
+        store.append(second, make_turn('b'), keep_from=second.first_message + 4)
+
+        state = self.store().load('t')
+        self.assertEqual(state.messages, make_turn(1) + make_turn('a') + make_turn('b'))
+        self.assertEqual(state.first_message, 4)
+
+    def test_concurrent_turns_with_trimming(self):
+        store = self.store()
+        store.append(store.load('t'), make_turn('start'))
+        window = 12
+        errors = []
+
+        def turn(name):
+            try:
+                state = store.load('t')
+                #the agent's sliding window, cut at a turn boundary
+                trimmed = max(0, len(state.messages) + 4 - window)
+                trimmed += -trimmed % 4
+                store.append(state, make_turn(name), keep_from=state.first_message + trimmed)
+            except Exception as e:
+                errors.append(e)
+
+        for round_number in range(4):
+            threads = [threading.Thread(target=turn, args=(f'{round_number}-{n}',)) for n in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
+
+        state = self.store().load('t')
+        messages = state.messages
+        #every turn saved whole, after the trimmed ones, and the thread starts with a question
+        self.assertEqual(state.first_message + len(messages), 4 * 17)
+        self.assertEqual(len(messages) % 4, 0)
+        self.assertIn('text', messages[0]['content'][0])
+        for start in range(0, len(messages), 4):
+            name = messages[start]['content'][0]['text'].split(' ', 1)[1]
+            self.assertEqual(messages[start:start + 4], make_turn(name))
+        self.assertLessEqual(len(messages), window + 4 * 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+"""
+Benchmark: per-turn decision-tree routing, rebuilt from scratch vs precompiled
+
+Scales data/comprehensive_decision_tree.json up by cloning it (with remapped
+child ids) until it has the requested number of nodes, then routes a stream of
+random (node, user message) turns.
+
+    before: the original per-turn logic - lowercase and split every response
+            option, rebuild the children topic list, decision_context and
+            available_options XML
+    after:  decision_index routes compiled once at load time
+
+Usage (from the backend directory):
+    python benchmarks/bench_decision_routing.py --nodes 100000 --turns 20000
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from decision_index import compile_routes, FALLBACK_OPTIONS_XML
+
+TREE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "comprehensive_decision_tree.json")
+
+MESSAGES = [
+    "I have severe chest pain and shortness of breath",
+    "my child has had a fever for two days",
+    "not sure, maybe mild discomfort",
+    "Female",
+    "I'm 45",
+    "feeling anxious and can't sleep",
+    "there's a rash on my arm that itches",
+    "none of these",
+]
+
+
+def load_scaled_nodes(target):
+    with open(TREE_FILE) as f:
+        base = json.load(f)["nodes"]
+    nodes = {}
+    copy = 0
+    while len(nodes) < target:
+        suffix = "" if copy == 0 else f"__{copy}"
+        for node_id, data in base.items():
+            node = dict(data)
+            node["id"] = node_id + suffix
+            node["children"] = [child + suffix for child in data.get("children", [])]
+            node.setdefault("is_terminal", False)
+            node.setdefault("outcome", None)
+            nodes[node["id"]] = SimpleNamespace(**node)
+            if len(nodes) >= target:
+                break
+        copy += 1
+    return nodes
+
+
+def route_before(nodes, current_node, message):
+    """The original per-turn work from stream_ai_response_with_images"""
+    def get_next_node_options(current_node, user_message):
+        if current_node.is_terminal:
+            return current_node.id
+        if current_node.response_options and current_node.children:
+            if len(current_node.children) == 1:
+                return current_node.children[0]
+            elif len(current_node.children) == len(current_node.response_options):
+                for i, option in enumerate(current_node.response_options):
+                    if any(keyword.lower() in user_message.lower() for keyword in option.lower().split()):
+                        return current_node.children[i]
+                return current_node.children[0]
+            else:
+                children_info = []
+                for child_id in current_node.children:
+                    child_node = nodes.get(child_id)
+                    if child_node:
+                        children_info.append(f"{child_id}: {child_node.topic}")
+                return children_info
+        if not current_node.children:
+            return current_node.id
+        return current_node.children[0]
+
+    next_node_candidate = get_next_node_options(current_node, message)
+    decision_context = f"""
+Current Node: {current_node.id} - {current_node.topic}
+Question: {current_node.question}
+Available Response Options: {current_node.response_options}
+Current Node Children: {current_node.children}
+Should Reason: {current_node.should_reason}
+Reasoning Rules: {current_node.reasoning_rules}
+"""
+    if isinstance(next_node_candidate, list):
+        options_text = "\n".join([f"- {opt}" for opt in next_node_candidate])
+    else:
+        next_node_info = nodes.get(next_node_candidate)
+        next_node_options = next_node_info.response_options if next_node_info else []
+        if next_node_options:
+            options_list = []
+            for option in next_node_options:
+                urgency = "high" if any(keyword in option.lower() for keyword in
+                                      ["emergency", "severe", "urgent", "call 911", "immediate"]) else "normal"
+                options_list.append(f'<option urgency="{urgency}">{option}</option>')
+            options_list.append('<option urgency="normal">Other</option>')
+            options_text = f"""
+
+IMPORTANT: You MUST provide quick response options for user interaction:
+<available_options>
+{chr(10).join(options_list)}
+</available_options>"""
+        else:
+            options_text = FALLBACK_OPTIONS_XML
+    return next_node_candidate, decision_context, options_text
+
+
+def route_after(routes, current_node, message):
+    route = routes[current_node.id]
+    next_node_candidate = route.next_node(message)
+    if isinstance(next_node_candidate, list):
+        options_text = route.ai_choices_text
+    else:
+        next_route = routes.get(next_node_candidate)
+        options_text = next_route.available_options_xml if next_route else FALLBACK_OPTIONS_XML
+    return next_node_candidate, route.decision_context, options_text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=100000)
+    parser.add_argument("--turns", type=int, default=20000)
+    args = parser.parse_args()
+
+    nodes = load_scaled_nodes(args.nodes)
+    start = time.perf_counter()
+    routes = compile_routes(nodes)
+    compile_time = time.perf_counter() - start
+    print(f"{len(nodes)} nodes, compiled in {compile_time * 1000:.0f} ms")
+
+    rng = random.Random(3)
+    node_list = list(nodes.values())
+    turns = [(rng.choice(node_list), rng.choice(MESSAGES)) for _ in range(args.turns)]
+
+    for node, message in turns[:2000]:
+        assert route_before(nodes, node, message) == route_after(routes, node, message), node.id
+
+    start = time.perf_counter()
+    for node, message in turns:
+        route_before(nodes, node, message)
+    before = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for node, message in turns:
+        route_after(routes, node, message)
+    after = time.perf_counter() - start
+
+    print(f"before (rebuilt per turn): {before / args.turns * 1e6:8.2f} us/turn")
+    print(f"after  (precompiled):      {after / args.turns * 1e6:8.2f} us/turn")
+    print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
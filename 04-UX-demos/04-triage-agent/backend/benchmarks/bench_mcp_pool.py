@@ -0,0 +1,117 @@
+"""
+Benchmark: per-request MCP stdio spawns vs the pooled MCP servers
+
+Simulates concurrent chat turns and measures the time from request start until
+the first MCP tool result is available. An agent cannot emit its first token
+before its MCP tools are reachable, so this is the MCP share of first-token
+latency.
+
+    before: every request enters a fresh MCPClient per enabled server
+            (one Python subprocess spawn + teardown each)
+    after:  every tool call leases its long-lived server from mcp_manager
+
+Usage (from the backend directory):
+    python benchmarks/bench_mcp_pool.py --requests 40 --concurrency 8
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp import stdio_client, StdioServerParameters
+from strands.tools.mcp import MCPClient
+from mcpmanager import MCPClientManager
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROBE_SERVER = "calendar"
+PROBE_TOOL = "get_current_datetime"
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def fresh_client(command, args):
+    return MCPClient(lambda: stdio_client(
+        StdioServerParameters(command=command, args=args, cwd=BACKEND_DIR, env=os.environ)
+    ))
+
+
+def load_server_params():
+    with open(os.path.join(BACKEND_DIR, "mcp.json")) as f:
+        config = json.load(f)
+    servers = config.get("mcpServers", config.get("servers", {}))
+    return {name: (cfg.get("command", "python3"), cfg.get("args", [])) for name, cfg in servers.items()}
+
+
+def request_per_spawn(manager, server_params):
+    """Old request path: spawn every active server for this request only"""
+    start = time.perf_counter()
+    clients = {name: fresh_client(*server_params[name]) for name in manager.get_active_clients()}
+    for client in clients.values():
+        client.start()
+    try:
+        clients[PROBE_SERVER].list_tools_sync()
+        clients[PROBE_SERVER].call_tool_sync(str(uuid.uuid4()), PROBE_TOOL, {})
+        return time.perf_counter() - start
+    finally:
+        for client in clients.values():
+            client.stop(None, None, None)
+
+
+def request_pooled(manager, server_params):
+    """New request path: the tool call leases its warm server from the pool"""
+    start = time.perf_counter()
+    with manager.lease([PROBE_SERVER]):
+        manager.get_client(PROBE_SERVER).call_tool_sync(str(uuid.uuid4()), PROBE_TOOL, {})
+        return time.perf_counter() - start
+
+
+def run(label, fn, manager, server_params, requests, concurrency):
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(lambda _: fn(manager, server_params), range(requests)))
+    print(f"{label:<10} n={len(latencies):<5} "
+          f"p50={percentile(latencies, 50) * 1000:8.1f} ms  "
+          f"p99={percentile(latencies, 99) * 1000:8.1f} ms  "
+          f"mean={statistics.mean(latencies) * 1000:8.1f} ms")
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    manager = MCPClientManager()
+    manager.initialize_default_clients()
+    if PROBE_SERVER not in manager.get_active_clients():
+        sys.exit(f"The '{PROBE_SERVER}' server must be enabled in mcp.json to run this benchmark")
+
+    server_params = load_server_params()
+
+    print(f"Active servers: {manager.get_active_clients()}  "
+          f"requests={args.requests} concurrency={args.concurrency}")
+    before = run("before", request_per_spawn, manager, server_params, args.requests, args.concurrency)
+
+    manager.start_pool()
+    try:
+        after = run("after", request_pooled, manager, server_params, args.requests, args.concurrency)
+    finally:
+        manager.shutdown_pool()
+
+    print(f"p50 speedup: {percentile(before, 50) / percentile(after, 50):.1f}x  "
+          f"p99 speedup: {percentile(before, 99) / percentile(after, 99):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
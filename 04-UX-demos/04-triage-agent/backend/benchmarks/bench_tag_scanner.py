@@ -0,0 +1,109 @@
+"""
+Benchmark: regex over the accumulated response vs the incremental tag scanner
+
+Streams a synthetic model answer token by token and extracts the control tags
+the triage SSE loop reacts to. The control tags sit at the end of the answer
+and are split across several chunks, as they are in real streams.
+
+    before: append each chunk to the accumulated response and re-run
+            re.search(...) over the whole string on every event
+    after:  feed each chunk once to ControlTagScanner
+
+Usage (from the backend directory):
+    python benchmarks/bench_tag_scanner.py --tokens 50000
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tag_scanner import ControlTagScanner
+
+WORDS = ["patient", "pain", "**severe**", "symptoms", "the", "and", "<", "a", "doctor",
+         "recommend", "hours", "fever", "of", "please", "call", "\n\n", "- ", "rest"]
+
+CONTROL_TAGS = (
+    '<decision_tree_status next_node="pain_scale" action="Moving to next assessment step" />\n\n'
+    'IMPORTANT: You MUST provide quick response options for user interaction:\n'
+    '<available_options>\n'
+    '<option urgency="high">Severe pain, call 911</option>\n'
+    '<option urgency="normal">Mild discomfort</option>\n'
+    '<option urgency="normal">Other</option>\n'
+    '</available_options>'
+)
+
+
+def synthetic_chunks(tokens, seed=7):
+    """About one word per chunk, like Bedrock streaming deltas"""
+    rng = random.Random(seed)
+    chunks = [rng.choice(WORDS) + " " for _ in range(tokens)]
+    tags = CONTROL_TAGS
+    while tags:
+        size = rng.randint(2, 6)
+        chunks.append(tags[:size])
+        tags = tags[size:]
+    return chunks
+
+
+def regex_baseline(chunks):
+    accumulated_response = ""
+    found = {}
+    for chunk in chunks:
+        accumulated_response += chunk
+        if "decision_tree_status" not in found:
+            match = re.search(r'<decision_tree_status[^>]*next_node="([^"]+)"[^>]*/?>', accumulated_response)
+            if match:
+                found["decision_tree_status"] = match.group(1)
+        if "available_options" not in found:
+            match = re.search(r'<available_options>([\s\S]*?)</available_options>', accumulated_response)
+            if match:
+                found["available_options"] = match.group(1)
+    return found
+
+
+def incremental_scanner(chunks):
+    scanner = ControlTagScanner()
+    found = {}
+    for chunk in chunks:
+        for tag in scanner.feed(chunk):
+            found.setdefault(tag.name, tag)
+    return found
+
+
+def timed(fn, chunks, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(chunks)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    chunks = synthetic_chunks(args.tokens)
+    total_chars = sum(len(chunk) for chunk in chunks)
+    print(f"{len(chunks)} chunks, {total_chars / 1024:.0f} KiB")
+
+    before, regex_found = timed(regex_baseline, chunks, args.repeat)
+    after, scanner_found = timed(incremental_scanner, chunks, args.repeat)
+
+    assert regex_found["decision_tree_status"] == scanner_found["decision_tree_status"].attributes["next_node"]
+    assert len(scanner_found["available_options"].options()) == 3
+
+    print(f"before (regex over accumulated): {before * 1000:10.1f} ms")
+    print(f"after  (incremental scanner):    {after * 1000:10.1f} ms")
+    print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Precompiled routing index for the triage decision tree
+
+Everything the chat path needs for a node that does not depend on the user's
+message is built once when the tree is loaded: the keyword -> child routing
+table, the list of candidate children for AI-chosen routing, the
+``decision_context`` prompt block and the ``<available_options>`` XML with its
+urgency flags. Per turn, routing is a handful of substring checks against the
+lowercased message, and prompt building is dictionary lookups and joins.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+URGENT_KEYWORDS = ("emergency", "severe", "urgent", "call 911", "immediate")
+
+FALLBACK_OPTIONS_XML = """
+
+IMPORTANT: You MUST provide quick response options for user interaction:
+<available_options>
+<option urgency="normal">Continue with assessment</option>
+<option urgency="normal">Go back to previous step</option>
+<option urgency="normal">Other</option>
+</available_options>"""
+
+
+def option_urgency(option: str) -> str:
+    """Urgency flag for a response option, based on keywords"""
+    lowered = option.lower()
+    return "high" if any(keyword in lowered for keyword in URGENT_KEYWORDS) else "normal"
+
+
+@dataclass
+class NodeRoute:
+    """Precompiled routing and prompt fragments for one decision node"""
+    node_id: str
+    # Target used regardless of the message (terminal, leaf, single child, default child)
+    static_target: Optional[str] = None
+    # (keyword, child_id) in option order; the first keyword found in the message wins
+    keyword_index: List[Tuple[str, str]] = field(default_factory=list)
+    default_child: Optional[str] = None
+    # "child_id: topic" entries when the AI has to choose the next node
+    ai_choices: Optional[List[str]] = None
+    ai_choices_text: str = ""
+    decision_context: str = ""
+    available_options_xml: str = FALLBACK_OPTIONS_XML
+    option_urgencies: List[str] = field(default_factory=list)
+
+    def next_node(self, user_message: str) -> Union[str, List[str]]:
+        """Child id to move to, or the list of choices when the AI must decide"""
+        if self.ai_choices is not None:
+            return self.ai_choices
+        if self.keyword_index:
+            message = user_message.lower()
+            for keyword, child_id in self.keyword_index:
+                if keyword in message:
+                    return child_id
+            return self.default_child
+        return self.static_target
+
+
+def compile_route(node: Any, nodes: Dict[str, Any]) -> NodeRoute:
+    """Build the route for a single node; nodes maps ids to DecisionNode-like objects"""
+    route = NodeRoute(node_id=node.id)
+
+    route.decision_context = f"""
+Current Node: {node.id} - {node.topic}
+Question: {node.question}
+Available Response Options: {node.response_options}
+Current Node Children: {node.children}
+Should Reason: {node.should_reason}
+Reasoning Rules: {node.reasoning_rules}
+"""
+
+    if node.response_options:
+        route.option_urgencies = [option_urgency(option) for option in node.response_options]
+        options_list = [
+            f'<option urgency="{urgency}">{option}</option>'
+            for option, urgency in zip(node.response_options, route.option_urgencies)
+        ]
+        # Always add "Other" option for free-form chat
+        options_list.append('<option urgency="normal">Other</option>')
+        route.available_options_xml = f"""
+
+IMPORTANT: You MUST provide quick response options for user interaction:
+<available_options>
+{chr(10).join(options_list)}
+</available_options>"""
+
+    if node.is_terminal:
+        route.static_target = node.id
+    elif not node.children:
+        route.static_target = node.id
+    elif node.response_options and len(node.children) == len(node.response_options) and len(node.children) > 1:
+        # Each response option maps to a child; keep the first (lowest option index) child per keyword
+        seen = set()
+        for option, child_id in zip(node.response_options, node.children):
+            for keyword in option.lower().split():
+                if keyword not in seen:
+                    seen.add(keyword)
+                    route.keyword_index.append((keyword, child_id))
+        route.default_child = node.children[0]
+    elif node.response_options and len(node.children) > 1:
+        # Complex routing - let AI decide based on reasoning
+        route.ai_choices = [f"{child_id}: {nodes[child_id].topic}" for child_id in node.children if child_id in nodes]
+        route.ai_choices_text = "\n".join(f"- {choice}" for choice in route.ai_choices)
+    else:
+        route.static_target = node.children[0]
+
+    return route
+
+
+def compile_routes(nodes: Dict[str, Any]) -> Dict[str, NodeRoute]:
+    """Compile every node of a decision tree"""
+    return {node_id: compile_route(node, nodes) for node_id, node in nodes.items()}
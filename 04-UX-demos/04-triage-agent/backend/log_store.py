@@ -0,0 +1,181 @@
+"""
+Ring-buffered, structured server log store for the triage backend
+
+Producers only pay for a level check and a deque append: the message is kept
+as a format string plus arguments, and ``details`` may be a callable, so
+timestamps, formatting and large detail payloads are materialized later by an
+async drain task (or by the first reader). The queue and each server's ring
+buffer have fixed capacities, so a stalled drain drops the oldest queued
+entries instead of growing without limit. Every entry gets a monotonically
+increasing sequence number that readers use as a cursor for pagination and
+live streaming.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+DEFAULT_CAPACITY = int(os.environ.get("SERVER_LOG_CAPACITY", "50"))
+DEFAULT_MIN_LEVEL = os.environ.get("SERVER_LOG_LEVEL", "info").lower()
+DEFAULT_PENDING_CAPACITY = int(os.environ.get("SERVER_LOG_PENDING_CAPACITY", "10000"))
+
+Details = Union[Dict[str, Any], Callable[[], Dict[str, Any]], None]
+
+
+class LogStore:
+    """Per-server ring buffers of structured log entries with a global cursor"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, min_level: str = DEFAULT_MIN_LEVEL,
+                 drain_interval: float = 0.1, pending_capacity: int = DEFAULT_PENDING_CAPACITY):
+        self.capacity = capacity
+        self.min_level = LEVELS.get(min_level, LEVELS["info"])
+        self.drain_interval = drain_interval
+        self._buffers: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._pending: Deque[Tuple] = deque(maxlen=pending_capacity)
+        self._seq = 0
+        self._dropped = 0
+        self._dropped_pending = 0
+        self._task: Optional[asyncio.Task] = None
+
+    # --- Producers ---
+
+    def enabled(self, level: str) -> bool:
+        """Whether a level would be recorded; check before building expensive details"""
+        return LEVELS.get(level, LEVELS["info"]) >= self.min_level
+
+    def add(self, server_name: str, message: str, *args: Any, level: str = "info", details: Details = None):
+        """Queue a log entry; formatting is deferred until the entry is drained"""
+        if LEVELS.get(level, LEVELS["info"]) < self.min_level:
+            return
+        if len(self._pending) == self._pending.maxlen:
+            self._dropped_pending += 1
+        self._pending.append((time.time(), server_name, level, message, args, details))
+
+    # --- Drain ---
+
+    def drain_pending(self) -> int:
+        """Materialize queued entries into the ring buffers"""
+        drained = 0
+        while self._pending:
+            created, server_name, level, message, args, details = self._pending.popleft()
+            if args:
+                try:
+                    message = message % args
+                except (TypeError, ValueError):
+                    message = " ".join([message, *map(str, args)])
+
+            buffer = self._buffers.get(server_name)
+            if buffer is None:
+                buffer = self._buffers[server_name] = deque(maxlen=self.capacity)
+
+            # Prevent duplicate consecutive messages (but allow tool executions)
+            if buffer and not message.startswith("Executing ") and buffer[-1]["message"] == message:
+                continue
+
+            if callable(details):
+                try:
+                    details = details()
+                except Exception as e:
+                    details = {"details_error": str(e)}
+
+            if len(buffer) == buffer.maxlen:
+                self._dropped += 1
+            self._seq += 1
+            buffer.append({
+                "seq": self._seq,
+                "timestamp": datetime.fromtimestamp(created).isoformat(),
+                "server": server_name,
+                "level": level,
+                "message": message,
+                "details": details or {}
+            })
+            drained += 1
+        return drained
+
+    async def _drain_loop(self):
+        while True:
+            if self._pending:
+                self.drain_pending()
+            await asyncio.sleep(self.drain_interval)
+
+    def start(self):
+        """Start the async drain task on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._drain_loop())
+
+    async def stop(self):
+        """Stop the drain task, flushing anything still queued"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.drain_pending()
+
+    # --- Readers ---
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """All buffered entries grouped by server"""
+        self.drain_pending()
+        return {server: list(buffer) for server, buffer in self._buffers.items()}
+
+    def since(self, cursor: int = 0, server: Optional[str] = None, level: Optional[str] = None,
+              limit: int = 200) -> Tuple[List[Dict[str, Any]], int]:
+        """Entries with seq > cursor in order, plus the cursor to resume from"""
+        self.drain_pending()
+        min_level = LEVELS.get(level, 0) if level else 0
+        buffers = [self._buffers[server]] if server in self._buffers else ([] if server else self._buffers.values())
+        matching = sorted(
+            (entry for buffer in buffers for entry in buffer
+             if entry["seq"] > cursor and LEVELS.get(entry["level"], 0) >= min_level),
+            key=lambda entry: entry["seq"]
+        )
+        if len(matching) > limit:
+            entries = matching[:limit]
+            return entries, entries[-1]["seq"]
+        # Everything up to the newest entry has been examined, even if it was filtered out
+        return matching, max(cursor, self._seq)
+
+    async def wait_for_new(self, cursor: int, timeout: float) -> bool:
+        """Wait until an entry newer than cursor exists, or the timeout passes"""
+        deadline = time.monotonic() + timeout
+        while True:
+            # Entries become visible at drain granularity, so polling at that rate loses nothing
+            self.drain_pending()
+            if self._seq > cursor:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(self.drain_interval)
+
+    @property
+    def cursor(self) -> int:
+        """Sequence number of the newest entry"""
+        self.drain_pending()
+        return self._seq
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "servers": len(self._buffers),
+            "buffered": sum(len(buffer) for buffer in self._buffers.values()),
+            "pending": len(self._pending),
+            "dropped": self._dropped,
+            "dropped_pending": self._dropped_pending,
+            "cursor": self._seq,
+            "capacity_per_server": self.capacity,
+        }
+
+    def clear(self):
+        """Drop every buffered and queued entry; the cursor keeps increasing"""
+        self._pending.clear()
+        self._buffers.clear()
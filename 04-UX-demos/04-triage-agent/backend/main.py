@@ -30,7 +30,6 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dataclasses import dataclass, asdict, field
-import re
 
 # Strands imports
 from strands import Agent
@@ -38,46 +37,34 @@ from strands.models import BedrockModel
 from strands.tools.mcp import MCPClient
 from mcp import StdioServerParameters, stdio_client
 from mcpmanager import mcp_manager
+from tag_scanner import ControlTagScanner
+from session_store import SessionStore
+from decision_index import NodeRoute, compile_routes, FALLBACK_OPTIONS_XML
+from log_store import LogStore
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Store server logs
-server_logs: Dict[str, List[str]] = {}
+# Store server logs in per-server ring buffers, drained asynchronously
+log_store = LogStore()
 mcp_servers = {}  # Initialize early to avoid loading issues
 mcp_clients = {}  # Store MCP client instances
 
-def add_server_log(server_name: str, message: str, level: str = "info", details: Dict = None):
-    """Add a structured log entry for a server"""
-    timestamp = datetime.now().isoformat()
+def add_server_log(server_name: str, message: str, *args, level: str = "info", details: Any = None):
+    """Add a structured log entry for a server.
     
-    # Create structured log entry
-    log_entry = {
-        "timestamp": timestamp,
-        "server": server_name,
-        "level": level,
-        "message": message,
-        "details": details or {}
-    }
-    
-    if server_name not in server_logs:
-        server_logs[server_name] = []
-    
-    # Prevent duplicate consecutive messages (but allow tool executions)
-    if server_logs[server_name] and not message.startswith("Executing "):
-        last_log = server_logs[server_name][-1]
-        if isinstance(last_log, dict) and last_log.get("message") == message:
-            return  # Skip duplicate message
+    ``message`` may use %-style placeholders filled from ``args`` and ``details``
+    may be a callable; both are only evaluated when the entry is drained.
+    """
+    log_store.add(server_name, message, *args, level=level, details=details)
     
-    server_logs[server_name].append(log_entry)
+# Global agent cache - session-based, bounded by count, message bytes and idle time
+session_agents = SessionStore()
     
-    # Keep only last 50 logs per server
-    if len(server_logs[server_name]) > 50:
-        server_logs[server_name] = server_logs[server_name][-50:]
-
-# Global agent cache - session-based
-session_agents = {}
+# Decision tree conversations are small, but still capped and expired
+MAX_TRIAGE_CONVERSATIONS = int(os.environ.get("MAX_TRIAGE_CONVERSATIONS", "1000"))
+TRIAGE_CONVERSATION_TTL = float(os.environ.get("TRIAGE_CONVERSATION_TTL", "86400"))
 
 # Global tools cache
 cached_tools = []
@@ -132,9 +119,13 @@ class ConversationState:
 class DecisionTree:
     """Manages the decision tree logic and conversation states, self-contained within main.py."""
     
-    def __init__(self, data_file: str):
+    def __init__(self, data_file: str, max_conversations: int = MAX_TRIAGE_CONVERSATIONS,
+                 conversation_ttl: float = TRIAGE_CONVERSATION_TTL):
         self.nodes: Dict[str, DecisionNode] = {}
+        self.routes: Dict[str, NodeRoute] = {}
         self.conversations: Dict[str, ConversationState] = {}
+        self.max_conversations = max_conversations
+        self.conversation_ttl = conversation_ttl
         self.data_file = data_file
         self.load_data()
     
@@ -147,6 +138,9 @@ class DecisionTree:
             for node_id, node_data in data['nodes'].items():
                 self.nodes[node_id] = DecisionNode(**node_data)
             
+            # Precompile routing tables and prompt fragments so each turn is lookups only
+            self.routes = compile_routes(self.nodes)
+            
             logger.info(f"Loaded {len(self.nodes)} decision tree nodes")
         except Exception as e:
             logger.error(f"Failed to load decision tree data: {e}")
@@ -157,6 +151,7 @@ class DecisionTree:
         if session_id in self.conversations:
             return
 
+        self.prune_conversations()
         self.conversations[session_id] = ConversationState(
             session_id=session_id,
             current_node_id="start",
@@ -164,6 +159,27 @@ class DecisionTree:
         )
         logger.info(f"Started new session {session_id} in chat_mode={chat_mode}")
 
+    def prune_conversations(self) -> int:
+        """Drop expired conversations, then the least recently updated ones beyond the cap."""
+        now = datetime.now()
+        expired = [
+            session_id for session_id, state in self.conversations.items()
+            if (now - state.last_updated).total_seconds() > self.conversation_ttl
+        ]
+        for session_id in expired:
+            del self.conversations[session_id]
+
+        overflow = len(self.conversations) - self.max_conversations + 1
+        if overflow > 0:
+            oldest = sorted(self.conversations, key=lambda sid: self.conversations[sid].last_updated)[:overflow]
+            for session_id in oldest:
+                del self.conversations[session_id]
+            expired.extend(oldest)
+
+        if expired:
+            logger.info(f"Pruned {len(expired)} triage conversations")
+        return len(expired)
+
     def set_current_node(self, session_id: str, node_id: str) -> bool:
         """Forcefully set the current node for a session."""
         if session_id in self.conversations and node_id in self.nodes:
@@ -221,7 +237,8 @@ def get_or_create_session_agent(session_id: str, model_id: str) -> Agent:
     """Get or create a cached agent for the given session and model"""
     agent_key = f"{session_id}:{model_id}"
     
-    if agent_key not in session_agents:
+    agent = session_agents.get(agent_key)
+    if agent is None:
         model = BedrockModel(model_id=model_id, temperature=0.7)
         tools = get_cached_tools()
         
@@ -239,28 +256,26 @@ FORMATTING GUIDELINES:
 - Make important medical advice stand out visually
 """
         
-        agent = Agent(model=model, system_prompt=system_prompt, tools=tools)
-        session_agents[agent_key] = agent
-        add_server_log("system", f"Session agent cached for {session_id}:{model_id}")
+        # Sessions evicted to disk come back with their full message history
+        messages = session_agents.restore_messages(agent_key)
+        agent = Agent(model=model, system_prompt=system_prompt, tools=tools, messages=messages)
+        session_agents.put(agent_key, agent)
+        add_server_log("system", f"Session agent cached for {session_id}:{model_id}", details={"rehydrated": messages is not None})
     
-    return session_agents[agent_key]
+    return agent
 
 def get_session_messages_for_ui(session_id: str, model_id: str) -> List[Dict]:
     """Get session messages formatted for UI from the actual agent"""
     agent_key = f"{session_id}:{model_id}"
     
-    if agent_key not in session_agents:
-        return []
-    
-    agent = session_agents[agent_key]
-    
-    # Get messages from agent.messages
-    if not hasattr(agent, 'messages') or not agent.messages:
+    # Get messages from the cached agent, or from its spilled copy if it was evicted
+    messages = session_agents.get_messages(agent_key)
+    if not messages:
         return []
     
     ui_messages = []
     
-    for msg in agent.messages:
+    for msg in messages:
         # Skip system messages
         if msg.get('role') == 'system':
             continue
@@ -308,9 +323,9 @@ def refresh_agents():
     # Refresh tools cache first
     refresh_tools_cache()
     
-    # Clear agent cache so they get recreated with new tools
-    session_agents.clear()
-    add_server_log("system", "Tools and agent cache refreshed - agents will recreate with new tools", level="info", details={"cleared_sessions": len(session_agents)})
+    # Clear agent cache so they get recreated with new tools (history is kept if spilling is enabled)
+    cleared = session_agents.clear(spill=True)
+    add_server_log("system", "Tools and agent cache refreshed - agents will recreate with new tools", level="info", details={"cleared_sessions": cleared})
 
 def load_mcp_config():
     """Load MCP configuration from mcp.json file"""
@@ -644,7 +659,7 @@ async def stream_ai_response_with_images(message: str, model_id: str, session_id
     global decision_tree
     
     try:
-        add_server_log("system", f"Processing [{session_id}]: {message[:30]}...")
+        add_server_log("system", "Processing [%s]: %s...", session_id, message[:30])
         
         # Ensure session exists
         if session_id not in decision_tree.conversations:
@@ -661,7 +676,7 @@ async def stream_ai_response_with_images(message: str, model_id: str, session_id
         state = decision_tree.conversations[session_id]
         current_node = decision_tree.nodes[state.current_node_id]
         
-        add_server_log("triage", f"PROCESSING MESSAGE: {session_id} at node {current_node.id}", level="info", details={
+        add_server_log("triage", "PROCESSING MESSAGE: %s at node %s", session_id, current_node.id, level="info", details=lambda: {
             "session_id": session_id,
             "current_node": current_node.id,
             "current_topic": current_node.topic,
@@ -670,76 +685,34 @@ async def stream_ai_response_with_images(message: str, model_id: str, session_id
             "should_reason": current_node.should_reason
         })
         
-        add_server_log("triage", f"GETTING MCP CONTEXT: {session_id}", level="info", details={
-            "session_id": session_id,
-            "active_clients": mcp_manager.get_active_clients() if hasattr(mcp_manager, 'get_active_clients') else []
-        })
+        # Diagnostic-only entries are filtered at the call site unless debug logging is on
+        debug_logs = log_store.enabled("debug")
+        if debug_logs:
+            add_server_log("triage", "GETTING MCP CONTEXT: %s", session_id, level="debug", details=lambda: {
+                "session_id": session_id,
+                "active_clients": mcp_manager.get_active_clients() if hasattr(mcp_manager, 'get_active_clients') else []
+            })
         
-        with mcp_manager.get_active_context():
-            add_server_log("triage", f"MCP CONTEXT ACQUIRED: {session_id}", level="info")
-            
-            agent = get_or_create_session_agent(session_id, model_id)
+        # MCP tools lease their pooled server per tool call, so the turn itself holds no lease
+        agent = get_or_create_session_agent(session_id, model_id)
             
-            add_server_log("triage", f"AGENT ACQUIRED: {session_id}", level="info", details={
+        if debug_logs:
+            add_server_log("triage", "AGENT ACQUIRED: %s", session_id, level="debug", details=lambda: {
                 "session_id": session_id,
                 "agent_type": type(agent).__name__,
                 "has_tools": hasattr(agent, 'tools'),
                 "tools_count": len(agent.tools) if hasattr(agent, 'tools') else 0
             })
             
-            # Dynamic next node selection based on decision tree structure
-            def get_next_node_options(current_node, user_message):
-                """Determine possible next nodes based on current node structure and user input"""
-                
-                # If it's a terminal node, stay at current node
-                if current_node.is_terminal:
-                    return current_node.id
-                
-                # If current node has specific routing logic based on response options
-                if current_node.response_options and current_node.children:
-                    # Create mapping between response options and children
-                    if len(current_node.children) == 1:
-                        # Single child - go to that child
-                        return current_node.children[0]
-                    elif len(current_node.children) == len(current_node.response_options):
-                        # Each response option maps to a child
-                        for i, option in enumerate(current_node.response_options):
-                            if any(keyword.lower() in user_message.lower() for keyword in option.lower().split()):
-                                return current_node.children[i]
-                        # Default to first child if no match
-                        return current_node.children[0]
-                    else:
-                        # Complex routing - let AI decide based on reasoning
-                        children_info = []
-                        for child_id in current_node.children:
-                            child_node = decision_tree.nodes.get(child_id)
-                            if child_node:
-                                children_info.append(f"{child_id}: {child_node.topic}")
-                        return children_info  # Return list for AI to choose from
-                
-                # If no children, stay at current node
-                if not current_node.children:
-                    return current_node.id
+        # Next node selection and prompt fragments come from the precompiled route for this node
+        route = decision_tree.routes[current_node.id]
+        next_node_candidate = route.next_node(message)
+        decision_context = route.decision_context
                 
-                # Default to first child
-                return current_node.children[0]
-            
-            next_node_candidate = get_next_node_options(current_node, message)
-            
-            # Build comprehensive prompt based on decision tree context
-            decision_context = f"""
-Current Node: {current_node.id} - {current_node.topic}
-Question: {current_node.question}
-Available Response Options: {current_node.response_options}
-Current Node Children: {current_node.children}
-Should Reason: {current_node.should_reason}
-Reasoning Rules: {current_node.reasoning_rules}
-"""
-            
-            if isinstance(next_node_candidate, list):
-                # AI needs to choose from multiple options
-                node_options = "\n".join([f"- {opt}" for opt in next_node_candidate])
-                unified_prompt = f"""You are an AI Triage Assistant. 
+        if isinstance(next_node_candidate, list):
+            # AI needs to choose from multiple options
+            node_options = route.ai_choices_text
+            unified_prompt = f"""You are an AI Triage Assistant. 
 
 {decision_context}
 
@@ -767,42 +740,13 @@ IMPORTANT: You MUST always provide available options for user interaction. Inclu
 </available_options>
 
 Replace CHOSEN_NODE_ID with the most appropriate node from the available options."""
-            else:
-                # Direct routing to specific node
-                next_node_info = decision_tree.nodes.get(next_node_candidate)
-                next_node_options = next_node_info.response_options if next_node_info else []
-                
-                # Always generate available_options XML - either from next node or fallback options
-                available_options_xml = ""
-                if next_node_options:
-                    options_list = []
-                    for option in next_node_options:
-                        # Determine urgency based on keywords
-                        urgency = "high" if any(keyword in option.lower() for keyword in 
-                                              ["emergency", "severe", "urgent", "call 911", "immediate"]) else "normal"
-                        options_list.append(f'<option urgency="{urgency}">{option}</option>')
-                    
-                    # Always add "Other" option for free-form chat
-                    options_list.append('<option urgency="normal">Other</option>')
-                    
-                    available_options_xml = f"""
-
-IMPORTANT: You MUST provide quick response options for user interaction:
-<available_options>
-{chr(10).join(options_list)}
-</available_options>"""
-                else:
-                    # Fallback options when next node has no response_options
-                    available_options_xml = f"""
-
-IMPORTANT: You MUST provide quick response options for user interaction:
-<available_options>
-<option urgency="normal">Continue with assessment</option>
-<option urgency="normal">Go back to previous step</option>
-<option urgency="normal">Other</option>
-</available_options>"""
+        else:
+            # Direct routing to specific node - always provide available_options XML,
+            # either from the next node or fallback options
+            next_route = decision_tree.routes.get(next_node_candidate)
+            available_options_xml = next_route.available_options_xml if next_route else FALLBACK_OPTIONS_XML
                 
-                unified_prompt = f"""You are an AI Triage Assistant.
+            unified_prompt = f"""You are an AI Triage Assistant.
 
 {decision_context}
 
@@ -818,53 +762,55 @@ IMPORTANT FORMATTING RULES:
 Respond with guidance followed by EXACTLY this XML format:
 <decision_tree_status next_node="{next_node_candidate}" action="Moving to next assessment step" />{available_options_xml}"""
             
-            accumulated_response = ""
+        add_server_log("triage", "STARTING LLM STREAM: %s", session_id, level="info", details=lambda: {
+            "session_id": session_id,
+            "prompt_length": len(unified_prompt),
+            "agent_tools_count": len(agent.tools) if hasattr(agent, 'tools') else 0,
+            "next_node_candidate": str(next_node_candidate)
+        })
             
-            add_server_log("triage", f"STARTING LLM STREAM: {session_id}", level="info", details={
-                "session_id": session_id,
-                "prompt_length": len(unified_prompt),
-                "agent_tools_count": len(agent.tools) if hasattr(agent, 'tools') else 0,
-                "next_node_candidate": str(next_node_candidate)
-            })
+        # Each chunk is scanned once for control tags, even when a tag is split across chunks
+        xml_processed = False
+        tag_scanner = ControlTagScanner()
+        # Keep the agent from being evicted mid-turn; unpinning re-accounts its grown history
+        agent_key = f"{session_id}:{model_id}"
+        session_agents.pin(agent_key)
+        try:
+            async for event in agent.stream_async(unified_prompt):
+                if "data" in event:
+                    text_data = event["data"]
             
-            # Simplified Strands streaming - process events as they come
-            xml_processed = False
-            xml_buffer = ""  # Buffer to handle XML tags split across chunks
-            try:
-                async for event in agent.stream_async(unified_prompt):
-                    if "data" in event:
-                        text_data = event["data"]
-                        accumulated_response += text_data
+                    for tag in tag_scanner.feed(text_data):
+                        if tag.name == "decision_tree_status" and not xml_processed and "next_node" in tag.attributes:
+                            # Node transitions are driven by the first status tag only
+                            xml_processed = True
+                            next_node_id = tag.attributes["next_node"]
 
-                        # Add to XML buffer for processing
-                        xml_buffer += text_data
+                            add_server_log("triage", "XML DETECTED: %s -> %s", session_id, next_node_id, level="info")
 
-                        # Check for XML in accumulated response for node transitions
-                        if not xml_processed:
-                            decision_tree_match = re.search(r'<decision_tree_status[^>]*next_node="([^"]+)"[^>]*/?>', accumulated_response)
-                            if decision_tree_match:
-                                xml_processed = True
-                                next_node_id = decision_tree_match.group(1)
+                            if next_node_id in decision_tree.nodes:
+                                decision_tree.set_current_node(session_id, next_node_id)
+                                yield f"data: {json.dumps({'type': 'node_changed', 'node_id': next_node_id, 'reload_left_ui': True, 'call_status_api': True})}\n\n"
 
-                                add_server_log("triage", f"XML DETECTED: {session_id} -> {next_node_id}", level="info")
+                        elif tag.name == "available_options":
+                            yield f"data: {json.dumps({'type': 'available_options', 'options': tag.options()})}\n\n"
 
-                                if next_node_id in decision_tree.nodes:
-                                    decision_tree.set_current_node(session_id, next_node_id)
-                                    yield f"data: {json.dumps({'type': 'node_changed', 'node_id': next_node_id, 'reload_left_ui': True, 'call_status_api': True})}\n\n"
+                    # Send all text - let frontend handle filtering
+                    if text_data.strip():
+                        yield f"data: {json.dumps({'type': 'content', 'content': text_data})}\n\n"
 
-                        # Send all text - let frontend handle filtering
-                        if text_data.strip():
-                            yield f"data: {json.dumps({'type': 'content', 'content': text_data})}\n\n"
+                elif "current_tool_use" in event and event["current_tool_use"].get("name"):
+                    tool_name = event["current_tool_use"]["name"]
+                    yield f"data: {json.dumps({'type': 'tool_use', 'tool_name': tool_name})}\n\n"
 
-                    elif "current_tool_use" in event and event["current_tool_use"].get("name"):
-                        tool_name = event["current_tool_use"]["name"]
-                        yield f"data: {json.dumps({'type': 'tool_use', 'tool_name': tool_name})}\n\n"
+            add_server_log("triage", "STREAM COMPLETE: %s", session_id, level="info")
 
-                add_server_log("triage", f"STREAM COMPLETE: {session_id}", level="info")
+        except Exception as llm_error:
+            add_server_log("triage", f"LLM STREAM ERROR: {session_id} - {str(llm_error)}", level="error")
+            yield f"data: {json.dumps({'type': 'content', 'content': f'Error: {str(llm_error)}'})}\n\n"
 
-            except Exception as llm_error:
-                add_server_log("triage", f"LLM STREAM ERROR: {session_id} - {str(llm_error)}", level="error")
-                yield f"data: {json.dumps({'type': 'content', 'content': f'Error: {str(llm_error)}'})}\n\n"
+        finally:
+            session_agents.unpin(agent_key)
 
         yield "data: [DONE]\n\n"
 
@@ -893,17 +839,16 @@ async def stream_plain_response(message: str, model_id: str):
             tools=tools
         )
         
-        with mcp_manager.get_active_context():
-            # Execute agent and get response
-            response = agent(message)
-            response_text = str(response)
+        # Execute agent and get response
+        response = agent(message)
+        response_text = str(response)
             
-            # Stream response in chunks
-            chunk_size = 40
-            for i in range(0, len(response_text), chunk_size):
-                chunk = response_text[i:i+chunk_size]
-                yield chunk
-                await asyncio.sleep(0.08)  # Small delay for streaming effect
+        # Stream response in chunks
+        chunk_size = 40
+        for i in range(0, len(response_text), chunk_size):
+            chunk = response_text[i:i+chunk_size]
+            yield chunk
+            await asyncio.sleep(0.08)  # Small delay for streaming effect
                 
     except Exception as e:
         error_msg = f"Error: {str(e)}"
@@ -951,8 +896,8 @@ async def toggle_mcp_server(server_name: str, request: ToggleRequest):
     # Save to configuration file
     save_mcp_config(mcp_servers)
     
-    # Update MCP client active state and refresh agent cache
-    mcp_manager.set_client_active(server_name, enabled)
+    # Update MCP client active state and refresh agent cache; deactivating waits for calls in flight
+    await asyncio.get_running_loop().run_in_executor(None, mcp_manager.set_client_active, server_name, enabled)
     refresh_agents()
     
     action = "enabled" if enabled else "disabled"
@@ -960,14 +905,63 @@ async def toggle_mcp_server(server_name: str, request: ToggleRequest):
     
     return {"success": True, "server": server_name, "enabled": enabled}
 
+@app.get("/mcp/pool")
+async def get_mcp_pool_status():
+    """Get the state of the pooled MCP server processes"""
+    return mcp_manager.get_pool_status()
+
+@app.post("/mcp/pool/health")
+async def check_mcp_pool_health():
+    """Run a health check now, restarting any unhealthy pooled servers"""
+    results = await asyncio.get_running_loop().run_in_executor(None, mcp_manager.check_health)
+    return {"healthy": results, "pool": mcp_manager.get_pool_status()}
+
 @app.get("/mcp/logs")
 async def get_mcp_logs():
-    return server_logs
+    return log_store.snapshot()
+
+@app.get("/mcp/logs/page")
+async def get_mcp_logs_page(cursor: int = 0, server: Optional[str] = None, level: Optional[str] = None, limit: int = 200):
+    """Get log entries newer than a cursor, oldest first"""
+    entries, next_cursor = log_store.since(cursor, server=server, level=level, limit=min(limit, 1000))
+    return {"logs": entries, "cursor": next_cursor, "has_more": len(entries) == min(limit, 1000)}
+
+@app.get("/mcp/logs/stream")
+async def stream_mcp_logs(request: Request, cursor: Optional[int] = None, server: Optional[str] = None,
+                          level: Optional[str] = None, limit: int = 200):
+    """Stream log entries as Server-Sent Events, starting after a cursor.
+
+    Each event id is the entry's sequence number, so a reconnecting EventSource
+    resumes from Last-Event-ID without missing or repeating entries.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if cursor is None:
+        cursor = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    page_size = min(limit, 1000)
+
+    async def event_generator():
+        position = cursor
+        while not await request.is_disconnected():
+            entries, position = log_store.since(position, server=server, level=level, limit=page_size)
+            for entry in entries:
+                yield f"id: {entry['seq']}\ndata: {json.dumps(entry, default=str)}\n\n"
+            if len(entries) < page_size and not await log_store.wait_for_new(position, timeout=15):
+                # Keep idle connections open through proxies
+                yield ": keepalive\n\n"
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        }
+    )
 
 @app.delete("/mcp/logs")
 async def clear_mcp_logs():
-    global server_logs
-    server_logs.clear()
+    log_store.clear()
     add_server_log("system", "Logs cleared")
     return {"message": "Logs cleared"}
 
@@ -976,7 +970,8 @@ async def initialize_mcp():
     """Initialize all MCP servers"""
     try:
         initialize_mcp_servers()
-        mcp_manager.initialize_default_clients()
+        # Replacing the clients waits for their calls in flight to finish
+        await asyncio.get_running_loop().run_in_executor(None, mcp_manager.initialize_default_clients)
         refresh_agents()  # This will refresh tools cache and clear agents
         return {"message": "MCP servers initialized", "status": "success"}
     except Exception as e:
@@ -1022,7 +1017,9 @@ async def get_agents_status():
     
     return {
         "session_agents": agents_info,
-        "count": len(session_agents)
+        "count": len(session_agents),
+        "cache": session_agents.stats(),
+        "triage_conversations": len(decision_tree.conversations) if decision_tree else 0
     }
 
 @app.post("/agents/refresh")
@@ -1037,9 +1034,9 @@ async def clear_session(session_id: str):
     global session_agents, decision_tree
     
     # Remove all agents for this session
-    keys_to_remove = [key for key in session_agents.keys() if key.startswith(f"{session_id}:")]
+    keys_to_remove = [key for key in session_agents.keys() + session_agents.spilled_keys() if key.startswith(f"{session_id}:")]
     for key in keys_to_remove:
-        del session_agents[key]
+        session_agents.pop(key)
     
     # Remove triage session if exists
     if decision_tree and session_id in decision_tree.conversations:
@@ -1053,7 +1050,8 @@ async def clear_session(session_id: str):
 async def get_sessions():
     """Get all active sessions"""
     sessions = {}
-    for agent_key in session_agents.keys():
+    # Sessions spilled to disk are still resumable, so list them too
+    for agent_key in dict.fromkeys(session_agents.keys() + session_agents.spilled_keys()):
         session_id, model_id = agent_key.split(":", 1)
         if session_id not in sessions:
             sessions[session_id] = []
@@ -1070,8 +1068,7 @@ async def get_session_history(session_id: str, model_id: str = "us.anthropic.cla
         # Get messages from the actual agent
         messages = get_session_messages_for_ui(session_id, model_id)
         
-        agent_key = f"{session_id}:{model_id}"
-        exists = agent_key in session_agents
+        exists = bool(messages) or f"{session_id}:{model_id}" in session_agents
         
         add_server_log("system", f"Session history request: {session_id} - Found {len(messages)} messages, exists: {exists}")
         
@@ -1291,12 +1288,22 @@ async def startup_event():
     """Initialize MCP servers and decision tree on startup"""
     global decision_tree
     
+    log_store.start()
+    
     try:
         initialize_mcp_servers()
     except Exception as e:
         logger.error(f"Failed to initialize MCP servers: {e}")
         add_server_log("system", f"Startup MCP init failed: {str(e)}")
     
+    # Keep MCP server processes warm for the lifetime of the app
+    try:
+        mcp_manager.start_pool()
+        add_server_log("system", "MCP server pool started", level="info", details={"pool": mcp_manager.get_pool_status()})
+    except Exception as e:
+        logger.error(f"Failed to start MCP server pool: {e}")
+        add_server_log("system", f"MCP pool start failed: {str(e)}", level="error")
+    
     # Initialize decision tree
     try:
         tree_file = os.path.join(os.path.dirname(__file__), 'data/comprehensive_decision_tree.json')
@@ -1310,7 +1317,8 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup MCP servers on shutdown"""
     add_server_log("system", "Shutting down MCP servers...")
-    # Clean shutdown for stdio-based servers happens automatically
+    mcp_manager.shutdown_pool()
+    await log_store.stop()
 
 if __name__ == "__main__":
     import uvicorn
@@ -2,6 +2,7 @@ from mcp.server import FastMCP
 from typing import List, Dict, Optional
 import json
 import os
+import sys
 from datetime import datetime, timedelta
 import calendar as cal
 
@@ -238,5 +239,6 @@ def delete_event(event_id: int) -> str:
     return f"❌ Event with ID {event_id} not found."
 
 if __name__ == "__main__":
-    print("📅 Starting Calendar Integration MCP Server...")
+    # stdout carries the stdio JSON-RPC stream, so banners must go to stderr
+    print("📅 Starting Calendar Integration MCP Server...", file=sys.stderr)
     mcp.run(transport="stdio") 
\ No newline at end of file
@@ -1,36 +1,157 @@
 """
 MCP Client Manager for Strands Agents
 Based on Strands official documentation examples
+
+MCP servers are kept running in a long-lived, supervised pool instead of being
+spawned and torn down for every request. The tools returned by
+``get_all_tools()`` lease their server for the duration of each tool call, so
+the per-server concurrency limit counts calls in flight, not open chats.
+A background supervisor health-checks each server and restarts it in place if
+the stdio session dies, so tools bound to the client keep working. Restarting
+or deactivating a server first drains its leases: new calls wait, and calls in
+flight get up to the lease timeout to finish.
 """
 
 import os
 import json
+import time
+import asyncio
 import logging
-from contextlib import contextmanager, ExitStack
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager, asynccontextmanager
+from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Any
 from mcp import stdio_client, StdioServerParameters
 from strands.tools.mcp import MCPClient
+from strands.types.tools import AgentTool, ToolGenerator, ToolSpec, ToolUse
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get("MCP_POOL_MAX_CONCURRENCY", "4"))
+DEFAULT_HEALTH_CHECK_INTERVAL = float(os.environ.get("MCP_POOL_HEALTH_CHECK_INTERVAL", "30"))
+DEFAULT_HEALTH_CHECK_TIMEOUT = float(os.environ.get("MCP_POOL_HEALTH_CHECK_TIMEOUT", "10"))
+DEFAULT_LEASE_TIMEOUT = float(os.environ.get("MCP_POOL_LEASE_TIMEOUT", "30"))
+
+
+class LeaseTimeoutError(RuntimeError):
+    """Raised when a server slot cannot be leased within the timeout"""
+
+
+@dataclass
+class PooledServer:
+    """A long-lived MCP client plus its supervision state"""
+    name: str
+    client: MCPClient
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    started: bool = False
+    healthy: bool = False
+    in_use: int = 0
+    draining: bool = False
+    restarts: int = 0
+    leases: int = 0
+    started_at: Optional[float] = None
+    last_health_check: Optional[float] = None
+    last_error: Optional[str] = None
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    slots: threading.BoundedSemaphore = field(default=None, repr=False)
+    changed: threading.Condition = field(default=None, repr=False)
+
+    def __post_init__(self):
+        if self.slots is None:
+            self.slots = threading.BoundedSemaphore(self.max_concurrency)
+        if self.changed is None:
+            # Notified when in_use drops to zero or a drain ends
+            self.changed = threading.Condition(self.lock)
+
+    def status(self) -> Dict[str, Any]:
+        """Serializable view of the server state"""
+        return {
+            "started": self.started,
+            "healthy": self.healthy,
+            "in_use": self.in_use,
+            "draining": self.draining,
+            "max_concurrency": self.max_concurrency,
+            "restarts": self.restarts,
+            "leases": self.leases,
+            "uptime_seconds": round(time.monotonic() - self.started_at, 1) if self.started_at else None,
+            "last_health_check": self.last_health_check,
+            "last_error": self.last_error,
+        }
+
+
+class LeasedMCPTool(AgentTool):
+    """An MCP tool that leases its pooled server for each call instead of for a whole chat turn"""
+
+    def __init__(self, tool: AgentTool, manager: "MCPClientManager", server_name: str):
+        super().__init__()
+        self.tool = tool
+        self.manager = manager
+        self.server_name = server_name
+
+    @property
+    def tool_name(self) -> str:
+        return self.tool.tool_name
+
+    @property
+    def tool_spec(self) -> ToolSpec:
+        return self.tool.tool_spec
+
+    @property
+    def tool_type(self) -> str:
+        return self.tool.tool_type
+
+    async def stream(self, tool_use: ToolUse, invocation_state: Dict[str, Any], **kwargs: Any) -> ToolGenerator:
+        # Events are collected inside the lease: the agent stops iterating at the result,
+        # so a lease held across a yield would only be released when the generator is collected
+        try:
+            async with self.manager.lease_async([self.server_name]) as leased:
+                if not leased:
+                    raise RuntimeError(f"MCP server {self.server_name} is not available")
+                events = [event async for event in self.tool.stream(tool_use, invocation_state, **kwargs)]
+        except Exception as e:
+            logger.error(f"MCP tool {self.tool_name} failed on {self.server_name}: {e}")
+            events = [{
+                "toolUseId": tool_use["toolUseId"],
+                "status": "error",
+                "content": [{"text": f"Error calling {self.tool_name}: {e}"}],
+            }]
+        for event in events:
+            yield event
+
+
 class MCPClientManager:
-    def __init__(self):
+    def __init__(self, health_check_interval: float = DEFAULT_HEALTH_CHECK_INTERVAL,
+                 health_check_timeout: float = DEFAULT_HEALTH_CHECK_TIMEOUT,
+                 drain_timeout: float = DEFAULT_LEASE_TIMEOUT):
         self.clients: Dict[str, MCPClient] = {}
         self.active_clients: List[str] = []
+        self.pool: Dict[str, PooledServer] = {}
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self.drain_timeout = drain_timeout
+        self._supervisor: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._health_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="mcp-health")
         
-    def add_client(self, name: str, client: MCPClient):
+    def add_client(self, name: str, client: MCPClient, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
         """Add an MCP client"""
+        if name in self.pool:
+            self._retire_server(self.pool[name])
         self.clients[name] = client
+        self.pool[name] = PooledServer(name=name, client=client, max_concurrency=max(1, max_concurrency))
         if name not in self.active_clients:
             self.active_clients.append(name)
         logger.info(f"Added MCP client: {name}")
     
     def remove_client(self, name: str):
         """Remove an MCP client"""
-        if name in self.clients:
-            del self.clients[name]
         if name in self.active_clients:
             self.active_clients.remove(name)
+        if name in self.pool:
+            self._retire_server(self.pool.pop(name))
+        if name in self.clients:
+            del self.clients[name]
         logger.info(f"Removed MCP client: {name}")
     
     def get_client(self, name: str) -> Optional[MCPClient]:
@@ -49,6 +170,9 @@ class MCPClientManager:
                 logger.info(f"Activated MCP client: {name}")
             elif not active and name in self.active_clients:
                 self.active_clients.remove(name)
+                # Disabled servers don't need to keep a process around; new calls are
+                # refused now that it is inactive, calls in flight finish first
+                self._retire_server(self.pool[name])
                 logger.info(f"Deactivated MCP client: {name}")
         else:
             logger.warning(f"Client {name} not found")
@@ -60,9 +184,12 @@ class MCPClientManager:
             with open(config_path, 'r') as f:
                 config = json.load(f)
             
-            # Clear existing clients
-            self.clients.clear()
+            # Clear existing clients, stopping any pooled server processes
             self.active_clients.clear()
+            for server in list(self.pool.values()):
+                self._retire_server(server)
+            self.pool.clear()
+            self.clients.clear()
             
             # Get servers config (support both 'servers' and 'mcpServers' keys)
             servers_config = config.get('mcpServers', config.get('servers', {}))
@@ -85,14 +212,15 @@ class MCPClientManager:
                         )
                     )
                     
-                    self.add_client(server_name, mcp_client)
+                    max_concurrency = server_config.get('max_concurrency', DEFAULT_MAX_CONCURRENCY)
+                    self.add_client(server_name, mcp_client, max_concurrency=max_concurrency)
                     
                     # Set active state based on config
                     enabled = server_config.get('enabled', True)
                     if not enabled and server_name in self.active_clients:
                         self.active_clients.remove(server_name)
                     
-                    logger.info(f"Initialized MCP client: {server_name} (enabled: {enabled})")
+                    logger.info(f"Initialized MCP client: {server_name} (enabled: {enabled}, max_concurrency: {max_concurrency})")
                     
                 except Exception as e:
                     logger.error(f"Failed to initialize MCP client {server_name}: {e}")
@@ -102,8 +230,212 @@ class MCPClientManager:
         except Exception as e:
             logger.error(f"Failed to initialize MCP clients: {e}")
     
+    # --- Pool supervision ---
+
+    def _start_server(self, server: PooledServer):
+        """Start the server's stdio session if it isn't running yet"""
+        with server.lock:
+            if server.started:
+                return
+            try:
+                server.client.start()
+                server.started = True
+                server.healthy = True
+                server.started_at = time.monotonic()
+                server.last_error = None
+                logger.info(f"Started pooled MCP server: {server.name}")
+            except Exception as e:
+                server.healthy = False
+                server.last_error = str(e)
+                logger.error(f"Failed to start pooled MCP server {server.name}: {e}")
+                raise
+
+    def _stop_server(self, server: PooledServer):
+        """Stop the server's stdio session, if running"""
+        with server.lock:
+            if not server.started:
+                return
+            try:
+                server.client.stop(None, None, None)
+            except Exception as e:
+                logger.warning(f"Error stopping pooled MCP server {server.name}: {e}")
+            server.started = False
+            server.healthy = False
+            server.started_at = None
+            logger.info(f"Stopped pooled MCP server: {server.name}")
+
+    def _drain(self, server: PooledServer) -> bool:
+        """Hold back new leases on a server and wait up to drain_timeout for the current ones to end"""
+        with server.lock:
+            server.draining = True
+            drained = server.changed.wait_for(lambda: server.in_use == 0, timeout=self.drain_timeout)
+        if not drained:
+            logger.warning(f"MCP server {server.name} still has {server.in_use} call(s) in flight "
+                           f"after {self.drain_timeout}s; stopping it anyway")
+        return drained
+
+    def _end_drain(self, server: PooledServer):
+        with server.lock:
+            server.draining = False
+            server.changed.notify_all()
+
+    def _retire_server(self, server: PooledServer):
+        """Stop a server once its leases have drained"""
+        self._drain(server)
+        try:
+            self._stop_server(server)
+        finally:
+            self._end_drain(server)
+
+    def _restart_server(self, server: PooledServer):
+        """Restart a server in place, after draining its leases, so tools bound to its client stay valid"""
+        logger.warning(f"Restarting pooled MCP server {server.name} (last error: {server.last_error})")
+        self._drain(server)
+        try:
+            self._stop_server(server)
+            server.restarts += 1
+            self._start_server(server)
+        finally:
+            self._end_drain(server)
+
+    def _check_server(self, server: PooledServer) -> bool:
+        """Probe a running server with list_tools, bounded by the health check timeout"""
+        future = self._health_executor.submit(server.client.list_tools_sync)
+        try:
+            future.result(timeout=self.health_check_timeout)
+            server.healthy = True
+        except FutureTimeoutError:
+            server.healthy = False
+            server.last_error = f"health check timed out after {self.health_check_timeout}s"
+        except Exception as e:
+            server.healthy = False
+            server.last_error = str(e)
+        server.last_health_check = time.time()
+        return server.healthy
+
+    def check_health(self) -> Dict[str, bool]:
+        """Health-check every active server, restarting the ones that fail"""
+        results = {}
+        for name in self.get_active_clients():
+            server = self.pool.get(name)
+            if server is None:
+                continue
+            try:
+                if not server.started:
+                    self._start_server(server)
+                elif not self._check_server(server):
+                    self._restart_server(server)
+            except Exception as e:
+                logger.error(f"Health check failed for {name}: {e}")
+            results[name] = server.healthy
+        return results
+
+    def _supervise(self):
+        while not self._stop_event.wait(self.health_check_interval):
+            self.check_health()
+
+    def start_pool(self):
+        """Start all active servers and the background supervisor"""
+        for name in self.get_active_clients():
+            server = self.pool.get(name)
+            if server is None:
+                continue
+            try:
+                self._start_server(server)
+            except Exception:
+                # The supervisor retries on its next pass
+                pass
+        if self._supervisor is None or not self._supervisor.is_alive():
+            self._stop_event.clear()
+            self._supervisor = threading.Thread(target=self._supervise, name="mcp-supervisor", daemon=True)
+            self._supervisor.start()
+        logger.info(f"MCP pool started: {self.get_pool_status()}")
+
+    def shutdown_pool(self):
+        """Stop the supervisor and every pooled server"""
+        self._stop_event.set()
+        if self._supervisor is not None:
+            self._supervisor.join(timeout=self.health_check_timeout)
+            self._supervisor = None
+        for server in list(self.pool.values()):
+            self._stop_server(server)
+        logger.info("MCP pool shut down")
+
+    def get_pool_status(self) -> Dict[str, Dict[str, Any]]:
+        """Get pool state for every configured server"""
+        return {name: server.status() for name, server in self.pool.items()}
+
+    # --- Leases ---
+
+    def _acquire(self, names: List[str], timeout: float) -> List[str]:
+        """Acquire a slot on each named active server, starting it if needed"""
+        acquired = []
+        deadline = time.monotonic() + timeout
+        try:
+            # Sorted order so two concurrent leases can't deadlock each other
+            for name in sorted(names):
+                server = self.pool.get(name)
+                if server is None or name not in self.active_clients:
+                    continue
+                if not server.slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                    raise LeaseTimeoutError(f"Timed out waiting for a free slot on MCP server {name}")
+                with server.lock:
+                    # A server being restarted or stopped takes no new leases until that is done
+                    if not server.changed.wait_for(lambda: not server.draining,
+                                                   timeout=max(0.0, deadline - time.monotonic())):
+                        server.slots.release()
+                        raise LeaseTimeoutError(f"Timed out waiting for MCP server {name} to restart")
+                    if name not in self.active_clients:
+                        server.slots.release()
+                        continue
+                    server.in_use += 1
+                    server.leases += 1
+                acquired.append(name)
+                try:
+                    self._start_server(server)
+                except Exception as e:
+                    logger.error(f"Failed to lease {name}: {e}")
+                    self._release([name])
+                    acquired.remove(name)
+        except BaseException:
+            self._release(acquired)
+            raise
+        return acquired
+
+    def _release(self, names: List[str]):
+        for name in names:
+            server = self.pool.get(name)
+            if server is None:
+                continue
+            with server.lock:
+                server.in_use -= 1
+                if server.in_use == 0:
+                    server.changed.notify_all()
+            server.slots.release()
+
+    @contextmanager
+    def lease(self, names: Optional[List[str]] = None, timeout: float = DEFAULT_LEASE_TIMEOUT):
+        """Borrow running servers (all active ones by default) for the duration of a call"""
+        leased = self._acquire(names if names is not None else self.get_active_clients(), timeout)
+        try:
+            yield leased
+        finally:
+            self._release(leased)
+
+    @asynccontextmanager
+    async def lease_async(self, names: Optional[List[str]] = None, timeout: float = DEFAULT_LEASE_TIMEOUT):
+        """Async variant of lease() that waits for slots without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        leased = await loop.run_in_executor(
+            None, self._acquire, names if names is not None else self.get_active_clients(), timeout
+        )
+        try:
+            yield leased
+        finally:
+            self._release(leased)
+
     def get_all_tools(self, active_only: bool = True) -> List[Any]:
-        """Get all tools from active MCP clients"""
+        """Get all tools from active MCP clients, each leasing its server per call"""
         all_tools = []
         
         clients_to_use = self.active_clients if active_only else list(self.clients.keys())
@@ -115,11 +447,13 @@ class MCPClientManager:
             client = self.clients[client_name]
             
             try:
-                # Use client in context to get tools (Strands way)
-                with client:
+                # Tools stay bound to the pooled client, so they remain usable after this lease
+                with self.lease([client_name]) as leased:
+                    if not leased:
+                        continue
                     tools = client.list_tools_sync()
                     if tools:
-                        all_tools.extend(tools)
+                        all_tools.extend(LeasedMCPTool(tool, self, client_name) for tool in tools)
                         logger.info(f"Loaded {len(tools)} tools from {client_name}")
             except Exception as e:
                 logger.error(f"Error loading tools from {client_name}: {e}")
@@ -128,20 +462,8 @@ class MCPClientManager:
     
     @contextmanager
     def get_active_context(self):
-        """Get context manager for all active MCP clients"""
-        # Use ExitStack to manage multiple context managers
-        with ExitStack() as stack:
-            contexts = []
-            
-            for client_name in self.active_clients:
-                if client_name in self.clients:
-                    try:
-                        # Enter context for each client
-                        stack.enter_context(self.clients[client_name])
-                        contexts.append(client_name)
-                    except Exception as e:
-                        logger.error(f"Failed to enter context for {client_name}: {e}")
-            
+        """Get context manager for all active MCP clients (kept for backwards compatibility, leases from the pool)"""
+        with self.lease() as contexts:
             logger.info(f"Entering context with active clients: {contexts}")
             yield contexts
 
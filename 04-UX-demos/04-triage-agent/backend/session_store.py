@@ -0,0 +1,348 @@
+"""
+Bounded session-agent store for the triage backend
+
+Keeps one Strands Agent per ``session_id:model_id`` key, evicting the least
+recently used sessions when the store exceeds its session count or its
+estimated message byte budget, and any session idle for longer than the TTL.
+Evicted sessions can optionally be spilled to a local directory as JSON so
+their message history is rehydrated into a fresh agent on the next request.
+Spill files are written outside the store lock and named after their key, so
+listing spilled sessions never opens them.
+"""
+
+import os
+import json
+import time
+import base64
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SESSIONS = int(os.environ.get("SESSION_STORE_MAX_SESSIONS", "200"))
+DEFAULT_MAX_BYTES = int(os.environ.get("SESSION_STORE_MAX_BYTES", str(256 * 1024 * 1024)))
+DEFAULT_IDLE_TTL = float(os.environ.get("SESSION_STORE_IDLE_TTL", "3600"))
+DEFAULT_SPILL_DIR = os.environ.get("SESSION_STORE_SPILL_DIR") or None
+
+# Keys are stored base64url-encoded in the spill file name; longer ones fall back to a hash
+MAX_ENCODED_KEY_CHARS = 200
+
+
+def estimate_message_bytes(value: Any) -> int:
+    """Rough in-memory size of a Strands message list (text and binary payloads dominate)"""
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(str(k)) + estimate_message_bytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_message_bytes(v) for v in value)
+    return 8
+
+
+def _encode_binary(value: Any) -> Any:
+    # Image content blocks carry raw bytes, which JSON can't represent directly
+    if isinstance(value, (bytes, bytearray)):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    return str(value)
+
+
+def _decode_binary(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1 and "__bytes__" in obj:
+        return base64.b64decode(obj["__bytes__"])
+    return obj
+
+
+@dataclass
+class SessionEntry:
+    agent: Any
+    size_bytes: int
+    last_access: float
+    pinned: int = 0
+
+
+class SessionStore:
+    """LRU + idle-TTL cache of session agents with a byte budget and optional disk spill"""
+
+    def __init__(self, max_sessions: int = DEFAULT_MAX_SESSIONS, max_bytes: int = DEFAULT_MAX_BYTES,
+                 idle_ttl: float = DEFAULT_IDLE_TTL, spill_dir: Optional[str] = DEFAULT_SPILL_DIR):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.spill_dir = spill_dir
+        self._entries: "OrderedDict[str, SessionEntry]" = OrderedDict()
+        # Evicted sessions whose spill file is still being written, by key
+        self._spilling: Dict[str, SessionEntry] = {}
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.counters = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "evictions_lru": 0,
+            "evictions_ttl": 0,
+            "evictions_bytes": 0,
+            "spills": 0,
+            "rehydrations": 0,
+        }
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    # --- Dict-like access ---
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._entries.keys())
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        with self._lock:
+            return iter([(key, entry.agent) for key, entry in self._entries.items()])
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached agent, counting a hit or miss and refreshing its recency"""
+        with self._lock:
+            evicted = self._expire_idle()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.counters["misses"] += 1
+            else:
+                self.counters["hits"] += 1
+                entry.last_access = time.monotonic()
+                self._entries.move_to_end(key)
+        self._write_spills(evicted)
+        return entry.agent if entry else None
+
+    def put(self, key: str, agent: Any):
+        """Insert or replace a session agent, evicting others if over budget"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            size = estimate_message_bytes(getattr(agent, "messages", None) or [])
+            self._entries[key] = SessionEntry(agent=agent, size_bytes=size, last_access=time.monotonic())
+            self._bytes += size
+            evicted = self._expire_idle() + self._enforce_budget()
+        self._write_spills(evicted)
+
+    def pop(self, key: str, discard_spill: bool = True) -> Optional[Any]:
+        """Remove a session; by default also forget any spilled copy"""
+        with self._lock:
+            entry = self._remove(key)
+            if discard_spill:
+                self._spilling.pop(key, None)
+        if discard_spill:
+            self._delete_spill(key)
+        return entry.agent if entry else None
+
+    def clear(self, spill: bool = False) -> int:
+        """Drop every cached session, spilling them first if requested and enabled"""
+        with self._lock:
+            keys = list(self._entries.keys())
+            evicted = [(key, self._remove(key)) for key in keys]
+            if spill:
+                self._spilling.update(evicted)
+        if spill:
+            self._write_spills(evicted)
+        return len(keys)
+
+    # --- Usage tracking ---
+
+    def pin(self, key: str):
+        """Protect a session from eviction while a request is using it"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                entry.pinned += 1
+
+    def unpin(self, key: str):
+        """Release a pin and re-account the session's size after its turn"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.pinned = max(0, entry.pinned - 1)
+            size = estimate_message_bytes(getattr(entry.agent, "messages", None) or [])
+            self._bytes += size - entry.size_bytes
+            entry.size_bytes = size
+            entry.last_access = time.monotonic()
+            evicted = self._enforce_budget()
+        self._write_spills(evicted)
+
+    # --- Spill and rehydration ---
+
+    def restore_messages(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Load and remove the spilled message history for a session, if any"""
+        with self._lock:
+            # Still being written: take the messages and let the writer discard its file
+            entry = self._spilling.pop(key, None)
+            if entry is not None:
+                self.counters["rehydrations"] += 1
+                return getattr(entry.agent, "messages", None) or []
+        path = self._spill_path(key)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                messages = json.load(f, object_hook=_decode_binary)["messages"]
+            os.remove(path)
+            with self._lock:
+                self.counters["rehydrations"] += 1
+            logger.info(f"Rehydrated session {key} with {len(messages)} messages")
+            return messages
+        except Exception as e:
+            logger.error(f"Failed to rehydrate session {key}: {e}")
+            return None
+
+    def get_messages(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Read a session's messages from memory or its spill file without touching counters"""
+        with self._lock:
+            entry = self._entries.get(key) or self._spilling.get(key)
+            if entry is not None:
+                return getattr(entry.agent, "messages", None) or []
+        path = self._spill_path(key)
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    return json.load(f, object_hook=_decode_binary)["messages"]
+            except Exception as e:
+                logger.error(f"Failed to read spilled session {key}: {e}")
+        return None
+
+    def spilled_keys(self) -> List[str]:
+        """Keys of sessions currently spilled to disk"""
+        if not self.spill_dir or not os.path.isdir(self.spill_dir):
+            return []
+        with self._lock:
+            keys = list(self._spilling.keys())
+        for name in os.listdir(self.spill_dir):
+            if name.startswith("k-") and name.endswith(".json"):
+                encoded = name[2:-5]
+                try:
+                    keys.append(base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)).decode("utf-8"))
+                except ValueError:
+                    continue
+            elif name.startswith("h-") and name.endswith(".json"):
+                # Only keys too long for a file name need the file itself opened
+                try:
+                    with open(os.path.join(self.spill_dir, name), "r") as f:
+                        keys.append(json.load(f)["key"])
+                except Exception:
+                    continue
+        return list(dict.fromkeys(keys))
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and current occupancy"""
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_rate": round(self.counters["hits"] / lookups, 3) if lookups else None,
+                "sessions": len(self._entries),
+                "bytes": self._bytes,
+                "max_sessions": self.max_sessions,
+                "max_bytes": self.max_bytes,
+                "idle_ttl_seconds": self.idle_ttl,
+                "spill_enabled": bool(self.spill_dir),
+            }
+
+    # --- Internals ---
+
+    def _remove(self, key: str) -> Optional[SessionEntry]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size_bytes
+        return entry
+
+    def _evict(self, key: str, reason: str) -> Tuple[str, SessionEntry]:
+        """Remove a session under the lock; the caller spills it after releasing the lock"""
+        entry = self._remove(key)
+        self.counters["evictions"] += 1
+        self.counters[f"evictions_{reason}"] += 1
+        self._spilling[key] = entry
+        logger.info(f"Evicted session {key} ({reason}, {entry.size_bytes} bytes)")
+        return key, entry
+
+    def _expire_idle(self) -> List[Tuple[str, SessionEntry]]:
+        evicted = []
+        if not self.idle_ttl:
+            return evicted
+        cutoff = time.monotonic() - self.idle_ttl
+        # Entries are kept in recency order, so expired ones are at the front
+        for key, entry in list(self._entries.items()):
+            if entry.last_access > cutoff:
+                break
+            if not entry.pinned:
+                evicted.append(self._evict(key, "ttl"))
+        return evicted
+
+    def _enforce_budget(self) -> List[Tuple[str, SessionEntry]]:
+        evicted = []
+        # The most recently used session is never evicted, even if it alone exceeds the budget
+        for key in list(self._entries.keys())[:-1]:
+            over_count = len(self._entries) > self.max_sessions
+            over_bytes = self._bytes > self.max_bytes
+            if not (over_count or over_bytes):
+                break
+            if self._entries[key].pinned:
+                continue
+            evicted.append(self._evict(key, "lru" if over_count else "bytes"))
+        return evicted
+
+    def _spill_path(self, key: str) -> Optional[str]:
+        if not self.spill_dir:
+            return None
+        encoded = base64.urlsafe_b64encode(key.encode("utf-8")).decode("ascii").rstrip("=")
+        if len(encoded) <= MAX_ENCODED_KEY_CHARS:
+            return os.path.join(self.spill_dir, f"k-{encoded}.json")
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.spill_dir, f"h-{digest}.json")
+
+    def _write_spills(self, evicted: List[Tuple[str, SessionEntry]]):
+        for key, entry in evicted:
+            self._spill(key, entry)
+
+    def _spill(self, key: str, entry: SessionEntry):
+        """Write an evicted session to disk; called without the lock held"""
+        path = self._spill_path(key)
+        messages = getattr(entry.agent, "messages", None)
+        if not path or not messages:
+            with self._lock:
+                if self._spilling.get(key) is entry:
+                    del self._spilling[key]
+            return
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"key": key, "messages": messages}, f, default=_encode_binary)
+            with self._lock:
+                # Rehydrated or discarded while it was being written: the file is stale
+                if self._spilling.get(key) is not entry:
+                    os.remove(tmp_path)
+                    return
+                os.replace(tmp_path, path)
+                del self._spilling[key]
+                self.counters["spills"] += 1
+        except Exception as e:
+            logger.error(f"Failed to spill session {key}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            with self._lock:
+                if self._spilling.get(key) is entry:
+                    del self._spilling[key]
+
+    def _delete_spill(self, key: str):
+        path = self._spill_path(key)
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Failed to delete spilled session {key}: {e}")
@@ -0,0 +1,151 @@
+"""
+Incremental scanner for the XML control tags the triage agent embeds in its answers
+
+The model ends each answer with a ``<decision_tree_status ... />`` tag and an
+``<available_options>...</available_options>`` block. Instead of re-running a
+regex over the whole accumulated response on every streamed chunk, the scanner
+is fed each chunk once and only buffers text that may belong to a control tag,
+so the work per response is linear in its length. A tag is reported as soon as
+it closes, even if it was split across any number of chunks.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+ATTRIBUTE_PATTERN = re.compile(r'([\w-]+)\s*=\s*"([^"]*)"')
+OPTION_PATTERN = re.compile(r'<option\b([^>]*)>(.*?)</option>', re.DOTALL)
+
+# Tag name -> True if the tag wraps a body closed by </name>, False if it ends at the first '>'
+DEFAULT_TAGS: Dict[str, bool] = {
+    "decision_tree_status": False,
+    "available_options": True,
+}
+
+
+@dataclass
+class ControlTag:
+    """A completed control tag found in the stream"""
+    name: str
+    attributes: Dict[str, str] = field(default_factory=dict)
+    body: str = ""
+    raw: str = ""
+
+    def options(self) -> List[Dict[str, str]]:
+        """Parse the <option> children of an available_options block"""
+        options = []
+        for attrs, text in OPTION_PATTERN.findall(self.body):
+            text = text.strip()
+            if text:
+                urgency = dict(ATTRIBUTE_PATTERN.findall(attrs)).get("urgency", "normal")
+                options.append({"text": text, "urgency": urgency})
+        return options
+
+
+class ControlTagScanner:
+    """Single-pass state machine that extracts control tags from streamed text"""
+
+    def __init__(self, tags: Optional[Dict[str, bool]] = None, max_tag_chars: int = 65536):
+        self.tags = dict(tags or DEFAULT_TAGS)
+        self.max_tag_chars = max_tag_chars
+        self._buffer = ""       # unresolved text, always starting at a candidate '<'
+        self._tag: Optional[str] = None  # tag currently being read, None while in plain text
+        self._opener_end = -1   # offset of the '>' ending the current opening tag, once seen
+        self._scan_from = 0     # offset in _buffer where the terminator search resumes
+        self.chars_scanned = 0
+
+    def feed(self, chunk: str) -> List[ControlTag]:
+        """Consume the next chunk and return every tag that closed within it"""
+        self.chars_scanned += len(chunk)
+        self._buffer += chunk
+        found = []
+
+        while self._buffer:
+            if self._tag is None:
+                if not self._find_tag_start():
+                    break
+            tag = self._read_tag()
+            if tag is not None:
+                found.append(tag)
+            elif self._tag is not None:
+                break  # tag still open, wait for the next chunk
+
+        return found
+
+    def reset(self):
+        """Drop any partially read tag"""
+        self._buffer = ""
+        self._tag = None
+        self._opener_end = -1
+        self._scan_from = 0
+
+    def _find_tag_start(self) -> bool:
+        """Advance to the next opening control tag; keep only a possible partial opener"""
+        position = 0
+        while True:
+            lt = self._buffer.find("<", position)
+            if lt == -1:
+                self._buffer = ""
+                return False
+
+            remaining = len(self._buffer) - lt - 1
+            partial = False
+            for name in self.tags:
+                if self._buffer.startswith(name, lt + 1):
+                    if remaining == len(name):
+                        partial = True  # need the next char to tell <name> from <name_other>
+                    elif self._buffer[lt + 1 + len(name)] in " \t\r\n/>":
+                        self._buffer = self._buffer[lt:]
+                        self._tag = name
+                        self._scan_from = len(name) + 1
+                        return True
+                elif remaining < len(name) and name.startswith(self._buffer[lt + 1:]):
+                    partial = True
+
+            if partial:
+                self._buffer = self._buffer[lt:]
+                return False
+            position = lt + 1
+
+    def _read_tag(self) -> Optional[ControlTag]:
+        """Finish the current tag if its terminator has arrived"""
+        name = self._tag
+        if self._opener_end == -1:
+            self._opener_end = self._buffer.find(">", self._scan_from)
+            if self._opener_end == -1:
+                return self._wait_for_more()
+            self._scan_from = self._opener_end + 1
+
+        opener_end = self._opener_end
+        opener = self._buffer[:opener_end + 1]
+        attributes = dict(ATTRIBUTE_PATTERN.findall(opener))
+
+        if self.tags[name] and not opener.endswith("/>"):
+            closer = f"</{name}>"
+            start = max(opener_end + 1, self._scan_from - len(closer) + 1)
+            close_at = self._buffer.find(closer, start)
+            if close_at == -1:
+                return self._wait_for_more()
+            end = close_at + len(closer)
+            body = self._buffer[opener_end + 1:close_at]
+        else:
+            end = opener_end + 1
+            body = ""
+
+        tag = ControlTag(name=name, attributes=attributes, body=body, raw=self._buffer[:end])
+        self._buffer = self._buffer[end:]
+        self._tag = None
+        self._opener_end = -1
+        self._scan_from = 0
+        return tag
+
+    def _wait_for_more(self) -> None:
+        # Everything read so far has been searched; resume after it next time
+        self._scan_from = len(self._buffer)
+        if len(self._buffer) > self.max_tag_chars:
+            # Not a real control tag (or a runaway one) - skip its opening '<' and rescan
+            self._buffer = self._buffer[1:]
+            self._tag = None
+            self._opener_end = -1
+            self._scan_from = 0
+        return None
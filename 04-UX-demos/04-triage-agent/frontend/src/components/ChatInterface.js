@@ -89,27 +89,6 @@ const ChatInterface = ({
     textarea.style.height = newHeight + 'px';
   };
 
-  // Parse XML options from assistant response - streaming version
-  const parseQuickOptionsStreaming = (content) => {
-    const options = [];
-    try {
-      // Look for any <option tags, even incomplete ones
-      const optionMatches = content.matchAll(/<option[^>]*urgency="([^"]*)"[^>]*>([^<]*)/g);
-      
-      for (const match of optionMatches) {
-        const urgency = match[1];
-        let text = match[2].trim();
-        
-        if (text && text.length > 2) {
-          options.push({ text, urgency });
-        }
-      }
-    } catch (error) {
-      console.error('Error parsing streaming options:', error);
-    }
-    return options;
-  };
-
   // Parse XML options from completed response
   const parseQuickOptionsRealTime = (content) => {
     const options = [];
@@ -431,12 +410,12 @@ const ChatInterface = ({
                     : msg
                 ));
                 
-                // Real-time option parsing during streaming
-                const currentOptions = parseQuickOptionsStreaming(accumulatedContent);
+              } else if (parsed.type === 'available_options') {
+                // Options block parsed by the backend as soon as it closes
+                const currentOptions = parsed.options.filter(option => option.text.length > 2);
                 if (currentOptions.length > 0) {
                   setQuickOptions(currentOptions);
                 }
-                
               } else if (parsed.type === 'tool_use') {
                 // Show tool usage with input details
                 const toolInfo = parsed.input ? ` (${JSON.stringify(parsed.input).slice(0, 50)}...)` : '';
@@ -1,6 +1,9 @@
 import React, { useState, useEffect, useRef } from 'react';
 import './RightSidebar.css';
 
+// Matches the backend's per-server ring buffer capacity
+const MAX_LOGS_PER_SERVER = 50;
+
 const RightSidebar = ({ onClose }) => {
   const [logs, setLogs] = useState({});
   const [selectedServer, setSelectedServer] = useState('All Servers');
@@ -12,10 +15,29 @@ const RightSidebar = ({ onClose }) => {
   const scrollTimeoutRef = useRef(null);
 
   useEffect(() => {
-    fetchLogs();
-    const interval = setInterval(fetchLogs, 3000); // Increased to 3 seconds
-    return () => clearInterval(interval);
-  }, []); // eslint-disable-line react-hooks/exhaustive-deps
+    // Stream new log entries instead of polling the whole list.
+    // EventSource reconnects on its own and resumes after the last received entry.
+    const apiBase = window.location.hostname === 'localhost' ? 'http://localhost:8000' : '';
+    const source = new EventSource(`${apiBase}/mcp/logs/stream`);
+
+    source.onmessage = (event) => {
+      try {
+        const entry = JSON.parse(event.data);
+        setLogs(prev => ({
+          ...prev,
+          [entry.server]: [...(prev[entry.server] || []), entry].slice(-MAX_LOGS_PER_SERVER)
+        }));
+      } catch (error) {
+        console.error('Error parsing log entry:', error);
+      }
+    };
+
+    source.onerror = (error) => {
+      console.error('Log stream error:', error);
+    };
+
+    return () => source.close();
+  }, []);
 
     // CloudWatch-style tail to bottom
   const tailToBottom = () => {
@@ -74,26 +96,6 @@ const RightSidebar = ({ onClose }) => {
     }
   };
 
-  const fetchLogs = async () => {
-    try {
-      const apiBase = window.location.hostname === 'localhost' ? 'http://localhost:8000' : '';
-      const response = await fetch(`${apiBase}/mcp/logs`);
-      if (response.ok) {
-        const data = await response.json();
-        
-        // Only update if logs have actually changed
-        const currentLogsString = JSON.stringify(logs);
-        const newLogsString = JSON.stringify(data);
-        
-        if (currentLogsString !== newLogsString) {
-          setLogs(data);
-        }
-      }
-    } catch (error) {
-      console.error('Error fetching logs:', error);
-    }
-  };
-
   const clearLogs = async () => {
     try {
           const apiBase = window.location.hostname === 'localhost' ? 'http://localhost:8000' : '';
@@ -0,0 +1,155 @@
+"""
+Benchmark: fixed-interval Athena polling vs the async Athena executor
+
+Runs against a local stub of the Athena API that takes a fixed time to run
+each query and returns a multi-page result set. Each simulated question runs
+the same SQL several times, the way the agent re-runs a query while it
+self-corrects its answer, and the questions run concurrently.
+
+    before: new client per call, get_query_execution every 2 seconds,
+            only the first get_query_results page
+    after:  AthenaExecutor with exponential-backoff polling, NextToken
+            pagination and the local result-set cache
+
+Usage (from the agent directory):
+    python benchmarks/bench_athena_executor.py --questions 10 --attempts 3
+"""
+
+import os
+import sys
+import time
+import uuid
+import asyncio
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.tools.athena_executor import AthenaExecutor
+
+
+class StubAthenaClient:
+    """Minimal in-process stand-in for the boto3 Athena client"""
+
+    def __init__(self, runtime: float, rows: int):
+        self.runtime = runtime
+        self.rows = rows
+        self.started = 0
+        self.calls = 0
+        self._executions = {}
+        self._lock = threading.Lock()
+
+    def start_query_execution(self, QueryString, **kwargs):
+        with self._lock:
+            self.started += 1
+            self.calls += 1
+            execution_id = str(uuid.uuid4())
+            self._executions[execution_id] = {"started": time.monotonic(), "state": None}
+        return {"QueryExecutionId": execution_id}
+
+    def get_query_execution(self, QueryExecutionId):
+        with self._lock:
+            self.calls += 1
+            execution = self._executions[QueryExecutionId]
+        state = execution["state"] or (
+            "SUCCEEDED" if time.monotonic() - execution["started"] >= self.runtime else "RUNNING"
+        )
+        return {"QueryExecution": {"QueryExecutionId": QueryExecutionId, "Status": {"State": state}}}
+
+    def stop_query_execution(self, QueryExecutionId):
+        with self._lock:
+            self._executions[QueryExecutionId]["state"] = "CANCELLED"
+        return {}
+
+    def get_query_results(self, QueryExecutionId, MaxResults=1000, NextToken=None):
+        with self._lock:
+            self.calls += 1
+        start = int(NextToken or 0)
+        # Row 0 is the header, as in Athena
+        total = self.rows + 1
+        rows = []
+        for i in range(start, min(start + MaxResults, total)):
+            if i == 0:
+                rows.append({"Data": [{"VarCharValue": "client_id"}, {"VarCharValue": "value"}]})
+            else:
+                rows.append({"Data": [{"VarCharValue": str(i)}, {"VarCharValue": f"{i * 1.5:.2f}"}]})
+        page = {
+            "ResultSet": {
+                "Rows": rows,
+                "ResultSetMetadata": {"ColumnInfo": [{"Label": "client_id"}, {"Label": "value"}]}
+            }
+        }
+        if start + MaxResults < total:
+            page["NextToken"] = str(start + MaxResults)
+        return page
+
+
+def run_before(client: StubAthenaClient, query: str) -> int:
+    response = client.start_query_execution(QueryString=query)
+    query_execution_id = response["QueryExecutionId"]
+    max_retries = 20
+    retries = 0
+    while retries < max_retries:
+        response = client.get_query_execution(QueryExecutionId=query_execution_id)
+        state = response["QueryExecution"]["Status"]["State"]
+        if state in ("SUCCEEDED", "FAILED", "CANCELLED"):
+            break
+        time.sleep(2)
+        retries += 1
+    results = client.get_query_results(QueryExecutionId=query_execution_id)
+    return len(results["ResultSet"]["Rows"][1:])
+
+
+def bench_before(args) -> tuple:
+    client = StubAthenaClient(args.runtime, args.rows)
+
+    def question(i):
+        # The SQL text is identical across attempts, only its formatting differs
+        return [run_before(client, f"SELECT client_id, value FROM t{i}" + ";" * attempt)
+                for attempt in range(args.attempts)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.questions) as pool:
+        rows = [r for answers in pool.map(question, range(args.questions)) for r in answers]
+    return time.perf_counter() - start, client, rows
+
+
+def bench_after(args) -> tuple:
+    client = StubAthenaClient(args.runtime, args.rows)
+    executor = AthenaExecutor(database="bench", output_location="s3://bench/", client=client)
+
+    async def question(i):
+        return [(await executor.execute(f"SELECT client_id, value FROM t{i}" + ";" * attempt))["row_count"]
+                for attempt in range(args.attempts)]
+
+    async def run():
+        return await asyncio.gather(*(question(i) for i in range(args.questions)))
+
+    start = time.perf_counter()
+    rows = [r for answers in asyncio.run(run()) for r in answers]
+    return time.perf_counter() - start, client, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--attempts", type=int, default=3)
+    parser.add_argument("--runtime", type=float, default=0.5, help="Simulated Athena query runtime in seconds")
+    parser.add_argument("--rows", type=int, default=2500)
+    args = parser.parse_args()
+
+    print(f"{args.questions} questions x {args.attempts} attempts, "
+          f"{args.runtime}s query runtime, {args.rows} result rows")
+
+    for label, bench in (("before", bench_before), ("after", bench_after)):
+        elapsed, client, rows = bench(args)
+        print(f"{label:7s} {elapsed:6.2f} s  scans {client.started:3d}  api calls {client.calls:4d}  "
+              f"rows per answer {min(rows)}-{max(rows)}")
+        if label == "before":
+            before = elapsed
+    print(f"speedup: {before / elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark: re-rendering the schema per call vs the precomputed schema catalog
+
+Simulates the get_schema calls an agent makes while answering questions
+(several per question) and measures time per call and the size of the schema
+text placed in the prompt.
+
+    before: _format_schema_from_data() string concatenation of the whole
+            documented schema on every call
+    after:  SchemaCatalog introspected once from data/wealthmanagement.db,
+            returning the precomputed rendering of the tables relevant to the
+            question
+
+Usage (from the agent directory):
+    python benchmarks/bench_schema_catalog.py --calls 10000
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.tools.knowledge_base_tool import WEALTH_MANAGEMENT_SCHEMA
+from src.tools.schema_catalog import SchemaCatalog
+
+QUESTIONS = [
+    "How many clients do we have?",
+    "Show me all conservative clients",
+    "What's the total investment amount for each risk tolerance level?",
+    "Show portfolio performance above benchmark for 2023",
+    "Which asset types have the largest gain in current value?",
+]
+
+
+def format_before(schema_data) -> str:
+    result = "Database: wealthmanagement-db\n\n"
+    for table_info in schema_data:
+        table = f"Table: {table_info['table_name']}\n"
+        table += f"Description: {table_info['table_description']}\n"
+        table += "Columns:\n"
+        for column in table_info["columns"]:
+            table += f"- {column['Name']} ({column['Type']}): {column['Comment']}\n"
+        if "relationships" in table_info:
+            table += "Relationships:\n"
+            if "primary_key" in table_info["relationships"]:
+                pk_cols = [pk["column_name"] for pk in table_info["relationships"]["primary_key"]]
+                table += f"- Primary Key: {', '.join(pk_cols)}\n"
+            if "foreign_keys" in table_info["relationships"]:
+                for fk in table_info["relationships"]["foreign_keys"]:
+                    table += f"- Foreign Key: {fk['join_on_column']} references {fk['table_name']}\n"
+        result += table + "\n\n"
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--database", default="./data/wealthmanagement.db")
+    parser.add_argument("--calls", type=int, default=10000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    catalog = SchemaCatalog.from_sqlite(args.database, WEALTH_MANAGEMENT_SCHEMA)
+    build = time.perf_counter() - start
+    print(f"catalog built in {build * 1000:.2f} ms ({len(catalog.tables)} tables, {len(catalog.index)} index terms)")
+
+    start = time.perf_counter()
+    before_chars = 0
+    for i in range(args.calls):
+        before_chars += len(format_before(WEALTH_MANAGEMENT_SCHEMA))
+    before = time.perf_counter() - start
+
+    start = time.perf_counter()
+    full_chars = 0
+    for i in range(args.calls):
+        full_chars += len(catalog.render())
+    full = time.perf_counter() - start
+
+    start = time.perf_counter()
+    after_chars = 0
+    for i in range(args.calls):
+        after_chars += len(catalog.render(question=QUESTIONS[i % len(QUESTIONS)]))
+    after = time.perf_counter() - start
+
+    print(f"{'before':17s}{before / args.calls * 1e6:7.2f} us/call  {before_chars / args.calls:7.0f} chars/call")
+    print(f"{'after (all)':17s}{full / args.calls * 1e6:7.2f} us/call  {full_chars / args.calls:7.0f} chars/call")
+    print(f"{'after (question)':17s}{after / args.calls * 1e6:7.2f} us/call  {after_chars / args.calls:7.0f} chars/call")
+    print(f"speedup: {before / full:.1f}x for the whole schema, {before / after:.1f}x per question; "
+          f"prompt schema text {100 * (1 - after_chars / before_chars):.0f}% smaller")
+
+    for question in QUESTIONS:
+        print(f"  {question!r}: {[name for name, _ in catalog.relevant_tables(question)]}")
+
+
+if __name__ == "__main__":
+    main()
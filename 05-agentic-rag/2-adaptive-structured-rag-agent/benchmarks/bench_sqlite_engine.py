@@ -0,0 +1,100 @@
+"""
+Benchmark: per-call sqlite3.connect vs the pooled read-only query engine
+
+Runs a mix of the queries the agent generates for the wealth management
+schema against data/wealthmanagement.db from a thread pool, the way concurrent
+agent tool calls hit run_sqlite_query.
+
+    before: re-read config, stat the file, open a new connection, fetchall()
+            and build a dict per row by looking up each column by name
+    after:  SQLiteQueryEngine.execute() on the calling thread's pooled
+            read-only connection, returning column-oriented results
+
+Usage (from the agent directory):
+    python benchmarks/bench_sqlite_engine.py --queries 1000 --workers 32
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import statistics
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.tools.sqlite_engine import SQLiteQueryEngine
+
+QUERIES = [
+    "SELECT COUNT(*) AS client_count FROM client",
+    "SELECT * FROM client WHERE risk_tolerance = 'Conservative'",
+    "SELECT c.risk_tolerance, SUM(i.investment_amount) AS total_investment "
+    "FROM client c JOIN investment i ON c.client_id = i.client_id GROUP BY c.risk_tolerance",
+    "SELECT c.first_name, c.last_name, p.year, p.total_return_percentage, p.benchmark_return "
+    "FROM client c JOIN portfolio_performance p ON c.client_id = p.client_id "
+    "WHERE p.year = 2023 AND p.total_return_percentage > p.benchmark_return",
+    "SELECT asset_type, AVG(current_value - investment_amount) AS avg_gain "
+    "FROM investment GROUP BY asset_type ORDER BY avg_gain DESC",
+]
+
+
+def run_before(database_path: str, query: str) -> int:
+    from config import get_config
+    get_config()
+    if not Path(database_path).exists():
+        raise FileNotFoundError(database_path)
+    with sqlite3.connect(database_path) as conn:
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute(query)
+        rows = cursor.fetchall()
+        columns = [description[0] for description in cursor.description] if cursor.description else []
+        data = [{column: row[column] for column in columns} for row in rows]
+    return len(data)
+
+
+def run_after(engine: SQLiteQueryEngine, query: str) -> int:
+    return engine.execute(query)["row_count"]
+
+
+def bench(label: str, fn, queries: int, workers: int):
+    def timed(i):
+        start = time.perf_counter()
+        rows = fn(QUERIES[i % len(QUERIES)])
+        return time.perf_counter() - start, rows
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(timed, range(queries)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{label:7s} {elapsed * 1000:9.1f} ms total  {queries / elapsed:9.0f} q/s  "
+          f"p50 {p50:6.3f} ms  p99 {p99:6.3f} ms")
+    return elapsed, sum(rows for _, rows in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--database", default="./data/wealthmanagement.db")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"{args.queries} queries, {args.workers} concurrent workers, database {args.database}")
+
+    engine = SQLiteQueryEngine(args.database)
+    before, before_rows = bench("before", lambda q: run_before(args.database, q), args.queries, args.workers)
+    after, after_rows = bench("after", lambda q: run_after(engine, q), args.queries, args.workers)
+    engine.close()
+
+    assert before_rows == after_rows, f"row counts differ: {before_rows} vs {after_rows}"
+    print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
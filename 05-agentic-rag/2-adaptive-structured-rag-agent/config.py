@@ -33,10 +33,20 @@ def get_config() -> Dict[str, Any]:
         # Athena Configuration
         "athena_database": os.environ.get("ATHENA_DATABASE", ""),
         "athena_output_location": os.environ.get("ATHENA_OUTPUT_LOCATION", ""),
+        "athena_workgroup": os.environ.get("ATHENA_WORKGROUP", ""),
+        "athena_result_reuse_minutes": int(os.environ.get("ATHENA_RESULT_REUSE_MINUTES", "60")),
+        "athena_query_timeout": float(os.environ.get("ATHENA_QUERY_TIMEOUT", "300")),
+        "athena_max_rows": int(os.environ.get("ATHENA_MAX_ROWS", "10000")),
+        "athena_result_cache_ttl": float(os.environ.get("ATHENA_RESULT_CACHE_TTL", "300")),
         
         # Knowledge Base Configuration
         "knowledge_base_id": os.environ.get("KNOWLEDGE_BASE_ID", ""),
+        "schema_kb_cache_ttl": float(os.environ.get("SCHEMA_KB_CACHE_TTL", "600")),
 
+        # SQLite Configuration
+        "sqlite_database_path": os.environ.get("SQLITE_DATABASE_PATH", "./data/wealthmanagement.db"),
+        "sqlite_max_rows": int(os.environ.get("SQLITE_MAX_ROWS", "1000")),
+        "sqlite_max_bytes": int(os.environ.get("SQLITE_MAX_BYTES", str(1024 * 1024))),
     }
     
     return config
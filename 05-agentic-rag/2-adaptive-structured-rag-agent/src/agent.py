@@ -8,6 +8,7 @@ from strands import Agent
 from src.tools.knowledge_base_tool import get_schema
 from src.tools.athena_tool import run_athena_query
 from src.tools.sqllite_tool import run_sqlite_query
+from src.tools.schema_catalog import set_catalog_source
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +28,7 @@ def create_nl2sql_agent(environment: str = "local") -> Agent:
     2. Generate a valid SQL query that answers the question
     3. If provided with an error message, correct your SQL query
     4. If you are unable to retrieve the schema fully, call get_schema with bool flag=True
+    5. Pass the user's question to get_schema as question to receive only the relevant tables
     
     When generating SQL:
     - Use standard SQL syntax compatible with Amazon Athena
@@ -43,6 +45,9 @@ def create_nl2sql_agent(environment: str = "local") -> Agent:
     If you receive an error, carefully analyze it and fix your query.
     """
     
+    # Introspect the schema catalog from the same engine the queries run on
+    set_catalog_source(environment)
+
     # Create the agent with tools and system prompt
     tools = [get_schema, run_athena_query] if environment == "athena" else [get_schema, run_sqlite_query]
 
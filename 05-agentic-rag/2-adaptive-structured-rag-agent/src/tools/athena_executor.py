@@ -0,0 +1,410 @@
+"""
+Asynchronous Amazon Athena execution layer shared by the Athena tool.
+
+One boto3 client is shared by every tool call. Query state is polled with
+exponential backoff, and results are read through every ``NextToken`` page as
+column-oriented batches. Queries that time out or whose caller is cancelled
+are stopped on the Athena side. Athena result reuse is requested for each
+read-only query, and successful read-only result sets are also cached
+locally under their normalized SQL text, so an agent retrying the same query
+after a self-correction does not scan the data again. Statements that change
+data or metadata (INSERT, CTAS, DDL, UNLOAD, ...) always run.
+
+The client is injectable, so the executor can run against a local stub of the
+Athena API (see ``benchmarks/bench_athena_executor.py``).
+"""
+import re
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESULT_REUSE_MINUTES = 60
+DEFAULT_TIMEOUT = 300.0
+DEFAULT_MAX_ROWS = 10000
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_CACHE_TTL = 300.0
+DEFAULT_CACHE_SIZE = 128
+
+_WHITESPACE = re.compile(r"\s+")
+_LEADING_COMMENTS = re.compile(r"^(?:\s+|--[^\n]*(?:\n|$)|/\*.*?\*/)+", re.DOTALL)
+_READ_ONLY = re.compile(r"^[(\s]*(?:select|with|show|describe|desc|explain|values)\b", re.IGNORECASE)
+
+
+class AthenaQueryError(Exception):
+    """
+    Raised when an Athena query fails, is cancelled or times out.
+    """
+
+    def __init__(self, message: str, details: Any = None, execution_id: Optional[str] = None):
+        super().__init__(message)
+        self.message = message
+        self.details = details
+        self.execution_id = execution_id
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Normalize SQL text for use as a result cache key.
+
+    Collapses whitespace and drops a trailing semicolon; string literals and
+    identifiers are left untouched, so only formatting differences are ignored.
+
+    Args:
+        query: SQL query string
+
+    Returns:
+        str: Normalized query text
+    """
+    return _WHITESPACE.sub(" ", query).strip().rstrip(";").rstrip()
+
+
+def is_read_only(query: str) -> bool:
+    """
+    Whether a statement only reads (SELECT/WITH/SHOW/DESCRIBE/EXPLAIN/VALUES).
+
+    Only these are cached or reuse previous results; anything else must run every time.
+
+    Args:
+        query: SQL query string
+
+    Returns:
+        bool: True for read-only statements
+    """
+    return bool(_READ_ONLY.match(_LEADING_COMMENTS.sub("", query, count=1)))
+
+
+class AthenaExecutor:
+    """
+    Runs queries on Athena with a shared client, adaptive polling and a result cache.
+    """
+
+    def __init__(
+        self,
+        database: str,
+        output_location: str,
+        region_name: Optional[str] = None,
+        workgroup: Optional[str] = None,
+        client: Any = None,
+        result_reuse_minutes: int = DEFAULT_RESULT_REUSE_MINUTES,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_rows: int = DEFAULT_MAX_ROWS,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        cache_ttl: float = DEFAULT_CACHE_TTL,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        poll_initial: float = 0.2,
+        poll_max: float = 5.0,
+        poll_multiplier: float = 2.0
+    ):
+        """
+        Create an executor for one Athena database.
+
+        Args:
+            database: Athena / Glue database name
+            output_location: S3 location for query results
+            region_name: AWS region used when the client is created
+            workgroup: Optional Athena workgroup
+            client: Optional pre-built Athena client (or a local stub of one)
+            result_reuse_minutes: Maximum age of reused Athena results, 0 to disable reuse
+            timeout: Seconds to wait for a query before cancelling it
+            max_rows: Maximum number of rows returned per query
+            page_size: Rows requested per get_query_results page (at most 1000)
+            cache_ttl: Seconds a locally cached result set stays valid, 0 to disable
+            cache_size: Maximum number of locally cached result sets
+            poll_initial: First polling delay in seconds
+            poll_max: Upper bound of the polling delay in seconds
+            poll_multiplier: Factor applied to the delay after each poll
+        """
+        self.database = database
+        self.output_location = output_location
+        self.region_name = region_name
+        self.workgroup = workgroup
+        self.result_reuse_minutes = result_reuse_minutes
+        self.timeout = timeout
+        self.max_rows = max_rows
+        self.page_size = min(page_size, 1000)
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+        self.poll_multiplier = poll_multiplier
+        self._client = client
+        self._client_lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.counters = {"executions": 0, "polls": 0, "pages": 0, "cache_hits": 0, "reused_results": 0, "cancelled": 0}
+
+    @property
+    def client(self) -> Any:
+        """
+        Shared Athena client, created on first use.
+        """
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    import boto3
+                    self._client = boto3.client('athena', region_name=self.region_name)
+        return self._client
+
+    async def _call(self, method: str, **kwargs) -> Dict[str, Any]:
+        """
+        Run a blocking client call without blocking the event loop.
+        """
+        return await asyncio.to_thread(getattr(self.client, method), **kwargs)
+
+    async def start(self, query: str) -> str:
+        """
+        Submit a query to Athena.
+
+        Args:
+            query: SQL query string to execute
+
+        Returns:
+            str: Query execution ID
+        """
+        request = {
+            "QueryString": query,
+            "QueryExecutionContext": {"Database": self.database},
+            "ResultConfiguration": {"OutputLocation": self.output_location},
+        }
+        if self.workgroup:
+            request["WorkGroup"] = self.workgroup
+        if self.result_reuse_minutes > 0 and is_read_only(query):
+            request["ResultReuseConfiguration"] = {
+                "ResultReuseByAgeConfiguration": {
+                    "Enabled": True,
+                    "MaxAgeInMinutes": self.result_reuse_minutes
+                }
+            }
+
+        response = await self._call("start_query_execution", **request)
+        self.counters["executions"] += 1
+        return response["QueryExecutionId"]
+
+    async def wait(self, execution_id: str) -> Dict[str, Any]:
+        """
+        Poll a query with exponential backoff until it finishes.
+
+        The query is cancelled if it exceeds the timeout or if the waiting
+        task itself is cancelled.
+
+        Args:
+            execution_id: Query execution ID
+
+        Returns:
+            Dict containing the QueryExecution description of the succeeded query
+
+        Raises:
+            AthenaQueryError: If the query fails, is cancelled or times out
+        """
+        deadline = time.monotonic() + self.timeout
+        delay = self.poll_initial
+
+        try:
+            while True:
+                response = await self._call("get_query_execution", QueryExecutionId=execution_id)
+                self.counters["polls"] += 1
+                execution = response["QueryExecution"]
+                status = execution["Status"]
+                state = status["State"]
+
+                if state == "SUCCEEDED":
+                    reuse = execution.get("Statistics", {}).get("ResultReuseInformation", {})
+                    if reuse.get("ReusedPreviousResult"):
+                        self.counters["reused_results"] += 1
+                        logger.info(f"Athena reused a previous result for {execution_id}")
+                    return execution
+                if state in ("FAILED", "CANCELLED"):
+                    logger.error(f"Query failed response: {status}")
+                    raise AthenaQueryError(
+                        status.get("StateChangeReason", f"Query {state.lower()} with an Unknown error"),
+                        status.get("AthenaError", "Query failed with an Unknown Athena error"),
+                        execution_id
+                    )
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    await self.cancel(execution_id)
+                    raise AthenaQueryError(
+                        f"Query timed out after {self.timeout:g} seconds and was cancelled",
+                        {"State": state},
+                        execution_id
+                    )
+                logger.debug(f"Query state: {state}, polling again in {delay:.2f} seconds")
+                await asyncio.sleep(min(delay, remaining))
+                delay = min(delay * self.poll_multiplier, self.poll_max)
+        except asyncio.CancelledError:
+            await asyncio.shield(self.cancel(execution_id))
+            raise
+
+    async def cancel(self, execution_id: str):
+        """
+        Stop a running query.
+
+        Args:
+            execution_id: Query execution ID
+        """
+        try:
+            await self._call("stop_query_execution", QueryExecutionId=execution_id)
+            self.counters["cancelled"] += 1
+            logger.info(f"Cancelled Athena query {execution_id}")
+        except Exception as e:
+            logger.warning(f"Failed to cancel Athena query {execution_id}: {e}")
+
+    async def stream(self, execution_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Read every result page of a succeeded query as column-oriented batches.
+
+        Each batch is a dict with ``columns``, ``values`` (one list per column)
+        and ``truncated``, which is set on the last batch when ``max_rows`` cut
+        the result short.
+
+        Args:
+            execution_id: Query execution ID
+
+        Yields:
+            Dict containing one page of results
+        """
+        rows_left = self.max_rows
+        next_token = None
+        columns: List[str] = []
+
+        while True:
+            request = {"QueryExecutionId": execution_id, "MaxResults": self.page_size}
+            if next_token:
+                request["NextToken"] = next_token
+            page = await self._call("get_query_results", **request)
+            self.counters["pages"] += 1
+
+            rows = page["ResultSet"]["Rows"]
+            if not columns:
+                columns = [col["Label"] for col in page["ResultSet"]["ResultSetMetadata"]["ColumnInfo"]]
+                # The first page of a SELECT starts with a header row
+                if rows and [value.get("VarCharValue") for value in rows[0]["Data"]] == columns:
+                    rows = rows[1:]
+
+            next_token = page.get("NextToken")
+            truncated = len(rows) > rows_left or (len(rows) == rows_left and next_token is not None)
+            rows = rows[:rows_left]
+            rows_left -= len(rows)
+
+            values = [[] for _ in columns]
+            for row in rows:
+                for column_values, value in zip(values, row["Data"]):
+                    # Handle null values
+                    column_values.append(value.get("VarCharValue"))
+
+            yield {"columns": columns, "values": values, "truncated": truncated}
+            if truncated or not next_token:
+                break
+
+    async def execute(self, query: str) -> Dict[str, Any]:
+        """
+        Run a query and collect its batches into a single columnar result.
+
+        Args:
+            query: SQL query string to execute
+
+        Returns:
+            Dict with ``columns``, ``data`` (column name -> values), ``row_count``,
+            ``truncated``, ``execution_id`` and ``cached``
+
+        Raises:
+            AthenaQueryError: If the query fails, is cancelled or times out
+        """
+        key = (self.database, normalize_sql(query)) if is_read_only(query) else None
+        cached = self._cache_get(key) if key is not None else None
+        if cached is not None:
+            self.counters["cache_hits"] += 1
+            logger.info(f"Serving Athena result for {cached['execution_id']} from the local cache")
+            return {**cached, "cached": True}
+
+        execution_id = await self.start(query)
+        logger.info(f"Query execution ID: {execution_id}")
+        await self.wait(execution_id)
+
+        columns: List[str] = []
+        values: List[List[Any]] = []
+        truncated = False
+        async for batch in self.stream(execution_id):
+            if not columns:
+                columns = batch["columns"]
+                values = [[] for _ in columns]
+            for column_values, batch_values in zip(values, batch["values"]):
+                column_values.extend(batch_values)
+            truncated = batch["truncated"]
+
+        result = {
+            "columns": columns,
+            "data": dict(zip(columns, values)),
+            "row_count": len(values[0]) if values else 0,
+            "truncated": truncated,
+            "execution_id": execution_id
+        }
+        if key is not None:
+            self._cache_put(key, result)
+        return {**result, "cached": False}
+
+    def _cache_get(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires, result = entry
+        if expires < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return result
+
+    def _cache_put(self, key: Tuple[str, str], result: Dict[str, Any]):
+        if self.cache_ttl <= 0 or self.cache_size <= 0:
+            return
+        self._cache[key] = (time.monotonic() + self.cache_ttl, result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def clear_cache(self):
+        """
+        Drop every locally cached result set.
+        """
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Execution counters and cache occupancy.
+        """
+        return {**self.counters, "cached_results": len(self._cache)}
+
+
+_executor: Optional[AthenaExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> AthenaExecutor:
+    """
+    Return the shared executor, creating it from the configuration on first use.
+
+    Returns:
+        AthenaExecutor: Executor shared by every Athena tool call
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                from config import get_config
+                config = get_config()
+                _executor = AthenaExecutor(
+                    database=config["athena_database"],
+                    output_location=config["athena_output_location"],
+                    region_name=config["aws_region"],
+                    workgroup=config["athena_workgroup"] or None,
+                    result_reuse_minutes=config["athena_result_reuse_minutes"],
+                    timeout=config["athena_query_timeout"],
+                    max_rows=config["athena_max_rows"],
+                    cache_ttl=config["athena_result_cache_ttl"]
+                )
+    return _executor
@@ -6,7 +6,9 @@ import boto3
 import logging
 import os
 import json
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any
+
+from src.tools.schema_catalog import KBSchemaCache, SchemaCatalog, get_catalog
 
 logger = logging.getLogger(__name__)
 
@@ -152,26 +154,39 @@ WEALTH_MANAGEMENT_SCHEMA = [
     }
 ]
 
+_kb_cache: Optional[KBSchemaCache] = None
+
 @tool
-def get_schema(flag: bool = False, table_name: str = None) -> str:
+def get_schema(flag: bool = False, table_name: str = None, question: str = None) -> str:
     """
     Retrieve schema information from a knowledge base.
     
     Uses AWS Knowledge Base to retrieve schema information.
-    Falls back to mock data if AWS connection fails.
+    Falls back to the local schema catalog if AWS connection fails.
     
     Args:
+        flag: If True, skip the knowledge base and use the local schema catalog.
         table_name: Optional name of a specific table to retrieve schema for.
                    If None, returns all tables in the knowledge base.
+        question: Optional natural language question. When given (and no
+                  table_name), only the tables relevant to it are returned.
     
     Returns:
         str: Schema information formatted for the LLM context.
     """
+    global _kb_cache
     try:
+        catalog = get_catalog(WEALTH_MANAGEMENT_SCHEMA)
+        
         # For testing purposes, check if we should use mock data
         if flag == True:
             logger.info("get_schema called with flag=True")
-            return _format_schema_from_data(WEALTH_MANAGEMENT_SCHEMA, table_name)
+            return catalog.render(table_name, question)
+        
+        # Relevant tables are picked from the local catalog index
+        if question and not table_name:
+            logger.info(f"get_schema selecting tables for question: {question}")
+            return catalog.render(question=question)
         
         # Get knowledge base ID from environment
         from config import get_config
@@ -179,12 +194,19 @@ def get_schema(flag: bool = False, table_name: str = None) -> str:
         knowledge_base_id = config['knowledge_base_id']
         
         if not knowledge_base_id or knowledge_base_id == "default-kb-id":
-            logger.warning("No knowledge base ID provided, using mock schema data")
-            return _format_schema_from_data(WEALTH_MANAGEMENT_SCHEMA, table_name)
+            logger.warning("No knowledge base ID provided, using local schema catalog")
+            return catalog.render(table_name)
+        
+        if _kb_cache is None:
+            _kb_cache = KBSchemaCache(ttl=config['schema_kb_cache_ttl'])
+        cached = _kb_cache.get(table_name)
+        if cached is not None:
+            logger.info("Using cached schema from knowledge base")
+            return cached
         
         # Create Bedrock client
         logger.debug(f"Connecting to knowledge base: {knowledge_base_id}")
-        bedrock_client = boto3.client('bedrock-agent-runtime', region_name=config['aws_region'])
+        bedrock_client = _bedrock_client(config['aws_region'])
         
         # Prepare the query
         query = f"Describe the schema for {table_name} table" if table_name else "Describe all tables and their schemas"
@@ -204,77 +226,40 @@ def get_schema(flag: bool = False, table_name: str = None) -> str:
         )
         
         # Process and format the response
-        schema_info = ""
-        for result in response.get('retrievalResults', []):
-            if 'content' in result and 'text' in result['content']:
-                schema_info += result['content']['text'] + "\n\n"
+        schema_info = "\n\n".join(
+            result['content']['text']
+            for result in response.get('retrievalResults', [])
+            if 'content' in result and 'text' in result['content']
+        )
 
         if not schema_info:
-            logger.warning("No schema information retrieved from knowledge base, using mock data")
-            return _format_schema_from_data(WEALTH_MANAGEMENT_SCHEMA, table_name)
+            logger.warning("No schema information retrieved from knowledge base, using local schema catalog")
+            return catalog.render(table_name)
         
+        schema_info += "\n\n"
+        _kb_cache.put(table_name, schema_info)
         logger.info("Successfully retrieved schema from knowledge base")
         return schema_info
         
     except Exception as e:
         logger.exception(f"Error retrieving schema from knowledge base: {e}")
-        # Fall back to the provided schema
-        return _format_schema_from_data(WEALTH_MANAGEMENT_SCHEMA, table_name)
+        # Fall back to the documented schema
+        return SchemaCatalog(WEALTH_MANAGEMENT_SCHEMA).render(table_name, question)
 
 
-def _format_schema_from_data(schema_data: List[Dict[str, Any]], table_name: str = None) -> str:
-    """
-    Format schema information from the provided data.
-    
-    Args:
-        schema_data: List of table schema definitions
-        table_name: Optional name of a specific table
-    
-    Returns:
-        str: Formatted schema information
-    """
-    if table_name:
-        # Filter for the specific table
-        table_info = next((table for table in schema_data if table["table_name"].lower() == table_name.lower()), None)
-        if not table_info:
-            return f"No schema information found for table: {table_name}"
-        
-        return _format_table_schema(table_info)
-    else:
-        # Return all tables
-        result = "Database: wealthmanagement-db\n\n"
-        for table in schema_data:
-            result += _format_table_schema(table) + "\n\n"
-        return result
+_bedrock_clients: Dict[str, Any] = {}
 
-
-def _format_table_schema(table_info: Dict[str, Any]) -> str:
+def _bedrock_client(region_name: str) -> Any:
     """
-    Format a single table's schema information.
+    Return a shared bedrock-agent-runtime client for a region.
     
     Args:
-        table_info: Dictionary containing table schema
+        region_name: AWS region
     
     Returns:
-        str: Formatted table schema
+        boto3 client for the Bedrock agent runtime
     """
-    result = f"Table: {table_info['table_name']}\n"
-    result += f"Description: {table_info['table_description']}\n"
-    result += "Columns:\n"
-    
-    for column in table_info["columns"]:
-        result += f"- {column['Name']} ({column['Type']}): {column['Comment']}\n"
-    
-    # Add relationship information
-    if "relationships" in table_info:
-        result += "Relationships:\n"
-        
-        if "primary_key" in table_info["relationships"]:
-            pk_cols = [pk["column_name"] for pk in table_info["relationships"]["primary_key"]]
-            result += f"- Primary Key: {', '.join(pk_cols)}\n"
-        
-        if "foreign_keys" in table_info["relationships"]:
-            for fk in table_info["relationships"]["foreign_keys"]:
-                result += f"- Foreign Key: {fk['join_on_column']} references {fk['table_name']}\n"
-    
-    return result
+    client = _bedrock_clients.get(region_name)
+    if client is None:
+        client = _bedrock_clients[region_name] = boto3.client('bedrock-agent-runtime', region_name=region_name)
+    return client
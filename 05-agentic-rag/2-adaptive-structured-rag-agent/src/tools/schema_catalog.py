@@ -0,0 +1,437 @@
+"""
+Precomputed schema catalog for the get_schema tool.
+
+The catalog introspects the SQLite database (or the Athena catalog) once,
+merges in the table and column descriptions of the documented schema, and
+renders every table and the whole database up front. A lexical index over
+table names, column names and comments picks the tables relevant to a
+question, so the agent can request a smaller schema than the full database.
+Knowledge base retrievals are kept in a small TTL cache keyed on table name.
+"""
+import re
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KB_CACHE_TTL = 600.0
+DEFAULT_DATABASE_NAME = "wealthmanagement-db"
+QUESTION_CACHE_SIZE = 256
+
+# Weight of a query term matching each part of a table's schema. Multi-word
+# column names such as client_id only count as much as a comment word, so a
+# foreign key column does not make every table look relevant.
+TABLE_NAME_WEIGHT = 3.0
+COLUMN_NAME_WEIGHT = 2.0
+COLUMN_PART_WEIGHT = 1.0
+COMMENT_WEIGHT = 1.0
+
+# Tables scoring below this fraction of the best table are left out
+RELEVANCE_CUTOFF = 0.5
+
+SQLITE_TYPES = {
+    "INTEGER": "integer",
+    "INT": "integer",
+    "REAL": "double",
+    "FLOAT": "double",
+    "DOUBLE": "double",
+    "NUMERIC": "double",
+    "TEXT": "string",
+    "VARCHAR": "string",
+    "DATE": "date",
+}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "by", "do", "does", "each", "for", "from", "have", "how", "in", "is",
+    "me", "of", "on", "or", "show", "that", "the", "their", "to", "we", "what", "which", "who",
+    "with", "all", "many", "much", "list", "give", "get", "find",
+}
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase index terms.
+
+    Identifiers are split on underscores, stopwords are dropped and a
+    trailing plural ``s`` is removed so "clients" matches "client".
+
+    Args:
+        text: Question, identifier or comment
+
+    Returns:
+        List[str]: Index terms
+    """
+    terms = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+
+def render_table(table_info: Dict[str, Any]) -> str:
+    """
+    Format a single table's schema information.
+
+    Args:
+        table_info: Dictionary containing table schema
+
+    Returns:
+        str: Formatted table schema
+    """
+    lines = [
+        f"Table: {table_info['table_name']}",
+        f"Description: {table_info.get('table_description', '')}",
+        "Columns:",
+    ]
+    lines.extend(
+        f"- {column['Name']} ({column['Type']}): {column.get('Comment', '')}"
+        for column in table_info["columns"]
+    )
+
+    # Add relationship information
+    relationships = table_info.get("relationships")
+    if relationships:
+        lines.append("Relationships:")
+        if "primary_key" in relationships:
+            pk_cols = [pk["column_name"] for pk in relationships["primary_key"]]
+            lines.append(f"- Primary Key: {', '.join(pk_cols)}")
+        for fk in relationships.get("foreign_keys", []):
+            lines.append(f"- Foreign Key: {fk['join_on_column']} references {fk['table_name']}")
+
+    return "\n".join(lines) + "\n"
+
+
+class SchemaCatalog:
+    """
+    Schema of one database with precomputed renderings and a lexical index.
+    """
+
+    def __init__(self, tables: List[Dict[str, Any]], database_name: str = DEFAULT_DATABASE_NAME):
+        """
+        Build the renderings and the index for a list of table definitions.
+
+        Args:
+            tables: Table schema definitions in the knowledge base format
+            database_name: Database name shown in the whole-database rendering
+        """
+        self.database_name = database_name
+        self.tables = {table["table_name"].lower(): table for table in tables}
+        self.renderings = {name: render_table(table) for name, table in self.tables.items()}
+        self.full_rendering = self._render(list(self.tables))
+        self._subset_renderings: Dict[Tuple[str, ...], str] = {}
+        # The agent tends to ask for the schema several times with the same question
+        self._question_renderings: "OrderedDict[str, str]" = OrderedDict()
+
+        # term -> {table: weight}
+        self.index: Dict[str, Dict[str, float]] = defaultdict(dict)
+        for name, table in self.tables.items():
+            self._index_text(name, table["table_name"], TABLE_NAME_WEIGHT)
+            self._index_text(name, table.get("table_description", ""), COMMENT_WEIGHT)
+            for column in table["columns"]:
+                parts = tokenize(column["Name"])
+                self._index_text(name, column["Name"], COLUMN_NAME_WEIGHT if len(parts) == 1 else COLUMN_PART_WEIGHT)
+                self._index_text(name, column.get("Comment", ""), COMMENT_WEIGHT)
+
+    def _index_text(self, table: str, text: str, weight: float):
+        for term in set(tokenize(text)):
+            postings = self.index[term]
+            postings[table] = max(postings.get(table, 0.0), weight)
+
+    def _render_subset(self, names: List[str]) -> str:
+        # Questions map onto a small number of distinct table sets, so render each once
+        key = tuple(names)
+        rendering = self._subset_renderings.get(key)
+        if rendering is None:
+            rendering = self._subset_renderings[key] = self._render(names)
+        return rendering
+
+    def _render(self, names: List[str]) -> str:
+        result = f"Database: {self.database_name}\n\n"
+        for name in names:
+            result += self.renderings[name] + "\n\n"
+        return result
+
+    def table(self, table_name: str) -> Optional[str]:
+        """
+        Precomputed rendering of one table.
+
+        Args:
+            table_name: Table name, case-insensitive
+
+        Returns:
+            Optional[str]: Rendered schema, or None if the table is unknown
+        """
+        return self.renderings.get(table_name.lower())
+
+    def relevant_tables(self, question: str, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Rank tables by how well their schema matches the question's terms.
+
+        Args:
+            question: Natural language question
+            limit: Optional maximum number of tables
+
+        Returns:
+            List of (table_name, score) within RELEVANCE_CUTOFF of the best score, best first
+        """
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(tokenize(question)):
+            for table, weight in self.index.get(term, {}).items():
+                scores[table] += weight
+        if not scores:
+            return []
+        cutoff = max(scores.values()) * RELEVANCE_CUTOFF
+        ranked = sorted(
+            ((table, score) for table, score in scores.items() if score >= cutoff),
+            key=lambda item: (-item[1], item[0])
+        )
+        return ranked[:limit] if limit else ranked
+
+    def render(self, table_name: Optional[str] = None, question: Optional[str] = None) -> str:
+        """
+        Schema text for one table, the tables relevant to a question, or the whole database.
+
+        Args:
+            table_name: Optional name of a specific table
+            question: Optional question used to select relevant tables
+
+        Returns:
+            str: Formatted schema information
+        """
+        if table_name:
+            rendering = self.table(table_name)
+            if rendering is None:
+                return f"No schema information found for table: {table_name}"
+            return rendering
+        if question:
+            rendering = self._question_renderings.get(question)
+            if rendering is None:
+                rendering = self._render_question(question)
+                self._question_renderings[question] = rendering
+                if len(self._question_renderings) > QUESTION_CACHE_SIZE:
+                    self._question_renderings.popitem(last=False)
+            return rendering
+        return self.full_rendering
+
+    def _render_question(self, question: str) -> str:
+        ranked = self.relevant_tables(question)
+        if not ranked:
+            return self.full_rendering
+        names = [name for name, _ in ranked]
+        # Keep join targets of the selected tables so the agent can write the joins
+        for name in list(names):
+            for fk in self.tables[name].get("relationships", {}).get("foreign_keys", []):
+                target = fk["table_name"].lower()
+                if target in self.tables and target not in names:
+                    names.append(target)
+        if len(names) == len(self.tables):
+            return self.full_rendering
+        return self._render_subset(names)
+
+    @classmethod
+    def from_sqlite(cls, database_path: str, descriptions: List[Dict[str, Any]],
+                    database_name: str = DEFAULT_DATABASE_NAME) -> "SchemaCatalog":
+        """
+        Introspect a SQLite database, taking descriptions from the documented schema.
+
+        Args:
+            database_path: Path to the SQLite database file
+            descriptions: Documented table definitions supplying descriptions and comments
+            database_name: Database name shown in renderings
+
+        Returns:
+            SchemaCatalog: Catalog of every table in the database
+        """
+        if not Path(database_path).exists():
+            raise FileNotFoundError(f"Database file not found: {database_path}")
+
+        documented = {table["table_name"].lower(): table for table in descriptions}
+        uri = f"{Path(database_path).resolve().as_uri()}?mode=ro"
+        tables = []
+        with sqlite3.connect(uri, uri=True) as conn:
+            names = [row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY rowid"
+            )]
+            for name in names:
+                doc = documented.get(name.lower(), {})
+                doc_columns = {column["Name"].lower(): column for column in doc.get("columns", [])}
+                columns = []
+                primary_key = []
+                for _, column_name, column_type, not_null, _, pk in conn.execute(f'PRAGMA table_info("{name}")'):
+                    doc_column = doc_columns.get(column_name.lower(), {})
+                    columns.append({
+                        "Name": column_name,
+                        "Type": doc_column.get("Type") or SQLITE_TYPES.get(column_type.split("(")[0].upper(), column_type.lower()),
+                        "Comment": doc_column.get("Comment", ""),
+                    })
+                    if pk:
+                        primary_key.append((pk, {"column_name": column_name, "constraint": "not null"}))
+
+                relationships: Dict[str, Any] = {}
+                if primary_key:
+                    relationships["primary_key"] = [entry for _, entry in sorted(primary_key, key=lambda item: item[0])]
+                foreign_keys = [
+                    {"database_name": database_name, "table_name": row[2], "join_on_column": row[3]}
+                    for row in conn.execute(f'PRAGMA foreign_key_list("{name}")')
+                ]
+                if foreign_keys:
+                    relationships["foreign_keys"] = foreign_keys
+
+                tables.append({
+                    "database_name": database_name,
+                    "table_name": name,
+                    "table_description": doc.get("table_description", ""),
+                    "relationships": relationships,
+                    "columns": columns,
+                })
+
+        logger.info(f"Introspected {len(tables)} tables from SQLite database {database_path}")
+        return cls(tables, database_name)
+
+    @classmethod
+    def from_athena(cls, client: Any, database: str, descriptions: List[Dict[str, Any]],
+                    catalog_name: str = "AwsDataCatalog") -> "SchemaCatalog":
+        """
+        Read table metadata from the Athena data catalog.
+
+        Args:
+            client: Athena client
+            database: Athena / Glue database name
+            descriptions: Documented table definitions supplying relationships and missing comments
+            catalog_name: Athena data catalog name
+
+        Returns:
+            SchemaCatalog: Catalog of every table in the database
+        """
+        documented = {table["table_name"].lower(): table for table in descriptions}
+        tables = []
+        request = {"CatalogName": catalog_name, "DatabaseName": database}
+        while True:
+            response = client.list_table_metadata(**request)
+            for metadata in response.get("TableMetadataList", []):
+                doc = documented.get(metadata["Name"].lower(), {})
+                doc_columns = {column["Name"].lower(): column for column in doc.get("columns", [])}
+                columns = [
+                    {
+                        "Name": column["Name"],
+                        "Type": column.get("Type", ""),
+                        "Comment": column.get("Comment") or doc_columns.get(column["Name"].lower(), {}).get("Comment", ""),
+                    }
+                    for column in metadata.get("Columns", []) + metadata.get("PartitionKeys", [])
+                ]
+                tables.append({
+                    "database_name": database,
+                    "table_name": metadata["Name"],
+                    "table_description": metadata.get("Parameters", {}).get("comment") or doc.get("table_description", ""),
+                    "relationships": doc.get("relationships", {}),
+                    "columns": columns,
+                })
+            if not response.get("NextToken"):
+                break
+            request["NextToken"] = response["NextToken"]
+
+        logger.info(f"Read {len(tables)} tables from Athena database {database}")
+        return cls(tables, database)
+
+
+class KBSchemaCache:
+    """
+    TTL cache of knowledge base schema retrievals keyed on table name.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_KB_CACHE_TTL):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(table_name: Optional[str]) -> str:
+        return table_name.lower() if table_name else "*"
+
+    def get(self, table_name: Optional[str]) -> Optional[str]:
+        """
+        Cached retrieval for a table (None for all tables), if still fresh.
+        """
+        key = self._key(table_name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def put(self, table_name: Optional[str], schema_info: str):
+        """
+        Store a retrieval for a table (None for all tables).
+        """
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[self._key(table_name)] = (time.monotonic() + self.ttl, schema_info)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_catalog: Optional[SchemaCatalog] = None
+_catalog_source = "sqllite"
+_catalog_lock = threading.Lock()
+
+
+def set_catalog_source(source: str):
+    """
+    Select where the catalog is introspected from ("sqllite" or "athena").
+
+    Args:
+        source: Query engine the agent was created for
+    """
+    global _catalog, _catalog_source
+    with _catalog_lock:
+        if source != _catalog_source:
+            _catalog_source = source
+            _catalog = None
+
+
+def get_catalog(descriptions: List[Dict[str, Any]]) -> SchemaCatalog:
+    """
+    Return the shared catalog, introspecting the selected source on first use.
+
+    Falls back to the documented schema when introspection fails.
+
+    Args:
+        descriptions: Documented table definitions
+
+    Returns:
+        SchemaCatalog: Catalog shared by every get_schema call
+    """
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                from config import get_config
+                config = get_config()
+                try:
+                    if _catalog_source == "athena":
+                        from src.tools.athena_executor import get_executor
+                        _catalog = SchemaCatalog.from_athena(
+                            get_executor().client, config["athena_database"], descriptions
+                        )
+                    else:
+                        _catalog = SchemaCatalog.from_sqlite(config["sqlite_database_path"], descriptions)
+                except Exception as e:
+                    logger.warning(f"Schema introspection failed, using documented schema: {e}")
+                    _catalog = SchemaCatalog(descriptions)
+    return _catalog
@@ -0,0 +1,229 @@
+"""
+Read-only SQLite query engine shared by the SQLite tool.
+
+Each worker thread keeps its own read-only connection (opened once with
+``mode=ro``, ``PRAGMA query_only`` and memory-mapped I/O), so tool calls do not
+pay for opening the database file. Prepared statements are reused through the
+per-connection statement cache, and results are streamed in column-oriented
+batches that stop at the configured row and byte limits.
+"""
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ROWS = 1000
+DEFAULT_MAX_BYTES = 1024 * 1024
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024
+DEFAULT_CACHED_STATEMENTS = 256
+
+
+def _value_size(value: Any) -> int:
+    """
+    Approximate the serialized size of a single column value.
+
+    Args:
+        value: Value returned by SQLite
+
+    Returns:
+        int: Size in bytes used for the byte limit
+    """
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return 8
+
+
+class SQLiteQueryEngine:
+    """
+    Pool of per-thread read-only connections to one SQLite database.
+    """
+
+    def __init__(
+        self,
+        database_path: str,
+        max_rows: int = DEFAULT_MAX_ROWS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        mmap_size: int = DEFAULT_MMAP_SIZE,
+        cached_statements: int = DEFAULT_CACHED_STATEMENTS
+    ):
+        """
+        Create an engine for an existing database file.
+
+        Args:
+            database_path: Path to the SQLite database file
+            max_rows: Maximum number of rows returned per query
+            max_bytes: Maximum approximate result size per query
+            batch_size: Number of rows fetched per batch
+            mmap_size: Bytes of the database file to memory-map
+            cached_statements: Prepared statements kept per connection
+
+        Raises:
+            FileNotFoundError: If the database file does not exist
+        """
+        db_path = Path(database_path)
+        if not db_path.exists():
+            raise FileNotFoundError(f"Database file not found: {database_path}")
+
+        self.database_path = database_path
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self._uri = f"{db_path.resolve().as_uri()}?mode=ro"
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Return the calling thread's connection, opening it on first use.
+
+        Returns:
+            sqlite3.Connection: Read-only connection owned by this thread
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self._uri,
+                uri=True,
+                check_same_thread=False,
+                cached_statements=self.cached_statements
+            )
+            conn.execute("PRAGMA query_only = ON")
+            conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+            logger.debug(f"Opened read-only SQLite connection to {self.database_path}")
+        return conn
+
+    def stream(self, query: str, parameters: tuple = ()) -> Iterator[Dict[str, Any]]:
+        """
+        Execute a query and yield its results as column-oriented batches.
+
+        Each batch is a dict with ``columns`` (column names) and ``values``
+        (one list per column). The final batch has ``truncated`` set when the
+        row or byte limit cut the result short.
+
+        Args:
+            query: SQL query string to execute
+            parameters: Optional query parameters
+
+        Yields:
+            Dict containing one batch of results
+        """
+        cursor = self._connection().execute(query, parameters)
+        try:
+            columns = [description[0] for description in cursor.description] if cursor.description else []
+            rows_left = self.max_rows
+            bytes_left = self.max_bytes
+
+            while columns:
+                rows = cursor.fetchmany(min(self.batch_size, rows_left + 1))
+                if not rows:
+                    break
+
+                # Keep whole rows only, stopping at whichever limit is hit first
+                truncated = False
+                kept = 0
+                for row in rows:
+                    if kept == rows_left:
+                        truncated = True
+                        break
+                    row_bytes = sum(_value_size(value) for value in row)
+                    if row_bytes > bytes_left:
+                        truncated = True
+                        break
+                    bytes_left -= row_bytes
+                    kept += 1
+                rows_left -= kept
+
+                values = [list(column) for column in zip(*rows[:kept])] if kept else [[] for _ in columns]
+                yield {"columns": columns, "values": values, "truncated": truncated}
+                if truncated:
+                    break
+        finally:
+            cursor.close()
+
+    def execute(self, query: str, parameters: tuple = ()) -> Dict[str, Any]:
+        """
+        Execute a query and merge its batches into a single columnar result.
+
+        Args:
+            query: SQL query string to execute
+            parameters: Optional query parameters
+
+        Returns:
+            Dict with ``columns``, ``data`` (column name -> values),
+            ``row_count`` and ``truncated``
+        """
+        columns: List[str] = []
+        values: List[List[Any]] = []
+        truncated = False
+
+        for batch in self.stream(query, parameters):
+            if not columns:
+                columns = batch["columns"]
+                values = [[] for _ in columns]
+            for column_values, batch_values in zip(values, batch["values"]):
+                column_values.extend(batch_values)
+            truncated = batch["truncated"]
+
+        return {
+            "columns": columns,
+            "data": dict(zip(columns, values)),
+            "row_count": len(values[0]) if values else 0,
+            "truncated": truncated
+        }
+
+    def close(self):
+        """
+        Close every connection opened by the engine.
+        """
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Error closing SQLite connection: {e}")
+        self._local = threading.local()
+
+
+_engines: Dict[Optional[str], SQLiteQueryEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(database_path: Optional[str] = None) -> SQLiteQueryEngine:
+    """
+    Return the shared engine for a database, creating it on first use.
+
+    Configuration is only read when the engine is created, so steady-state
+    tool calls go straight to a pooled connection.
+
+    Args:
+        database_path: Path to the SQLite database; defaults to the configured path
+
+    Returns:
+        SQLiteQueryEngine: Engine shared by every tool call for that database
+    """
+    engine = _engines.get(database_path)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(database_path)
+            if engine is None:
+                from config import get_config
+                config = get_config()
+                engine = SQLiteQueryEngine(
+                    database_path or config["sqlite_database_path"],
+                    max_rows=config["sqlite_max_rows"],
+                    max_bytes=config["sqlite_max_bytes"]
+                )
+                _engines[database_path] = engine
+    return engine
@@ -4,18 +4,19 @@ SQLite Query Tool for executing SQL queries against local SQLite database.
 from strands import tool
 import sqlite3
 import logging
-import os
-from typing import Dict, Any, Optional
-from pathlib import Path
+from typing import Dict, Any
+
+from src.tools.sqlite_engine import get_engine
 
 logger = logging.getLogger(__name__)
 
 @tool
 def run_sqlite_query(query: str) -> Dict[str, Any]:
     """
-    Execute a SQL query on SQLite database.
+    Execute a read-only SQL query on SQLite database.
     
-    Uses sqlite3 to execute the query on local SQLite database and returns the results.
+    Runs the query on a pooled, read-only connection to the local SQLite
+    database and returns the results in column-oriented form.
     
     Args:
         query: SQL query string to execute
@@ -24,73 +25,32 @@ def run_sqlite_query(query: str) -> Dict[str, Any]:
         Dict containing either query results or error information
     """
     try:
-        # Get database path from config
-        from config import get_config
-        config = get_config()
-        
-        database_path = config.get('sqlite_database_path', './data/wealthmanagement.db')
-        
-        # Validate database exists
-        db_path = Path(database_path)
-        if not db_path.exists():
-            logger.error(f"SQLite database not found at {database_path}")
-            return {
-                "success": False,
-                "error": f"Database file not found: {database_path}",
-                "query": query
-            }
+        engine = get_engine()
         
         # Execute query
         logger.info(f"Executing SQLite query: {query}")
+        result = engine.execute(query)
+        
+        if result["truncated"]:
+            logger.warning(f"Query result truncated at {result['row_count']} rows")
+        logger.info(f"Query succeeded! Returned {result['row_count']} rows")
         
-        with sqlite3.connect(database_path) as conn:
-            # Enable row factory for dictionary-like access
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            # Execute the query
-            cursor.execute(query)
-            
-            # Handle different query types
-            query_upper = query.strip().upper()
-            if query_upper.startswith(('SELECT', 'WITH')):
-                # For SELECT queries, fetch results
-                rows = cursor.fetchall()
-                
-                # Get column names
-                columns = [description[0] for description in cursor.description] if cursor.description else []
-                
-                # Convert rows to list of dictionaries
-                data = []
-                for row in rows:
-                    item = {}
-                    for column in columns:
-                        value = row[column]
-                        # Handle None values consistently with Athena tool
-                        item[column] = value if value is not None else None
-                    data.append(item)
-                
-                logger.info(f"Query succeeded! Returned {len(data)} rows")
-                
-                return {
-                    "success": True,
-                    "data": data,
-                    "query": query
-                }
-            else:
-                # For INSERT, UPDATE, DELETE queries
-                affected_rows = cursor.rowcount
-                conn.commit()
-                
-                logger.info(f"Query succeeded! {affected_rows} rows affected")
-                
-                return {
-                    "success": True,
-                    "data": [],
-                    "affected_rows": affected_rows,
-                    "message": f"Query executed successfully. {affected_rows} rows affected.",
-                    "query": query
-                }
+        return {
+            "success": True,
+            "columns": result["columns"],
+            "data": result["data"],
+            "row_count": result["row_count"],
+            "truncated": result["truncated"],
+            "query": query
+        }
+    
+    except FileNotFoundError as e:
+        logger.error(f"SQLite database not found: {e}")
+        return {
+            "success": False,
+            "error": str(e),
+            "query": query
+        }
     
     except sqlite3.Error as e:
         # Handle SQLite-specific errors
@@ -140,5 +100,7 @@ def _format_sqlite_error(error_message: str) -> str:
         return f"Unique constraint violation: {error_message}"
     elif 'not null constraint failed' in error_lower:
         return f"NOT NULL constraint violation: {error_message}"
+    elif 'readonly database' in error_lower:
+        return f"Database is read-only, only SELECT queries are allowed: {error_message}"
     else:
         return error_message
\ No newline at end of file
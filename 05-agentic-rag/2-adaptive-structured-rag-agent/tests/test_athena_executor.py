@@ -0,0 +1,78 @@
+"""
+Tests for the Athena executor's local result cache.
+"""
+
+import asyncio
+import itertools
+import unittest
+
+from src.tools.athena_executor import AthenaExecutor, is_read_only
+
+
+class StubAthenaClient:
+    """Athena client stand-in whose queries succeed at once with a one-row result."""
+
+    def __init__(self):
+        self.started = []
+        self._ids = itertools.count()
+
+    def start_query_execution(self, QueryString, **kwargs):
+        self.started.append((QueryString, kwargs))
+        return {"QueryExecutionId": f"q-{next(self._ids)}"}
+
+    def get_query_execution(self, QueryExecutionId):
+        return {"QueryExecution": {"QueryExecutionId": QueryExecutionId, "Status": {"State": "SUCCEEDED"}}}
+
+    def get_query_results(self, QueryExecutionId, MaxResults=1000, NextToken=None):
+        return {
+            "ResultSet": {
+                "Rows": [{"Data": [{"VarCharValue": "n"}]}, {"Data": [{"VarCharValue": "1"}]}],
+                "ResultSetMetadata": {"ColumnInfo": [{"Label": "n"}]},
+            }
+        }
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.client = StubAthenaClient()
+        self.executor = AthenaExecutor("db", "s3://results/", client=self.client, poll_initial=0)
+
+    def run_twice(self, query):
+        first = asyncio.run(self.executor.execute(query))
+        second = asyncio.run(self.executor.execute(query))
+        return first, second
+
+    def test_repeated_select_is_served_from_cache(self):
+        first, second = self.run_twice("SELECT count(*) AS n FROM clients;")
+        self.assertFalse(first["cached"])
+        self.assertTrue(second["cached"])
+        self.assertEqual(len(self.client.started), 1)
+        self.assertIn("ResultReuseConfiguration", self.client.started[0][1])
+
+    def test_statements_that_write_always_run(self):
+        for query in (
+            "INSERT INTO clients SELECT * FROM staging",
+            "CREATE TABLE top_clients AS SELECT * FROM clients",
+            "DROP TABLE IF EXISTS top_clients",
+            "UNLOAD (SELECT * FROM clients) TO 's3://bucket/out/' WITH (format = 'PARQUET')",
+        ):
+            with self.subTest(query=query):
+                self.client.started.clear()
+                first, second = self.run_twice(query)
+                self.assertFalse(first["cached"])
+                self.assertFalse(second["cached"])
+                self.assertEqual(len(self.client.started), 2)
+                self.assertNotIn("ResultReuseConfiguration", self.client.started[0][1])
+        self.assertEqual(self.executor.stats()["cached_results"], 0)
+
+    def test_is_read_only(self):
+        for query in ("select 1", "WITH t AS (SELECT 1) SELECT * FROM t", "(SELECT 1)",
+                      "-- top clients\nSHOW TABLES", "/* schema */ DESCRIBE clients"):
+            self.assertTrue(is_read_only(query), query)
+        for query in ("INSERT INTO t VALUES (1)", "CREATE TABLE t AS SELECT 1", "MSCK REPAIR TABLE t",
+                      "-- select\nDELETE FROM t", "selected_clients"):
+            self.assertFalse(is_read_only(query), query)
+
+
+if __name__ == "__main__":
+    unittest.main()